@@ -3,8 +3,8 @@ from code.TrendDistinguish.TrendDistinguishRunModel import TrendDistinguishModel
 from code.MySql.sql_utils import Stocks
 from code.MySql.LoadMysql import LoadBasicInform
 from code.MySql.DataBaseStockPool import TableStockPoolCount, TableStockBoard
-import multiprocessing
 from code.Evaluation.CountPool import count_board_by_date
+from code.utils.TaskScheduler import TaskScheduler
 
 
 def distinguish_board(code_, date_, id_=None, freq='120m'):
@@ -31,29 +31,6 @@ def distinguish_board(code_, date_, id_=None, freq='120m'):
     TableStockBoard.set_table_to_board(sql, params)
 
 
-def board_evaluate(day_, _num, num_, data):
-    """
-    all boards code_data evaluate ,  loop;
-    """
-
-    count = 0
-
-    for index in range(_num, num_):
-
-        stock_ = data.loc[index, 'code']
-        id_ = data.loc[index, 'id']
-
-        print(f'当前进度，剩余{num_ - _num - count}；')
-
-        try:
-            distinguish_board(code_=stock_, id_=id_, date_=day_)
-
-        except Exception as ex:
-            print(f'Error: {ex}')
-
-        count += 1
-
-
 def multiprocessing_count_board(date_):
     """
     multi processing function ;
@@ -70,20 +47,11 @@ def multiprocessing_count_board(date_):
 
     print(f'处理板块日期: {date_}, 处理个数：{shape_}')
 
-    l1 = shape_ // 3
-    l2 = shape_ // 3 * 2
-
-    p1 = multiprocessing.Process(target=board_evaluate, args=(date_, 0, l1, board_data))
-    p2 = multiprocessing.Process(target=board_evaluate, args=(date_, l1, l2, board_data))
-    p3 = multiprocessing.Process(target=board_evaluate, args=(date_, l2, shape_, board_data))
-
-    p1.start()
-    p2.start()
-    p3.start()
+    # 每个板块一个任务, 空闲进程领取下一个
+    tasks = [(code_, date_, id_) for code_, id_ in zip(board_data['code'], board_data['id'])]
 
-    p1.join()
-    p2.join()
-    p3.join()
+    scheduler = TaskScheduler()
+    scheduler.run(distinguish_board, tasks, name=f'板块趋势 {date_}')
 
 
 if __name__ == '__main__':
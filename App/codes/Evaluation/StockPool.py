@@ -10,6 +10,7 @@ from App.code.parsers.BollingerParser import *
 from matplotlib import pyplot as plt
 from App.code.RnnModel.RnnRunModel import PredictionCommon
 from App.code.TrendDistinguish.TrendDistinguishRunModel import TrendDistinguishModel
+from App.code.TrendDistinguish.Distinguish_utils import calculate_distinguish_panel
 
 from sqlalchemy.exc import IntegrityError
 
@@ -67,11 +68,11 @@ class ScoreStockPool(TrendDistinguishModel):
         self.dataB, self.scoreB = None, None
         self.dataF, self.scoreF = None, None
 
-    def board_trends(self, code: str):
+    def board_trends(self, code: str, data=None):
 
         try:
-            # 获取趋势 df数据  和 得分
-            data, score = self.distinguish_1m(stock_code=code, freq='120m', returnFreq=True, date_=None)
+            # 获取趋势 df数据  和 得分; data 为 analysis_Industry 批量算好的 MACD / 布林带数据
+            data, score = self.distinguish_1m(stock_code=code, freq='120m', returnFreq=True, date_=None, data=data)
 
             data['close'] = My_mfl.data2normalization(data['close'])
 
@@ -160,13 +161,17 @@ class ScoreStockPool(TrendDistinguishModel):
         poolB = TableStockBoard.load_board()
         print(poolB)
         # exit()
+
+        # 全部板块的 120m MACD / 布林带一次算完
+        boards = calculate_distinguish_panel(list(poolB['code']), '120m', None)
+
         for index, row in poolB.iterrows():
 
             self.codeB = row['code']
             self.nameB = row['name']
             board_id = row['id']
 
-            self.dataB, self.scoreB = self.board_trends(self.codeB)
+            self.dataB, self.scoreB = self.board_trends(self.codeB, boards[self.codeB])
             self.dataF, self.scoreF = self.funds_trends(self.codeB)
 
             # 更新股票池  板块数据
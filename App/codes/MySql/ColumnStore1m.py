@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+1分钟数据本地列式存储
+
+按 年份/股票代码 分区保存为 Parquet 文件:
+
+    <root>/<year>/<code>.parquet
+
+读取时把日期范围和列裁剪下推到 pyarrow (按行组统计跳过无关数据)，文件以内存映射方式打开，
+避免为了最后几周数据把整年 1m 数据从 MySQL 全量拉取。
+写入与 StockData1m.append_1m / replace_1m 保持一致: append 按 date 去重合并, replace 整体覆盖。
+"""
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+except ImportError:  # pyarrow 为可选依赖，缺失时 StockData1m 回退到 MySQL
+    pa = None
+    pq = None
+
+
+class ColumnStore1m:
+    """
+    root: 存储根目录;
+    row_group_size: Parquet 行组大小, 约等于一个月的 1m 数据, 日期过滤按行组跳过;
+    """
+
+    date_column = 'date'
+
+    def __init__(self, root: str, row_group_size: int = 6000):
+        self.root = str(root)
+        self.row_group_size = row_group_size
+
+    @classmethod
+    def available(cls) -> bool:
+        return pq is not None
+
+    def partition_path(self, code_: str, year_) -> str:
+        return os.path.join(self.root, str(int(year_)), f'{code_.lower()}.parquet')
+
+    def has_partition(self, code_: str, year_) -> bool:
+        return self.available() and os.path.exists(self.partition_path(code_, year_))
+
+    def years(self, code_: str) -> list:
+        """ 返回某只股票在本地存储中已有的年份列表(升序) """
+        if not os.path.isdir(self.root):
+            return []
+
+        file_name = f'{code_.lower()}.parquet'
+        years = [int(y) for y in os.listdir(self.root)
+                 if y.isdigit() and os.path.exists(os.path.join(self.root, y, file_name))]
+        return sorted(years)
+
+    def read(self, code_: str, year_, start_date=None, end_date=None, columns=None) -> pd.DataFrame:
+        """
+        读取单个年份分区。
+
+        参数:
+            start_date / end_date: 闭区间日期过滤, 下推到 Parquet 行组;
+            columns: 需要的列, date 列总是返回;
+        """
+        path = self.partition_path(code_, year_)
+
+        if columns is not None:
+            columns = [self.date_column] + [c for c in columns if c != self.date_column]
+
+        filters = []
+        if start_date is not None:
+            filters.append((self.date_column, '>=', pd.Timestamp(start_date).to_pydatetime()))
+
+        if end_date is not None:
+            filters.append((self.date_column, '<=', pd.Timestamp(end_date).to_pydatetime()))
+
+        table = pq.read_table(path, columns=columns, filters=filters or None, memory_map=True)
+        return table.to_pandas()
+
+    def load(self, code_: str, start_year: int, end_year: int,
+             start_date=None, end_date=None, columns=None) -> pd.DataFrame:
+        """ 读取 [start_year, end_year] 之间所有存在的年份分区并拼接 """
+        frames = [self.read(code_, year, start_date, end_date, columns)
+                  for year in range(int(start_year), int(end_year) + 1)
+                  if self.has_partition(code_, year)]
+
+        if not frames:
+            return pd.DataFrame()
+
+        return pd.concat(frames, ignore_index=True)
+
+    def append(self, code_: str, year_, data: pd.DataFrame):
+        """ 追加数据, 与已有分区按 date 去重 (新数据优先) 并排序 """
+        path = self.partition_path(code_, year_)
+
+        if os.path.exists(path):
+            data = pd.concat([pq.read_table(path, memory_map=True).to_pandas(), data], ignore_index=True)
+
+        self._write(path, data)
+
+    def replace(self, code_: str, year_, data: pd.DataFrame):
+        self._write(self.partition_path(code_, year_), data)
+
+    def _write(self, path: str, data: pd.DataFrame):
+        data = data.copy()
+        data[self.date_column] = pd.to_datetime(data[self.date_column])
+        data = data.drop_duplicates(subset=[self.date_column], keep='last')
+        data = data.sort_values(by=self.date_column).reset_index(drop=True)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 先写临时文件再原子替换，读进程不会看到写了一半的分区
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
@@ -1,7 +1,10 @@
+import os
+import time
+import threading
 import pymysql
 from sqlalchemy.orm import sessionmaker
 import pandas as pd
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, Float, DateTime, text
+from sqlalchemy import create_engine, event, MetaData, Table, Column, Integer, Float, DateTime, text
 from sqlalchemy import inspect
 from config import Config
 
@@ -9,16 +12,116 @@ pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 5000)
 
 
-def sql_cursor(database: str):
+class EngineRegistry:
+    """
+    进程内共享的数据库引擎注册表: 每个逻辑数据库只保留一个带连接池的 SQLAlchemy engine。
+
+    - 连接池开启 pre-ping, 大小由 Config.DB_POOL_CONFIG 控制;
+    - fork 出的子进程 (multiprocessing.Process) 不复用父进程的连接, 首次使用时自动重建;
+    - pool_status() 导出每个库的连接池统计, 用于监控。
+
+    url_factory: database -> 连接 URL, 测试时可替换为 SQLite。
+    """
+
+    def __init__(self, url_factory=None):
+        self.url_factory = url_factory or database_url
+        self._engines = {}
+        self._stats = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def engine(self, database: str):
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+        engine = self._engines.get(database)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            if database not in self._engines:
+                self._engines[database] = self._create_engine(database)
+
+            return self._engines[database]
+
+    def _create_engine(self, database: str):
+        url = self.url_factory(database)
+        kwargs = {'pool_pre_ping': True}
+
+        if not url.startswith('sqlite'):
+            kwargs.update(Config.DB_POOL_CONFIG)
+            kwargs['connect_args'] = {'autocommit': True}
+
+        engine = create_engine(url, **kwargs)
+
+        stats = {'connects': 0, 'checkouts': 0, 'created': time.time()}
+        self._stats[database] = stats
+
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            stats['connects'] += 1
+
+        @event.listens_for(engine, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            stats['checkouts'] += 1
+
+        return engine
+
+    def reset_after_fork(self):
+        """ 子进程中丢弃继承来的连接池 (不关闭父进程仍在使用的 socket) """
+        for engine in self._engines.values():
+            engine.dispose(close=False)
+
+        self._engines = {}
+        self._stats = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def dispose(self):
+        for engine in self._engines.values():
+            engine.dispose()
+
+        self._engines = {}
+        self._stats = {}
+
+    def pool_status(self) -> dict:
+        status = {}
+
+        for database, engine in self._engines.items():
+            pool = engine.pool
+            stats = self._stats.get(database, {})
+            status[database] = {
+                'pool': type(pool).__name__,
+                'size': pool.size() if hasattr(pool, 'size') else None,
+                'checked_in': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+                'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+                'overflow': pool.overflow() if hasattr(pool, 'overflow') else None,
+                'connects': stats.get('connects', 0),
+                'checkouts': stats.get('checkouts', 0),
+            }
+
+        return status
+
+
+def database_url(database: str):
     w = Config.get_sql_password()
-    connection = pymysql.connect(
-        host=Config.DB_CONFIG['host'],
-        user=Config.DB_CONFIG['user'],
-        password=w,
-        database=database,
-        charset=Config.DB_CONFIG['charset'],
-        autocommit=True
-    )
+    conn = f"mysql+pymysql://{Config.DB_CONFIG['user']}:{w}@{Config.DB_CONFIG['host']}:3306/{database}?charset={Config.DB_CONFIG['charset']}"
+    return conn
+
+
+registry = EngineRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.reset_after_fork)
+
+
+def pool_status() -> dict:
+    return registry.pool_status()
+
+
+def sql_cursor(database: str):
+    """ 从连接池取出一个 DBAPI 连接; connection.close() 会把连接归还连接池 """
+    connection = registry.engine(database).raw_connection()
     cursor = connection.cursor()
     return connection, cursor
 
@@ -40,14 +143,20 @@ def execute_sql(database: str, sql: str, params: tuple = None):
     try:
         connection, cursor = sql_cursor(database)
 
-        with connection, cursor:
+        try:
             if params is None:
                 cursor.execute(sql)
 
             else:
                 cursor.execute(sql, params)
 
-            return cursor.fetchall()
+            result = cursor.fetchall()
+            connection.commit()
+            return result
+
+        finally:
+            cursor.close()
+            connection.close()
 
     except Exception as e:
         print(f"Error updating record: {e}")
@@ -71,25 +180,27 @@ def execute_sql_return_value(database: str, sql: str, params: tuple):
     """
 
     connection, cursor = sql_cursor(database)
-    data = cursor.execute(sql, params)
-    return data
+    try:
+        data = cursor.execute(sql, params)
+        connection.commit()
+        return data
+
+    finally:
+        cursor.close()
+        connection.close()
 
 
 def pandas_conn(database: str):
-    w = Config.get_sql_password()
-    conn = f"mysql+pymysql://{Config.DB_CONFIG['user']}:{w}@{Config.DB_CONFIG['host']}:3306/{database}?charset={Config.DB_CONFIG['charset']}"
-    return conn
+    """ 返回注册表中该库共享的 engine, 可直接作为 pandas read_sql / to_sql 的 con 参数 """
+    return registry.engine(database)
 
 
 def my_engine(database: str):
-    conn = pandas_conn(database)
-    engine = create_engine(conn)
-    return engine
+    return registry.engine(database)
 
 
 def pandas_create_session(database: str):
-    conn = pandas_conn(database)
-    engine = create_engine(conn)
+    engine = registry.engine(database)
     DbSession = sessionmaker(bind=engine)
     session = DbSession()
     return session
@@ -97,8 +208,7 @@ def pandas_create_session(database: str):
 
 def create_stock_table(database: str, table_name: str):
     metadata = MetaData()
-    conn = pandas_conn(database)
-    engine = create_engine(conn)
+    engine = registry.engine(database)
 
     # 'date', 'open', 'close', 'high', 'low', 'volume', 'money'
     table = Table(
@@ -132,7 +242,7 @@ class MysqlAlchemy:
     @classmethod
     def pd_read(cls, database: str, table: str):
         conn = pandas_conn(database)
-        sql = f'SELECT * FROM {database}.{table};'
+        sql = f'SELECT * FROM `{table}`;'
         d = pd.read_sql(sql=sql, con=conn)  # 读取SQL数据库中数据;
         return d
 
@@ -159,25 +269,11 @@ def upsert_dataframe_to_mysql(df: pd.DataFrame, database: str, table_name: str,
 
     """
 
-    # 创建数据库连接引擎
-    engine = my_engine(database)
-
-    # 获取 DataFrame 中的列名
-    columns = df.columns.tolist()
-
-    # 构建 INSERT 语句及 ON DUPLICATE KEY UPDATE 部分
-    insert_stmt = text(f"""
-        INSERT INTO `{table_name}` ({', '.join(columns)})
-        VALUES ({', '.join([f':{col}' for col in columns])})
-        ON DUPLICATE KEY UPDATE
-        {', '.join([f'{col} = VALUES({col})' for col in columns if col != primary_key])};
-    """)
-
-    # 使用 SQLAlchemy 的连接执行语句
-    with engine.connect() as conn:
+    # 按字节预算分批发送多行 INSERT ... ON DUPLICATE KEY UPDATE; 在此导入, 导入本模块时不加载 Flask 的 App 包
+    from App.utils.bulk_upsert import bulk_upsert
 
-        for index, row in df.iterrows():
-            conn.execute(insert_stmt, {col: row[col] for col in columns})
+    with my_engine(database).begin() as conn:
+        bulk_upsert(conn, table_name, df, primary_key)
 
     print("数据成功写入 MySQL 数据库，并在主键冲突时进行了更新。")
 
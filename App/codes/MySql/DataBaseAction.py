@@ -1,5 +1,5 @@
 from DB_MySql import execute_sql
-import multiprocessing
+from App.codes.utils.TaskScheduler import TaskScheduler
 
 
 def load_tables(db: str, upper=True):
@@ -29,33 +29,12 @@ class DropDatabase:
         params = (db, tb)
         execute_sql(db, sql, params)
 
-    @classmethod
-    def drop_tabel_loop(cls, _i: int, i_: int, tabel: list):
-        count = 0
-
-        for i in range(_i, i_):  # in tabel
-            t = tabel[i]
-            print(f'剩余股票：{i_ - _i - count};\nDROP {t} success;')
-            cls.drop_tabel(t)
-
-            count += 1
-
     @classmethod
     def drop_all_tabel(cls, ):
         tabel = load_tables('stock_1m_data', upper=False)
 
-        l = len(tabel)
-
-        l1 = l // 3
-        l2 = l // 3 * 2
-
-        p1 = multiprocessing.Process(target=cls.drop_tabel_loop, args=(0, l1, tabel,))
-        p2 = multiprocessing.Process(target=cls.drop_tabel_loop, args=(l1, l2, tabel,))
-        p3 = multiprocessing.Process(target=cls.drop_tabel_loop, args=(l2, l, tabel,))
-
-        p1.start()
-        p2.start()
-        p3.start()
+        scheduler = TaskScheduler()
+        scheduler.run(cls.drop_tabel, tabel, name='DROP stock_1m_data')
 
 
 if __name__ == '__main__':
@@ -1,22 +1,33 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 from DB_MySql import MysqlAlchemy as Alc
-from DB_MySql import execute_sql
+from DB_MySql import execute_sql, pandas_conn
+from ColumnStore1m import ColumnStore1m
+from config import Config
 
 
 class StockData1m:
     """
     _year: code_data start year ;
     year_: code_data end year;
+
+    store: 本地列式存储; 某个 年份/股票 分区存在时 load_1m 直接读本地分区, 否则回退到 data1m{year} 数据库;
+    append_1m / replace_1m 同时写入 MySQL 和本地存储, 保证两者一致。
     """
 
+    store = ColumnStore1m(Config.get_data1m_store_path()) if ColumnStore1m.available() else None
+
     @classmethod
-    def load_1m(cls, code_: str, start_year: str, end_year=None) -> pd.DataFrame:
+    def load_1m(cls, code_: str, start_year: str, end_year=None,
+                start_date=None, end_date=None, columns=None) -> pd.DataFrame:
         """
          Parameters:
              code_: stock code;
              start_year: code_data start year; 要求导入数据的开始年； 可以是 四位数年份， 或者带年份的日期；
              end_year : code_data end year; 要求导入数据的结束年份；2020, 2020/01/01
+             start_date: 只返回 date >= start_date 的数据; 本地存储会下推过滤, 不读取整年数据;
+             end_date: 只返回 date <= end_date 的数据;
+             columns: 只返回指定列 (date 列总是返回);
 
          Returns:
         """
@@ -36,17 +47,52 @@ class StockData1m:
 
         start_year = int(pd.to_datetime(start_year).year)
 
+        # 日期范围落在年份区间内时, 跳过整年都不需要的分区
+        if start_date is not None:
+            start_year = max(start_year, pd.Timestamp(start_date).year)
+
+        if end_date is not None:
+            end_year = min(end_year, pd.Timestamp(end_date).year)
+
         df = pd.DataFrame()
 
         # Loop through each year in the range and concatenate code_data
         for year in range(start_year, end_year + 1):
-            db = f'data1m{year}'
-            tb = code_.lower()
-            data = Alc.pd_read(db, tb)
+
+            if cls.store is not None and cls.store.has_partition(code_, year):
+                data = cls.store.read(code_, year, start_date, end_date, columns)
+
+            else:
+                data = cls._read_mysql(code_, year, start_date, end_date, columns)
+
             df = pd.concat([df, data], ignore_index=True)
 
         return df
 
+    @classmethod
+    def _read_mysql(cls, code_: str, year_: int, start_date=None, end_date=None, columns=None):
+        db = f'data1m{year_}'
+        tb = code_.lower()
+
+        if start_date is None and end_date is None and columns is None:
+            return Alc.pd_read(db, tb)
+
+        select = '*' if columns is None else ', '.join(f'`{c}`' for c in ['date'] + [c for c in columns if c != 'date'])
+        where = []
+
+        if start_date is not None:
+            where.append(f"`date` >= '{pd.Timestamp(start_date):%Y-%m-%d %H:%M:%S}'")
+
+        if end_date is not None:
+            where.append(f"`date` <= '{pd.Timestamp(end_date):%Y-%m-%d %H:%M:%S}'")
+
+        sql = f'SELECT {select} FROM {db}.`{tb}`'
+        if where:
+            sql = f'{sql} WHERE {" AND ".join(where)}'
+
+        data = pd.read_sql(sql=f'{sql};', con=pandas_conn(db))
+        return data
+
     @classmethod
     def append_1m(cls, code_: str, year_: str, data: pd.DataFrame):
         """
@@ -62,12 +108,36 @@ class StockData1m:
         tb = code_.lower()
         Alc.pd_append(data, db, tb)
 
+        if cls.store is None:
+            return
+
+        if cls.store.has_partition(code_, year_):
+            cls.store.append(code_, year_, data)
+        else:
+            # 本地还没有该年分区时, 以数据库中的全年数据 (已含本次追加) 建立分区, 避免分区只有新数据
+            cls.store.replace(code_, year_, cls._read_mysql(code_, int(year_)))
+
     @classmethod
     def replace_1m(cls, code_: str, year_: str, data: pd.DataFrame):
         db = f'data1m{year_}'
         tb = code_.lower()
         Alc.pd_replace(data, db, tb)
 
+        if cls.store is not None:
+            cls.store.replace(code_, year_, data)
+
+    @classmethod
+    def export_1m_to_store(cls, code_: str, year_: str):
+        """
+        把 data1m{year} 中某只股票的整年数据导出到本地列式存储, 用于初始化或修复分区。
+        """
+        if cls.store is None:
+            raise RuntimeError('本地列式存储不可用, 请先安装 pyarrow')
+
+        data = Alc.pd_read(f'data1m{year_}', code_.lower())
+        cls.store.replace(code_, year_, data)
+        return len(data)
+
 
 def update_table_1mdata_date_column_to_id(db_name: str) -> None:
     """
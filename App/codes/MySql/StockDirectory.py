@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+进程内股票目录
+
+sql_utils.Stocks(stock) 每次调用都整表读取 record_stock_minute，再按名称 / 代码 / id 过滤。
+监测、评估、训练循环中每只股票都会调用，整个股票池跑一轮就是几千次相同的整表查询。
+
+StockDirectory 读取一次整表，建立 名称 / 代码 / id -> (name, code, id) 的字典，查找为 O(1)，
+查找顺序和结果与原 Stocks 相同 (先名称, 再 6 位标准代码, 最后 id; 重复时取表中第一行)。
+
+- 快照不可变, 刷新时整体替换, fork 出的子进程直接继承父进程的快照;
+- 距上次检查超过 ttl 秒时查询一次表的版本 (行数, 最大 id)，变化时重新加载;
+- refresh() 立即检查版本, refresh(force=True) 无条件重新加载 (例如原地修改了股票名称)。
+"""
+import time
+from types import MappingProxyType
+from collections import namedtuple
+
+import pandas as pd
+
+from DB_MySql import pandas_conn
+from LoadMysql import LoadBasicInform
+from App.codes.utils.Normal import StockCode
+
+Snapshot = namedtuple('Snapshot', ['version', 'by_name', 'by_code', 'by_id'])
+
+NOT_FOUND = (None, None, None)
+
+
+def minute_version() -> tuple:
+    """ record_stock_minute 的版本: (行数, 最大 id) """
+    sql = f'SELECT COUNT(*) AS n, MAX(id) AS max_id FROM `{LoadBasicInform.tb_minute}`;'
+    row = pd.read_sql(sql=sql, con=pandas_conn(LoadBasicInform.db_basic)).iloc[0]
+    return int(row['n']), None if pd.isna(row['max_id']) else int(row['max_id'])
+
+
+class StockDirectory:
+    """
+    ttl: 自动检查版本的间隔 (秒), None 表示只在调用 refresh() 时刷新;
+    load: 返回整表 DataFrame 的函数 (name, code, id 列);
+    version: 返回表版本的函数;
+    """
+
+    def __init__(self, ttl=300, load=None, version=None):
+        self.ttl = ttl
+        self.load = load or LoadBasicInform.load_minute
+        self.version = version or minute_version
+
+        self._snapshot = None
+        self._checked_at = 0.0
+
+        self.loads = 0  # 整表读取次数
+        self.checks = 0  # 版本查询次数
+
+    def _build(self, version) -> Snapshot:
+        tables = self.load()
+        rows = list(zip(tables['name'].tolist(), tables['code'].tolist(), tables['id'].tolist()))
+
+        by_name, by_code, by_id = {}, {}, {}
+        for row in rows:
+            by_name.setdefault(row[0], row)
+            by_code.setdefault(row[1], row)
+            by_id.setdefault(row[2], row)
+
+        self.loads += 1
+        return Snapshot(version, MappingProxyType(by_name), MappingProxyType(by_code), MappingProxyType(by_id))
+
+    def refresh(self, force=False) -> bool:
+        """ 版本变化 (或 force) 时重新加载, 返回是否重新加载 """
+        version = self.version()
+        self.checks += 1
+        self._checked_at = time.monotonic()
+
+        if force or self._snapshot is None or version != self._snapshot.version:
+            self._snapshot = self._build(version)
+            return True
+
+        return False
+
+    def snapshot(self) -> Snapshot:
+        if self._snapshot is None:
+            self.refresh()
+
+        elif self.ttl is not None and time.monotonic() - self._checked_at >= self.ttl:
+            self.refresh()
+
+        return self._snapshot
+
+    def lookup(self, stock) -> tuple:
+        """ 按名称、代码或 id 查找, 返回 (name, code, id), 找不到时返回 (None, None, None) """
+        snapshot = self.snapshot()
+
+        row = snapshot.by_name.get(stock)
+        if row is None:
+            row = snapshot.by_code.get(StockCode.stand_code(stock))
+
+        if row is None:
+            row = snapshot.by_id.get(stock)
+
+        return row or NOT_FOUND
+
+    def __len__(self):
+        return len(self.snapshot().by_id)
+
+
+stock_directory = StockDirectory()
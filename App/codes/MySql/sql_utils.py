@@ -1,35 +1,10 @@
-from LoadMysql import LoadBasicInform
-from code.Normal import StockCode
+from StockDirectory import stock_directory
 
 
 def Stocks(stock):
-
-    tables = LoadBasicInform.load_minute()
-
-    try:
-        name = stock
-        code = tables[tables['name'] == name].iloc[0]['code']
-        id_ = tables[tables['name'] == name].iloc[0]['id']
-
-    except IndexError:
-
-        try:
-            code = stock
-            code = StockCode.stand_code(code)  # stand code
-
-            name = tables[tables['code'] == code].iloc[0]['name']
-            id_ = tables[tables['code'] == code].iloc[0]['id']
-
-        except IndexError:
-            try:
-                id_ = stock
-                name = tables[tables['id'] == id_].iloc[0]['name']
-                code = tables[tables['id'] == id_].iloc[0]['code']
-
-            except IndexError:
-                name = None
-                code = None
-                id_ = None
-    r = (name, code, id_)
+    """
+    按名称、代码或 id 查找股票, 返回 (name, code, id), 找不到时返回 (None, None, None);
+    查询进程内的 StockDirectory, 不再每次整表读取 record_stock_minute。
+    """
+    r = stock_directory.lookup(stock)
     return r
-# sinaptca@airchina.com  # 0065 6541 8543
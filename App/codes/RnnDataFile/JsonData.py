@@ -1,5 +1,6 @@
 from stock_path import StockDataPath
-import json
+from App.codes.RnnDataFile.ParamStore import param_store
+from App.codes.RnnDataFile.MonthManifest import month_manifest
 import os
 
 
@@ -7,10 +8,11 @@ class MyJsonData:
 
     @classmethod
     def loadJsonData(cls, month: str, stock_code: str):
-        # 读取json文件
-        path = StockDataPath.json_data_path(month, stock_code)
-        with open(path, 'r', encoding='utf-8') as f:
-            jsons = json.load(f)
+        # 读取参数, 保存在 ParamStore 中, 首次读取时导入原 json 文件
+        jsons = param_store.get(month, stock_code)
+
+        if jsons is None:
+            raise FileNotFoundError(StockDataPath.json_data_path(month, stock_code))
 
         return jsons
 
@@ -24,10 +26,7 @@ class MyJsonData:
              stock_code (str): 股票名称文件名称；
        """
 
-        path = StockDataPath.json_data_path(month, stock_code)
-
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(new_data, f, ensure_ascii=False, indent=2)
+        param_store.put_document(month, stock_code, new_data)
 
     @classmethod
     def modify_nested_dict(cls, json_data, changes):
@@ -49,25 +48,15 @@ class MyJsonData:
         """
         获取以前月份列表
         :param target_month: 月份
-        :class_file: 文件夹类型 ， 如 weigh , train_data ;
         :return: 上个月份列表
 
-        获取RNN 文件夹名， 大到小并且排序；
+        获取RNN 文件夹名， 大到小并且排序； 由 MonthManifest 索引给出， 不再每次 listdir；
         能用到的地方， 训练模型读取历史数据时，例如权重数据，例如训练数据；
 
         """
 
-        root_path = StockDataPath.rnnData_folder_path()
-        # 获取RnnData文件夹下全部月份文件夹名称
-        folder_names = sorted(
-            [folder for folder in os.listdir(root_path) if os.path.isdir(os.path.join(root_path, folder))],
-            reverse=True)
-
-        # 删除CommonFile文件夹
-        folder_names.remove('CommonFile')
-
-        # 移除当前月份及以后月份的文件夹
-        folder_names = folder_names[folder_names.index(target_month) + 1:]
+        root_path = month_manifest.root_path()
+        folder_names = month_manifest.previous_month_folders(target_month)
 
         # 构建文件夹路径列表
         folder_path = [os.path.join(root_path, M, 'json') for M in folder_names]
@@ -84,21 +73,52 @@ class MyJsonData:
              Returns:
                  json code_data: json村出纳的参数.
                  json code_data month ： 文件所在文件夹月份名称.
+
+             参数在 ParamStore 中或仍是未导入的 json 文件， 两处各自二分查找之前最近的月份， 取较近者。
            """
 
-        folder_paths, month_list = cls.previous_month_json_folder_list(month)
+        file_name = f'{stock_code}.json'
 
-        for folder_path, M in zip(folder_paths, month_list):
+        while month:
+            candidates = [m for m in (param_store.previous_month(stock_code, month),
+                                      month_manifest.previous_month('json', file_name, month)) if m]
 
-            folder_path = os.path.join(folder_path, f'{stock_code}.json')
+            if not candidates:
+                break
 
-            if os.path.exists(folder_path) and os.path.isfile(folder_path):
-                jsons = cls.loadJsonData(M, stock_code)  # 如果找到第一个存在的路径，立即返回并结束循环
+            month = max(candidates)
+            jsons = param_store.get(month, stock_code)
 
-                return jsons, M
+            if jsons is not None:  # 如果找到第一个存在的参数，立即返回并结束循环
+                return jsons, month
 
         return False, False
 
+    @classmethod
+    def find_previous_month_param(cls, month: str, stock_code: str, path: str, default=None):
+        """ 输入月份之前最近一个月份保存的参数.
+             Parameters:
+                 month (str): 输入月份；
+                 stock_code (str): 股票名称文件名称；
+                 path (str): 参数路径， 如 DailyVolEma、 volume；
+                 default: 没有上个月参数时的返回值；
+
+             参数保存在文档顶层； 迁移前的 json 文件把参数放在 {stock_code} 之下， 两处都查找。
+           """
+
+        parser_data, pre_month = cls.find_previous_month_json_parser(month, stock_code)
+
+        if not parser_data:
+            return default
+
+        for key in (path, f'{stock_code}/{path}'):
+            value = param_store.get(pre_month, stock_code, key)
+
+            if value is not None:
+                return value
+
+        return default
+
 
 if __name__ == '__main__':
     stock = '000001'
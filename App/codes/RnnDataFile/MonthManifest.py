@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+月份文件夹索引
+
+训练 / 监测读取历史数据时要找 "目标月份之前、最近一个含有某文件的月份":
+Rnn_utils.find_file_in_paths / rnn_data_pre_month_list 和 MyJsonData.previous_month_json_folder_list
+每次都 os.listdir 整个 RnnData、排序, 再逐个月份 os.path.exists 探测, 每只股票 O(月份数) 次文件系统调用。
+
+MonthManifest 扫描一次 RnnData/<month>/{json,weight,train_data,model}, 建立 (类型, 文件名) -> 排序月份列表:
+- previous_month 用二分查找, O(log n);
+- 本进程写入文件后调用 record 更新索引;
+- RnnData 根目录的修改时间变化 (新增 / 删除月份文件夹)、距上次扫描超过 ttl 秒或调用 invalidate() 后,
+  下一次查询时重新扫描, 以发现其它进程写入的文件;
+- find 返回前确认文件仍然存在, 已删除的文件从索引中移除后继续向前查找。
+"""
+import os
+import time
+import bisect
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+
+COMMON = 'CommonFile'
+
+
+class MonthManifest:
+    """
+    root: RnnData 文件夹, 默认 StockDataPath.rnnData_folder_path() (随 StockDataPath.data_path 变化);
+    ttl: 重新扫描的间隔 (秒), None 表示只在根目录变化或 invalidate() 后重新扫描;
+    """
+
+    kinds = ('json', 'weight', 'train_data', 'model')
+
+    def __init__(self, root=None, ttl=300):
+        self.root = root
+        self.ttl = ttl
+
+        self._index = None  # (类型, 文件名) -> 排序的月份列表
+        self._months = []  # 排序的月份文件夹
+        self._signature = None  # (根目录, 根目录修改时间)
+        self._built_at = 0.0
+
+        self.builds = 0  # 扫描次数
+
+    def root_path(self) -> str:
+        return self.root or StockDataPath.rnnData_folder_path()
+
+    def _root_signature(self):
+        root = self.root_path()
+
+        try:
+            return root, os.stat(root).st_mtime_ns
+
+        except FileNotFoundError:
+            return root, None
+
+    def _build(self, signature):
+        root = signature[0]
+        index, months = {}, []
+
+        entries = sorted(e.name for e in os.scandir(root) if e.is_dir() and e.name != COMMON) \
+            if signature[1] is not None else []
+
+        for month in entries:
+            months.append(month)
+
+            for kind in self.kinds:
+                folder = os.path.join(root, month, kind)
+                if not os.path.isdir(folder):
+                    continue
+
+                for entry in os.scandir(folder):
+                    if entry.is_file():
+                        # 月份按升序遍历, 直接 append 即为有序
+                        index.setdefault((kind, entry.name), []).append(month)
+
+        self._index, self._months, self._signature = index, months, signature
+        self._built_at = time.monotonic()
+        self.builds += 1
+
+    def _ensure(self):
+        signature = self._root_signature()
+        expired = self.ttl is not None and time.monotonic() - self._built_at >= self.ttl
+
+        if self._index is None or signature != self._signature or expired:
+            self._build(signature)
+
+    def invalidate(self):
+        """ 下一次查询时重新扫描 """
+        self._index = None
+
+    def record(self, kind: str, month: str, file_name: str):
+        """ 写入 RnnData/<month>/<kind>/<file_name> 后调用 """
+        if self._index is None:
+            return  # 尚未扫描, 下一次查询时会扫描到
+
+        months = self._index.setdefault((kind, file_name), [])
+        i = bisect.bisect_left(months, month)
+        if i == len(months) or months[i] != month:
+            months.insert(i, month)
+
+        i = bisect.bisect_left(self._months, month)
+        if i == len(self._months) or self._months[i] != month:
+            self._months.insert(i, month)
+
+    def discard(self, kind: str, month: str, file_name: str):
+        """ 删除文件后调用 """
+        months = self._index.get((kind, file_name)) if self._index is not None else None
+        if months and month in months:
+            months.remove(month)
+
+    def months(self, kind: str, file_name: str) -> list:
+        """ 含有该文件的全部月份, 升序 """
+        self._ensure()
+        return list(self._index.get((kind, file_name), ()))
+
+    def previous_month(self, kind: str, file_name: str, month: str):
+        """ month 之前 (不含) 最近一个含有该文件的月份, 没有时返回 None """
+        self._ensure()
+        months = self._index.get((kind, file_name), ())
+        i = bisect.bisect_left(months, month)
+        return months[i - 1] if i else None
+
+    def find(self, kind: str, file_name: str, month: str) -> tuple:
+        """ 返回 (文件路径, 月份); 没有时返回 (None, None) """
+        while True:
+            previous = self.previous_month(kind, file_name, month)
+            if previous is None:
+                return None, None
+
+            path = os.path.join(self.root_path(), previous, kind, file_name)
+            if os.path.isfile(path):
+                return path, previous
+
+            self.discard(kind, previous, file_name)
+            month = previous
+
+    def month_folders(self) -> list:
+        """ 全部月份文件夹 (不含 CommonFile), 升序 """
+        self._ensure()
+        return list(self._months)
+
+    def previous_month_folders(self, month: str) -> list:
+        """ month 之前 (不含) 的月份文件夹, 从近到远 """
+        self._ensure()
+        return self._months[:bisect.bisect_left(self._months, month)][::-1]
+
+
+month_manifest = MonthManifest()
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+参数存储
+
+每只股票每个月份的参数原先保存在 RnnData/<month>/json/<code>.json，读写方式都是整文件读取、修改、整文件写回:
+ProcessTrainingData.stand_save_parser / column_stand 每标准化一列就重写一次文件，监测每只股票每轮读取同一文件多次，
+多进程同时写一个文件时还会出现写了一半的文件或相互覆盖。
+
+ParamStore 把参数按 (month, code, path) 保存在一个 SQLite 文件中，每个叶子值一行，值为 JSON:
+- path 为用 '/' 连接的键路径，例如 'TrainingData/dataDaily/volume/num_max';
+- set / update 只改动涉及的路径，同一事务内提交，其它进程写入的其它路径不会被覆盖;
+- batch() 把多次写入合并为一个事务;
+- 读取按连接缓存整个文档, 其它进程提交后失效, 监测中同一文档的多次读取只查询一次;
+- 文档中没有的 (month, code) 第一次读取时从原 json 文件导入, export_json 导出为原格式的 json 文件;
+- previous_month 按 (code, month) 索引查找之前最近的月份。
+
+WAL 模式下读不阻塞写，写之间由 SQLite 文件锁串行化 (busy timeout 30 秒)。
+"""
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+
+SEP = '/'
+
+# path 本身或以 'path/' 开头 (不用 LIKE, 列名中的 '_' 是 LIKE 的通配符)
+SUBTREE = '(path = ? OR substr(path, 1, ?) = ?)'
+
+
+def _subtree(path: str) -> tuple:
+    return path, len(path) + len(SEP), f'{path}{SEP}'
+
+
+def _default(value):
+    """ json.dumps 不认识的 numpy 标量 / 数组 """
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=_default)
+
+
+def flatten(value, prefix='') -> dict:
+    """ 嵌套字典 -> {路径: 叶子值}; 空字典作为叶子保存 """
+    if isinstance(value, dict) and value:
+        leaves = {}
+        for key, item in value.items():
+            leaves.update(flatten(item, f'{prefix}{SEP}{key}' if prefix else str(key)))
+        return leaves
+
+    return {prefix: value}
+
+
+def unflatten(rows) -> dict:
+    """ [(路径, 叶子值)] -> 嵌套字典 """
+    document = {}
+
+    for path, value in rows:
+        keys = path.split(SEP)
+        node = document
+
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+
+        node[keys[-1]] = value
+
+    return document
+
+
+class ParamStore:
+    """
+    path: SQLite 文件路径, 默认 RnnData/CommonFile/params.sqlite (随 StockDataPath.data_path 变化);
+    import_json: 读取不存在的 (month, code) 时是否从原 json 文件导入;
+    """
+
+    def __init__(self, path=None, import_json=True):
+        self.path = path
+        self.import_json = import_json
+
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def db_path(self) -> str:
+        return self.path or StockDataPath.param_store_path()
+
+    def connection(self) -> sqlite3.Connection:
+        # fork 出的子进程和不同线程各自打开连接
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+
+        path = self.db_path()
+        conn = getattr(self._local, 'conn', None)
+
+        if conn is None or self._local.path != path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS params ('
+                         'month TEXT NOT NULL, code TEXT NOT NULL, path TEXT NOT NULL, value TEXT, '
+                         'PRIMARY KEY (month, code, path))')
+            conn.execute('CREATE INDEX IF NOT EXISTS params_code_month ON params (code, month)')
+
+            self._local.conn, self._local.path, self._local.depth = conn, path, 0
+            self._local.cache, self._local.version = {}, None
+
+        return conn
+
+    @contextmanager
+    def batch(self):
+        """ 块内的所有写入在一个事务中提交; 可嵌套, 最外层提交 """
+        conn = self.connection()
+
+        if self._local.depth == 0:
+            conn.execute('BEGIN IMMEDIATE')
+
+        self._local.depth += 1
+
+        try:
+            yield self
+
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute('ROLLBACK')
+                self._local.cache = {}
+            raise
+
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute('COMMIT')
+
+    def _delete(self, conn, month, code, path):
+        self._local.cache.pop((month, code), None)
+
+        if path:
+            conn.execute(f'DELETE FROM params WHERE month = ? AND code = ? AND {SUBTREE}',
+                         (month, code) + _subtree(path))
+        else:
+            conn.execute('DELETE FROM params WHERE month = ? AND code = ?', (month, code))
+
+    def _insert(self, conn, month, code, path, value):
+        self._local.cache.pop((month, code), None)
+        leaves = {p: v for p, v in flatten(value, path).items() if p}
+        # 替换叶子时同时删除它原来的上级叶子 (例如把标量改为字典)
+        keys = path.split(SEP) if path else []
+        for i in range(1, len(keys)):
+            conn.execute('DELETE FROM params WHERE month = ? AND code = ? AND path = ?',
+                         (month, code, SEP.join(keys[:i])))
+
+        conn.executemany('INSERT OR REPLACE INTO params (month, code, path, value) VALUES (?, ?, ?, ?)',
+                         [(month, code, p, _dumps(v)) for p, v in leaves.items()])
+
+    def set(self, month: str, code: str, path: str, value):
+        """ 用 value 替换 path 下的全部内容 """
+        with self.batch():
+            conn = self.connection()
+            # 先从 json 文件导入, 否则写入后该 (month, code) 已存在, 其余参数不会再导入
+            self._ensure_imported(conn, month, code)
+            self._delete(conn, month, code, path)
+            self._insert(conn, month, code, path, value)
+
+    def update(self, month: str, code: str, changes: dict):
+        """ 与 MyJsonData.modify_nested_dict 相同的合并: 字典递归合并, 其它值直接替换 """
+        with self.batch():
+            for path, value in flatten(changes).items():
+                self.set(month, code, path, value)
+
+    def put_document(self, month: str, code: str, document: dict):
+        """ 整体替换 (month, code) 的参数, 对应原 save_json """
+        with self.batch():
+            conn = self.connection()
+            self._delete(conn, month, code, '')
+            self._insert(conn, month, code, '', document)
+
+    def get(self, month: str, code: str, path: str = '', default=None):
+        """ 返回 path 下的内容 (字典或叶子值), 不存在时返回 default; path 为空时返回整个文档 """
+        text = self._document_text(month, code)
+        if text is None:
+            return default
+
+        document = json.loads(text)
+
+        for key in path.split(SEP) if path else []:
+            if not isinstance(document, dict) or key not in document:
+                return default
+            document = document[key]
+
+        return document
+
+    def _document_text(self, month, code):
+        """
+        整个文档的 json 文本。按连接缓存, 其它连接提交后 (PRAGMA data_version 变化) 清空缓存,
+        本连接的写入在 _delete / _insert 中清除对应文档; 每次返回新解析的对象, 调用方可以修改。
+        """
+        conn = self.connection()
+
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._local.version:
+            self._local.cache, self._local.version = {}, version
+
+        key = (month, code)
+        if key in self._local.cache:
+            return self._local.cache[key]
+
+        if self.import_json and not self._exists(conn, month, code):
+            with self.batch():
+                self._ensure_imported(conn, month, code)
+
+        rows = conn.execute('SELECT path, value FROM params WHERE month = ? AND code = ? ORDER BY rowid',
+                            (month, code)).fetchall()
+
+        text = _dumps(unflatten((p, json.loads(v)) for p, v in rows)) if rows else None
+        self._local.cache[key] = text
+        return text
+
+    def _exists(self, conn, month, code) -> bool:
+        return conn.execute('SELECT 1 FROM params WHERE month = ? AND code = ? LIMIT 1', (month, code)).fetchone() \
+            is not None
+
+    def _ensure_imported(self, conn, month, code):
+        if not self.import_json or self._exists(conn, month, code):
+            return
+
+        path = StockDataPath.json_data_path(month, code)
+        if not os.path.exists(path):
+            return
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+
+        except ValueError:
+            return
+
+        conn.executemany('INSERT OR REPLACE INTO params (month, code, path, value) VALUES (?, ?, ?, ?)',
+                         [(month, code, p, _dumps(v)) for p, v in flatten(document).items()])
+
+    def codes(self, month: str) -> list:
+        rows = self.connection().execute('SELECT DISTINCT code FROM params WHERE month = ? ORDER BY code', (month,))
+        return [row[0] for row in rows]
+
+    def previous_month(self, code: str, month: str):
+        """ month 之前 (不含) 最近一个有 code 参数的月份, 没有时返回 None; 由 (code, month) 索引查询 """
+        row = self.connection().execute('SELECT MAX(month) FROM params WHERE code = ? AND month < ?',
+                                        (code, month)).fetchone()
+        return row[0]
+
+    def export_json(self, month: str, code: str = None) -> list:
+        """ 导出为原格式的 json 文件 (RnnData/<month>/json/<code>.json), 返回导出的文件路径 """
+        paths = []
+
+        for c in ([code] if code else self.codes(month)):
+            document = self.get(month, c)
+            if document is None:
+                continue
+
+            path = StockDataPath.json_data_path(month, c)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # 每次导出使用各自的临时文件, 同时导出同一文件的进程 / 线程不会相互截断
+            fd, tmp = tempfile.mkstemp(prefix=f'{c}.', suffix='.tmp', dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(document, f, ensure_ascii=False, indent=2, default=_default)
+
+                os.replace(tmp, path)
+
+            except BaseException:
+                os.remove(tmp)
+                raise
+            paths.append(path)
+
+        return paths
+
+
+param_store = ParamStore()
@@ -46,6 +46,24 @@ class StockDataPath:
         r = os.path.join(cls.data_path, cls.rnn_data_file, month_parser, 'train_data', file_name)
         return r
 
+    @classmethod
+    def high_water_path(cls, stock_code: str):
+        """ 15m 增量计算的高水位记录, 与月份无关 """
+        r = os.path.join(cls.data_path, cls.rnn_data_file, 'CommonFile', 'high_water', f'{stock_code}.json')
+        return r
+
+    @classmethod
+    def param_store_path(cls):
+        """ 各月份、各股票参数的 SQLite 存储 (见 ParamStore) """
+        r = os.path.join(cls.data_path, cls.rnn_data_file, 'CommonFile', 'params.sqlite')
+        return r
+
+    @classmethod
+    def calendar_path(cls, code: str):
+        """ 由 code 的 1m 数据得到的交易日历 """
+        r = os.path.join(cls.data_path, cls.rnn_data_file, 'CommonFile', 'calendar', f'{code}.npz')
+        return r
+
     @classmethod
     def rnnData_folder_path(cls):
         r = os.path.join(cls.data_path, cls.rnn_data_file)  # os.path.join(file_root(), 'code_data', 'RnnData')
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+跨股票批量推理
+
+每只股票的四个模型 (CycleLength4, CycleChange4, BarChange4, BarVolume4) 各有一个 .h5 文件，
+逐股票 batch=1 调用模型时大部分时间花在框架开销上。BatchPredictor 先收集一轮监测中所有股票的 30x30x1 输入，
+再按模型名统一推理:
+
+- 同一模型文件的多个输入合并为一个 batch;
+- 同一模型名下的所有模型若都是 create_model 的 LeNet 结构，把各股票的权重堆叠起来，
+  用批量矩阵乘法一次算完整个股票池 (每个模型名一次调用);
+- 其它结构回退为每个模型文件调用一次。
+
+每个批次记录样本数、模型数、耗时和吞吐量。
+"""
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .ModelRegistry import model_registry
+
+LENET_LAYERS = ('Conv2D', 'AveragePooling2D', 'Conv2D', 'AveragePooling2D', 'Flatten', 'Dense', 'Dense', 'Dense')
+
+# 堆叠推理时每块最多处理的模型数，限制中间数组的内存
+STACK_CHUNK_MODELS = 256
+
+# 模型对象 -> 是否为 LeNet，缓存的模型每轮都会检查，读取层配置较慢
+_lenet_checked = weakref.WeakKeyDictionary()
+
+
+def is_lenet(model) -> bool:
+    """ 是否为 RnnCreationModel.create_model 的 LeNet 结构 (valid 卷积, 2x2 平均池化, relu) """
+    result = _lenet_checked.get(model)
+
+    if result is None:
+        result = _lenet_checked[model] = _is_lenet(model)
+
+    return result
+
+
+def _is_lenet(model) -> bool:
+    layers = [layer for layer in model.layers if type(layer).__name__ != 'InputLayer']
+    if tuple(type(layer).__name__ for layer in layers) != LENET_LAYERS:
+        return False
+
+    config = [layer.get_config() for layer in layers]
+    activations = [c.get('activation') for c in config if 'activation' in c]
+
+    return (activations == ['relu', 'relu', 'relu', 'relu', 'linear'] and
+            all(c['padding'] == 'valid' and tuple(c['strides']) == (1, 1) for c in (config[0], config[2])) and
+            all(tuple(c['pool_size']) == (2, 2) and tuple(c['strides']) == (2, 2) and c['padding'] == 'valid'
+                for c in (config[1], config[3])) and
+            config[0].get('data_format', 'channels_last') == 'channels_last')
+
+
+def _conv_relu(x: np.ndarray, kernel: np.ndarray, bias: np.ndarray) -> np.ndarray:
+    """ x: (G, B, H, W, C), kernel: (G, kh, kw, C, O), bias: (G, O) -> (G, B, H', W', O) """
+    g, b, h, w, c = x.shape
+    kh, kw, o = kernel.shape[1], kernel.shape[2], kernel.shape[4]
+
+    # patches 的最后三维为 (C, kh, kw)，对应调整卷积核的维度顺序
+    patches = sliding_window_view(x, (kh, kw), axis=(2, 3))
+    h2, w2 = patches.shape[2], patches.shape[3]
+    patches = patches.reshape(g, b * h2 * w2, c * kh * kw)
+    kernel = kernel.transpose(0, 3, 1, 2, 4).reshape(g, c * kh * kw, o)
+
+    y = np.matmul(patches, kernel) + bias[:, None, :]
+    return np.maximum(y, 0).reshape(g, b, h2, w2, o)
+
+
+def _avg_pool(x: np.ndarray) -> np.ndarray:
+    g, b, h, w, c = x.shape
+    h2, w2 = h // 2, w // 2
+    return x[:, :, :h2 * 2, :w2 * 2].reshape(g, b, h2, 2, w2, 2, c).mean(axis=(3, 5))
+
+
+def stacked_lenet(weights: list, x: np.ndarray) -> np.ndarray:
+    """
+    G 个相同结构 LeNet 的前向计算。
+
+    参数:
+        weights: 长度为 G 的列表, 每项为 model.get_weights()
+        x: (G, B, 30, 30, 1), 第 g 组输入送入第 g 个模型
+    返回:
+        (G, B, 1)
+    """
+    w = [np.stack([ws[i] for ws in weights]).astype(np.float32) for i in range(len(weights[0]))]
+    x = np.asarray(x, dtype=np.float32)
+
+    x = _avg_pool(_conv_relu(x, w[0], w[1]))
+    x = _avg_pool(_conv_relu(x, w[2], w[3]))
+    x = x.reshape(x.shape[0], x.shape[1], -1)
+
+    x = np.maximum(np.matmul(x, w[4]) + w[5][:, None, :], 0)
+    x = np.maximum(np.matmul(x, w[6]) + w[7][:, None, :], 0)
+    return np.matmul(x, w[8]) + w[9][:, None, :]
+
+
+class BatchPredictor:
+    """
+    registry: 模型缓存;
+    stacked: 是否对 LeNet 模型使用堆叠权重的一次性推理;
+    """
+
+    def __init__(self, registry=None, stacked=True):
+        self.registry = registry or model_registry
+        self.stacked = stacked
+
+        self.requests = []  # (model_name, month_parsers, stock_code, x)
+        self.batches = []  # 每个批次的统计
+
+    def add(self, month_parsers: str, model_name: str, stock_code: str, x: np.ndarray) -> int:
+        """ 登记一个 (1, 30, 30, 1) 输入, 返回其在结果中的序号 """
+        self.requests.append((model_name, month_parsers, stock_code, x))
+        return len(self.requests) - 1
+
+    def run(self) -> np.ndarray:
+        """ 按模型名批量推理, 返回与登记顺序一致的预测值数组 (耗时统计不含模型加载) """
+        values = np.full(len(self.requests), np.nan, dtype=np.float32)
+
+        by_name = OrderedDict()
+        for i, (model_name, month_parsers, stock_code, x) in enumerate(self.requests):
+            by_name.setdefault(model_name, OrderedDict()).setdefault((month_parsers, stock_code), []).append(i)
+
+        for model_name, groups in by_name.items():
+            groups = self._loadable(model_name, groups)
+            if not groups:
+                continue
+
+            lenet = self.stacked and all(is_lenet(self.registry.get(m, model_name, c)) for m, c in groups)
+            start = time.perf_counter()
+
+            if lenet:
+                self._predict_stacked(model_name, groups, values)
+            else:
+                self._predict_per_model(model_name, groups, values)
+
+            seconds = time.perf_counter() - start
+            samples = sum(len(index) for index in groups.values())
+            self.batches.append({'model_name': model_name,
+                                 'mode': 'stacked' if lenet else 'per_model',
+                                 'models': len(groups),
+                                 'samples': samples,
+                                 'seconds': seconds,
+                                 'samples_per_second': samples / seconds if seconds else float('inf')})
+
+        return values
+
+    def _loadable(self, model_name: str, groups: dict) -> dict:
+        """ 预先加载模型, 模型文件缺失或损坏的股票不参与批量推理 (结果保持 NaN) """
+        loaded = OrderedDict()
+
+        for (month_parsers, stock_code), index in groups.items():
+            try:
+                self.registry.get(month_parsers, model_name, stock_code)
+
+            except Exception as ex:
+                print(f'{stock_code} {model_name} 模型加载失败: {ex}')
+                continue
+
+            loaded[(month_parsers, stock_code)] = index
+
+        return loaded
+
+    def _inputs(self, index: list) -> np.ndarray:
+        return np.concatenate([self.requests[i][3] for i in index]).astype(np.float32)
+
+    def _predict_per_model(self, model_name: str, groups: dict, values: np.ndarray):
+        for (month_parsers, stock_code), index in groups.items():
+            model = self.registry.get(month_parsers, model_name, stock_code)
+            values[index] = np.asarray(model(self._inputs(index), training=False))[:, 0]
+
+    def _predict_stacked(self, model_name: str, groups: dict, values: np.ndarray):
+        items = list(groups.items())
+
+        for a in range(0, len(items), STACK_CHUNK_MODELS):
+            chunk = items[a:a + STACK_CHUNK_MODELS]
+            width = max(len(index) for _, index in chunk)
+
+            # 每个模型的样本数不同时用 0 补齐到同一 batch 宽度
+            x = np.zeros((len(chunk), width) + self.requests[chunk[0][1][0]][3].shape[1:], dtype=np.float32)
+            for g, (_, index) in enumerate(chunk):
+                x[g, :len(index)] = self._inputs(index)
+
+            weights = [self.registry.weights(m, model_name, c) for (m, c), _ in chunk]
+            y = stacked_lenet(weights, x)
+
+            for g, (_, index) in enumerate(chunk):
+                values[index] = y[g, :len(index), 0]
+
+    def report(self):
+        for b in self.batches:
+            print(f"{b['model_name']}: {b['mode']}, 模型 {b['models']} 个, 样本 {b['samples']} 个, "
+                  f"耗时 {b['seconds'] * 1000:.1f} ms, 吞吐 {b['samples_per_second']:.0f} 样本/秒")
@@ -5,8 +5,8 @@ from ..MySql.LoadMysql import LoadRnnModel
 from ..MySql.DataBaseStockPool import TableStockPool
 from ..MySql.sql_utils import Stocks
 import matplotlib.pyplot as plt
-import multiprocessing
 from ..Evaluation.CountPool import PoolCount
+from ..utils.TaskScheduler import TaskScheduler
 from Rnn_utils import reset_id_time, reset_record_time, date_range
 import logging
 from typing import Optional
@@ -122,75 +122,10 @@ class StockEvaluator:
             self.evaluate_stock(index)
 
 
-def stock_evaluate(day_: str, _num: int, num_: int, data: pd.DataFrame,
-                   month_parsers: str, check_model: bool) -> None:
-    """
-    评估股票的函数，对指定范围内的股票进行评估，并根据评估结果更新模型检查状态。
-
-    参数:
-        day_ (str): 要评估的日期，格式为 'YYYY-MM-DD'。
-        _num (int): 评估起始索引，表示从数据集中哪个位置开始评估。
-        num_ (int): 评估结束索引，表示在哪个位置停止评估。
-        code_data (pd.DataFrame): 包含股票信息的 Pandas 数据集，至少应包含 'code' 和 'id' 两列。
-        month_parsers (str): 指定月份的参数，用于模型预测，格式为 'YYYY-MM'。
-        check_model (bool): 指示是否需要在评估后更新模型检查状态。
-
-    返回:
-        None: 该函数没有返回值。
-    """
-
-    count = 0
-
-    for index in range(_num, num_):
-        stock_ = data.loc[index, 'code']
-        id_ = data.loc[index, 'id']
-        check_date = pd.Timestamp('now').date()
-
-        logging.info(f'当前进度，剩余{num_ - _num - count}； 当前股票：{stock_}')
-
-        try:
-            # 执行单只股票的预测
-            run = PredictionCommon(stock=stock_, month_parsers=month_parsers, monitor=False, check_date=day_)
-            run.single_stock()
-
-            # 如果启用模型检查，更新数据库中的模型检查状态为 'success'
-            if check_model:
-                sql = '''
-                UPDATE table_name SET 
-                    ModelCheckTiming = %s, 
-                    ModelCheck = 'success', 
-                    ModelError = 'success' 
-                WHERE id = %s;
-                '''
-
-                parser = (pd.Timestamp.now(), check_date, id_)
-                LoadRnnModel.set_table_train_record(sql, parser)
-
-        except Exception as ex:
-            logging_test = f'stock code {stock_} Error: {ex}'
-            logging.info(logging_test)
-            logging.error("Error occurred: %s", str(ex))
-
-            # 如果出现错误且启用模型检查，更新数据库中的模型检查状态为 'error'
-            if check_model:
-                sql = '''
-                UPDATE table_name SET 
-                    ModelCheck = 'error',
-                    ModelError = 'error',
-                    ModelCheckTiming = %s 
-                WHERE id = %s;
-                '''
-
-                parser = (check_date, id_)
-                LoadRnnModel.set_table_train_record(sql, parser)
-
-        count += 1
-
-
 def multiprocessing_count_pool(day_: str, month_parsers: str = '2022-02',
                                check_model: bool = False) -> None:
     """
-    使用多进程处理股票评估任务，将数据分成三部分并行处理。
+    使用多进程处理股票评估任务，每只股票一个任务，由 TaskScheduler 的进程池动态领取。
 
     参数:
         day_ (str): 要处理的日期，格式为 'YYYY-MM-DD'。
@@ -208,22 +143,10 @@ def multiprocessing_count_pool(day_: str, month_parsers: str = '2022-02',
 
         print(f'处理日期{day_}， 处理个数：{shape_}')
 
-        l1 = shape_ // 3
-        l2 = shape_ // 3 * 2
-
-        p1 = multiprocessing.Process(target=stock_evaluate, args=(day_, 0, l1, data, month_parsers, check_model,))
-        p2 = multiprocessing.Process(target=stock_evaluate, args=(day_, l1, l2, data, month_parsers, check_model,))
-        p3 = multiprocessing.Process(target=stock_evaluate, args=(day_, l2, shape_, data, month_parsers, check_model,))
-
-        # 启动进程
-        p1.start()
-        p2.start()
-        p3.start()
+        evaluator = StockEvaluator(day_, 0, shape_, data, month_parsers, check_model)
 
-        # 等待进程完成
-        p1.join()
-        p2.join()
-        p3.join()
+        scheduler = TaskScheduler()
+        scheduler.run(evaluator.evaluate_stock, list(data.index), name=f'股票池评估 {day_}')
 
 
 class RMHistoryCheck:
@@ -16,7 +16,6 @@ import logging
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from dataclasses import dataclass
-from functools import lru_cache
 import os
 
 from ..MySql.DataBaseStockData1m import StockData1m  # 1分钟数据库操作
@@ -25,10 +24,14 @@ from ..MySql.sql_utils import Stocks  # 股票基本信息
 from ..parsers.RnnParser import *  # 解析器常量和配置
 from App.my_code.utils.Normal import ReadSaveFile, ResampleData  # 文件读写和数据重采样
 from ..Signals.StatisticsMacd import SignalMethod  # MACD信号计算
+from ..Signals.RangeMaxIndex import Volume1mIndex  # 1分钟成交量区间最大值索引
 from ..RnnDataFile.stock_path import StockDataPath  # 文件路径管理
+from ..RnnDataFile.JsonData import MyJsonData  # 各月参数
+from ..RnnDataFile.MonthManifest import month_manifest  # 月份文件夹索引
+from .Incremental15m import Incremental15m  # 15m 增量计算
+from .TrainingSamples import write_training_samples  # 训练样本写入
 
 from App.static import file_root
-from Rnn_utils import find_file_in_paths
 
 # 配置日志系统
 logging.basicConfig(
@@ -174,38 +177,12 @@ class ModelData:
         self.y_column = YColumn()                   # 标签列配置
         self.model_name = ModelName                 # 模型名称配置
 
-    def _save_data(self, model_name: str, data_x: np.ndarray, data_y: np.ndarray) -> None:
-        """
-        保存训练数据到文件
-        
-        Args:
-            model_name: 模型名称，用于生成文件名
-            data_x: 特征矩阵，shape为(样本数, height, width, 1)
-            data_y: 标签矩阵，shape为(样本数, 标签数)
-        """
-        try:
-            # 构建文件名
-            file_x = f'{model_name}_{self.stock_code}_x.npy'
-            file_y = f'{model_name}_{self.stock_code}_y.npy'
-
-            # 获取保存路径
-            file_path_x = StockDataPath.train_data_path(self.month, file_x)
-            file_path_y = StockDataPath.train_data_path(self.month, file_y)
-
-            # 保存数据
-            np.save(file_path_x, data_x)
-            np.save(file_path_y, data_y)
-            logger.info(f"保存训练数据成功: {model_name}, {self.stock_code}")
-            
-        except Exception as e:
-            logger.error(f"保存训练数据失败: {model_name}, {self.stock_code}, 错误: {str(e)}")
-            raise
-
     def data_common(self, model_name: str, column_x: list, column_y: list, height: int = 30, width: int = 30) -> None:
         """
         处理通用训练数据
         
-        将15分钟数据处理成固定大小的矩阵，用于模型训练
+        将15分钟数据处理成固定大小的矩阵，用于模型训练；
+        按样本数预先写好 .npy 文件头后逐块写入，不在内存中拼接 (见 TrainingSamples)
         
         Args:
             model_name: 模型名称
@@ -216,51 +193,27 @@ class ModelData:
         """
         try:
             logger.info(f"开始处理数据: {model_name}, {self.stock_code}")
-            data_x = np.zeros([0])  # 初始化特征矩阵
-            data_y = np.empty([0])  # 初始化标签矩阵
 
-            # 获取有效的信号数据
-            data_ = self.data_15m.dropna(subset=[SignalChoice])
-            
-            # 按信号周期处理数据
-            for st in data_[SignalTimes]:
-                # 提取当前周期的特征和标签
-                x = self.data_15m[self.data_15m[SignalTimes] == st][column_x].dropna(how='any').tail(height)
-                y = self.data_15m[self.data_15m[SignalTimes] == st][column_y].dropna(how='any').tail(1)
+            # 构建文件名
+            file_x = f'{model_name}_{self.stock_code}_x.npy'
+            file_y = f'{model_name}_{self.stock_code}_y.npy'
 
-                if not x.shape[0] or not y.shape[0]:
-                    continue
+            # 获取保存路径
+            file_path_x = StockDataPath.train_data_path(self.month, file_x)
+            file_path_y = StockDataPath.train_data_path(self.month, file_y)
 
-                # 处理特征数据
-                x = pd.concat([x[[Signal]], x], axis=1).to_numpy()
-                
-                # 填充数据为指定维度矩阵
-                h = height - x.shape[0]  # 需要填充的高度
-                w = width - x.shape[1]   # 需要填充的宽度
-                
-                # 计算填充尺寸
-                ht, hl = h // 2, h - h // 2  # 上下填充
-                wl, wr = w // 2, w - w // 2  # 左右填充
-                
-                # 使用0填充矩阵
-                x = np.pad(x, ((ht, hl), (wr, wl)), 'constant', constant_values=(0, 0))
-                x = x.reshape(1, height, width, 1)  # 调整维度
-                y = y.to_numpy()  # 转换标签为numpy数组
-
-                # 合并数据
-                data_x = x if data_x.shape[0] == 0 else np.append(data_x, x, axis=0)
-                data_y = y if data_y.shape[0] == 0 else np.append(data_y, y, axis=0)
-
-            # 保存处理后的数据
-            self._save_data(model_name, data_x, data_y)
-            logger.info(f"数据处理完成: {model_name}, shape: {data_x.shape}")
+            # 生成并保存训练数据，x 形状为(样本数, height, width, 1)，y 形状为(样本数, 标签数)
+            shape = write_training_samples(self.data_15m, column_x, column_y, file_path_x, file_path_y, height, width)
+            month_manifest.record('train_data', self.month, file_x)
+            month_manifest.record('train_data', self.month, file_y)
+            logger.info(f"数据处理完成: {model_name}, shape: {shape}")
             
         except Exception as e:
             logger.error(f"数据处理失败: {model_name}, {self.stock_code}, 错误: {str(e)}")
             raise
 
 
-class Data15MOriginalCalculate(ModelData):
+class Data15MOriginalCalculate(ModelData, Incremental15m):
     """
     15分钟原始数据处理类
     
@@ -308,46 +261,14 @@ class Data15MOriginalCalculate(ModelData):
         加载和预处理1分钟数据
         
         主要步骤：
-        1. 从数据库加载1分钟数据
-        2. 检查数据完整性
-        3. 处理缺失值和异常值
-        4. 计算基础指标
+        1. 从数据库加载1分钟数据 (经 prepare_1m 预处理)
+        2. 计算基础指标
         """
         try:
             logger.info(f"开始加载1分钟数据: {self.stock_code}")
             
             # 从数据库加载数据
-            self.data_1m = load_1m_by_local_file(self.stock_code, self.start_date, )
-            
-            if self.data_1m is None or len(self.data_1m) == 0:
-                raise ValueError(f"无法加载1分钟数据: {self.stock_code}")
-            
-            # 确保日期列是datetime类型
-            self.data_1m['date'] = pd.to_datetime(self.data_1m['date'])
-            
-            # 按时间排序
-            self.data_1m = self.data_1m.sort_values('date')
-            
-            # 检查并处理缺失值
-            missing_values = self.data_1m.isnull().sum()
-
-            if missing_values.any():
-                logger.warning(f"发现缺失值:\n{missing_values[missing_values > 0]}")
-                # 对于价格，使用前值填充
-                price_cols = ['open', 'high', 'low', 'close']
-                self.data_1m[price_cols] = self.data_1m[price_cols].fillna(method='ffill')
-                # 对于成交量，使用0填充
-                self.data_1m['volume'] = self.data_1m['volume'].fillna(0)
-            
-            # 检查数据连续性
-            time_diff = self.data_1m['date'].diff()
-            irregular_intervals = time_diff[time_diff != pd.Timedelta(minutes=1)]
-
-            if not irregular_intervals.empty:
-                logger.warning(f"发现不规则时间间隔:\n{irregular_intervals}")
-            
-            # 记录起始日期
-            self.start_date_1m = self.data_1m['date'].min().strftime('%Y-%m-%d %H:%M:%S')
+            self.data_1m = self.load_1m_from(self.start_date)
             
             # 计算每日成交量最大值
             self._calculate_daily_volume_max()
@@ -358,43 +279,85 @@ class Data15MOriginalCalculate(ModelData):
             logger.error(f"加载1分钟数据失败: {self.stock_code}, 错误: {str(e)}")
             raise
 
-    @lru_cache(maxsize=128)
-    def find_bar_max_1m(self, x: pd.Timestamp, num: int) -> Optional[int]:
+    def prepare_1m(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        计算指定时间段内的最大成交量
+        1分钟数据预处理, 全量和增量计算加载的数据都经过这里
+        
+        主要步骤：
+        1. 检查数据完整性
+        2. 处理缺失值和异常值
+        3. 检查数据连续性
+        
+        Args:
+            data: 从数据库加载的1分钟数据
+            
+        Returns:
+            预处理后的1分钟数据
+        """
+        if data is None or len(data) == 0:
+            raise ValueError(f"无法加载1分钟数据: {self.stock_code}")
+        
+        # 确保日期列是datetime类型
+        data = data.copy()
+        data['date'] = pd.to_datetime(data['date'])
+        
+        # 按时间排序
+        data = data.sort_values('date').reset_index(drop=True)
         
-        使用@lru_cache装饰器缓存结果，提高性能
+        # 检查并处理缺失值
+        missing_values = data.isnull().sum()
+
+        if missing_values.any():
+            logger.warning(f"发现缺失值:\n{missing_values[missing_values > 0]}")
+            # 对于价格，使用前值填充
+            price_cols = ['open', 'high', 'low', 'close']
+            data[price_cols] = data[price_cols].ffill()
+            # 对于成交量，使用0填充
+            data['volume'] = data['volume'].fillna(0)
         
+        # 检查数据连续性
+        time_diff = data['date'].diff()
+        irregular_intervals = time_diff[time_diff != pd.Timedelta(minutes=1)]
+
+        if not irregular_intervals.empty:
+            logger.warning(f"发现不规则时间间隔:\n{irregular_intervals}")
+        
+        # 记录起始日期
+        self.start_date_1m = data['date'].min().strftime('%Y-%m-%d %H:%M:%S')
+        return data
+
+    def find_bar_max_1m(self, x: pd.Timestamp, num: int) -> Optional[int]:
+        """
+        计算指定时间段内的最大成交量
+
         Args:
             x: 时间点
             num: 取前n个最大值的平均
-            
+
         Returns:
-            最大成交量值或None（计算失败时）
+            最大成交量值或None（没有数据时）
         """
-        try:
-            # 计算时间窗口
-            start_time = pd.to_datetime(x) + pd.Timedelta(minutes=-15)
-            end_time = pd.to_datetime(x)
-            
-            # 筛选时间段内的数据
-            mask = (self.data_1m['date'] > start_time) & (self.data_1m['date'] < end_time)
-            
-            # 计算最大成交量
-            max_vol = (
-                self.data_1m[mask]
-                .nlargest(num, 'volume')['volume']  # 取前n个最大值
-                .mean()  # 计算平均值
-            )
-            
-            return int(max_vol) if pd.notna(max_vol) else None
-            
-        except Exception as ex:
-            logger.error(
-                f'{self.stock_name} - find_bar_max_1m 错误: {str(ex)}\n'
-                f'时间点: {x}, num: {num}'
-            )
-            return None
+        max_vol = self.bar_max_1m([x], num)[0]
+        return None if np.isnan(max_vol) else int(max_vol)
+
+    def bar_max_1m(self, dates, num: int, index: Optional[Volume1mIndex] = None) -> np.ndarray:
+        """
+        批量计算每个时间点前15分钟（不含两端）内最大的num个1分钟成交量的均值
+
+        使用Volume1mIndex（按时间排序的1分钟数据 + 稀疏表），每个时间点只查询窗口内的切片，
+        与nlargest(num, 'volume')的结果相同（忽略NaN成交量）
+
+        Args:
+            dates: 时间点序列
+            num: 取前n个最大值的平均
+            index: 由 data_1m 建立的成交量索引，为 None 时现建
+
+        Returns:
+            取整后的成交量数组，没有数据时为NaN
+        """
+        if index is None:
+            index = Volume1mIndex.from_frame(self.data_1m)
+        return np.trunc(index.top_mean(dates, num, nan_policy='skip'))
 
     def _calculate_daily_volume_max(self) -> None:
         """
@@ -404,7 +367,7 @@ class Data15MOriginalCalculate(ModelData):
         """
         # 加载数据
         _date = '2018-01-01'  # 固定的起始日期
-        self.data_1m = StockData1m.load_1m(self.stock_code, _date)
+        self.data_1m = StockData1m.load_1m(self.stock_code, _date, start_date=_date)
         mask = self.data_1m['date'] > pd.to_datetime(_date)
         self.data_1m = self.data_1m[mask]
         
@@ -419,34 +382,29 @@ class Data15MOriginalCalculate(ModelData):
         # 计算最大值
         self.daily_volume_max = round(data_daily[DailyVolEma].max(), 2)
 
-    def _process_daily_data(self) -> pd.DataFrame:
+    def _process_daily_data(self, data_daily: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         处理日线数据
         
+        Args:
+            data_daily: 已由 data_1m 重采样的日线数据，为 None 时重新计算
+            
         Returns:
             处理后的日线数据，包含日期和成交量解析器
         """
         # 计算日线数据
-        data_daily = ResampleData.resample_1m_data(data=self.data_1m, freq='daily')
+        if data_daily is None:
+            data_daily = ResampleData.resample_1m_data(data=self.data_1m, freq='daily')
         data_daily['date'] = pd.to_datetime(data_daily['date']) + pd.Timedelta(minutes=585)
         data_daily[DailyVolEma] = data_daily['volume'].rolling(90, min_periods=1).mean()
         
-        # 计算当前最大值
-        daily_volume_max = round(data_daily[DailyVolEma].max(), 2)
+        # 计算当前最大值 (增量模式下只取高水位之后的交易日)
+        daily_volume_max = self.daily_ema_max(data_daily)
         
-        try:
-            # 读取历史数据
-            file_name = f"{self.stock_code}.json"
-            file_path = find_file_in_paths(self.month, 'json', file_name)
-            parser_data = ReadSaveFile.read_json_by_path(file_path)
-            pre_daily_volume_max = parser_data[self.stock_code][DailyVolEma]
-            
-            # 更新最大值
-            self.daily_volume_max = max(daily_volume_max, pre_daily_volume_max)
-
-        except Exception as e:
-            logger.warning(f"获取历史日成交量数据失败: {str(e)}")
-            self.daily_volume_max = daily_volume_max
+        # 读取上个月的最大值并更新
+        pre_daily_volume_max = MyJsonData.find_previous_month_param(
+            self.month, self.stock_code, DailyVolEma, default=daily_volume_max)
+        self.daily_volume_max = max(daily_volume_max, pre_daily_volume_max)
         
         # 计算成交量解析器值
         data_daily[DailyVolEmaParser] = self.daily_volume_max / data_daily[DailyVolEma]
@@ -467,12 +425,12 @@ class Data15MOriginalCalculate(ModelData):
         """
         logger.info(f"开始第一阶段数据处理: {self.stock_code}")
         
-        # 重采样和信号生成
-        self.data_15m = ResampleData.resample_1m_data(data=self.data_1m, freq=self.freq)
-        self.data_15m = SignalMethod.signal_by_MACD_3ema(self.data_15m, self.data_1m).set_index('date', drop=True)
+        # 重采样 (15分钟和日线一次计算) 和信号生成
+        resampled = ResampleData.resample_1m_multi(self.data_1m, (self.freq, 'day'))
+        self.data_15m = SignalMethod.signal_by_MACD_3ema(resampled[self.freq], self.data_1m).set_index('date', drop=True)
         
         # 处理日线数据
-        data_daily = self._process_daily_data()
+        data_daily = self._process_daily_data(resampled['day'])
         self.data_15m = self.data_15m.join([data_daily]).reset_index()
         self.data_15m[DailyVolEmaParser] = self.data_15m[DailyVolEmaParser].fillna(method='ffill')
         
@@ -497,6 +455,9 @@ class Data15MOriginalCalculate(ModelData):
         """
         logger.info(f"开始第二阶段数据处理: {self.stock_code}")
         
+        # 1分钟成交量索引每轮只建一次
+        volume_index = Volume1mIndex.from_frame(self.data_1m)
+        
         # 获取需要处理的数据索引
         valid_indices = self.data_15m.dropna(subset=[SignalChoice, EndPriceIndex]).index
         
@@ -517,10 +478,8 @@ class Data15MOriginalCalculate(ModelData):
             
             # 计算最大成交量
             dates = self.data_15m.loc[st_index:ed_index, 'date']
-            self.data_15m.loc[st_index:ed_index, Bar1mVolMax1] = dates.apply(
-                self.find_bar_max_1m, args=(1,))
-            self.data_15m.loc[st_index:ed_index, Bar1mVolMax5] = dates.apply(
-                self.find_bar_max_1m, args=(5,))
+            self.data_15m.loc[st_index:ed_index, Bar1mVolMax1] = self.bar_max_1m(dates, 1, volume_index)
+            self.data_15m.loc[st_index:ed_index, Bar1mVolMax5] = self.bar_max_1m(dates, 5, volume_index)
         
         # 清理异常值
         self.data_15m = self.data_15m.replace([np.inf, -np.inf], np.nan)
@@ -658,7 +617,7 @@ class Data15MOriginalCalculate(ModelData):
             logger.error(f"保存15分钟数据失败: {self.stock_code}, 错误: {str(e)}")
             raise
 
-    def data_15m_calculate(self) -> pd.DataFrame:
+    def data_15m_calculate(self, incremental: bool = True) -> pd.DataFrame:
         """
         执行完整的15分钟数据处理流程
         
@@ -668,6 +627,9 @@ class Data15MOriginalCalculate(ModelData):
         3. 第二阶段处理（成交量计算）
         4. 第三阶段处理（数据标准化）
         
+        Args:
+            incremental: 只计算高水位之后的新 bar 并追加 (见 Incremental15m)，否则全量重算
+            
         Returns:
             处理完成的15分钟数据
         """
@@ -675,9 +637,11 @@ class Data15MOriginalCalculate(ModelData):
             logger.info(f"开始处理股票数据: {self.stock_code}")
             
             # 执行处理流程
-            self.data_1m_calculate()
-            self.data_15m = self.first_calculate()
-            self.data_15m = self.second_calculate()
+            if incremental:
+                self.data_15m = self.calculate_15m_incremental()
+            else:
+                self.data_15m = self.calculate_15m_full()
+
             self.data_15m = self.third_calculate()
             
             logger.info(f"数据处理完成: {self.stock_code}")
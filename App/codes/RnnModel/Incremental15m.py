@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+15分钟特征增量计算
+
+TrainingDataCalculate / Data15MOriginalCalculate 原先每次都从 1m 全量历史重采样、计算信号并整表覆盖 15m 数据，
+维护成本随历史长度增长。15m 特征都是局部的:
+- MACD / Bollinger 只依赖前几十根 bar;
+- 信号有效性只依赖本周期和上一个有效信号;
+- 周期统计只依赖本周期的 bar 和 1m 数据;
+- DailyVolEmaParser 依赖 90 日滚动均量和全历史最大均量。
+
+因此只需从最近几个已完成周期之前 (并保证 90 个交易日的日线回看) 加载 1m 数据，重新计算后把高水位之后的 bar
+通过 save_15m_data 追加。下列情况回退为全量重算:
+- 重叠区间内的信号与已保存数据不一致 (回看不足);
+- 全历史最大均量变大 (已保存 bar 的 DailyVolEmaParser 会随之改变)。
+
+高水位 (最后保存的 bar 时间、最大日均量) 按股票保存在 RnnData/CommonFile/high_water/<code>.json，与月份无关；
+先写临时文件再 os.replace。高水位文件不完整、或与已保存 15m 数据的最后时间不一致 (追加后、写高水位前中断) 时也全量重算。
+"""
+import os
+import json
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ..MySql.DataBaseStockData1m import StockData1m
+from ..MySql.DataBaseStockData15m import StockData15m
+from ..parsers.RnnParser import *
+from App.my_code.utils.Normal import ReadSaveFile
+from ..RnnDataFile.stock_path import StockDataPath
+
+logger = logging.getLogger(__name__)
+
+
+class Incremental15m:
+    """
+    增量计算混入类。宿主类需提供:
+    stock_code, start_date, first_calculate(), second_calculate() (内部调用保存函数),
+    以及 data_1m, data_15m, daily_volume_max, RecordStartDate, RecordEndDate 属性;
+    宿主类的 _process_daily_data 通过 daily_ema_max 计算最大日均量;
+    宿主类可覆盖 prepare_1m, 全量和增量计算加载的 1m 数据都经过同样的预处理。
+
+    lookback_cycles: 从倒数第几个已完成周期开始重算, 与 RecordNextStartDate 的 6 个周期一致;
+    warmup_bars: 重算起点之前额外加载的 15m bar 数, 覆盖 MACD (30 + 9) 和 Bollinger (20) 的滚动窗口;
+    daily_ema_days: DailyVolEma 的滚动天数;
+    """
+
+    lookback_cycles = 6
+    warmup_bars = 60
+    daily_ema_days = 90
+
+    # 重叠区间内需要与已保存数据一致的列
+    check_columns = (Signal, SignalTimes, SignalChoice, EndPriceIndex)
+
+    incremental = False
+    RecordDailyVolumeMax = None
+
+    def read_high_water_mark(self) -> Optional[dict]:
+        """ 读取高水位, 文件不存在、不完整或缺少字段时返回 None (全量重算) """
+        path = StockDataPath.high_water_path(self.stock_code)
+
+        try:
+            mark = ReadSaveFile.read_json_by_path(path)
+
+        except (OSError, ValueError) as ex:
+            logger.warning(f'{self.stock_code}: 高水位文件无法读取 {path}: {ex}')
+            return None
+
+        if not isinstance(mark, dict) or not {'RecordEndDate', 'DailyVolumeMax'} <= set(mark):
+            return None
+
+        return mark
+
+    def save_high_water_mark(self, end_date):
+        mark = {'RecordEndDate': pd.Timestamp(end_date).strftime('%Y-%m-%d %H:%M:%S'),
+                'DailyVolumeMax': float(self.daily_volume_max)}
+
+        path = StockDataPath.high_water_path(self.stock_code)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(mark, f)
+
+        os.replace(tmp, path)
+
+    def daily_ema_max(self, data_daily: pd.DataFrame) -> float:
+        """
+        最大日均量。增量模式下窗口开头的 90 日滚动均值不完整，只取高水位当天及之后的交易日，
+        并与已保存的最大值比较。
+        """
+        ema = data_daily[DailyVolEma]
+
+        if not self.incremental:
+            return round(ema.max(), 2)
+
+        day = pd.Timestamp(self.RecordEndDate).normalize()
+        recent = ema[pd.to_datetime(data_daily['date']) >= day]
+        return max(round(recent.max(), 2), self.RecordDailyVolumeMax) if len(recent) else self.RecordDailyVolumeMax
+
+    def incremental_start_date(self, persisted: pd.DataFrame):
+        """
+        根据已保存的 15m 数据确定 1m 加载起点和重叠检查起点。
+
+        返回:
+            (load_start, check_start); 历史太短无法增量时返回 (None, None)
+        """
+        dates = pd.to_datetime(persisted['date']).reset_index(drop=True)
+        starts = dates[persisted[SignalChoice].notna().to_numpy()]
+
+        if len(starts) < self.lookback_cycles:
+            return None, None
+
+        check_start = starts.iloc[-self.lookback_cycles]
+        pos = int(np.searchsorted(dates.to_numpy(), check_start.to_datetime64()))
+
+        if pos < self.warmup_bars:
+            return None, None
+
+        days = dates.dt.normalize().drop_duplicates()
+        prior_days = days[days < dates.iloc[-1].normalize()]
+
+        if len(prior_days) < self.daily_ema_days:
+            return None, None
+
+        load_start = min(dates.iloc[pos - self.warmup_bars], prior_days.iloc[-self.daily_ema_days]).normalize()
+        return load_start, check_start
+
+    def window_consistent(self, persisted: pd.DataFrame, check_start, end_date) -> bool:
+        """ 重叠区间 [check_start, end_date] 内重算结果与已保存数据的信号列是否一致 """
+        def overlap(data):
+            dates = pd.to_datetime(data['date'])
+            return data[(dates >= check_start) & (dates <= end_date)].reset_index(drop=True)
+
+        old, new = overlap(persisted), overlap(self.data_15m)
+
+        if len(old) != len(new) or not (pd.to_datetime(old['date']) == pd.to_datetime(new['date'])).all():
+            return False
+
+        for column in self.check_columns:
+            a, b = old[column], new[column]
+
+            if column == EndPriceIndex:
+                a, b = pd.to_datetime(a), pd.to_datetime(b)
+                same = (a == b) | (a.isna() & b.isna())
+
+            elif column == Signal:
+                same = np.isclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), equal_nan=True)
+
+            else:
+                same = (a.isna() & b.isna()) | (a.astype(str) == b.astype(str))
+
+            if not np.all(same):
+                return False
+
+        return True
+
+    def prepare_1m(self, data: pd.DataFrame) -> pd.DataFrame:
+        """ 1m 数据预处理, 默认只按时间排序 """
+        return data.sort_values('date').reset_index(drop=True)
+
+    def load_1m_from(self, start_date) -> pd.DataFrame:
+        start_date = pd.Timestamp(start_date)
+        data = StockData1m.load_1m(self.stock_code, start_date.strftime('%Y-%m-%d'), start_date=start_date)
+        return self.prepare_1m(data)
+
+    def calculate_15m_full(self) -> pd.DataFrame:
+        """ 全量重算: 从 start_date 加载 1m 数据, 整表覆盖 15m 数据 """
+        self.incremental = False
+        self.RecordStartDate = None
+
+        self.data_1m = self.load_1m_from(self.start_date)
+        self.data_15m = self.first_calculate()
+        self.data_15m = self.second_calculate()
+        self.save_high_water_mark(self.data_15m['date'].max())
+
+        return self.data_15m
+
+    def calculate_15m_incremental(self) -> pd.DataFrame:
+        """
+        增量计算 first_calculate / second_calculate，只追加高水位之后的 bar。
+
+        返回:
+            追加后完整的 15m 数据 (与全量重算的结果相同)
+        """
+        mark = self.read_high_water_mark()
+        if not mark:
+            return self.calculate_15m_full()
+
+        persisted = StockData15m.load_15m(self.stock_code)
+        if persisted is None or persisted.empty:
+            return self.calculate_15m_full()
+
+        end_date = pd.Timestamp(mark['RecordEndDate'])
+        if pd.to_datetime(persisted['date']).max() != end_date:
+            logger.info(f'{self.stock_code}: 高水位与已保存的 15m 数据不一致，全量重算')
+            return self.calculate_15m_full()
+        load_start, check_start = self.incremental_start_date(persisted)
+
+        if load_start is None:
+            return self.calculate_15m_full()
+
+        self.incremental = True
+        self.RecordEndDate = end_date
+        self.RecordStartDate = check_start
+        self.RecordDailyVolumeMax = mark['DailyVolumeMax']
+
+        try:
+            self.data_1m = self.load_1m_from(load_start)
+            self.data_15m = self.first_calculate()
+
+            if self.daily_volume_max != self.RecordDailyVolumeMax:
+                logger.info(f'{self.stock_code}: 最大日均量变化，全量重算')
+                return self.calculate_15m_full()
+
+            if not self.window_consistent(persisted, check_start, end_date):
+                logger.info(f'{self.stock_code}: 重叠区间信号与已保存数据不一致，全量重算')
+                return self.calculate_15m_full()
+
+            new_end = self.data_15m['date'].max()
+            if new_end <= end_date:
+                logger.info(f'{self.stock_code}: 没有新的完整周期')
+                return persisted
+
+            # second_calculate 通过 save_15m_data 只追加 RecordEndDate 之后的 bar
+            self.second_calculate()
+            self.save_high_water_mark(new_end)
+
+        finally:
+            self.incremental = False
+
+        self.data_15m = StockData15m.load_15m(self.stock_code)
+        return self.data_15m
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+进程内 Keras 模型缓存
+
+DlModel.predictive_value 原先每次预测都 clear_session + load_model，一轮 15m 监测对每只股票从磁盘重新加载 4 个模型，
+加载耗时比推理本身高 2~3 个数量级。这里按 (月份目录, 模型名, 股票代码) 缓存已加载的模型:
+
+- LRU 淘汰，同时限制模型个数和权重总字节数;
+- 每次取用时比较 .h5 文件的 mtime/size，重新训练后的模型文件会被自动重新加载;
+- 统计命中、未命中、重新加载、淘汰次数和累计加载耗时。
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from keras.models import load_model
+
+from ..RnnDataFile.stock_path import StockDataPath
+
+
+class ModelRegistry:
+    """
+    max_models: 最多缓存的模型个数;
+    max_bytes: 缓存模型权重总字节数上限, None 表示不限制;
+    loader: 模型加载函数, 默认 load_model(path, compile=False)，只做推理不需要恢复优化器和损失函数;
+    """
+
+    def __init__(self, max_models: int = 1024, max_bytes: int = 512 * 1024 * 1024, loader=None):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.loader = loader or self.load_for_predict
+
+        self._models = OrderedDict()  # key -> (model, (mtime_ns, size), nbytes)
+        self._weights = {}  # key -> model.get_weights(), 批量推理时按需缓存
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    @staticmethod
+    def load_for_predict(path: str):
+        return load_model(path, compile=False)
+
+    @staticmethod
+    def model_bytes(model) -> int:
+        """ 模型权重占用的字节数 """
+        return int(sum(w.nbytes for w in model.get_weights()))
+
+    @staticmethod
+    def _signature(path: str):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, month_parsers: str, model_name: str, stock_code: str):
+        """ 取 RnnData/<month>/model/<model_name>_<stock_code>.h5 对应的模型 """
+        path = StockDataPath.model_path(month_parsers, f'{model_name}_{stock_code}.h5')
+        return self.get_path((month_parsers, model_name, stock_code), path)
+
+    def get_path(self, key, path: str):
+        """ 按 key 取模型, 未缓存或 path 文件已变更时重新加载 """
+        signature = self._signature(path)
+
+        with self._lock:
+            entry = self._models.get(key)
+
+            if entry is not None:
+                if entry[1] == signature:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+
+                # 模型文件已被重新训练覆盖
+                self._remove(key)
+                self.reloads += 1
+
+            self.misses += 1
+
+            start = time.perf_counter()
+            model = self.loader(path)
+            self.load_seconds += time.perf_counter() - start
+
+            nbytes = self.model_bytes(model)
+            self._models[key] = (model, signature, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+            return model
+
+    def weights(self, month_parsers: str, model_name: str, stock_code: str) -> list:
+        """ 模型权重的 numpy 数组列表, 随模型一起缓存和失效 """
+        key = (month_parsers, model_name, stock_code)
+
+        with self._lock:
+            model = self.get(month_parsers, model_name, stock_code)
+            weights = self._weights.get(key)
+
+            if weights is None:
+                weights = model.get_weights()
+                self._weights[key] = weights
+                self._bytes += self._models[key][2]  # 权重副本与模型权重同样大小
+                self._evict()
+
+            return weights
+
+    def _remove(self, key):
+        _, _, nbytes = self._models.pop(key)
+        self._bytes -= nbytes * (2 if self._weights.pop(key, None) is not None else 1)
+
+    def _evict(self):
+        """ 超出个数或字节上限时淘汰最久未使用的模型 (至少保留刚加载的一个) """
+        while len(self._models) > 1 and (
+                len(self._models) > self.max_models or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            self._remove(next(iter(self._models)))
+            self.evictions += 1
+
+    def invalidate(self, month_parsers: str = None, stock_code: str = None):
+        """ 清除缓存: 不带参数时全部清除, 否则只清除匹配月份/股票的模型 """
+        with self._lock:
+            keys = [key for key in self._models
+                    if (month_parsers is None or key[0] == month_parsers) and
+                    (stock_code is None or key[-1] == stock_code)]
+
+            for key in keys:
+                self._remove(key)
+
+    def __len__(self):
+        return len(self._models)
+
+    def __contains__(self, key):
+        return key in self._models
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {'models': len(self._models),
+                    'bytes': self._bytes,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'reloads': self.reloads,
+                    'evictions': self.evictions,
+                    'hit_rate': self.hits / requests if requests else 0.0,
+                    'load_seconds': self.load_seconds}
+
+
+model_registry = ModelRegistry()
@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 from ..MySql.DataBaseStockPool import TableStockPool
-from RnnRunModel import PredictionCommon
-import multiprocessing
+from RnnRunModel import PredictionCommon, PredictionBatch
 from App.my_code.utils.Normal import Useful
+from ..utils.TaskScheduler import TaskScheduler
 
 
 class RMMonitor:
 
+    # 每个调度任务包含的股票数: 任务内按模型名批量推理, 任务之间由空闲进程领取
+    batch_stocks = 20
+
     def __init__(self, months='2022-02'):
         self.lines, self.line = Useful.dashed_line(50)
         self.pool_data = None
@@ -30,21 +33,21 @@ class RMMonitor:
         return results
 
     def monitor_buy_stock(self, start_, end_):
-        i = 0
+        runs = []
 
-        for index in range(start_, end_):
+        for i, index in enumerate(range(start_, end_)):
             Stock = self.pool_data.loc[index, 'code']
             print(f'{self.lines}\n回测进度：\n总股票数:{end_ - start_}个;'
                   f'剩余股票: {(end_ - start_ - i)}个;\n当前股票：{Stock};\n')
 
             try:
-                run = PredictionCommon(stock=Stock, month_parsers=self.months, monitor=True, check_date=None)
-                run.single_stock()
+                runs.append(PredictionCommon(stock=Stock, month_parsers=self.months, monitor=True, check_date=None))
 
             except Exception as ex:
                 print(f'{Stock}: {ex}；')
 
-            i += 1
+        # 所有股票的模型输入收集后按模型名批量推理，再逐股运行
+        PredictionBatch(runs).single_stocks()
 
     def monitor_multiple_process(self):
 
@@ -54,31 +57,10 @@ class RMMonitor:
 
         shapes = self.pool_data.shape[0]
 
-        if shapes > 4:
-
-            index1 = int(shapes * 0.25)
-            index2 = int(shapes * 0.5)
-            index3 = int(shapes * 0.75)
-
-            p1 = multiprocessing.Process(target=self.monitor_buy_stock, args=(0, index1,))
-            p2 = multiprocessing.Process(target=self.monitor_buy_stock, args=(index1, index2,))
-            p3 = multiprocessing.Process(target=self.monitor_buy_stock, args=(index2, index3,))
-            p4 = multiprocessing.Process(target=self.monitor_buy_stock, args=(index3, shapes,))
-
-            p1.start()
-            p2.start()
-            p3.start()
-            p4.start()
-
-            p1.join()
-            p2.join()
-            p3.join()
-            p4.join()
+        tasks = [(start_, min(start_ + self.batch_stocks, shapes)) for start_ in range(0, shapes, self.batch_stocks)]
 
-        else:
-            p1 = multiprocessing.Process(target=self.monitor_buy_stock, args=(0, shapes,))
-            p1.start()
-            p1.join()
+        scheduler = TaskScheduler()
+        scheduler.run(self.monitor_buy_stock, tasks, name='监测股票池')
 
     def monitor_position_stock(self):
 
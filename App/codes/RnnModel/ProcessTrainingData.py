@@ -24,9 +24,11 @@ from ..MySql.sql_utils import Stocks
 from ..MySql.DataBaseStockData1m import StockData1m
 from ..MySql.DataBaseStockDataDaily import StockDataDaily
 from ..RnnDataFile.JsonData import MyJsonData
+from ..RnnDataFile.ParamStore import param_store
 from ..parsers.RnnParser import *
 from App.my_code.utils.Normal import ReadSaveFile, ResampleData
 from ..Signals.StatisticsMacd import SignalMethod
+from ..Signals.RangeMaxIndex import Volume1mIndex
 from datetime import datetime, timedelta
 
 
@@ -136,13 +138,9 @@ class TrainingDataCalculate:
         # 数据归一化处理
         data[column] = (data[column] - low) / (high - low)
 
-        # 读取当前月的参数JSON数据
-        current_parser_data = ReadSaveFile.read_json(self.month, self.stock_code)
-        # 更新当前列的最大最小值参数
-        current_parser_data['TrainingData']['dataDaily'][column] = {'num_max': high, 'num_min': low}
-
-        # 保存更新后的JSON数据, 更新参数
-        ReadSaveFile.save_json(current_parser_data, self.month, self.stock_code)
+        # 只更新当前列的最大最小值参数, 不重写整个参数文档
+        param_store.set(self.month, self.stock_code, f'TrainingData/dataDaily/{column}',
+                        {'num_max': high, 'num_min': low})
 
         return data
 
@@ -158,11 +156,8 @@ class TrainingDataCalculate:
             pd.DataFrame: 经过标准化处理的DataFrame。
         """
 
-        # 读取当前月的参数JSON数据
-        parser_data = ReadSaveFile.read_json(self.month, self.stock_code)
-
-        # 获取指定列的训练数据参数
-        column_data = parser_data['TrainingData']["dataDaily"][column]
+        # 读取当前月该列的训练数据参数
+        column_data = param_store.get(self.month, self.stock_code, f'TrainingData/dataDaily/{column}')
         num_max = column_data['num_max']
         num_min = column_data['num_min']
 
@@ -190,7 +185,7 @@ class TrainingDataCalculate:
 
             # 加载1分钟频率的数据，并进行日期过滤
             _date = '2018-01-01'
-            self.data_1m = StockData1m.load_1m(self.stock_code, _date)
+            self.data_1m = StockData1m.load_1m(self.stock_code, _date, start_date=_date)
             self.data_1m = self.data_1m[self.data_1m['date'] > pd.to_datetime(_date)]
 
             # 将1分钟数据重采样为每日数据
@@ -201,10 +196,8 @@ class TrainingDataCalculate:
             # 计算daily_volume_max
             self.daily_volume_max = round(data_daily[DailyVolEma].max(), 2)
 
-        # 读取当前月的参数JSON数据并更新daily_volume_max
-        parser_data = ReadSaveFile.read_json(self.month, self.stock_code)
-        parser_data[DailyVolEma] = self.daily_volume_max
-        ReadSaveFile.save_json(parser_data, self.month, self.stock_code)
+        # 更新daily_volume_max
+        param_store.set(self.month, self.stock_code, DailyVolEma, self.daily_volume_max)
 
         # 定义需要保存的列及其相关参数
         save_list = [('volume', False, None),
@@ -223,13 +216,14 @@ class TrainingDataCalculate:
                      (CycleAmplitudePerBar, False, None),
                      ('EndDaily1mVolMax5', True, SignalChoice)]
 
-        # 对每列数据进行标准化处理并保存参数
-        for i in save_list:
-            column = i[0]
-            drop_duplicates = i[1]
-            drop_column = i[2]
-            # todo 验证保存参数的正确性
-            data_15m = self.stand_save_parser(data_15m, column, drop_duplicates, drop_column)
+        # 对每列数据进行标准化处理并保存参数, 所有列的参数在一个事务中提交
+        with param_store.batch():
+            for i in save_list:
+                column = i[0]
+                drop_duplicates = i[1]
+                drop_column = i[2]
+                # todo 验证保存参数的正确性
+                data_15m = self.stand_save_parser(data_15m, column, drop_duplicates, drop_column)
 
         # 定义需要读取的列及其历史参数
         read_dict = {preCycle1mVolMax1: Cycle1mVolMax1,
@@ -267,26 +261,20 @@ class TrainingDataCalculate:
 
     def find_bar_max_1m(self, x, num):
 
-        try:
-            start_time = pd.to_datetime(x) + pd.Timedelta(minutes=-15)
-
-            end_time = pd.to_datetime(x)
-
-            max_vol = self.data_1m[(self.data_1m['date'] > start_time) & (self.data_1m['date'] < end_time)]
-            max_vol = max_vol.sort_values(by=['volume'])['volume'].tail(num).mean()
+        """ 单个时间点的 bar_max_1m, 没有数据时为 None """
+        max_vol = self.bar_max_1m([x], num)[0]
+        return None if np.isnan(max_vol) else int(max_vol)
 
-            if pd.notna(max_vol):  # 如果 max_vol 不是 NaN
-                max_vol = int(max_vol)  # volume 1m is 'nan'
-
-            else:
-                max_vol = None
+    def bar_max_1m(self, dates, num, index=None):
 
-        except Exception as ex:
-            # 处理其他异常，并打印错误信息
-            max_vol = None
-            print(f'{self.stock_name} 函数： find_bar_max_1m 错误;\n{ex}')
-
-        return max_vol
+        """
+        每个时间点前 15 分钟 (不含两端) 内最大的 num 个 1m 成交量的均值, 取整, 没有数据时为 NaN;
+        与原先的 sort_values(by=['volume'])['volume'].tail(num).mean() 相同 (NaN 成交量排在最后, 先占名额);
+        index 为由 data_1m 建立的 Volume1mIndex, 不传时现建
+        """
+        if index is None:
+            index = Volume1mIndex.from_frame(self.data_1m)
+        return np.trunc(index.top_mean(dates, num, nan_policy='last'))
 
     def data_daily(self, start_date):
         start_date = (pd.to_datetime(start_date) - pd.DateOffset(years=1)).date()  # 导入的年份减去1年，度一个360天的数据
@@ -341,9 +329,7 @@ class TrainingDataCalculate:
         daily_vol_ema_dic = {"num_max": str(daily_vol_ema_max), "num_min": str(daily_vol_ema_min)}
         new_parser = {"TrainingData": {'dataDaily': {'volume': daily_volume_dic, DailyVolEma: daily_vol_ema_dic}}}
 
-        current_json = MyJsonData.loadJsonData(self.month, self.stock_code)
-        current_json = MyJsonData.modify_nested_dict(current_json, new_parser)
-        MyJsonData.save_json(current_json, self.month, self.stock_code)
+        param_store.update(self.month, self.stock_code, new_parser)
 
         return data_daily
 
@@ -397,9 +383,7 @@ class TrainingDataCalculate:
         new_parser = {"TrainingData": {"StartSignal": current_StartSignal_dic,
                                        "EndSignal": current_EndSignal_dic}}
 
-        current_json = MyJsonData.loadJsonData(self.month, self.stock_code)
-        current_json = MyJsonData.modify_nested_dict(current_json, new_parser)
-        MyJsonData.save_json(current_json, self.month, self.stock_code)
+        param_store.update(self.month, self.stock_code, new_parser)
 
         return data_15m
 
@@ -407,6 +391,8 @@ class TrainingDataCalculate:
 
         """ 找到 bar 1m 最大值； """
 
+        volume_index = Volume1mIndex.from_frame(self.data_1m)  # 每轮只建一次
+
         for _, row in data_15m.dropna(subset=[SignalChoice, EndPriceIndex]).iterrows():
             signal_times = row[SignalTimes]
             end_price_time = row[EndPriceIndex]
@@ -417,11 +403,9 @@ class TrainingDataCalculate:
             # 优化索引获取
             start_index, end_index = selects.index[0], selects.index[-1]
 
-            data_15m.loc[start_index:end_index, Bar1mVolMax1] = data_15m.loc[start_index:end_index]['date'].apply(
-                self.find_bar_max_1m, args=(1,))
-
-            data_15m.loc[start_index:end_index, Bar1mVolMax5] = data_15m.loc[start_index:end_index]['date'].apply(
-                self.find_bar_max_1m, args=(5,))
+            dates = data_15m.loc[start_index:end_index, 'date']
+            data_15m.loc[start_index:end_index, Bar1mVolMax1] = self.bar_max_1m(dates, 1, volume_index)
+            data_15m.loc[start_index:end_index, Bar1mVolMax5] = self.bar_max_1m(dates, 5, volume_index)
 
         # 替换无穷大和无穷小的值为 NaN
         data_15m = data_15m.replace([np.inf, -np.inf], np.nan)
@@ -484,11 +468,11 @@ class TrainingDataCalculate:
         # 导入1m数据
         self.load_year = str(start_date_1m.year)
 
-        data_1m = StockData1m.load_1m(self.stock_code, self.load_year)
-
         # 筛选出需要的日期
         end_data_1m = pd.to_datetime(self.month) + pd.Timedelta(days=-30)
 
+        data_1m = StockData1m.load_1m(self.stock_code, self.load_year, start_date=start_date_1m, end_date=end_data_1m)
+
         data_1m = data_1m.sort_values(by=['date'])
         data_1m = data_1m[(data_1m['date'] > start_date_1m) & (data_1m['date'] < end_data_1m)]
 
@@ -501,12 +485,10 @@ class TrainingDataCalculate:
         self.data1m_end_date = data_1m.iloc[-1]['date'].strftime('%Y-%m-%d %H:%M:%S')
 
         # 保存 code_data 1m 数据, Update JSON code_data
-        json_parser = MyJsonData.loadJsonData(self.month, self.stock_code)
         data1m_dic = {"startDate": self.data1m_start_date,
                       "EndDate": self.data1m_end_date}
 
-        json_parser["TrainingData"]["data1m"] = data1m_dic
-        MyJsonData.save_json(json_parser, self.month, self.stock_code)
+        param_store.set(self.month, self.stock_code, 'TrainingData/data1m', data1m_dic)
 
         return data_1m
 
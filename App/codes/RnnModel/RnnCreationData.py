@@ -12,7 +12,13 @@ from ..MySql.sql_utils import Stocks
 from ..parsers.RnnParser import *
 from App.my_code.utils.Normal import ReadSaveFile, ResampleData
 from ..Signals.StatisticsMacd import SignalMethod
+from ..Signals.RangeMaxIndex import Volume1mIndex
 from ..RnnDataFile.stock_path import StockDataPath
+from ..RnnDataFile.JsonData import MyJsonData
+from ..RnnDataFile.MonthManifest import month_manifest
+from ..RnnDataFile.ParamStore import param_store
+from .Incremental15m import Incremental15m
+from .TrainingSamples import write_training_samples
 
 from App.static import file_root
 from Rnn_utils import find_file_in_paths
@@ -54,46 +60,27 @@ class ModelData:
     def load_pre_month_existing_train_data(self, model_name: str) -> tuple:
 
         """
-        导入以前的数据，尝试读取前数据文件夹。
+        找出以前月份的训练数据文件。
 
         :param model_name: 模型名字
-        :return: 前数据文件夹内容，格式为 (data_x, data_y, pre_month)
+        :return: 前数据文件路径及月份，格式为 (file_path_x, file_path_y, pre_month)，没有时为 (None, None, None)
         """
 
         file_x = f'{model_name}_{self.stock_code}_x.npy'
         file_y = f'{model_name}_{self.stock_code}_y.npy'
 
-        try:
-            # 前数据读取
-            file_path_x, pre_month = find_file_in_paths(self.month, 'train_data', file_x)
-            file_path_y, pre_month = find_file_in_paths(self.month, 'train_data', file_y)
-            data_x = np.load(file_path_x, allow_pickle=True)
-            data_y = np.load(file_path_y, allow_pickle=True)
-            return data_x, data_y, pre_month
-
-        except FileNotFoundError:
-            return np.zeros([0]), np.empty([0]), None
-
-    def _save_data(self, model_name: str, data_x: np.ndarray, data_y: np.ndarray) -> None:
-        """
-        保存数据至指定路径。
-
-        :param model_name: 模型名字
-        :param data_x: 训练数据集 X
-        :param data_y: 训练数据集 Y
-        """
-        file_x = f'{model_name}_{self.stock_code}_x.npy'
-        file_y = f'{model_name}_{self.stock_code}_y.npy'
+        # 前数据查找
+        file_path_x, pre_month = find_file_in_paths(self.month, 'train_data', file_x)
+        file_path_y, pre_month_y = find_file_in_paths(self.month, 'train_data', file_y)
 
-        file_path_x = StockDataPath.train_data_path(self.month, file_x)
-        file_path_y = StockDataPath.train_data_path(self.month, file_y)
+        if not pre_month or pre_month != pre_month_y:
+            return None, None, None
 
-        np.save(file_path_x, data_x)
-        np.save(file_path_y, data_y)
+        return file_path_x, file_path_y, pre_month
 
     def data_common(self, model_name: str, column_x: list, column_y: list, height: int = 30, width: int = 30):  # width=w2, height=h1
         """
-        处理通用数据。
+        处理通用数据。以前月份的数据在前， 本月信号的数据在后， 按样本数预先写好文件头后逐块写入， 见 TrainingSamples。
 
         :param model_name: 模型名字
         :param column_x: X 数据列名称集
@@ -102,48 +89,22 @@ class ModelData:
         :param width: 数据矩阵的宽度（默认为30）
         """
 
-        data_x, data_y, pre_month = self.load_pre_month_existing_train_data(model_name)  # 加载以前数据
-
-        # 整理数据
-        data_ = self.data_15m.dropna(subset=[SignalChoice])
-
-        for st in data_[SignalTimes]:
-            x = self.data_15m[self.data_15m[SignalTimes] == st][column_x].dropna(how='any').tail(height)
-            y = self.data_15m[self.data_15m[SignalTimes] == st][column_y].dropna(how='any').tail(1)
-
-            if not x.shape[0] or not y.shape[0]:
-                continue
+        pre_path_x, pre_path_y, pre_month = self.load_pre_month_existing_train_data(model_name)  # 以前数据
+        previous = (pre_path_x, pre_path_y) if pre_month else None
 
-            x = pd.concat([x[[Signal]], x], axis=1)
-            x = x.to_numpy()
-
-            # 填充数据为 30*30 矩阵，不足部分补0
-            h = height - x.shape[0]
-            w = width - x.shape[1]
-
-            ht = h // 2  # height top
-            hl = h - ht  # height bottom
-
-            wl = w // 2  # width left
-            wr = w - wl  # width right
-
-            x = np.pad(x, ((ht, hl), (wr, wl)), 'constant', constant_values=(0, 0))
-            x.shape = (1, height, width, 1)
-            y = y.to_numpy()
-
-            # 合并数据
-            if data_x.shape[0]:
-                data_x = np.append(data_x, x, axis=0)
-                data_y = np.append(data_y, y, axis=0)
+        file_x = f'{model_name}_{self.stock_code}_x.npy'
+        file_y = f'{model_name}_{self.stock_code}_y.npy'
 
-            else:
-                data_x = x
-                data_y = y
+        file_path_x = StockDataPath.train_data_path(self.month, file_x)
+        file_path_y = StockDataPath.train_data_path(self.month, file_y)
 
-        # 新数据储存
-        self._save_data(model_name, data_x, data_y)
+        # 整理数据并储存
+        shape = write_training_samples(self.data_15m, column_x, column_y, file_path_x, file_path_y,
+                                       height, width, previous)
+        month_manifest.record('train_data', self.month, file_x)
+        month_manifest.record('train_data', self.month, file_y)
 
-        print(f'{model_name}, shape: {data_x.shape};')
+        print(f'{model_name}, shape: {shape};')
 
     def data_cycle_length(self) -> None:
         x = self.x_columns[0]
@@ -166,7 +127,7 @@ class ModelData:
         self.data_common(self.model_name[3], x, y)
 
 
-class TrainingDataCalculate(ModelData):
+class TrainingDataCalculate(ModelData, Incremental15m):
     """
     RNN模型训练数据处理类
     
@@ -251,29 +212,21 @@ class TrainingDataCalculate(ModelData):
         high = round(med + (3 * 1.4826 * mad), 2)
         low = round(med - (3 * 1.4826 * mad), 2)
         
-        # 读取历史参数并比较
-        try:
-            file_name = f"{self.stock_code}.json"
-            file_path, pre_month = find_file_in_paths(self.month, 'json', file_name)
-            parser_data = ReadSaveFile.read_json_by_path(file_path)
-            pre_high = parser_data[self.stock_code][column]['num_max']
-            pre_low = parser_data[self.stock_code][column]['num_min']
-            
+        # 读取上个月的参数并比较
+        pre_parser = MyJsonData.find_previous_month_param(self.month, self.stock_code, column)
+
+        if pre_parser:
             # 更新上下限
-            high = max(high, pre_high)
-            low = min(low, pre_low)
-        except ValueError:
-            pass
+            high = max(high, pre_parser['num_max'])
+            low = min(low, pre_parser['num_min'])
         
         # 数据截断和归一化
         data.loc[data[column] > high, column] = high
         data.loc[data[column] < low, column] = low
         data[column] = (data[column] - low) / (high - low)
         
-        # 保存参数
-        parser_data = ReadSaveFile.read_json(self.month, self.stock_code)
-        parser_data[column] = {'num_max': high, 'num_min': low}
-        ReadSaveFile.save_json(parser_data, self.month, self.stock_code)
+        # 保存参数 (只更新该列)
+        param_store.set(self.month, self.stock_code, column, {'num_max': high, 'num_min': low})
         
         return data
 
@@ -290,9 +243,9 @@ class TrainingDataCalculate(ModelData):
             标准化后的数据框
         """
         # 读取标准化参数
-        parser_data = ReadSaveFile.read_json(self.month, self.stock_code)
-        num_max = parser_data[self.stock_code][match]['num_max']
-        num_min = parser_data[self.stock_code][match]['num_min']
+        parser_data = param_store.get(self.month, self.stock_code, f'{self.stock_code}/{match}')
+        num_max = parser_data['num_max']
+        num_min = parser_data['num_min']
         
         # 数据截断和归一化
         data.loc[data[column] > num_max, column] = num_max
@@ -318,9 +271,7 @@ class TrainingDataCalculate(ModelData):
             self._calculate_daily_volume_max()
         
         # 保存日成交量最大值参数
-        parser_data = ReadSaveFile.read_json(self.month, self.stock_code)
-        parser_data[DailyVolEma] = self.daily_volume_max
-        ReadSaveFile.save_json(parser_data, self.month, self.stock_code)
+        param_store.set(self.month, self.stock_code, DailyVolEma, self.daily_volume_max)
         
         # 定义需要标准化的列及其参数
         save_list = [
@@ -341,10 +292,11 @@ class TrainingDataCalculate(ModelData):
             ('EndDaily1mVolMax5', True, SignalChoice)
         ]
         
-        # 执行标准化
-        for column, drop_duplicates, drop_column in save_list:
-            self.data_15m = self.stand_save_parser(
-                self.data_15m, column, drop_duplicates, drop_column)
+        # 执行标准化, 所有列的参数在一个事务中提交
+        with param_store.batch():
+            for column, drop_duplicates, drop_column in save_list:
+                self.data_15m = self.stand_save_parser(
+                    self.data_15m, column, drop_duplicates, drop_column)
         
         # 处理前置周期数据
         read_dict = {
@@ -385,7 +337,7 @@ class TrainingDataCalculate(ModelData):
         用于数据标准化的基准
         """
         _date = '2018-01-01'
-        self.data_1m = StockData1m.load_1m(self.stock_code, _date)
+        self.data_1m = StockData1m.load_1m(self.stock_code, _date, start_date=_date)
         self.data_1m = self.data_1m[
             self.data_1m['date'] > pd.to_datetime(_date)]
         
@@ -415,16 +367,15 @@ class TrainingDataCalculate(ModelData):
         Returns:
             处理后的数据框
         """
-        # 重采样到15分钟
-        self.data_15m = ResampleData.resample_1m_data(
-            data=self.data_1m, freq=self.freq)
+        # 重采样到15分钟和日线, 1分钟数据只分桶一次
+        resampled = ResampleData.resample_1m_multi(self.data_1m, (self.freq, 'day'))
         
         # 生成MACD信号
         self.data_15m = SignalMethod.signal_by_MACD_3ema(
-            self.data_15m, self.data_1m).set_index('date', drop=True)
+            resampled[self.freq], self.data_1m).set_index('date', drop=True)
         
         # 处理日线数据
-        data_daily = self._process_daily_data()
+        data_daily = self._process_daily_data(resampled['day'])
         
         # 合并数据
         self.data_15m = self.data_15m.join([data_daily]).reset_index()
@@ -438,15 +389,19 @@ class TrainingDataCalculate(ModelData):
         
         return self.data_15m
 
-    def _process_daily_data(self) -> pd.DataFrame:
+    def _process_daily_data(self, data_daily: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         处理日线数据
         
+        Args:
+            data_daily: 已由 data_1m 重采样的日线数据，为 None 时重新计算
+        
         Returns:
             处理后的日线数据
         """
-        data_daily = ResampleData.resample_1m_data(
-            data=self.data_1m, freq='daily')
+        if data_daily is None:
+            data_daily = ResampleData.resample_1m_data(
+                data=self.data_1m, freq='daily')
         data_daily['date'] = (
             pd.to_datetime(data_daily['date']) + 
             pd.Timedelta(minutes=585)
@@ -457,15 +412,10 @@ class TrainingDataCalculate(ModelData):
             .mean()
         )
         
-        daily_volume_max = round(data_daily[DailyVolEma].max(), 2)
+        daily_volume_max = self.daily_ema_max(data_daily)
         
-        try:
-            file_name = f"{self.stock_code}.json"
-            file_path = find_file_in_paths(self.month, 'json', file_name)
-            parser_data = ReadSaveFile.read_json_by_path(file_path)
-            pre_daily_volume_max = parser_data[self.stock_code][DailyVolEma]
-        except:
-            pre_daily_volume_max = daily_volume_max
+        pre_daily_volume_max = MyJsonData.find_previous_month_param(
+            self.month, self.stock_code, DailyVolEma, default=daily_volume_max)
         
         self.daily_volume_max = max(daily_volume_max, pre_daily_volume_max)
         
@@ -483,6 +433,9 @@ class TrainingDataCalculate(ModelData):
         Returns:
             处理后的数据框
         """
+        # 1分钟成交量索引每轮只建一次
+        volume_index = Volume1mIndex.from_frame(self.data_1m)
+        
         for index in self.data_15m.dropna(
             subset=[SignalChoice, EndPriceIndex]).index:
             signal_times = self.data_15m.loc[index, SignalTimes]
@@ -496,15 +449,9 @@ class TrainingDataCalculate(ModelData):
             st_index, ed_index = selects.index[0], selects.index[-1]
             
             # 计算Bar1mVolMax1和Bar1mVolMax5
-            self.data_15m.loc[st_index:ed_index, Bar1mVolMax1] = (
-                self.data_15m.loc[st_index:ed_index]['date']
-                .apply(self.find_bar_max_1m, args=(1,))
-            )
-            
-            self.data_15m.loc[st_index:ed_index, Bar1mVolMax5] = (
-                self.data_15m.loc[st_index:ed_index]['date']
-                .apply(self.find_bar_max_1m, args=(5,))
-            )
+            dates = self.data_15m.loc[st_index:ed_index, 'date']
+            self.data_15m.loc[st_index:ed_index, Bar1mVolMax1] = self.bar_max_1m(dates, 1, volume_index)
+            self.data_15m.loc[st_index:ed_index, Bar1mVolMax5] = self.bar_max_1m(dates, 5, volume_index)
         
         # 清理异常值
         self.data_15m = self.data_15m.replace([np.inf, -np.inf], np.nan)
@@ -576,30 +523,28 @@ class TrainingDataCalculate(ModelData):
             num (int): 取前n个最大值的平均
             
         Returns:
-            Optional[int]: 最大成交量值，如果计算失败则返回None
+            Optional[int]: 最大成交量值，没有数据时返回None
         """
-        try:
-            start_time = pd.to_datetime(x) + pd.Timedelta(minutes=-15)
-            end_time = pd.to_datetime(x)
-            
-            max_vol = (
-                self.data_1m[
-                    (self.data_1m['date'] > start_time) & 
-                    (self.data_1m['date'] < end_time)
-                ]
-                .sort_values(by=['volume'])['volume']
-                .tail(num)
-                .mean()
-            )
-            
-            return int(max_vol) if pd.notna(max_vol) else None
+        max_vol = self.bar_max_1m([x], num)[0]
+        return None if np.isnan(max_vol) else int(max_vol)
+
+    def bar_max_1m(self, dates, num: int, index: Optional[Volume1mIndex] = None) -> np.ndarray:
+        """
+        批量查找每个时间点前15分钟（不含两端）内最大的num个成交量的均值
+        
+        与sort_values(by=['volume'])['volume'].tail(num).mean()相同（NaN成交量排在最后，先占名额）
+        
+        Args:
+            dates: 时间点序列
+            num (int): 取前n个最大值的平均
+            index: 由 data_1m 建立的成交量索引，为 None 时现建
             
-        except Exception as ex:
-            logger.error(
-                f'{self.stock_name} - find_bar_max_1m 错误: {str(ex)}\n'
-                f'时间点: {x}, num: {num}'
-            )
-            return None
+        Returns:
+            np.ndarray: 取整后的成交量，没有数据时为NaN
+        """
+        if index is None:
+            index = Volume1mIndex.from_frame(self.data_1m)
+        return np.trunc(index.top_mean(dates, num, nan_policy='last'))
 
     def save_15m_data(self):
         """
@@ -649,16 +594,21 @@ class TrainingDataCalculate(ModelData):
         records.update(record_info)
         ReadSaveFile.save_json(records, self.month, self.stock_code)
 
-    def data_15m_calculate(self) -> pd.DataFrame:
+    def data_15m_calculate(self, incremental: bool = True) -> pd.DataFrame:
         """
         执行完整的15分钟数据处理流程
         
+        Args:
+            incremental: 只计算高水位之后的新 bar 并追加 (见 Incremental15m)，否则全量重算
+            
         Returns:
             处理完成的15分钟数据
         """
-        self.data_1m_calculate()
-        self.data_15m = self.first_calculate()
-        self.data_15m = self.second_calculate()
+        if incremental:
+            self.data_15m = self.calculate_15m_incremental()
+        else:
+            self.data_15m = self.calculate_15m_full()
+
         self.data_15m = self.third_calculate()
         self.data_15m = self.column_stand()
         return self.data_15m
@@ -667,16 +617,7 @@ class TrainingDataCalculate(ModelData):
         """
         执行单个股票的计算流程
         """
-        try:
-            path = find_file_in_paths(
-                self.month, 'json', f'{self.stock_code}.json')
-            record = ReadSaveFile.read_json_by_path(path)
-            self.RecordEndDate = record[self.stock_code]['RecordEndDate']
-            self.RecordStartDate = record[self.stock_code]['NextStartDate']
-
-        except ValueError:
-            pass
-        
+        # 高水位记录由 calculate_15m_incremental 读取
         self.data_15m = self.data_15m_calculate()
         
         # 处理不同模型的数据
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import os
 from ..MySql.LoadMysql import LoadRnnModel
 
 from keras import Sequential
@@ -8,7 +9,6 @@ from keras.layers import Conv2D
 from keras.layers import AveragePooling2D
 
 from keras.optimizers import adam_v2  # Adam
-from App.my_code.utils.Normal import ReadSaveFile as rf
 from ..MySql.sql_utils import Stocks
 import numpy as np
 from keras import backend as k
@@ -16,6 +16,11 @@ import pandas as pd
 from ..parsers.RnnParser import *
 from Rnn_utils import find_file_in_paths
 from ..RnnDataFile.stock_path import StockDataPath
+from ..RnnDataFile.MonthManifest import month_manifest
+from .ShardDataset import ShardDataset
+from .TrainOrchestrator import TrainOrchestrator
+from .TrainBudget import fit_with_budget
+from ..RnnDataFile.ParamStore import param_store
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 5000)
@@ -49,23 +54,21 @@ class BuiltModel:
 
         k.clear_session()  # 清除缓存
 
+        # 训练数据以 mmap 分片方式读取， 后台线程预取打乱后的批次， 见 ShardDataset
         x_name = f'{model_name}_{self.code}_x.npy'
-        data_x_path = find_file_in_paths(self.months, 'train_data', x_name)
+        data_x_path, x_month = find_file_in_paths(self.months, 'train_data', x_name)
 
         y_name = f'{model_name}_{self.code}_y.npy'
-        data_y_path = find_file_in_paths(self.months, 'train_data', y_name)
+        data_y_path, y_month = find_file_in_paths(self.months, 'train_data', y_name)
 
-        data_x = np.load(data_x_path, f'{model_name}_{self.code}_x.npy')
-        data_y = np.load(data_y_path, f'{model_name}_{self.code}_y.npy')
+        if not x_month or x_month != y_month:
+            raise FileNotFoundError(StockDataPath.train_data_path(self.months, x_name))
 
-        # 数据拆分
-        len_data = int(data_y.shape[0] * 0.8)
+        dataset = ShardDataset([(data_x_path, data_y_path)], batch_size=num_train)
 
-        train_x = data_x[:len_data]
-        train_y = data_y[:len_data]
-
-        test_x = data_x[len_data:]
-        test_y = data_y[len_data:]
+        # 数据拆分: 前 80% 训练 (其中后 15% 作为验证集)， 后 20% 评估
+        train_all, test_data = dataset.split(0.8, test_batch_size=num_test)
+        train_data, valid_data = train_all.split(0.85, test_batch_size=num_test)
 
         # 搭建模型
         model = create_model()
@@ -73,38 +76,50 @@ class BuiltModel:
         try:
             # 读取历史权重数据
             f = f'weight_{model_name}_{self.code}.h5'
-            weight_path = find_file_in_paths(self.months, 'weight', f)
+            weight_path, _ = find_file_in_paths(self.months, 'weight', f)
+            if not weight_path:
+                raise OSError(f)
+
             model.load_weights(filepath=weight_path)
             epochs = 100
 
         except OSError:
             epochs = 500
 
+        # epochs 为上限， 验证损失不再下降时提前停止并恢复最佳权重， 见 TrainBudget
         model.compile(loss='mean_squared_error', optimizer=adam_v2.Adam(lr))  # 编译
-        model.fit(train_x, train_y, epochs=epochs, batch_size=num_train)  # 训练
-        loss = model.evaluate(test_x, test_y, batch_size=num_test)  # 评估
-        print(loss)
+        budget = fit_with_budget(model, train_data, valid_data, epochs)  # 训练
+        loss = model.evaluate(test_data.iterate(), steps=len(test_data))  # 评估
+        print(loss, budget, train_data.report())
 
-        # 评估， 保存评估， 保存训练参数， 保存模型
-        records = rf.read_json(self.months, self.code)
-        records[model_name] = loss
-        rf.save_json(records, self.months, self.code)
+        # 评估， 保存评估及实际训练轮数 / 节省时间
+        param_store.update(self.months, self.code, {model_name: loss, 'TrainBudget': {model_name: budget}})
 
         # 保存权重
-        weight_file_name = 'weight_{model_name}_{self.code}.h5'
+        weight_file_name = f'weight_{model_name}_{self.code}.h5'
         weight_path = StockDataPath.model_weight_path(self.months, weight_file_name)
         model.save_weights(weight_path)  # 保存参数
+        month_manifest.record('weight', self.months, weight_file_name)
 
         # 保存模型
         model_file_name = f'{model_name}_{self.code}.h5'
         model_path = StockDataPath.model_weight_path(self.months, model_file_name)
         model.save(model_path)  # 保存模型
+        month_manifest.record('weight', self.months, model_file_name)
 
     def model_one(self, model_name: str):
         self.train_model(model_name)
 
-    def model_all(self):
+    def model_done(self, model_name: str) -> bool:
+        """ 本月是否已保存该模型 (中断后续训时跳过) """
+        model_file_name = f'{model_name}_{self.code}.h5'
+        return os.path.isfile(StockDataPath.model_weight_path(self.months, model_file_name))
+
+    def model_all(self, resume: bool = False):
         for name in ModelName:
+            if resume and self.model_done(name):
+                continue
+
             self.train_model(name)
 
 
@@ -118,39 +133,17 @@ class RMBuiltModel:
         train = BuiltModel(stock, self.months)
         train.model_all()
 
-    def train_remaining_models(self):
-        training_records = LoadRnnModel.load_train_record()
-        training_records = training_records[(training_records['ParserMonth'] == self.months) &
-                                            (training_records['ModelData'] == 'success') &
-                                            (training_records['ModelCreate'] != 'success')]
+    def train_remaining_models(self, processes=None, intra_threads=1):
+        """ 并行训练本月未完成的股票, 台账和排序见 TrainOrchestrator """
+        orchestrator = TrainOrchestrator(self.months, processes=processes, intra_threads=intra_threads)
+        report = orchestrator.run()
 
-        if training_records.empty:
+        if not report['jobs']:
             return False
 
-        training_records = training_records.reset_index(drop=True)
-        shapes = training_records.shape[0]
-        current = pd.Timestamp('now').date()
-
-        for i, row in training_records.iterrows():
-            stock_ = row['name']
-            id_ = row.loc['id']
-
-            print(f'当前股票：{stock_};\n训练进度：\n总股票数: {shapes}个; 剩余股票: {(shapes - i)}个;')
-
-            try:
-                train = BuiltModel(stock_, self.months)
-                train.model_all()
-
-                sql = f''' ModelCreate = 'success', ModelCreateTiming = %s where id = %s;'''
-
-                params = (current, id_)
-
-            except Exception as ex:
-                print(f'ModelCreate Error : {ex}')
-                sql = f''' ModelCreate = 'error', ModelCreateTiming = '{current}' where id = '{id_}';'''
-                params = (current, id_)
-
-            LoadRnnModel.set_table_train_record(sql, params)
+        print(f"训练完成: 股票 {report['jobs']} 个, 失败 {report['errors']} 个, 耗时 {report['wall_time']:.0f}s, "
+              f"CPU 利用率 {report['cpu_utilisation']:.0%}")
+        return report
 
 
 if __name__ == '__main__':
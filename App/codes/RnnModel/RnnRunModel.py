@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
-from keras.models import load_model
-from keras import backend as k
 from ..downloads.DlDataCombine import download_1m
 from ..MySql.LoadMysql import LoadRnnModel
 from ..MySql.DataBaseStockData15m import StockData15m
@@ -12,10 +10,14 @@ from ..MySql.sql_utils import Stocks
 from App.my_code.utils.Normal import MathematicalFormula as MyFormula
 from App.my_code.utils.Normal import ResampleData, Useful, count_times, ReadSaveFile
 from ..Signals.StatisticsMacd import SignalMethod
+from ..Signals.RangeMaxIndex import Volume1mIndex
 from ..parsers.RnnParser import *
 import matplotlib.pyplot as plt
 from ..TrendDistinguish.TrendDistinguishRunModel import TrendDistinguishModel
 from ..RnnDataFile.stock_path import StockDataPath
+from ..RnnDataFile.ParamStore import param_store
+from .ModelRegistry import model_registry
+from .BatchPredict import BatchPredictor
 
 plt.rcParams['font.sans-serif'] = ['FangSong']
 pd.set_option('display.max_columns', None)
@@ -89,7 +91,7 @@ class ModelData(Parsers):
             print(f'Select 1m code_data Date Error: {ex}')
 
         # 从StockData1m 加载1分钟级别的股票数据
-        data_1m = StockData1m.load_1m(self.stock_code, str(data_last_150_days.year))
+        data_1m = StockData1m.load_1m(self.stock_code, str(data_last_150_days.year), start_date=select_15m_time)
 
         # 筛选出所需的 code_data 1m 数据, 大于筛选时间变量 select_15m_time
         data_1m = data_1m[data_1m['date'] > select_15m_time].drop_duplicates(subset=['date']).reset_index(drop=True)
@@ -137,17 +139,17 @@ class ModelData(Parsers):
         self.data_15m.loc[:, column] = (self.data_15m[column] - min_) / (max_ - min_)
 
     def Bar1mVolumeMax(self, x, num):
-        st = x + pd.Timedelta(minutes=-15)
-        ed = x
-        vol = self.data_1m[(self.data_1m['date'] > st) &
-                           (self.data_1m['date'] < ed)].sort_values(by=['volume'])['volume'].tail(num).mean()
-        try:
-            vol = int(vol)
-
-        except ValueError:
-            vol = 0
+        return int(self.bar_1m_volume_max([x], num)[0])
 
-        return vol
+    def bar_1m_volume_max(self, dates, num, index=None):
+        """
+        每个时间点前 15 分钟 (不含两端) 内最大的 num 个 1m 成交量的均值, 取整, 没有数据时为 0;
+        index 为由 data_1m 建立的 Volume1mIndex, 不传时现建
+        """
+        if index is None:
+            index = Volume1mIndex.from_frame(self.data_1m)
+        vol = index.top_mean(dates, num, nan_policy='last')
+        return np.nan_to_num(np.trunc(vol), nan=0.0).astype(np.int64)
 
     def update_15m(self):
 
@@ -207,18 +209,21 @@ class ModelData(Parsers):
         signal_ = self.data_15m.iloc[-1]['Signal']
         signal_times_ = self.data_15m.iloc[-1]['SignalTimes']
 
-        self.jsons.update({
+        record = {
             'RecordEndDate': date_,
             'RecordEndSignal': signal_,
             'RecordEndSignalTimes': signal_times_,
             'RecordEndSignalStartTime': signal_start_time_
-        })
+        }
 
-        ReadSaveFile.save_json(dic=self.jsons, months=self.month_parsers, code=self.stock_code)  # 更新参数
+        self.jsons.update(record)
+        param_store.update(self.month_parsers, self.stock_code, record)  # 只更新记录参数
 
-    def daily_data(self):
+    def daily_data(self, data=None):
+        """ data: 已由 data_1m 重采样的日线数据, 为 None 时重新计算 """
 
-        data = ResampleData.resample_1m_data(data=self.data_1m, freq='day')
+        if data is None:
+            data = ResampleData.resample_1m_data(data=self.data_1m, freq='day')
 
         data['date'] = pd.to_datetime(data['date']) + pd.Timedelta(minutes=585)
         data[DailyVolEma] = data['volume'].rolling(90, min_periods=1).mean()
@@ -233,15 +238,16 @@ class ModelData(Parsers):
         """
         15m 数据计算
         """
-        path = StockDataPath.json_data_path(self.month_parsers, self.stock_code)
-        self.jsons = ReadSaveFile.read_json_by_path(path)
+        self.jsons = ReadSaveFile.read_json(self.month_parsers, self.stock_code)
 
-        data_daily = self.daily_data()
+        # 15m 和日线一次重采样; Time15m 记录的是日期 (15m 边界), 先重采样再筛选与先筛选 1m 再重采样结果相同
+        resampled = ResampleData.resample_1m_multi(self.data_1m, ('15m', 'day'))
 
-        self.data_15m = self.data_1m[self.data_1m['date'] > pd.to_datetime(self.record_last_15m_time)].reset_index(
-            drop=True)
+        data_daily = self.daily_data(resampled['day'])
 
-        self.data_15m = ResampleData.resample_1m_data(data=self.data_15m, freq='15m')
+        self.data_15m = resampled['15m']
+        self.data_15m = self.data_15m[self.data_15m['date'] > pd.to_datetime(self.record_last_15m_time)].reset_index(
+            drop=True)
 
         self.data_15m = SignalMethod.signal_by_MACD_3ema(data=self.data_15m, data1m=self.data_1m)
 
@@ -262,8 +268,9 @@ class ModelData(Parsers):
         self.data_15m = self.data_15m[self.data_15m[SignalTimes].isin(lastST)]
 
         # find Bar1mVolumeMax
-        self.data_15m.loc[:, Bar1mVolMax1] = self.data_15m['date'].apply(self.Bar1mVolumeMax, args=(1,))
-        self.data_15m.loc[:, Bar1mVolMax5] = self.data_15m['date'].apply(self.Bar1mVolumeMax, args=(5,))
+        volume_index = Volume1mIndex.from_frame(self.data_1m)
+        self.data_15m.loc[:, Bar1mVolMax1] = self.bar_1m_volume_max(self.data_15m['date'], 1, volume_index)
+        self.data_15m.loc[:, Bar1mVolMax5] = self.bar_1m_volume_max(self.data_15m['date'], 5, volume_index)
 
         # 保存15m新数据
         self.update_15m()
@@ -357,6 +364,9 @@ class DlModel(Parsers):
         self.model_name = ModelName
         self.X = XColumn()
 
+        # PredictionBatch 预先批量算好的预测值: (模型名, x 字节) -> 值
+        self.batch_values = {}
+
     def normal2value(self, data: float, match: str):
         high = self.jsons[match]['num_max']
         low = self.jsons[match]['num_min']
@@ -364,11 +374,14 @@ class DlModel(Parsers):
         return num_normal
 
     def predictive_value(self, model_name, x):
-        k.clear_session()
-        file_name = f'{model_name}_{self.stock_code}.h5'
-        path = StockDataPath.model_path(self.month_parsers, file_name)
-        model = load_model(path)
-        val = model.predict(x)
+        val = self.batch_values.get((model_name, x.tobytes()))
+        if val is not None:
+            return val
+
+        # 模型按 (月份, 模型名, 股票) 缓存在进程内，不再每次 clear_session + load_model
+        model = model_registry.get(self.month_parsers, model_name, self.stock_code)
+        # 单样本直接调用模型，避免 model.predict 每次构建数据迭代器的开销
+        val = np.asarray(model(x, training=False))
         val = val[0][0]
         return val
 
@@ -509,8 +522,7 @@ class PredictionCommon(ModelData, DlModel, UpdateData):
         self.stopLoss = stop_loss
 
         # todo 读取月份文件夹下数据失败时候怎么处理？
-        path = StockDataPath.json_data_path(self.month_parsers, self.stock_code)
-        self.jsons = ReadSaveFile.read_json_by_path(path)
+        self.jsons = ReadSaveFile.read_json(self.month_parsers, self.stock_code)
 
         # 生成预测数据
         if monitor:
@@ -873,11 +885,35 @@ class PredictionCommon(ModelData, DlModel, UpdateData):
         self.get_cycle_real()  # cycle real value
         self.get_bar_real()  # bar real value
 
+    def batch_inputs(self) -> list:
+        """
+        按 single_stock 的流程生成四个模型可能用到的全部输入, 返回 [(模型名, x), ...]，
+        供 PredictionBatch 跨股票批量推理; 数据保留给随后的 single_stock 使用。
+        """
+        self.checking_data = self.calculate_check_data()
+        inputs = []
+
+        for s_ in self.checking_data.drop_duplicates(subset=[SignalTimes])[SignalTimes]:
+            self.checking = self.checking_data[self.checking_data[SignalTimes] == s_]
+            self.get_bar_data()
+
+            cycle_data = self.data_15m[self.data_15m[SignalTimes] == self._signalTimes]
+            bar_data = self.data_15m[(self.data_15m['date'] < self.trade_timing) &
+                                     (self.data_15m[SignalTimes] == self.signalTimes)].tail(30)
+
+            for i, data in enumerate((cycle_data, cycle_data, bar_data, bar_data)):
+                self.predict_data = data
+                inputs.append((self.model_name[i], self.x_data(self.X[i])))
+
+        self.predict_data = None
+        return inputs
+
     @count_times
     def single_stock(self):  # 单股循环
 
-        # 生成数据 data_1m, data_15m, checking_data, checking
-        self.checking_data = self.calculate_check_data()
+        # 生成数据 data_1m, data_15m, checking_data, checking; PredictionBatch 已生成时直接使用
+        if self.checking_data is None:
+            self.checking_data = self.calculate_check_data()
 
         if self.checking_data.empty:  # 判断check date code_data 是否为空
             return False
@@ -907,6 +943,47 @@ class PredictionCommon(ModelData, DlModel, UpdateData):
             self.report_run()  # 显示运行结果
 
 
+class PredictionBatch:
+    """
+    一轮监测中多只股票共用一次批量推理:
+    先收集所有股票的模型输入, 按模型名统一推理 (BatchPredictor)，再逐股运行 single_stock, 预测值直接取批量结果。
+    """
+
+    def __init__(self, runs: list):
+        self.runs = runs
+        self.predictor = BatchPredictor()
+
+    def predict(self):
+        tickets = []
+
+        for run in self.runs:
+            try:
+                for model_name, x in run.batch_inputs():
+                    index = self.predictor.add(run.month_parsers, model_name, run.stock_code, x)
+                    tickets.append((run, model_name, x, index))
+
+            except Exception as ex:
+                print(f'{run.stock_code}: {ex}；')
+
+        values = self.predictor.run()
+
+        for run, model_name, x, index in tickets:
+            if not np.isnan(values[index]):
+                run.batch_values[(model_name, x.tobytes())] = values[index]
+
+    def single_stocks(self):
+        self.predict()
+
+        for run in self.runs:
+            try:
+                run.single_stock()
+
+            except Exception as ex:
+                print(f'{run.stock_code}: {ex}；')
+
+        self.predictor.report()
+
+
 if __name__ == '__main__':
     # month_ = '2022-02'
     # _date = '2024-01-15'
@@ -1,9 +1,10 @@
 import pandas as pd
 from ..MySql.LoadMysql import LoadRnnModel
-from ..MySql.DataBaseStockData1m import StockData1m
-from App.my_code.utils.Normal import ResampleData
+from App.my_code.utils.TradingCalendar import trading_calendar
 import os
 from root_ import file_root
+from App.codes.RnnDataFile.MonthManifest import month_manifest
+from App.codes.RnnDataFile.JsonData import MyJsonData
 
 
 def reset_record_time(_date):
@@ -27,6 +28,7 @@ def reset_id_time(id_, _date):
 
 
 def date_range(_date, date_, code_='bk0424') -> list:
+    """ [_date, date_] 内的交易日 (datetime.date 列表), 两者相同时包含 _date 的下一天; 见 TradingCalendar """
     if _date == date_:
         _date = pd.to_datetime(_date).date()
         date_ = pd.to_datetime(date_) + pd.Timedelta(days=1)  # .date()
@@ -36,10 +38,8 @@ def date_range(_date, date_, code_='bk0424') -> list:
         _date = pd.to_datetime(_date).date()
         date_ = pd.to_datetime(date_).date()
 
-    data = StockData1m.load_1m(code_, _year=str(_date.year))
-    data = ResampleData.resample_1m_data(data=data, freq='day').drop_duplicates(subset=['date'])
-    data = data[(data['date'] >= _date) & (data['date'] <= date_)]
-    data = list(data['date'])
+    calendar = trading_calendar(end=date_, code=code_)
+    data = calendar.days_between(_date, date_).astype(object).tolist()
 
     return data
 
@@ -60,22 +60,15 @@ def rnn_data_pre_month_list(month: str, class_file: str) -> tuple:
     :class_file: 文件夹类型 ， 如 weigh , train_data ;
     :return: 上个月份列表
 
-    获取RNN 文件夹名， 大到小并且排序；
+    获取RNN 文件夹名， 大到小并且排序； 由 MonthManifest 索引给出， 不再每次 listdir；
     能用到的地方， 训练模型读取历史数据时，例如权重数据，例如训练数据；
 
     """
 
-    root_path = os.path.join(file_root(), 'code_data', 'RnnData')
+    root_path = month_manifest.root_path()
 
-    # 获取RnnData文件夹下全部月份文件夹名称
-    folder_names = sorted(
-        [folder for folder in os.listdir(root_path) if os.path.isdir(os.path.join(root_path, folder))], reverse=True)
-
-    # 删除CommonFile文件夹
-    folder_names.remove('CommonFile')
-
-    # 移除当前月份及以后月份的文件夹
-    folder_names = folder_names[folder_names.index(month) + 1:]
+    # 当前月份以前的月份文件夹, 不含 CommonFile
+    folder_names = month_manifest.previous_month_folders(month)
 
     # 构建文件夹路径列表
     folder_path = [os.path.join(root_path, M, class_file) for M in folder_names]
@@ -93,21 +86,28 @@ def find_file_in_paths(month: str, classification: str, file_name: str):
 
 
       Returns:
-          folder_path: 文件所在文件夹路径.
+          folder_path: 文件所在文件夹路径, json 类型为参数字典.
           M ： 文件所在文件夹月份名称.
+
+      由 MonthManifest 二分查找， 只确认找到的那一个文件是否存在。
+      json 参数保存在 ParamStore 中， 按 MyJsonData.find_previous_month_json_parser 查找， 直接返回参数， 不写文件。
     """
 
-    folder_paths, month_list = rnn_data_pre_month_list(month, classification)
+    if classification == 'json':
+        stock_code = os.path.splitext(file_name)[0]
+        parser_data, M = MyJsonData.find_previous_month_json_parser(month, stock_code)
+
+        if not parser_data:
+            return False, False
 
-    for folder_path, M in zip(folder_paths, month_list):
+        return parser_data, M
 
-        folder_path = os.path.join(folder_path, file_name)
+    folder_path, M = month_manifest.find(classification, file_name, month)
 
-        if os.path.exists(folder_path) and os.path.isfile(folder_path):
-            return folder_path, M
-            # 如果找到第一个存在的路径，立即返回并结束循环
+    if folder_path is None:
+        return False, False
 
-    return False, False
+    return folder_path, M
 
 
 if __name__ == '__main__':
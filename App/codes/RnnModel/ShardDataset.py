@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+训练数据流式读取
+
+BuiltModel.train_model 原先用 np.load 把一只股票的 *_x.npy / *_y.npy 整个读入内存再训练，
+数据集大小受内存限制，也只能每只股票单独训练一个模型，不能把多只股票 / 多个月份的数据合在一起。
+
+ShardDataset 把多个 (x, y) 文件 (分片) 以 mmap 方式打开, 只在取批次时读取需要的行:
+- 每轮把所有分片的行号统一打乱 (seed 固定时可复现), 按 batch_size 切成小批次;
+- 批次内按 (分片, 行号) 排序后读取, 提高 mmap 的局部性, 再还原为打乱后的顺序;
+- 后台线程预取 prefetch 个批次, 训练计算与读取重叠;
+- split 按分片前 80% / 后 20% 划分训练集和测试集, 与原 train_model 的划分一致;
+- 统计批次数、耗时、等待读取的时间和 batches/s。
+
+repeat() 返回无限的 (x, y) 生成器, 与 steps_per_epoch 一起传给 model.fit, 仅依赖 CPU 版 TensorFlow / Keras。
+"""
+import os
+import time
+import queue
+import itertools
+import threading
+
+import numpy as np
+
+from ..RnnDataFile.stock_path import StockDataPath
+
+_END = object()
+
+
+def train_data_shards(month: str, model_name: str, codes) -> list:
+    """ month 文件夹中 codes 各股票已有的训练数据文件 [(path_x, path_y)] """
+    shards = []
+
+    for code in codes:
+        path_x = StockDataPath.train_data_path(month, f'{model_name}_{code}_x.npy')
+        path_y = StockDataPath.train_data_path(month, f'{model_name}_{code}_y.npy')
+
+        if os.path.isfile(path_x) and os.path.isfile(path_y):
+            shards.append((path_x, path_y))
+
+    return shards
+
+
+class ShardDataset:
+    """
+    shards: [(path_x, path_y)] 分片文件列表;
+    batch_size: 批次大小;
+    shuffle: 每轮是否打乱;
+    seed: 随机种子;
+    prefetch: 后台预取的批次数, 0 表示在当前线程读取;
+    ranges: 每个分片使用的行范围 [(start, stop)], 默认全部行;
+    """
+
+    def __init__(self, shards, batch_size=30, shuffle=True, seed=None, prefetch=4, ranges=None):
+        self.shards = [tuple(shard) for shard in shards]
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.prefetch = prefetch
+
+        self._arrays = [(np.load(x, mmap_mode='r'), np.load(y, mmap_mode='r')) for x, y in self.shards]
+
+        for (x, y), shard in zip(self._arrays, self.shards):
+            if x.shape[0] != y.shape[0]:
+                raise ValueError(f'{shard}: x 有 {x.shape[0]} 行, y 有 {y.shape[0]} 行')
+
+        if ranges is None:
+            ranges = [(0, x.shape[0]) for x, _ in self._arrays]
+
+        self.ranges = [tuple(r) for r in ranges]
+
+        # 全局行号 -> (分片, 行号)
+        self._shard_ids = np.concatenate([np.full(b - a, i, dtype=np.int32) for i, (a, b) in enumerate(self.ranges)]
+                                         + [np.zeros(0, dtype=np.int32)])
+        self._rows = np.concatenate([np.arange(a, b, dtype=np.int64) for a, b in self.ranges]
+                                    + [np.zeros(0, dtype=np.int64)])
+
+        self.epoch = 0
+        self.stats = {'batches': 0, 'samples': 0, 'seconds': 0.0, 'wait': 0.0}
+
+    @classmethod
+    def from_stocks(cls, month: str, model_name: str, codes, **kwargs):
+        """ 合并 month 中多只股票的训练数据 """
+        return cls(train_data_shards(month, model_name, codes), **kwargs)
+
+    def split(self, fraction=0.8, test_batch_size=None) -> tuple:
+        """ 每个分片前 fraction 作为训练集, 其余作为测试集 (测试集不打乱) """
+        train, test = [], []
+
+        for a, b in self.ranges:
+            cut = a + int((b - a) * fraction)
+            train.append((a, cut))
+            test.append((cut, b))
+
+        return (ShardDataset(self.shards, self.batch_size, self.shuffle, self.seed, self.prefetch, train),
+                ShardDataset(self.shards, test_batch_size or self.batch_size, False, None, self.prefetch, test))
+
+    @property
+    def samples(self) -> int:
+        return len(self._rows)
+
+    def __len__(self):
+        """ 每轮的批次数 """
+        return -(-self.samples // self.batch_size)
+
+    @property
+    def x_shape(self) -> tuple:
+        return self._arrays[0][0].shape[1:] if self._arrays else ()
+
+    def _order(self, epoch) -> np.ndarray:
+        if not self.shuffle:
+            return np.arange(self.samples)
+
+        seed = None if self.seed is None else (self.seed, epoch)
+        return np.random.default_rng(seed).permutation(self.samples)
+
+    def _read(self, index: np.ndarray) -> tuple:
+        """ 读取全局行号 index 对应的 (x, y), 顺序与 index 相同 """
+        shard_ids, rows = self._shard_ids[index], self._rows[index]
+        order = np.lexsort((rows, shard_ids))
+
+        x = np.empty((len(index),) + self.x_shape, dtype=self._arrays[0][0].dtype)
+        y = np.empty((len(index),) + self._arrays[0][1].shape[1:], dtype=self._arrays[0][1].dtype)
+
+        start = 0
+        sorted_ids, sorted_rows = shard_ids[order], rows[order]
+
+        for shard in np.unique(sorted_ids):
+            stop = np.searchsorted(sorted_ids, shard, side='right')
+            data_x, data_y = self._arrays[shard]
+            take = sorted_rows[start:stop]
+            x[order[start:stop]] = data_x[take]
+            y[order[start:stop]] = data_y[take]
+            start = stop
+
+        return x, y
+
+    def _epoch_batches(self, epoch):
+        order = self._order(epoch)
+
+        for i in range(0, len(order), self.batch_size):
+            yield self._read(order[i: i + self.batch_size])
+
+    def batch(self, i: int, epoch: int = None) -> tuple:
+        """ 第 epoch 轮 (默认当前轮) 的第 i 个批次, 供按下标取批次的 Keras Sequence 使用 """
+        order = self._order(self.epoch if epoch is None else epoch)
+        return self._read(order[i * self.batch_size: (i + 1) * self.batch_size])
+
+    @staticmethod
+    def _put(out: queue.Queue, item, stop: threading.Event) -> bool:
+        """ 放入队列, 消费方已停止时返回 False """
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+
+            except queue.Full:
+                continue
+
+        return False
+
+    def _produce(self, epochs, out: queue.Queue, stop: threading.Event):
+        try:
+            for batch in self._batches(epochs):
+                if not self._put(out, batch, stop):
+                    return
+
+            self._put(out, _END, stop)
+
+        except BaseException as ex:
+            self._put(out, ex, stop)
+
+    def _batches(self, epochs):
+        if not self.samples:
+            return
+
+        first = self.epoch
+        for epoch in itertools.count(first):
+            if epochs is not None and epoch >= first + epochs:
+                return
+
+            yield from self._epoch_batches(epoch)
+
+    def _prefetched(self, epochs):
+        out, stop = queue.Queue(self.prefetch), threading.Event()
+        worker = threading.Thread(target=self._produce, args=(epochs, out, stop), daemon=True)
+        worker.start()
+
+        try:
+            while True:
+                wait = time.perf_counter()
+                batch = out.get()
+                self.stats['wait'] += time.perf_counter() - wait
+
+                if batch is _END:
+                    return
+
+                if isinstance(batch, BaseException):
+                    raise batch
+
+                yield batch
+
+        finally:
+            stop.set()
+            worker.join()
+
+    def iterate(self, epochs=1):
+        """ 依次返回 (x, y) 批次, epochs 为 None 时无限循环 """
+        start, seconds, served = time.perf_counter(), self.stats['seconds'], 0
+        batches = self._prefetched(epochs) if self.prefetch else self._batches(epochs)
+
+        try:
+            for batch in batches:
+                served += 1
+                self.stats['batches'] += 1
+                self.stats['samples'] += len(batch[0])
+                self.stats['seconds'] = seconds + time.perf_counter() - start
+                yield batch
+
+        finally:
+            batches.close()
+            # 下一次 iterate 从新的一轮开始 (打乱顺序不同)
+            self.epoch += -(-served // len(self)) if len(self) else 0
+
+    def repeat(self):
+        """ 无限循环的批次生成器, 用于 model.fit(..., steps_per_epoch=len(dataset)) """
+        return self.iterate(epochs=None)
+
+    def report(self) -> dict:
+        """ 读取统计; wait_ratio 为训练等待读取的时间占比 """
+        seconds = self.stats['seconds']
+        return {**self.stats,
+                'batches_per_second': self.stats['batches'] / seconds if seconds else 0.0,
+                'wait_ratio': self.stats['wait'] / seconds if seconds else 0.0}
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+自适应训练轮数
+
+BuiltModel.train_model 原先固定训练 500 轮 (有历史权重时 100 轮), 大部分轮次的损失已不再下降,
+每只股票、每个月都要付出同样的时间。
+
+fit_with_budget 把固定轮数改为上限:
+- 从训练集中划出验证集, 以 val_loss 为准;
+- ReduceLROnPlateau: val_loss 连续 lr_patience 轮没有改善时学习率减半;
+- EarlyStopping: 连续 patience 轮没有改善时停止;
+- BestWeights: 记录 val_loss 最低的一轮的权重, 训练结束时恢复 (无论是否提前停止);
+- 返回实际轮数、最佳轮次、耗时和按平均每轮耗时估计的节省时间, 写入训练记录。
+"""
+import time
+
+import numpy as np
+from keras.utils import Sequence
+from keras.callbacks import Callback, EarlyStopping, ReduceLROnPlateau
+
+
+class ValidationSequence(Sequence):
+    """
+    按下标读取验证集批次。生成器作为 validation_data 时 Keras 会预读批次, 每轮验证的批次会错位,
+    Sequence 保证每轮验证恰好是整个验证集。
+    """
+
+    def __init__(self, dataset):
+        super().__init__()
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, i):
+        return self.dataset.batch(i)
+
+
+class BestWeights(Callback):
+    """ 记录每轮耗时和监控值最低的一轮的权重, 训练结束时恢复 """
+
+    def __init__(self, monitor='val_loss'):
+        super().__init__()
+        self.monitor = monitor
+        self.best = np.inf
+        self.best_epoch = None
+        self.best_weights = None
+        self.epoch_seconds = []
+        self._start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_seconds.append(time.perf_counter() - self._start)
+        value = (logs or {}).get(self.monitor)
+
+        if value is not None and value < self.best:
+            self.best, self.best_epoch = float(value), epoch
+            self.best_weights = self.model.get_weights()
+
+    def on_train_end(self, logs=None):
+        if self.best_weights is not None:
+            self.model.set_weights(self.best_weights)
+
+
+def budget_patience(epochs: int) -> int:
+    """ 早停的耐心轮数: 上限的 5%, 至少 10 轮 """
+    return max(10, epochs // 20)
+
+
+def fit_with_budget(model, train, validation, epochs: int, patience=None, lr_patience=None, min_delta=1e-6,
+                    verbose='auto') -> dict:
+    """
+    以 epochs 为上限训练 model, 返回训练记录。
+
+    参数:
+        train / validation: ShardDataset, validation 为空时以训练损失为准;
+        patience: 早停耐心轮数, 默认 budget_patience(epochs);
+        lr_patience: 学习率减半的耐心轮数, 默认 patience // 2;
+    """
+    patience = patience or budget_patience(epochs)
+    lr_patience = lr_patience or max(1, patience // 2)
+
+    monitor = 'val_loss' if validation is not None and validation.samples else 'loss'
+    best = BestWeights(monitor)
+
+    callbacks = [ReduceLROnPlateau(monitor=monitor, factor=0.5, patience=lr_patience, min_delta=min_delta,
+                                   min_lr=float(np.asarray(model.optimizer.learning_rate)) / 100),
+                 EarlyStopping(monitor=monitor, patience=patience, min_delta=min_delta),
+                 best]
+
+    kwargs = {}
+    if monitor == 'val_loss':
+        kwargs = {'validation_data': ValidationSequence(validation)}
+
+    start = time.perf_counter()
+    model.fit(train.repeat(), steps_per_epoch=len(train), epochs=epochs, callbacks=callbacks, verbose=verbose,
+              **kwargs)
+    seconds = time.perf_counter() - start
+
+    used = len(best.epoch_seconds)
+    per_epoch = float(np.mean(best.epoch_seconds)) if used else 0.0
+
+    return {'epochs': used,
+            'budget': epochs,
+            'best_epoch': None if best.best_epoch is None else best.best_epoch + 1,
+            'best_loss': None if best.best_epoch is None else best.best,
+            'monitor': monitor,
+            'seconds': seconds,
+            'saved_seconds': (epochs - used) * per_epoch}
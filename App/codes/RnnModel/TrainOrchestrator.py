@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+多股票并行训练
+
+RMBuiltModel.train_remaining_models 原先逐只股票训练 (新模型 500 轮, 有历史权重时 100 轮),
+30x30 的小 LeNet 单独训练时只用得上一两个核, 多核机器的大部分核空闲。
+
+TrainOrchestrator 用 TaskScheduler 的进程池同时训练多只股票:
+- 每个工作进程启动时限制 TensorFlow 的 intra-op / inter-op 线程数, 进程数 x 线程数不超过核数;
+- 进程以 spawn 方式启动 (TensorFlow 运行时不能安全地 fork), 每个进程训练 max_jobs_per_worker 只股票后重建, 释放显存 / 内存;
+  只有一个进程或只剩一只股票时也在工作进程中训练, 不在调用方进程内限制线程数;
+- rnn_model.trainrecord 作为任务台账: 开始前标记 running, 每只股票完成时立即写入 success / error 和时间,
+  中断后再次运行只会取 ModelCreate 不是 success 的股票; 同一股票已保存的模型跳过 (BuiltModel.model_all(resume=True));
+- 按数据新鲜度排序, ModelDataTiming 最近的股票先训练;
+- 报告总耗时、每只股票的耗时和 CPU 时间, 以及 CPU 利用率 (所有任务 CPU 时间 / (核数 x 总耗时))。
+"""
+import os
+import time
+
+import pandas as pd
+
+from ..MySql.LoadMysql import LoadRnnModel
+from App.codes.utils.TaskScheduler import TaskScheduler
+
+THREAD_ENV = ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def limit_threads(intra_threads: int, inter_threads: int):
+    """ 工作进程初始化: 限制 TensorFlow 和 BLAS 的线程数, 需在 TensorFlow 运行时初始化之前调用 """
+    for name in THREAD_ENV:
+        os.environ[name] = str(intra_threads)
+
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_threads)
+
+    try:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(intra_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+
+    except (ImportError, RuntimeError):  # 没有 TensorFlow, 或运行时已初始化 (只能依赖环境变量)
+        pass
+
+
+def train_stock(stock: str, months: str, resume: bool = True) -> dict:
+    """ 训练一只股票的全部模型, 返回耗时和本进程 CPU 时间 """
+    from .RnnCreationModel import BuiltModel
+
+    start, cpu = time.perf_counter(), time.process_time()
+    BuiltModel(stock, months).model_all(resume=resume)
+    return {'seconds': time.perf_counter() - start, 'cpu': time.process_time() - cpu}
+
+
+class TrainRecordLedger:
+    """ rnn_model.trainrecord 中的训练状态 """
+
+    def load(self) -> pd.DataFrame:
+        return LoadRnnModel.load_train_record()
+
+    def mark(self, ids, state: str, timing=None):
+        """ 把 ids 的 ModelCreate 改为 state """
+        ids = tuple(int(i) for i in ids)
+        if not ids:
+            return
+
+        sql = f''' ModelCreate = %s, ModelCreateTiming = %s where id in %s;'''
+        LoadRnnModel.set_table_train_record(sql, (state, timing or pd.Timestamp('now').date(), ids))
+
+
+class TrainOrchestrator:
+    """
+    months: 训练月份 (ParserMonth);
+    processes: 并行训练的进程数, 默认 CPU 核数 // intra_threads;
+    intra_threads / inter_threads: 每个进程的 TensorFlow 线程数;
+    max_jobs_per_worker: 每个进程训练多少只股票后重建;
+    job: 训练函数 job(stock, months) -> {'seconds', 'cpu'}, 需要能被 pickle;
+    ledger: 训练状态台账, 默认 TrainRecordLedger;
+    start_method: 进程启动方式;
+    """
+
+    def __init__(self, months: str, processes=None, intra_threads=1, inter_threads=1, max_jobs_per_worker=10,
+                 job=train_stock, ledger=None, start_method='spawn'):
+        self.months = months
+        self.intra_threads = intra_threads
+        self.inter_threads = inter_threads
+        self.processes = processes or max(1, (os.cpu_count() or 1) // intra_threads)
+
+        self.job = job
+        self.ledger = ledger or TrainRecordLedger()
+        self.scheduler = TaskScheduler(self.processes, max_tasks_per_worker=max_jobs_per_worker,
+                                       initializer=limit_threads, initargs=(intra_threads, inter_threads),
+                                       start_method=start_method, inline=False)
+
+        self.jobs = pd.DataFrame()
+        self.wall_time = 0.0
+
+    def pending_jobs(self) -> pd.DataFrame:
+        """ 本月训练数据已生成、模型未完成的股票, 数据最新的在前 """
+        records = self.ledger.load()
+        records = records[(records['ParserMonth'] == self.months) &
+                          (records['ModelData'] == 'success') &
+                          (records['ModelCreate'] != 'success')].copy()
+
+        records['freshness'] = pd.to_datetime(records['ModelDataTiming'], errors='coerce')
+        records = records.sort_values(['freshness', 'id'], ascending=[False, True], na_position='last')
+        return records.drop(columns='freshness').reset_index(drop=True)
+
+    def run(self) -> dict:
+        """ 训练全部待训练股票, 返回 report() """
+        self.jobs = self.pending_jobs()
+
+        if self.jobs.empty:
+            return self.report()
+
+        ids = self.jobs['id'].tolist()
+        self.jobs['state'], self.jobs['seconds'], self.jobs['cpu'] = 'running', None, None
+        self.ledger.mark(ids, 'running')
+
+        def on_result(index, ok, value):
+            # 每只股票完成时立即写台账, 中断后可从未完成的股票继续
+            state = 'success' if ok else 'error'
+            self.jobs.loc[index, 'state'] = state
+
+            if ok:
+                self.jobs.loc[index, ['seconds', 'cpu']] = value['seconds'], value['cpu']
+            else:
+                print(f'ModelCreate Error : {self.jobs.loc[index, "name"]}, {value["error"]}')
+
+            self.ledger.mark([ids[index]], state)
+
+        start = time.perf_counter()
+        tasks = [(name, self.months) for name in self.jobs['name']]
+        self.scheduler.run(self.job, tasks, name='train_model', on_result=on_result)
+        self.wall_time = time.perf_counter() - start
+
+        return self.report()
+
+    def report(self) -> dict:
+        """ 总耗时、任务数、每只股票耗时 / CPU 时间, CPU 利用率 = CPU 时间之和 / (核数 x 总耗时) """
+        done = self.jobs[self.jobs['state'] == 'success'] if 'state' in self.jobs else self.jobs
+        cpu = float(done['cpu'].sum()) if 'cpu' in done else 0.0
+        cores = os.cpu_count() or 1
+
+        return {'jobs': len(self.jobs),
+                'success': len(done),
+                'errors': len(self.jobs) - len(done),
+                'processes': self.processes,
+                'wall_time': self.wall_time,
+                'job_seconds': dict(zip(done['name'], done['seconds'])) if 'seconds' in done else {},
+                'cpu_time': cpu,
+                'cpu_utilisation': cpu / (cores * self.wall_time) if self.wall_time else 0.0}
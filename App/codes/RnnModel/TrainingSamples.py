@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+训练样本写入
+
+ModelData.data_common 原先对每个信号筛选一次整张 15m 表、np.append 一次 (每次复制全部已有样本, O(n²)),
+最后 _save_data 再整体写一遍, 整个股票池生成样本时内存和耗时都随样本数平方增长。
+
+write_training_samples:
+- 按 SignalTimes 分组一次, 先数出有效样本数 (x、y 各至少有一行完整数据);
+- 按总样本数写 .npy 文件头, 之后按块把样本顺序写入文件, 内存中只保留一个块;
+- 以前月份的样本 (mmap 读取) 先写入文件开头, 结果与原先 np.append 的顺序相同;
+- 写入临时文件, 完成后替换目标文件, 读取方不会看到写了一半的文件。
+
+样本矩阵与原实现相同: [Signal] + column_x 共 width 列、最后 height 行, 上下、左右补 0 居中。
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..parsers.RnnParser import *
+
+
+class NpyStreamWriter:
+    """
+    按已知的总行数写 .npy 文件, 行按块顺序追加。
+
+    path: 目标文件;
+    shape: 整个数组的形状, 第一维为总行数;
+    dtype: 数据类型 (不能是 object);
+    chunk: 每块的行数;
+    """
+
+    def __init__(self, path: str, shape: tuple, dtype, chunk: int = 1024):
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+        self.written = 0
+        self._tmp = f'{path}.tmp'
+        self._buffer = np.zeros((max(1, min(chunk, self.shape[0])),) + self.shape[1:], dtype=self.dtype)
+        self._used = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(self._tmp, 'wb')
+
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': self.shape}
+        np.lib.format.write_array_header_1_0(self._file, header)
+
+    def next_row(self) -> np.ndarray:
+        """ 返回下一行的缓冲区 (已置 0), 调用方原地填充 """
+        if self._used == len(self._buffer):
+            self._flush()
+
+        row = self._buffer[self._used]
+        row[...] = 0
+        self._used += 1
+        self.written += 1
+        return row
+
+    def write(self, rows: np.ndarray):
+        """ 直接写入多行 (例如以前月份的样本) """
+        self._flush()
+        for i in range(0, len(rows), len(self._buffer)):
+            np.ascontiguousarray(rows[i: i + len(self._buffer)], dtype=self.dtype).tofile(self._file)
+
+        self.written += len(rows)
+
+    def _flush(self):
+        if self._used:
+            self._buffer[:self._used].tofile(self._file)
+            self._used = 0
+
+    def close(self):
+        self._flush()
+        self._file.close()
+
+        if self.written != self.shape[0]:
+            os.remove(self._tmp)
+            raise ValueError(f'{self.path}: 写入 {self.written} 行, 文件头为 {self.shape[0]} 行')
+
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def signal_sample_rows(data_15m: pd.DataFrame, column_x: list, column_y: list, height: int) -> tuple:
+    """
+    每个有效信号对应的 (x 行号, y 行号), 顺序与 data_15m 中有 SignalChoice 的行相同。
+
+    返回 (samples, x_values, y_values): x_values 为 [Signal] + column_x 的矩阵, y_values 为 column_y 的矩阵。
+    """
+    x_values = data_15m[[Signal] + list(column_x)].to_numpy()
+    y_values = data_15m[list(column_y)].to_numpy()
+
+    x_ok = data_15m[list(column_x)].notna().all(axis=1).to_numpy()
+    y_ok = data_15m[list(column_y)].notna().all(axis=1).to_numpy()
+
+    groups = data_15m.groupby(SignalTimes, sort=False).indices
+    samples = []
+
+    for st in data_15m.loc[data_15m[SignalChoice].notna(), SignalTimes]:
+        rows = groups.get(st)
+        if rows is None:
+            continue
+
+        x_rows = rows[x_ok[rows]][-height:]
+        y_rows = rows[y_ok[rows]][-1:]
+
+        if len(x_rows) and len(y_rows):
+            samples.append((x_rows, y_rows[0]))
+
+    return samples, x_values, y_values
+
+
+def _load_previous(path):
+    try:
+        return np.load(path, mmap_mode='r')
+
+    except ValueError:  # object 数组不能 mmap
+        return np.load(path, allow_pickle=True)
+
+
+def write_training_samples(data_15m: pd.DataFrame, column_x: list, column_y: list, path_x: str, path_y: str,
+                           height: int = 30, width: int = 30, previous: tuple = None, chunk: int = 1024) -> tuple:
+    """
+    生成训练样本并写入 path_x / path_y, 返回 x 的形状。
+
+    previous: 以前月份样本文件 (path_x, path_y), 写在新样本之前; 没有时为 None;
+    """
+    samples, x_values, y_values = signal_sample_rows(data_15m, column_x, column_y, height)
+
+    columns = x_values.shape[1]
+    if columns > width:
+        raise ValueError(f'特征列数 {columns} 超过矩阵宽度 {width}')
+
+    w = width - columns
+    left = w - w // 2  # 与原实现相同, 左侧补 w - w // 2 列
+
+    pre_x = pre_y = None
+    if previous:
+        pre_x, pre_y = _load_previous(previous[0]), _load_previous(previous[1])
+
+    x_dtype, y_dtype = x_values.dtype, y_values.dtype
+    if pre_x is not None and pre_x.shape[0]:
+        x_dtype, y_dtype = np.result_type(x_dtype, pre_x.dtype), np.result_type(y_dtype, pre_y.dtype)
+
+    n_pre = pre_x.shape[0] if pre_x is not None else 0
+    total = n_pre + len(samples)
+    shape_x = (total, height, width, 1)
+    shape_y = (total, y_values.shape[1])
+
+    if total == 0 or x_dtype.hasobject or y_dtype.hasobject:
+        # 空结果或 object 列: 在内存中组装后保存
+        data_x, data_y = np.zeros(shape_x, dtype=x_dtype), np.zeros(shape_y, dtype=y_dtype)
+        if n_pre:
+            data_x[:n_pre], data_y[:n_pre] = pre_x, pre_y
+
+        for i, (x_rows, y_row) in enumerate(samples, n_pre):
+            top = (height - len(x_rows)) // 2
+            data_x[i, top: top + len(x_rows), left: left + columns, 0] = x_values[x_rows]
+            data_y[i] = y_values[y_row]
+
+        np.save(path_x, data_x, allow_pickle=x_dtype.hasobject)
+        np.save(path_y, data_y, allow_pickle=y_dtype.hasobject)
+        return shape_x
+
+    with NpyStreamWriter(path_x, shape_x, x_dtype, chunk) as writer_x, \
+            NpyStreamWriter(path_y, shape_y, y_dtype, chunk) as writer_y:
+
+        if n_pre:
+            writer_x.write(pre_x)
+            writer_y.write(pre_y)
+
+        for x_rows, y_row in samples:
+            top = (height - len(x_rows)) // 2
+            writer_x.next_row()[top: top + len(x_rows), left: left + columns, 0] = x_values[x_rows]
+            writer_y.next_row()[:] = y_values[y_row]
+
+    return shape_x
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+MACD 周期统计的 NumPy 向量化内核
+
+周期 (cycle) 由有效信号行切分: 第 i 个周期为 [starts[i], starts[i+1])，最后一个周期到数据末尾，
+第一个信号之前的行不属于任何周期。所有周期内的统计都用 reduceat / 累积和一次完成，
+1分钟成交量窗口用 searchsorted 定位，避免每个信号都对整张表做布尔筛选。
+
+这里只处理数组，不涉及列名；StatisticsMacd 负责把 DataFrame 的列映射到这些函数。
+"""
+import numpy as np
+
+# 单次 top-k 计算允许的最大矩阵元素数，超过后按行分块
+_TOPK_CHUNK_ELEMENTS = 4_000_000
+
+
+def segment_lengths(starts: np.ndarray, n: int) -> np.ndarray:
+    """ 每个周期的长度 """
+    return np.diff(np.append(starts, n))
+
+
+def segment_ids(starts: np.ndarray, n: int) -> np.ndarray:
+    """ 每一行所属的周期编号，第一个信号之前为 -1 """
+    ids = np.full(n, -1, dtype=np.int64)
+    if len(starts):
+        ids[starts[0]:] = np.repeat(np.arange(len(starts)), segment_lengths(starts, n))
+    return ids
+
+
+def segment_count(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """ 每个周期内 mask 为 True 的行数 (累积和差分) """
+    cs = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    ends = np.append(starts[1:], len(mask))
+    return cs[ends] - cs[starts]
+
+
+def segment_arg_extreme(values: np.ndarray, starts: np.ndarray, kind: str):
+    """
+    每个周期的最小/最大值及其第一次出现的位置 (与 pandas idxmin/idxmax 一致，忽略 NaN)。
+
+    返回:
+        (extreme, position): 全为 NaN 的周期返回 (NaN, -1)
+    """
+    n = len(values)
+    if len(starts) == 0:
+        return np.array([], dtype=float), np.array([], dtype=np.int64)
+
+    fill = np.inf if kind == 'min' else -np.inf
+    ufunc = np.minimum if kind == 'min' else np.maximum
+
+    offset = starts[0]
+    local_starts = starts - offset
+    v = np.asarray(values, dtype=float)[offset:]
+    v = np.where(np.isnan(v), fill, v)
+
+    extreme = ufunc.reduceat(v, local_starts)
+    hit = v == np.repeat(extreme, segment_lengths(local_starts, len(v)))
+    position = np.minimum.reduceat(np.where(hit, np.arange(len(v)), len(v)), local_starts) + offset
+
+    empty = extreme == fill
+    extreme = np.where(empty, np.nan, extreme)
+    position = np.where(empty, -1, position)
+    return extreme, position
+
+
+def window_bounds(sorted_dates: np.ndarray, left: np.ndarray, right: np.ndarray,
+                  left_closed: bool = False, right_closed: bool = True):
+    """
+    把时间窗口 (left, right] 换算为已排序时间数组上的切片 [lo, hi)。
+
+    NaT 窗口返回空切片。
+    """
+    lo = np.searchsorted(sorted_dates, left, side='left' if left_closed else 'right')
+    hi = np.searchsorted(sorted_dates, right, side='right' if right_closed else 'left')
+
+    invalid = np.isnat(left) | np.isnat(right)
+    hi = np.where(invalid | (hi < lo), lo, hi)
+    return lo, hi
+
+
+def window_topk_mean(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, ks=(1, 5)) -> dict:
+    """
+    每个切片 values[lo:hi] 中最大的 k 个值的均值 (切片不足 k 个时取全部)。
+
+    返回:
+        dict: k -> 均值数组，空切片为 NaN
+    """
+    values = np.asarray(values, dtype=float)
+    counts = hi - lo
+    n = len(lo)
+    out = {k: np.full(n, np.nan) for k in ks}
+
+    width = int(counts.max()) if n else 0
+    if width == 0:
+        return out
+
+    k_max = max(ks)
+    chunk = max(1, _TOPK_CHUNK_ELEMENTS // width)
+    cols = np.arange(width)
+
+    for a in range(0, n, chunk):
+        b = min(a + chunk, n)
+        idx = lo[a:b, None] + cols
+        valid = cols < counts[a:b, None]
+        block = np.where(valid, values[np.minimum(idx, len(values) - 1)], -np.inf)
+
+        # 降序排列后前 k 列即为最大的 k 个值
+        top = -np.sort(-block, axis=1)[:, :k_max]
+        top = np.where(np.isfinite(top), top, 0.0)
+        csum = np.cumsum(top, axis=1)
+
+        for k in ks:
+            kk = np.minimum(counts[a:b], k)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = csum[np.arange(b - a), np.maximum(kk, 1) - 1] / kk
+            out[k][a:b] = np.where(kk > 0, mean, np.nan)
+
+    return out
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+股票池的面板 (K 线 × 股票) 信号计算
+
+SignalMethod 的 trend_MACD / trend_3ema_MACDBoll / ema3_MACDBoll 每只股票各走一遍 DataFrame 流程,
+股票池有几百只股票时大部分时间花在 pandas 的逐只调用上。SignalPanel 把整个股票池放进二维矩阵一次算完:
+- 每只股票的 K 线靠下对齐, 最后一行是各自最新的 K 线, 上方不足的部分为 NaN;
+- 均线 / 标准差对整个矩阵调用一次 rolling (min_periods=1, 上方的 NaN 不计数), 与逐只计算逐位一致;
+- 信号、有效信号、周期的结束价按列优先展平后用 MacdCycleEngine 的分段函数计算, 每只股票的第一行也作为分段起点,
+  周期不会跨到下一只股票;
+- 前向填充沿时间方向对所有股票一次完成。
+
+columns 中是各列的矩阵, latest() 取每只股票最新一根 K 线; frame(code) 还原为与 SignalMethod 相同的逐只 DataFrame。
+macd_boll 与 calculate_MACD + Bollinger 相同, 供 Distinguish_utils.calculate_distinguish_panel 计算整个板块池的趋势图数据。
+signal_by_MACD_3ema 还需要每只股票各自的 1m 成交量窗口, 不在面板中计算。
+"""
+import numpy as np
+import pandas as pd
+
+import MacdCycleEngine as engine
+from App.codes.parsers.MacdParser import (EmaShort, EmaMid, EmaLong, Dif, DifSm, DifMl, Dea, macd_,
+                                          Signal, SignalChoice, SignalTimes, SignalStartIndex, up, down, upInt, downInt,
+                                          EndPrice, EndPriceIndex, StartPrice, StartPriceIndex)
+from App.codes.parsers.BollingerParser import BollMid, BollStd, BollUp, BollDn, StopLoss
+
+MACD_COLUMNS = [EmaShort, EmaMid, EmaLong, Dif, DifSm, DifMl, Dea, macd_]
+BOLL_COLUMNS = [BollMid, BollStd, BollUp, BollDn, StopLoss]
+CYCLE_COLUMNS = [EndPrice, EndPriceIndex, StartPrice, StartPriceIndex]
+
+
+def ffill(values: np.ndarray) -> np.ndarray:
+    """ 沿行方向 (时间) 前向填充每一列的空值 """
+    rows = np.arange(len(values))[:, None]
+    last = np.maximum.accumulate(np.where(pd.isna(values), -1, rows), axis=0)
+    filled = values[np.maximum(last, 0), np.arange(values.shape[1])]
+    return np.where(last >= 0, filled, values)
+
+
+def rolling(values: np.ndarray, window: int, how: str = 'mean') -> np.ndarray:
+    """ 每一列的 rolling(window, min_periods=1), 与逐列的 Series.rolling 相同 """
+    return getattr(pd.DataFrame(values).rolling(window, min_periods=1), how)().to_numpy()
+
+
+class SignalPanel:
+    """
+    股票池的面板信号计算。
+
+    frames: {股票代码: 按时间排序的 K 线数据}, 需包含 date, close, high, low 列
+    """
+
+    def __init__(self, frames: dict):
+        self.frames = frames
+        self.codes = list(frames)
+        self.position = {code: j for j, code in enumerate(self.codes)}
+
+        lengths = np.array([len(frame) for frame in frames.values()], dtype=np.int64)
+        self.rows = int(lengths.max()) if len(lengths) else 0
+        self.offsets = self.rows - lengths  # 每只股票第一根 K 线所在的行
+
+        shape = (self.rows, len(self.codes))
+        self.dates = np.full(shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self.close, self.high, self.low = np.full(shape, np.nan), np.full(shape, np.nan), np.full(shape, np.nan)
+
+        for j, frame in enumerate(frames.values()):
+            start = self.offsets[j]
+            self.dates[start:, j] = frame['date'].to_numpy(dtype='datetime64[ns]')
+            self.close[start:, j] = frame['close'].to_numpy(dtype=float)
+            self.high[start:, j] = frame['high'].to_numpy(dtype=float)
+            self.low[start:, j] = frame['low'].to_numpy(dtype=float)
+
+        self.columns = {}
+        self.method = None
+
+    # 按列优先展平: 第 j 只股票的第 i 行在位置 j * rows + i
+    def _flat(self, values: np.ndarray) -> np.ndarray:
+        return values.T.ravel()
+
+    def _unflat(self, values: np.ndarray) -> np.ndarray:
+        return values.reshape(len(self.codes), self.rows).T
+
+    def _segments(self, signal_flat: np.ndarray):
+        """ 信号位置, 以及加上每只股票起点后的分段起点 """
+        signals = np.flatnonzero(~np.isnan(signal_flat))
+        column_starts = np.arange(len(self.codes), dtype=np.int64) * self.rows
+        starts = np.union1d(signals, column_starts)
+        return signals, starts, np.searchsorted(starts, signals)
+
+    def calculate_MACD(self, s=12, m=20, l=30, em=9):
+        """ 与 calculate_MACD 相同的各列 """
+        ema_short, ema_mid, ema_long = rolling(self.close, s), rolling(self.close, m), rolling(self.close, l)
+        dif = ema_short - ema_long
+        dea = rolling(dif, em)
+
+        self.columns.update({EmaShort: ema_short, EmaMid: ema_mid, EmaLong: ema_long,
+                             Dif: dif, DifSm: ema_short - ema_mid, DifMl: ema_mid - ema_long,
+                             Dea: dea, macd_: (dif - dea) * 2})
+        return self
+
+    def _remark_MACD(self) -> np.ndarray:
+        """ 与 CountMACD.remark_MACD 相同: MACD 由正转负为下跌信号, 由负转正为上涨信号 """
+        macd = self.columns[macd_]
+        following = np.full_like(macd, np.nan)
+        following[:-1] = macd[1:]
+
+        signal = np.full_like(macd, np.nan)
+        signal[(macd > 0) & (following < 0)] = downInt
+        signal[(macd < 0) & (following > 0)] = upInt
+        return signal
+
+    def _find_effect_MACD(self, signal: np.ndarray) -> np.ndarray:
+        """ 与 CountMACD.find_effect_MACD 相同: 同向 bar 少于 7 根的信号无效, 再删除与上一个有效信号相同的信号 """
+        signal_flat = self._flat(signal)
+        signals, starts, at = self._segments(signal_flat)
+
+        up_count = engine.segment_count(self._flat((self.columns[DifMl] > 0) & (self.columns[DifSm] > 0)), starts)[at]
+        down_count = engine.segment_count(self._flat((self.columns[DifMl] < 0) & (self.columns[DifSm] < 0)), starts)[at]
+        counts = np.where(signal_flat[signals] == upInt, up_count, down_count)
+
+        signal_flat[signals[counts < 7]] = np.nan
+
+        # 每只股票内与上一个有效信号比较, 第一个与最后一个比较 (与 np.roll 的逐只实现一致)
+        effect = signals[counts >= 7]
+        if effect.size:
+            values = signal_flat[effect]
+            stock = effect // self.rows
+            first = np.append(True, stock[1:] != stock[:-1])
+            last = np.append(stock[1:] != stock[:-1], True)
+
+            previous = np.roll(values, 1)
+            previous[first] = values[last]
+            signal_flat[effect[values == previous]] = np.nan
+
+        return self._unflat(signal_flat)
+
+    def count_MACD(self):
+        """ 与 CountMACD.count_MACD 相同; 另外记录每只股票是否有信号, 用于还原 frame() 中的列类型 """
+        self.calculate_MACD()
+
+        raw = self._remark_MACD()
+        signal = self._find_effect_MACD(raw.copy())
+        is_signal = ~np.isnan(signal)
+
+        choice = np.full(signal.shape, None, dtype=object)
+        choice[signal == downInt] = down
+        choice[signal == upInt] = up
+
+        rows = np.broadcast_to(np.arange(self.rows, dtype=float)[:, None], signal.shape)
+        self.columns.update({
+            Signal: ffill(signal),
+            SignalChoice: choice,
+            SignalTimes: ffill(np.where(is_signal, rows, np.nan)),  # 信号所在的行, frame() 中转为时间字符串
+            SignalStartIndex: ffill(np.where(is_signal, self.dates, np.datetime64('NaT'))),
+        })
+        self.has_raw_signal = (~np.isnan(raw)).any(axis=0)
+        self.has_signal = is_signal.any(axis=0)
+        return self
+
+    def find_start_end_index(self):
+        """ 与 StatisticsMACD.find_start_end_index 相同: 下跌周期取最低价, 上涨周期取最高价, 每只股票的第一个周期不计算 """
+        choice_flat = self._flat(self.columns[SignalChoice])
+        signal_flat = np.where(pd.isna(choice_flat), np.nan, 0.0)
+        signals, starts, at = self._segments(signal_flat)
+
+        low, low_pos = engine.segment_arg_extreme(self._flat(self.low), starts, 'min')
+        high, high_pos = engine.segment_arg_extreme(self._flat(self.high), starts, 'max')
+
+        is_down = choice_flat[signals] == down
+        end_price = np.where(is_down, low[at], high[at])
+        end_pos = np.where(is_down, low_pos[at], high_pos[at])
+
+        stock = signals // self.rows
+        first = np.append(True, stock[1:] != stock[:-1]) if signals.size else np.array([], dtype=bool)
+        end_price[first] = np.nan
+        end_pos[first] = -1
+
+        dates_flat = self._flat(self.dates)
+        end_index = np.where(end_pos >= 0, dates_flat[np.maximum(end_pos, 0)], np.datetime64('NaT'))
+
+        start_price = np.roll(end_price, 1)
+        start_index = np.roll(end_index, 1)
+        start_price[first] = np.nan
+        start_index[first] = np.datetime64('NaT')
+
+        for column, values in ((EndPrice, end_price), (EndPriceIndex, end_index),
+                               (StartPrice, start_price), (StartPriceIndex, start_index)):
+            if column in (EndPriceIndex, StartPriceIndex):
+                full = np.full(dates_flat.shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+            else:
+                full = np.full(dates_flat.shape, np.nan)
+            full[signals] = values
+            self.columns[column] = ffill(self._unflat(full))
+
+        return self
+
+    def bollinger(self, ma_mid=20):
+        """ 与 Bollinger 相同的各列 """
+        mid, std = rolling(self.close, ma_mid), rolling(self.close, ma_mid, 'std')
+        up_, dn = mid + 2 * std, mid - 2 * std
+        self.columns.update({BollMid: mid, BollStd: std, BollUp: up_, BollDn: dn, StopLoss: np.round(dn - 2 * std, 2)})
+        return self
+
+    def trend_MACD(self):
+        self.method = 'trend_MACD'
+        return self.count_MACD()
+
+    def trend_3ema_MACDBoll(self):
+        self.method = 'trend_3ema_MACDBoll'
+        return self.count_MACD().find_start_end_index().bollinger()
+
+    def ema3_MACDBoll(self):
+        self.method = 'ema3_MACDBoll'
+        return self.count_MACD().bollinger()
+
+    def macd_boll(self):
+        """ 与 calculate_MACD 后再 Bollinger 相同, 不计算信号 """
+        self.method = 'macd_boll'
+        return self.calculate_MACD().bollinger()
+
+    def latest(self, columns=None) -> pd.DataFrame:
+        """ 每只股票最新一根 K 线的各列 (索引为股票代码) """
+        columns = columns or [c for c in self.columns if c not in (SignalChoice, SignalTimes)]
+        return pd.DataFrame({column: self.columns[column][-1] for column in columns}, index=self.codes)
+
+    def frame(self, code) -> pd.DataFrame:
+        """ 还原为 SignalMethod 对这只股票的输出 """
+        j = self.position[code]
+        start = self.offsets[j]
+        frame = self.frames[code]
+
+        if self.method == 'macd_boll':
+            columns = {column: self.columns[column][start:, j] for column in MACD_COLUMNS + BOLL_COLUMNS}
+            added = pd.DataFrame(columns, index=frame.index)
+            return pd.concat([frame.drop(columns=list(columns), errors='ignore'), added], axis=1)
+
+        columns = {column: self.columns[column][start:, j] for column in MACD_COLUMNS + [Signal]}
+
+        if self.has_raw_signal[j]:
+            # 有信号时 find_effect_MACD 把这两列重置为 None; 只格式化信号所在的行
+            rows = self.columns[SignalTimes][start:, j]
+            valid = ~np.isnan(rows)
+            signal_rows = np.unique(rows[valid].astype(np.int64))
+            labels = pd.DatetimeIndex(self.dates[signal_rows, j]).strftime('%Y%m%d%H%M').to_numpy(dtype=object)
+
+            times = np.full(len(rows), None, dtype=object)
+            times[valid] = labels[np.searchsorted(signal_rows, rows[valid].astype(np.int64))]
+            columns[SignalChoice], columns[SignalTimes] = self.columns[SignalChoice][start:, j], times
+        else:
+            # 没有信号时两列由空的 .loc 赋值生成, 全为 NaN
+            columns[SignalChoice] = np.full(len(frame), np.nan, dtype=object)
+            columns[SignalTimes] = np.full(len(frame), np.nan)
+
+        columns[SignalStartIndex] = self.columns[SignalStartIndex][start:, j]
+
+        if self.method == 'trend_3ema_MACDBoll' and self.has_signal[j]:
+            columns.update({column: self.columns[column][start:, j] for column in CYCLE_COLUMNS})
+        if self.method != 'trend_MACD':
+            columns.update({column: self.columns[column][start:, j] for column in BOLL_COLUMNS})
+
+        added = pd.DataFrame(columns, index=frame.index)
+        data = pd.concat([frame.drop(columns=list(columns), errors='ignore'), added], axis=1)
+
+        if self.method == 'trend_MACD':
+            return data[[Signal, SignalChoice, SignalTimes, 'date']]
+
+        if self.method == 'trend_3ema_MACDBoll':
+            # find_start_end_index 先 set_index('date') 再 reset_index, date 移到第一列
+            data = data.set_index('date', drop=True).reset_index()
+        return data
+
+    def frames_by_code(self) -> dict:
+        """ {股票代码: SignalMethod 的输出} """
+        return {code: self.frame(code) for code in self.codes}
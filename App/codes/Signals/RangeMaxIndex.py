@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+1分钟成交量的区间最大值索引
+
+Bar1mVolMax1 / Bar1mVolMax5 是每根 15m K 线前 15 分钟内 1m 成交量最大的 1 个 / 5 个的均值。
+RnnRunModel.UpdateData.Bar1mVolumeMax、ProcessTrainingData / Data15MOriginal / RnnCreationData 的
+find_bar_max_1m 和 StatisticsMacd.find_Bar1mMax 原先对每根 K 线 apply 一次, 每次都对整张 1m 表做布尔筛选、
+排序再取均值, 耗时为 O(K 线数 × 1m 行数)。
+
+RangeMaxIndex 是稀疏表 (sparse table): O(n log n) 预处理后, 任意区间 [lo, hi) 的最大值为两段重叠的
+2 的幂长度区间的最大值, 查询 O(1), 可以建在任意数值序列上。
+
+Volume1mIndex 把 1m 数据按时间排序一次, 用 searchsorted 把每个时间窗口换算成切片:
+- num=1 直接查稀疏表;
+- num>1 取切片中最大的 num 个值的均值 (MacdCycleEngine.window_topk_mean, 15 分钟窗口最多 15 行);
+- NaN 成交量有两种口径: 'skip' 与 nlargest 相同, 忽略 NaN; 'last' 与 sort_values().tail(num).mean() 相同,
+  NaN 排在最后会先占用 tail 的名额, 窗口内有 m 个 NaN 时只取最大的 num - m 个值。
+"""
+import numpy as np
+import pandas as pd
+
+import MacdCycleEngine as engine
+
+
+class RangeMaxIndex:
+    """ 稀疏表, 区间最大值查询 O(1); NaN 不参与比较, 区间为空或全为 NaN 时返回 NaN """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        values = np.where(np.isnan(values), -np.inf, values)
+        n = len(values)
+
+        levels = max(1, n.bit_length())
+        self.table = np.full((levels, n), -np.inf)
+        self.table[0] = values
+
+        for j in range(1, levels):
+            step = 1 << (j - 1)
+            self.table[j, :n - step] = np.maximum(self.table[j - 1, :n - step], self.table[j - 1, step:])
+
+        # log2[length]: 不超过 length 的最大 2 的幂的指数
+        self.log2 = np.zeros(n + 1, dtype=np.int64)
+        self.log2[2:] = np.floor(np.log2(np.arange(2, n + 1))).astype(np.int64)
+
+    def __len__(self):
+        return self.table.shape[1]
+
+    def query(self, lo, hi) -> np.ndarray:
+        """ 每个 [lo[i], hi[i]) 的最大值 """
+        lo, hi = np.asarray(lo, dtype=np.int64), np.asarray(hi, dtype=np.int64)
+        length = hi - lo
+        result = np.full(lo.shape, np.nan)
+
+        ok = length > 0
+        if ok.any():
+            j = self.log2[length[ok]]
+            value = np.maximum(self.table[j, lo[ok]], self.table[j, hi[ok] - (1 << j)])
+            result[ok] = np.where(np.isinf(value) & (value < 0), np.nan, value)
+
+        return result
+
+
+class Volume1mIndex:
+    """
+    1m 成交量按时间窗口查询最大值 / 最大 num 个值的均值。
+
+    dates / volumes: 1m 的时间和成交量, 不要求有序
+    """
+
+    def __init__(self, dates, volumes):
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        volumes = np.asarray(volumes, dtype=float)
+        order = np.argsort(dates, kind='stable')
+
+        self.dates, self.volumes = dates[order], volumes[order]
+
+        missing = np.isnan(self.volumes)
+        self.nan_prefix = np.concatenate(([0], np.cumsum(missing)))
+
+        self.valid_dates, self.valid_volumes = self.dates[~missing], self.volumes[~missing]
+        self.max_index = RangeMaxIndex(self.valid_volumes)
+
+    @classmethod
+    def from_frame(cls, data_1m: pd.DataFrame) -> 'Volume1mIndex':
+        return cls(data_1m['date'].to_numpy(dtype='datetime64[ns]'), data_1m['volume'].to_numpy(dtype=float))
+
+    def _windows(self, ends, minutes):
+        ends = pd.to_datetime(pd.Series(np.asarray(ends).ravel())).to_numpy(dtype='datetime64[ns]')
+        return ends - np.timedelta64(minutes, 'm'), ends
+
+    def top_mean(self, ends, num: int, minutes: int = 15, right_closed: bool = False, nan_policy: str = 'skip'):
+        """
+        每个窗口 (end - minutes, end) 内最大的 num 个成交量的均值, right_closed 时窗口包含 end。
+
+        不足 num 个时取全部, 没有数据时为 NaN; nan_policy 见模块说明
+        """
+        starts, ends = self._windows(ends, minutes)
+        lo, hi = engine.window_bounds(self.valid_dates, starts, ends, right_closed=right_closed)
+
+        if nan_policy == 'last':
+            nan_lo, nan_hi = engine.window_bounds(self.dates, starts, ends, right_closed=right_closed)
+            k = num - (self.nan_prefix[nan_hi] - self.nan_prefix[nan_lo])
+        elif nan_policy == 'skip':
+            k = np.full(len(lo), num)
+        else:
+            raise ValueError(f'未知的 nan_policy: {nan_policy}')
+
+        if num == 1:
+            result = self.max_index.query(lo, hi)
+        else:
+            top = engine.window_topk_mean(self.valid_volumes, lo, hi, ks=range(1, num + 1))
+            table = np.stack([top[j] for j in range(1, num + 1)], axis=1)
+            result = table[np.arange(len(lo)), np.clip(k, 1, num) - 1]
+
+        return np.where(k >= 1, result, np.nan)
+
+    def window_max(self, ends, minutes: int = 15, right_closed: bool = False) -> np.ndarray:
+        """ 每个窗口内成交量的最大值 (忽略 NaN) """
+        return self.top_mean(ends, 1, minutes, right_closed)
+
+    def window_count(self, ends, minutes: int = 15, right_closed: bool = False) -> np.ndarray:
+        """ 每个窗口内的 1m 行数 (含 NaN 成交量) """
+        starts, ends = self._windows(ends, minutes)
+        lo, hi = engine.window_bounds(self.dates, starts, ends, right_closed=right_closed)
+        return hi - lo
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import numpy as np
 import pandas as pd
 from MacdSignal import calculate_MACD
+import MacdCycleEngine as engine
+from RangeMaxIndex import Volume1mIndex
 
 from BollingerSignal import Bollinger
 from App.my_code.parsers.MacdParser import *
@@ -76,44 +79,35 @@ class CountMACD:
         - pd.DataFrame, 处理后的数据，其中无效的信号已被标记为 None
 
         功能:
-        1. 去除 Signal 列中为空的数据行。
-        2. 根据上涨和下跌信号，计算 DifMl 和 DifSm 列中的数据是否符合条件。
-        3. 删除满足特定条件的信号（如不满足条件的信号和连续相同的信号）。
+        1. 以信号行为边界切分周期，用累积和统计每个周期内 DifMl、DifSm 同向的 bar 数量。
+        2. 同向 bar 少于 7 根的信号视为无效。
+        3. 删除与上一个有效信号相同的信号 (第一个信号与最后一个信号比较，与原逐行实现一致)。
         4. 重置 SignalTimes 和 SignalChoice 列，以便进一步统计。
         """
 
-        # 去除 Signal 列中为空的数据行，得到一个新的 DataFrame df
-        df = data.dropna(subset=[Signal])
+        signal = data[Signal].to_numpy(dtype=float)
+        starts = np.flatnonzero(~np.isnan(signal))
 
-        # 如果 df 为空，则返回原始数据（或进行其他处理）
-        if df.empty:
+        # 如果没有信号，则返回原始数据
+        if starts.size == 0:
             return data
 
-        for index in df.index:
-            signal_times = data.loc[index, SignalTimes]
-            signal = data.loc[index, Signal]
-            condition = data[SignalTimes] == signal_times
+        dif_ml = data[DifMl].to_numpy(dtype=float)
+        dif_sm = data[DifSm].to_numpy(dtype=float)
 
-            diffs = data[condition & (data[DifMl] > 0) & (data[DifSm] > 0)].shape[0] if signal == upInt else \
-                    data[condition & (data[DifMl] < 0) & (data[DifSm] < 0)].shape[0]
-
-            if diffs < 7:
-                data.loc[index, Signal] = None
+        up_count = engine.segment_count((dif_ml > 0) & (dif_sm > 0), starts)
+        down_count = engine.segment_count((dif_ml < 0) & (dif_sm < 0), starts)
+        counts = np.where(signal[starts] == upInt, up_count, down_count)
 
+        signal[starts[counts < 7]] = np.nan
 
         # 删除连续相同的信号
-        drop = data.dropna(subset=[Signal])
-
-        if not drop.empty:
-
-            for i, index in zip(range(drop.shape[0]), drop.index):
+        effect = starts[counts >= 7]
+        if effect.size:
+            values = signal[effect]
+            signal[effect[values == np.roll(values, 1)]] = np.nan
 
-                try:
-                    if drop.iloc[i][Signal] == drop.iloc[i - 1][Signal]:
-                        data.loc[index, Signal] = None
-
-                except ValueError:
-                    pass
+        data[Signal] = signal
 
         # 重置统计列
         data[SignalTimes] = None  # 第2次统计出 涨跌次数
@@ -163,6 +157,51 @@ class CountMACD:
 
 class StatisticsMACD:
 
+    @classmethod
+    def _cycle_end_price(cls, data: pd.DataFrame, starts: np.ndarray):
+        """
+        计算每个周期的结束价及其位置: 下跌周期取最低价, 上涨周期取最高价。
+        第一个周期没有完整的前序周期, 与原实现一致不计算。
+        """
+        low, low_pos = engine.segment_arg_extreme(data['low'].to_numpy(dtype=float), starts, 'min')
+        high, high_pos = engine.segment_arg_extreme(data['high'].to_numpy(dtype=float), starts, 'max')
+
+        is_down = (data[SignalChoice].to_numpy()[starts] == down)
+        end_price = np.where(is_down, low, high)
+        end_pos = np.where(is_down, low_pos, high_pos)
+
+        end_price[0] = np.nan
+        end_pos[0] = -1
+        return end_price, end_pos
+
+    @classmethod
+    def _set_start_end(cls, data: pd.DataFrame, starts: np.ndarray, end_price, end_pos, extra: dict = None):
+        """ 把信号行上的结束价写入数据, 起始价为上一个信号的结束价, 然后前向填充 """
+        n = len(data)
+        index = data.index.to_numpy()
+        end_index = np.where(end_pos >= 0, index[np.maximum(end_pos, 0)], np.datetime64('NaT'))
+
+        columns = {EndPrice: (end_price, np.nan), EndPriceIndex: (end_index, np.datetime64('NaT'))}
+        columns.update(extra or {})
+
+        fills = list(columns)
+        for column, (values, empty) in columns.items():
+            full = np.full(n, empty, dtype=np.asarray(values).dtype)
+            full[starts] = values
+            data[column] = full
+
+        start_price = np.full(n, np.nan)
+        start_price[starts[1:]] = end_price[:-1]
+        start_index = np.full(n, np.datetime64('NaT'), dtype=end_index.dtype)
+        start_index[starts[1:]] = end_index[:-1]
+
+        data[StartPrice] = start_price
+        data[StartPriceIndex] = start_index
+
+        fills = [EndPrice, EndPriceIndex, StartPrice, StartPriceIndex] + fills[2:]
+        data[fills] = data[fills].ffill()
+        return data
+
     @classmethod
     def find_start_end_index(cls, data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -178,41 +217,16 @@ class StatisticsMACD:
         # 设置 'date' 列为索引
         data = data.set_index('date', drop=True)
 
-        # 删除 'SignalChoice' 列中含有缺失值的行
-        drops = data.dropna(subset=[SignalChoice])
+        # 信号行即周期的起点
+        starts = np.flatnonzero(data[SignalChoice].notna().to_numpy())
 
-        if drops.empty:
+        if starts.size == 0:
             # 如果没有有效数据，直接返回
             data = data.reset_index()
             return data
 
-        # 计算结束价格和结束价格索引
-        for i, index in zip(range(drops.shape[0]), drops.index):
-
-            if i > 0:
-                choice_ = data.loc[index, SignalChoice]
-                times_ = data.loc[index, SignalTimes]  # signal_times
-
-                if choice_ == down:
-                    end_price = data[data[SignalTimes] == times_]['low'].min()
-                    end_price_id = data[data[SignalTimes] == times_]['low'].idxmin()
-
-                else:
-                    end_price = data[data[SignalTimes] == times_]['high'].max()
-                    end_price_id = data[data[SignalTimes] == times_]['high'].idxmax()
-
-                # 设置结束价格和结束价格索引
-                data.loc[index, EndPrice] = end_price  # '结束价'
-                data.loc[index, EndPriceIndex] = end_price_id  # '结束价_index'
-
-        # find start price & start price id;
-        con1 = (~data[SignalChoice].isnull())
-        data.loc[con1, StartPrice] = data[con1][EndPrice].shift(1)
-        data.loc[con1, StartPriceIndex] = data[con1][EndPriceIndex].shift(1)
-
-        # fill nan
-        fills = [EndPrice, EndPriceIndex, StartPrice, StartPriceIndex]
-        data[fills] = data[fills].fillna(method='ffill')
+        end_price, end_pos = cls._cycle_end_price(data, starts)
+        data = cls._set_start_end(data, starts, end_price, end_pos)
 
         # reset 'date' to column
         data = data.reset_index()
@@ -235,35 +249,19 @@ class StatisticsMACD:
         # 将'date'列设为索引，并删除原来的'date'列
         data = data.set_index('date', drop=True)
 
-        # 删除'SignalChoice'列为空的行
-        drops = data.dropna(subset=[SignalChoice])
-
-        for i, index in zip(range(len(drops)), drops.index):
-
-            if i > 0:  # 从第二个信号开始处理
-                signal_ = data.loc[index, SignalChoice]
-                times_ = data.loc[index, SignalTimes]  # signal_times
+        starts = np.flatnonzero(data[SignalChoice].notna().to_numpy())
 
-                if signal_ == down:
-                    end_price = data[data[SignalTimes] == times_]['low'].min()
-                    end_price_id = data[data[SignalTimes] == times_]['low'].idxmin()
+        if starts.size == 0:
+            return data.reset_index()
 
-                else:
-                    end_price = data[data[SignalTimes] == times_]['high'].max()
-                    end_price_id = data[data[SignalTimes] == times_]['high'].idxmax()
+        end_price, end_pos = cls._cycle_end_price(data, starts)
 
-                data.loc[index, EndPrice] = end_price  # '结束价'
-                data.loc[index, EndPriceIndex] = end_price_id  # '结束价_index'
-                data.loc[index, 'EndDaily1mVolMax5'] = data.loc[end_price_id, 'Daily1mVolMax5']
+        # 结束价所在 bar 的日内 1m 最大成交量
+        daily_max5 = data['Daily1mVolMax5'].to_numpy(dtype=float)
+        end_daily = np.where(end_pos >= 0, daily_max5[np.maximum(end_pos, 0)], np.nan)
 
-        # 计算每个信号的起始价格和起始价格索引
-        condition = (~data[SignalChoice].isnull())
-        data.loc[condition, StartPrice] = data[condition][EndPrice].shift(1)
-        data.loc[condition, StartPriceIndex] = data[condition][EndPriceIndex].shift(1)
-
-        # 将结果进行前向填充，填补缺失值
-        fills = [EndPrice, EndPriceIndex, StartPrice, StartPriceIndex, 'EndDaily1mVolMax5']
-        data[fills] = data[fills].ffill()
+        data = cls._set_start_end(data, starts, end_price, end_pos,
+                                  extra={'EndDaily1mVolMax5': (end_daily, np.nan)})
 
         # 将索引重置回原来的状态
         data = data.reset_index()
@@ -300,7 +298,7 @@ class StatisticsMACD:
         return data
 
     @classmethod
-    def s_Cycle1mVolumeMax(cls, data: pd.DataFrame, data1m: pd.DataFrame) -> pd.DataFrame:
+    def s_Cycle1mVolumeMax(cls, data: pd.DataFrame, data1m: pd.DataFrame, index: Volume1mIndex = None) -> pd.DataFrame:
 
         """
          计算每个信号周期内的1分钟最大成交量，以及基于该成交量的5分钟平均成交量。
@@ -308,40 +306,42 @@ class StatisticsMACD:
          参数:
          - code_data (pd.DataFrame): 包含信号数据的数据集，必须包含 'SignalChoice', 'SignalTimes', 'EndPriceIndex', 'date' 等列。
          - data1m (pd.DataFrame): 包含1分钟成交量数据的数据集，必须包含 'date' 和 'volume' 列。
+         - index (Volume1mIndex): data1m 的成交量索引，不传时由 data1m 建立。
 
          返回:
          - pd.DataFrame: 添加了 'Cycle1mVolMax1' 和 'Cycle1mVolMax5' 列的 code_data 数据集。
+
+         窗口: 结束价时间之前周期内倒数第 5 根 bar 起 (不足 5 根时从结束价当天 0 点起) 到结束价时间为止。
          """
 
-        # 筛选出 SignalChoice 不为空的行
-        conditions = (~data[SignalChoice].isnull())
+        starts = np.flatnonzero(data[SignalChoice].notna().to_numpy())
+        if starts.size == 0:
+            return data
 
-        for index in data[conditions].index:
-            st = data.loc[index, SignalTimes]  # 获取当前信号的时间
-            ed_time = data.loc[index, EndPriceIndex]  # 获取当前信号结束的时间
+        n = len(data)
+        dates = data['date'].to_numpy(dtype='datetime64[ns]')
+        ends = np.append(starts[1:], n)
+        ed_time = data[EndPriceIndex].to_numpy(dtype='datetime64[ns]')[starts]
 
-            # 获取在该信号时间段内的数据
-            selects = data[(data[SignalTimes] == st) & (data['date'] < ed_time)]
+        # 周期内结束价时间之前的 bar 数量 (15m 数据按时间排序)
+        before = np.clip(np.searchsorted(dates, ed_time, side='left') - starts, 0, ends - starts)
+        before = np.where(np.isnat(ed_time), 0, before)
 
-            if len(selects) > 5:  # 如果信号时间段内的数据超过5条
-                # 获取倒数第5条数据的时间，作为开始时间
-                st_time = data[(data[SignalTimes] == st) &
-                               (data['date'] < ed_time)].iloc[-5]['date']
-            else:
-                # 否则，使用结束时间当天的日期作为开始时间
-                st_time = pd.to_datetime(ed_time.date())
+        day_start = ed_time.astype('datetime64[D]').astype('datetime64[ns]')
+        fifth_last = dates[np.clip(starts + before - 5, 0, n - 1)]
+        st_time = np.where(before > 5, fifth_last, day_start)
 
-            # 计算从开始时间到结束时间内，1分钟成交量的最大值
-            max1 = data1m[(data1m['date'] > st_time) &
-                          (data1m['date'] <= ed_time)].sort_values(by=['volume']).tail(1)['volume'].mean()
+        if index is None:
+            index = Volume1mIndex.from_frame(data1m)
 
-            # 计算从开始时间到结束时间内，1分钟成交量的最大5个值的平均值
-            max5 = data1m[(data1m['date'] > st_time) &
-                          (data1m['date'] <= ed_time)].sort_values(by=['volume']).tail(5)['volume'].mean()
+        lo, hi = engine.window_bounds(index.dates, st_time, ed_time)
+        top = engine.window_topk_mean(index.volumes, lo, hi, ks=(1, 5))
 
-            # 将计算出的最大1分钟和最大5分钟成交量分别赋值给对应的列
-            data.loc[(data[SignalTimes] == st), Cycle1mVolMax1] = max1
-            data.loc[(data[SignalTimes] == st), Cycle1mVolMax5] = max5
+        lengths = engine.segment_lengths(starts, n)
+        for column, values in ((Cycle1mVolMax1, top[1]), (Cycle1mVolMax5, top[5])):
+            full = data[column].to_numpy(dtype=float, copy=True) if column in data.columns else np.full(n, np.nan)
+            full[starts[0]:] = np.repeat(values, lengths)
+            data[column] = full
 
         return data
 
@@ -357,29 +357,32 @@ class StatisticsMACD:
         - pd.DataFrame: 添加了'CycleLengthMax'和'CycleLengthPerBar'列的data数据集。
         """
 
-        for index in data[~data[SignalChoice].isnull()].index:
-            st = data.loc[index, SignalTimes]  # 获取当前信号的时间
-            conditions = data[SignalTimes] == st  # 找到相同信号时间的所有行
-
-            st_index = data[conditions].index[0]  # 该信号第一次出现的索引
-            ed_index = data[conditions].index[-1]  # 该信号最后一次出现的索引
+        starts = np.flatnonzero(data[SignalChoice].notna().to_numpy())
+        if starts.size == 0:
+            return data
 
-            # 计算周期的总长度，并填充到'CycleLengthMax'列中
-            data.loc[conditions, CycleLengthMax] = ed_index - st_index
+        n = len(data)
+        index = data.index.to_numpy(dtype=float)
+        lengths = engine.segment_lengths(starts, n)
+        first = np.repeat(index[starts], lengths)
+        last = np.repeat(index[np.append(starts[1:], n) - 1], lengths)
 
-            # 计算每个bar在周期中的位置，并填充到'CycleLengthPerBar'列中
-            data.loc[conditions, CycleLengthPerBar] = data[conditions].index - st_index
+        for column, values in ((CycleLengthMax, last - first), (CycleLengthPerBar, index[starts[0]:] - first)):
+            full = data[column].to_numpy(dtype=float, copy=True) if column in data.columns else np.full(n, np.nan)
+            full[starts[0]:] = values
+            data[column] = full
 
         return data
 
     @classmethod
-    def s_Daily1mMax(cls, data: pd.DataFrame, data1m: pd.DataFrame) -> pd.DataFrame:  # 找出每天最大的 1根，5根，15根 1分钟成交量
+    def s_Daily1mMax(cls, data: pd.DataFrame, data1m: pd.DataFrame, index: Volume1mIndex = None) -> pd.DataFrame:  # 找出每天最大的 1根，5根，15根 1分钟成交量
         """
         计算每一天的最大1分钟成交量，以及基于该成交量的5分钟和15分钟平均成交量。
 
         参数:
         - code_data (pd.DataFrame): 包含日期信息的原始数据集，必须包含 'date' 列。
         - data1m (pd.DataFrame): 包含1分钟成交量数据的数据集，必须包含 'date' 和 'volume' 列。
+        - index (Volume1mIndex): data1m 的成交量索引，不传时由 data1m 建立。
 
         返回:
         - pd.DataFrame: 添加了最大1分钟成交量及其5分钟和15分钟平均成交量的data数据集。
@@ -391,33 +394,22 @@ class StatisticsMACD:
         # 提取日期中的时间部分，作为新的列 'minute_date'
         data.loc[:, 'minute_date'] = data['date'].dt.time
 
-        def find_Daily1mMax(x: pd.Timestamp, num: int, data1m: pd.DataFrame) -> int:
-            """
-            在给定日期的下一天内，找到最大的num个成交量并计算平均值。
-
-            参数:
-            - x (pd.Timestamp): 当天的日期。
-            - num (int): 要取的最大成交量数量。
-            - data1m (pd.DataFrame): 包含1分钟成交量数据的数据集。
-
-            返回:
-            - int: 计算出的最大成交量的平均值（取整）。
-            """
-            st_date = pd.to_datetime(x.date())
-            ed_date = st_date + pd.Timedelta(days=1)
+        # 每天 09:45:00 的 bar 记录当天 (0 点, 次日 0 点) 之间最大 1/5/15 根 1m 成交量均值
+        con = (data['minute_date'] == pd.to_datetime('09:45:00').time()).to_numpy()
+        day = data['date'].to_numpy(dtype='datetime64[ns]')[con].astype('datetime64[D]')
 
-            # 筛选出当天的1分钟成交量数据
-            select = data1m[(data1m['date'] > st_date) & (data1m['date'] < ed_date)]
+        if index is None:
+            index = Volume1mIndex.from_frame(data1m)
 
-            # 计算出最大num个成交量的平均值，并取整
-            max_volume = select.sort_values(by=['volume'])['volume'].tail(num).mean()
-            return int(max_volume)
+        lo, hi = engine.window_bounds(index.dates, day.astype('datetime64[ns]'),
+                                      (day + 1).astype('datetime64[ns]'), right_closed=False)
+        top = engine.window_topk_mean(index.volumes, lo, hi, ks=(1, 5, 15))
 
-        # 找到当天09:45:00的记录，并对其应用find_Daily1mMax函数，分别计算最大1, 5, 15分钟的成交量
-        con = data['minute_date'] == pd.to_datetime('09:45:00').time()
-        data.loc[con, Daily1mVolMax1] = data.loc[con, 'date'].apply(find_Daily1mMax, args=(1, data1m,))
-        data.loc[con, Daily1mVolMax5] = data.loc[con, 'date'].apply(find_Daily1mMax, args=(5, data1m,))
-        data.loc[con, Daily1mVolMax15] = data.loc[con, 'date'].apply(find_Daily1mMax, args=(15, data1m,))
+        n = len(data)
+        for column, k in zip(fills, (1, 5, 15)):
+            full = data[column].to_numpy(dtype=float, copy=True) if column in data.columns else np.full(n, np.nan)
+            full[con] = np.trunc(top[k])
+            data[column] = full
 
         # 对计算出来的最大成交量进行前向填充，填充空值
         data[fills] = data[fills].ffill()
@@ -425,7 +417,7 @@ class StatisticsMACD:
         return data
 
     @classmethod
-    def find_Bar1mMax(cls, x: pd.Timestamp, num: int, data1m: pd.DataFrame) -> int:
+    def find_Bar1mMax(cls, x: pd.Timestamp, num: int, data1m: pd.DataFrame, index: Volume1mIndex = None) -> int:
         """
         找出给定时间范围内1分钟成交量的最大值或最大值的平均值。
 
@@ -433,44 +425,45 @@ class StatisticsMACD:
         - x (pd.Timestamp): 目标时间点。
         - num (int): 用于计算平均值的成交量条数。
         - data1m (pd.DataFrame): 包含1分钟成交量数据的数据集，必须包含 'date' 和 'volume' 列。
+        - index (Volume1mIndex): data1m 的成交量索引，逐个时间点调用时传入同一个索引，不传时由 data1m 建立。
 
         返回:
         - int: 指定时间范围内1分钟成交量的最大值或最大值的平均值。如果没有数据，返回0。
         """
 
-        # 计算起始时间（目标时间前15分钟）和结束时间（目标时间）
-        st = pd.to_datetime(x) + pd.Timedelta(minutes=-15)
-        ed = pd.to_datetime(x)
+        # 窗口 (x - 15min, x]
+        if index is None:
+            index = Volume1mIndex.from_frame(data1m)
 
-        # 筛选在起始时间和结束时间之间的数据
-        filtered_data = data1m[(data1m['date'] > st) & (data1m['date'] <= ed)]
-
-        # 如果筛选的数据量少于 num 条，则直接返回 0
-        if filtered_data.empty:
+        # 如果窗口内没有数据，则直接返回 0
+        if index.window_count([x], right_closed=True)[0] == 0:
             return 0
 
-        # 获取最大 num 个成交量并计算其平均值
-        max_volume = filtered_data['volume'].nlargest(num).mean()
-
-        return max_volume
+        # 最大 num 个成交量的平均值 (忽略 NaN，与 nlargest 相同)
+        return index.top_mean([x], num, right_closed=True)[0]
 
     @classmethod
-    def s_BarMax1mVolume(cls, data: pd.DataFrame, data1m: pd.DataFrame) -> pd.DataFrame:
+    def s_BarMax1mVolume(cls, data: pd.DataFrame, data1m: pd.DataFrame, index: Volume1mIndex = None) -> pd.DataFrame:
         """
         为每个信号周期计算1分钟最大成交量以及最大5个成交量的平均值。
 
         参数:
         - code_data (pd.DataFrame): 包含信号数据的数据集，必须包含 'date' 列。
         - data1m (pd.DataFrame): 包含1分钟成交量数据的数据集，必须包含 'date' 和 'volume' 列。
+        - index (Volume1mIndex): data1m 的成交量索引，不传时由 data1m 建立。
 
         返回:
         - pd.DataFrame: 添加了 'Cycle1mVolMax1' 和 'Cycle1mVolMax5' 列的 code_data 数据集。
         """
-        # 使用 find_Bar1mMax 方法为每个时间点计算 1 分钟最大成交量
-        data.loc[:, Cycle1mVolMax1] = data['date'].apply(cls.find_Bar1mMax, args=(1, data1m,))
+        # 与 find_Bar1mMax 相同的窗口 (x - 15min, x]，一次定位所有 bar 的 1m 切片
+        if index is None:
+            index = Volume1mIndex.from_frame(data1m)
 
-        # 使用 find_Bar1mMax 方法为每个时间点计算最大 5 个成交量的平均值
-        data.loc[:, Cycle1mVolMax5] = data['date'].apply(cls.find_Bar1mMax, args=(5, data1m,))
+        empty = index.window_count(data['date'], right_closed=True) == 0
+
+        # 窗口内没有数据时为 0，全部为 NaN 时为 NaN
+        data.loc[:, Cycle1mVolMax1] = np.where(empty, 0.0, index.top_mean(data['date'], 1, right_closed=True))
+        data.loc[:, Cycle1mVolMax5] = np.where(empty, 0.0, index.top_mean(data['date'], 5, right_closed=True))
         return data
 
 
@@ -482,12 +475,15 @@ class SignalMethod:
 
         data = CountMACD.count_MACD(data)
 
-        data = StatisticsMACD.s_Daily1mMax(data, data1m)
+        # 1m 成交量索引只建一次，供各统计函数共用
+        index = Volume1mIndex.from_frame(data1m)
+
+        data = StatisticsMACD.s_Daily1mMax(data, data1m, index)
 
         data = StatisticsMACD.s_StartEndIndex(data)
 
         data = StatisticsMACD.s_CycleAmplitude(data)
-        data = StatisticsMACD.s_Cycle1mVolumeMax(data, data1m)
+        data = StatisticsMACD.s_Cycle1mVolumeMax(data, data1m, index)
 
         data = StatisticsMACD.s_CycleLength(data)
 
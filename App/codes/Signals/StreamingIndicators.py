@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+MACD / 布林线的流式增量计算
+
+calculate_MACD (s=12, m=20, l=30, em=9) 和 Bollinger (ma_mid=20) 都是 min_periods=1 的滚动均值 / 标准差,
+实时监控每来一根 15m K 线都要对全部历史重新计算。
+
+这里按 pandas 滚动窗口的在线算法 (pandas/_libs/window/aggregations.pyx 中的 roll_mean / roll_var) 逐根更新:
+- RollingMean: Kahan 补偿的累加和 (加入、移出各自一个补偿项)、负数计数、连续相同值计数;
+- RollingVar: Kahan 补偿的 Welford 算法, ddof=1;
+- 窗口内的值保存在环形缓冲区中, 每根 K 线 O(1) 更新;
+运算顺序与 pandas 相同, 结果与 calculate_MACD / Bollinger 逐位一致 (包括 NaN 和连续相同值)。
+
+StreamingMACD / StreamingBollinger 组合上述窗口, update(close) 返回与批量函数同名的各列数值;
+snapshot() 返回可 JSON 序列化的状态, restore(state) 恢复, 未收盘的 K 线可以先恢复到上一根收盘后的状态再更新。
+"""
+import math
+
+import numpy as np
+
+from App.codes.parsers.MacdParser import EmaShort, EmaMid, EmaLong, Dif, DifSm, DifMl, Dea, macd_
+from App.codes.parsers.BollingerParser import BollMid, BollStd, BollUp, BollDn, StopLoss
+
+
+class RollingMean:
+    """ 与 Series.rolling(window, min_periods=1).mean() 逐位一致的流式均值 """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.buffer = [math.nan] * self.window
+        self.count = 0  # 已加入的值的个数 (含 NaN)
+        self.nobs = 0
+        self.sum = 0.0
+        self.neg = 0
+        self.add_comp = 0.0
+        self.remove_comp = 0.0
+        self.same = 0
+        self.prev = math.nan
+
+    def _add(self, value):
+        if value == value:
+            self.nobs += 1
+            y = value - self.add_comp
+            t = self.sum + y
+            self.add_comp = t - self.sum - y
+            self.sum = t
+            if math.copysign(1.0, value) < 0:
+                self.neg += 1
+
+            if value == self.prev:
+                self.same += 1
+            else:
+                self.same = 1
+            self.prev = value
+
+    def _remove(self, value):
+        if value == value:
+            self.nobs -= 1
+            y = - value - self.remove_comp
+            t = self.sum + y
+            self.remove_comp = t - self.sum - y
+            self.sum = t
+            if math.copysign(1.0, value) < 0:
+                self.neg -= 1
+
+    def update(self, value) -> float:
+        value = float(value)
+
+        # 窗口为 1 时 pandas 每一行都重新开始
+        if self.count == 0 or self.window == 1:
+            self.reset()
+            self.prev = value
+        elif self.count >= self.window:
+            self._remove(self.buffer[self.count % self.window])
+
+        self.buffer[self.count % self.window] = value
+        self.count += 1
+        self._add(value)
+
+        if self.nobs <= 0:
+            return math.nan
+
+        result = self.sum / self.nobs
+        if self.same >= self.nobs:
+            result = self.prev
+        elif self.neg == 0 and result < 0:
+            result = 0.0
+        elif self.neg == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+    def snapshot(self) -> dict:
+        return dict(vars(self), buffer=list(self.buffer))
+
+    def restore(self, state: dict):
+        vars(self).update(state, buffer=list(state['buffer']))
+        return self
+
+
+class RollingVar:
+    """ 与 Series.rolling(window, min_periods=1).var(ddof) 逐位一致的流式方差 """
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.reset()
+
+    def reset(self):
+        self.buffer = [math.nan] * self.window
+        self.count = 0
+        self.nobs = 0.0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.add_comp = 0.0
+        self.remove_comp = 0.0
+        self.same = 0
+        self.prev = math.nan
+
+    def _add(self, value):
+        if value != value:
+            return
+
+        self.nobs += 1
+        if value == self.prev:
+            self.same += 1
+        else:
+            self.same = 1
+        self.prev = value
+
+        prev_mean = self.mean - self.add_comp
+        y = value - self.add_comp
+        t = y - self.mean
+        self.add_comp = t + self.mean - y
+        if self.nobs:
+            self.mean = self.mean + t / self.nobs
+        else:
+            self.mean = 0.0
+        self.ssqdm = self.ssqdm + (value - prev_mean) * (value - self.mean)
+
+    def _remove(self, value):
+        if value == value:
+            self.nobs -= 1
+            if self.nobs:
+                prev_mean = self.mean - self.remove_comp
+                y = value - self.remove_comp
+                t = y - self.mean
+                self.remove_comp = t + self.mean - y
+                self.mean = self.mean - t / self.nobs
+                self.ssqdm = self.ssqdm - (value - prev_mean) * (value - self.mean)
+            else:
+                self.mean = 0.0
+                self.ssqdm = 0.0
+
+    def update(self, value) -> float:
+        value = float(value)
+
+        if self.count == 0 or self.window == 1:
+            self.reset()
+            self.prev = value
+        elif self.count >= self.window:
+            self._remove(self.buffer[self.count % self.window])
+
+        self.buffer[self.count % self.window] = value
+        self.count += 1
+        self._add(value)
+
+        if self.nobs >= 1 and self.nobs > self.ddof:
+            if self.nobs == 1 or self.same >= self.nobs:
+                return 0.0
+            return self.ssqdm / (self.nobs - self.ddof)
+        return math.nan
+
+    def std(self, value) -> float:
+        """ 加入 value 后的标准差, 与 rolling().std() 相同 (负方差取 0) """
+        var = self.update(value)
+        return 0.0 if var < 0 else math.sqrt(var)
+
+    snapshot = RollingMean.snapshot
+    restore = RollingMean.restore
+
+
+class StreamingIndicator:
+    """ 由若干滚动窗口组成的指标, update 前保存状态, revise 用于更新未收盘的最后一根 K 线 """
+
+    windows = ()
+
+    def __init__(self):
+        self._last = None
+
+    def _windows(self) -> dict:
+        return {name: getattr(self, name) for name in self.windows}
+
+    def snapshot(self) -> dict:
+        return {name: window.snapshot() for name, window in self._windows().items()}
+
+    def restore(self, state: dict):
+        for name, window in self._windows().items():
+            window.restore(state[name])
+        self._last = None
+        return self
+
+    def update(self, close) -> dict:
+        """ 新的一根 K 线收盘价, 返回该根 K 线的指标 """
+        self._last = self.snapshot()
+        return self._compute(close)
+
+    def revise(self, close) -> dict:
+        """ 修改最近一根 K 线的收盘价 (例如未收盘的 K 线), 等价于用新的收盘价重新 update """
+        if self._last is None:
+            raise ValueError('没有可修改的 K 线')
+
+        last = self._last
+        self.restore(last)
+        self._last = last
+        return self._compute(close)
+
+    def run(self, closes) -> dict:
+        """ 依次 update 一串收盘价, 返回 {列名: np.ndarray} """
+        rows = [self.update(close) for close in closes]
+        names = rows[0].keys() if rows else ()
+        return {name: np.array([row[name] for row in rows], dtype=float) for name in names}
+
+    def _compute(self, close) -> dict:
+        raise NotImplementedError
+
+
+class StreamingMACD(StreamingIndicator):
+    """ 流式 calculate_MACD, 参数含义相同 """
+
+    windows = ('short', 'mid', 'long', 'dea')
+
+    def __init__(self, s=12, m=20, l=30, em=9):
+        super().__init__()
+        self.short, self.mid, self.long = RollingMean(s), RollingMean(m), RollingMean(l)
+        self.dea = RollingMean(em)
+
+    def _compute(self, close) -> dict:
+        ema_short, ema_mid, ema_long = self.short.update(close), self.mid.update(close), self.long.update(close)
+
+        dif = ema_short - ema_long
+        dea = self.dea.update(dif)
+
+        return {EmaShort: ema_short, EmaMid: ema_mid, EmaLong: ema_long,
+                Dif: dif, DifSm: ema_short - ema_mid, DifMl: ema_mid - ema_long,
+                Dea: dea, macd_: (dif - dea) * 2}
+
+
+class StreamingBollinger(StreamingIndicator):
+    """ 流式 Bollinger, 参数含义相同 """
+
+    windows = ('mid', 'var')
+
+    def __init__(self, ma_mid=20):
+        super().__init__()
+        self.mid, self.var = RollingMean(ma_mid), RollingVar(ma_mid)
+
+    def _compute(self, close) -> dict:
+        mid, std = self.mid.update(close), self.var.std(close)
+        up, dn = mid + 2 * std, mid - 2 * std
+
+        return {BollMid: mid, BollStd: std, BollUp: up, BollDn: dn,
+                StopLoss: float(np.round(dn - 2 * std, 2))}
@@ -4,10 +4,30 @@ from code.MySql.DataBaseStockData1m import StockData1m
 from code.Normal import ResampleData
 from code.Signals.BollingerSignal import Bollinger
 from code.Signals.MacdSignal import calculate_MACD
+from code.Signals.PanelSignals import SignalPanel
+from TrendRaster import render_trend
 
 
 def array_data(data, name_, showTicks=False):
 
+    """
+    趋势图的 (200, 150, 4) RGBA 数组, name_ 不为空时另存为图片;
+    默认由 TrendRaster 直接画入数组, 需要坐标刻度时才用 matplotlib
+    """
+    if showTicks:
+        return array_data_matplotlib(data, name_, showTicks)
+
+    array_ = render_trend(data)
+
+    if name_:
+        import imageio
+        imageio.imwrite(name_, array_[..., :3])
+
+    return array_
+
+
+def array_data_matplotlib(data, name_, showTicks=False):
+
     import matplotlib
 
     matplotlib.use('agg')
@@ -57,7 +77,7 @@ def array_data(data, name_, showTicks=False):
     return array_
 
 
-def calculate_distinguish_data(Stock: str, freq: str, date_):
+def load_distinguish_data(Stock: str, freq: str, date_):
 
     """ calculate end date: date_ """
 
@@ -91,12 +111,31 @@ def calculate_distinguish_data(Stock: str, freq: str, date_):
     data = data[(data['date'] > _date) & (data['date'] < date_)].reset_index(drop=True)
     data = ResampleData.resample_1m_data(data=data, freq=freq)
 
+    return data
+
+
+def calculate_distinguish_data(Stock: str, freq: str, date_):
+
+    data = load_distinguish_data(Stock, freq, date_)
+
     data = calculate_MACD(data)
     data = Bollinger(data).tail(100).reset_index(drop=True)
 
     return data
 
 
+def calculate_distinguish_panel(stocks, freq: str, date_) -> dict:
+
+    """
+    多只股票 / 板块的 calculate_distinguish_data, {代码: 数据};
+    MACD 与布林带由 SignalPanel 对整个池子一次算完, 与逐只计算逐位一致
+    """
+    frames = {stock: load_distinguish_data(stock, freq, date_) for stock in stocks}
+    panel = SignalPanel(frames).macd_boll()
+
+    return {stock: panel.frame(stock).tail(100).reset_index(drop=True) for stock in frames}
+
+
 if __name__ == '__main__':
     pass
     # array_data()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+趋势图样本的追加式分片存储
+
+CountTrendData.save_array_data 原先每保存一张图都要 np.load 整个已有的 .npy、np.append 再 np.save,
+生成 N 个样本的磁盘读写量为 O(N²)。
+
+ChunkedArrayStore 把 <名称>.npy 改为目录 <名称>.chunks/, 其中是编号的 .npy 分片 (00000.npy, 00001.npy ...):
+- 每个分片最多 chunk_rows 行, 文件头预留固定长度;
+- 追加时把新行写到最后一个分片的末尾, 再原地改写文件头中的行数, 写满后新建分片, 每次追加的读写量与已有样本数无关;
+- 文件头最后改写, 追加中途中断时读取方仍按旧行数读取, 不会读到写了一半的行;
+- 分片都是标准 .npy, np.load 可以直接读取。
+
+ChunkedArray 把旧格式的单个 .npy 和各分片按顺序用内存映射拼接成一个只读数组, 训练时按下标取样本不需要整体载入。
+"""
+import os
+import struct
+
+import numpy as np
+
+CHUNK_SUFFIX = '.chunks'
+
+
+def chunk_directory(file_path: str) -> str:
+    """ 旧格式文件 <名称>.npy 对应的分片目录 <名称>.chunks """
+    root, ext = os.path.splitext(file_path)
+    return (root if ext == '.npy' else file_path) + CHUNK_SUFFIX
+
+
+def _header_size(dtype, shape) -> int:
+    """ 行数取到 15 位时文件头的长度, 按 64 字节对齐, 追加过程中文件头长度不变 """
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                   'shape': (10 ** 15,) + tuple(shape)})
+    return -(-(len(header) + 11) // 64) * 64
+
+
+def _header_bytes(dtype, shape, size: int) -> bytes:
+    """ 固定长度 size 的 1.0 版 .npy 文件头 """
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': tuple(shape)})
+    header = header.ljust(size - 11) + '\n'
+    return np.lib.format.magic(1, 0) + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+def read_header(path: str) -> tuple:
+    """ .npy 文件的 (形状, dtype, 数据起始位置) """
+    with open(path, 'rb') as f:
+        if np.lib.format.read_magic(f) == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran_order:
+            raise ValueError(f'{path}: 不支持 fortran_order')
+        return shape, dtype, f.tell()
+
+
+class ChunkedArrayStore:
+    """
+    追加式分片数组。
+
+    file_path: 旧格式的 .npy 路径, 分片写在 chunk_directory(file_path) 中, 旧文件保持不变、读取时排在最前;
+    chunk_rows: 每个分片的最大行数;
+    """
+
+    def __init__(self, file_path: str, chunk_rows: int = 256):
+        self.file_path = file_path
+        self.directory = chunk_directory(file_path)
+        self.chunk_rows = chunk_rows
+
+        self._tail = None  # 最后一个分片: [编号, 行数, 行形状, dtype, 文件头长度]
+
+    def shards(self) -> list:
+        """ 按编号排列的分片路径 """
+        try:
+            names = sorted(name for name in os.listdir(self.directory)
+                           if name.endswith('.npy') and name[:-4].isdigit())
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _shard_path(self, number: int) -> str:
+        return os.path.join(self.directory, f'{number:05d}.npy')
+
+    def _load_tail(self):
+        if self._tail is None:
+            shards = self.shards()
+            if shards:
+                shape, dtype, offset = read_header(shards[-1])
+                self._tail = [int(os.path.basename(shards[-1])[:-4]), shape[0], shape[1:], dtype, offset]
+        return self._tail
+
+    def _new_shard(self, number, row_shape, dtype):
+        os.makedirs(self.directory, exist_ok=True)
+        size = _header_size(dtype, row_shape)
+        with open(self._shard_path(number), 'wb') as f:
+            f.write(_header_bytes(dtype, (0,) + row_shape, size))
+        self._tail = [number, 0, row_shape, dtype, size]
+
+    def append(self, rows: np.ndarray, row_shape=None) -> int:
+        """
+        追加若干行, 返回追加后分片中的总行数 (不含旧格式文件)。
+
+        rows 的形状为 (k,) + 行形状; row_shape 不为空时把 rows 重新解释为 (-1,) + row_shape
+        """
+        rows = np.asarray(rows)
+        if row_shape is not None:
+            rows = rows.reshape((-1,) + tuple(row_shape))
+
+        tail = self._load_tail()
+        if tail is None:
+            self._new_shard(0, rows.shape[1:], rows.dtype)
+            tail = self._tail
+
+        number, count, shape, dtype, offset = tail
+        if rows.shape[1:] != shape or rows.dtype != dtype:
+            raise ValueError(f'{self.directory}: 追加的行为 {rows.shape[1:]} {rows.dtype}, 已有分片为 {shape} {dtype}')
+
+        rows = np.ascontiguousarray(rows)
+        done = 0
+        while done < len(rows):
+            if count == self.chunk_rows:
+                number, count = number + 1, 0
+                self._new_shard(number, shape, dtype)
+
+            part = rows[done: done + self.chunk_rows - count]
+            with open(self._shard_path(number), 'r+b') as f:
+                f.seek(offset + count * part[0].nbytes)
+                f.write(part.tobytes())
+                f.truncate()
+
+                count += len(part)
+                f.seek(0)
+                f.write(_header_bytes(dtype, (count,) + shape, offset))
+
+            done += len(part)
+            self._tail[1] = count
+
+        return number * self.chunk_rows + count
+
+    def __len__(self):
+        tail = self._load_tail()
+        return 0 if tail is None else tail[0] * self.chunk_rows + tail[1]
+
+    def open(self) -> 'ChunkedArray':
+        """ 旧格式文件 (若存在) 和全部分片拼接成的只读数组 """
+        return ChunkedArray.open(self.file_path)
+
+
+class ChunkedArray:
+    """
+    多个 .npy 文件按第一维拼接成的只读数组, 各文件内存映射。
+
+    支持 len / shape / dtype, 整数、切片和下标数组索引; np.asarray 得到拼接后的完整数组
+    """
+
+    def __init__(self, paths: list):
+        self.paths = []
+        self.parts = []
+
+        for path in paths:
+            shape, dtype, offset = read_header(path)
+            if shape[0]:
+                self.paths.append(path)
+                self.parts.append(np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape))
+
+        if len({(part.shape[1:], part.dtype) for part in self.parts}) > 1:
+            raise ValueError(f'{paths}: 各文件的行形状或 dtype 不一致')
+
+        self.offsets = np.cumsum([0] + [len(part) for part in self.parts])
+
+    @classmethod
+    def open(cls, file_path: str) -> 'ChunkedArray':
+        """ 兼容读取: 旧格式的单个 .npy (若存在) 在前, 之后是分片目录中的全部分片 """
+        paths = [file_path] if os.path.isfile(file_path) else []
+        return cls(paths + ChunkedArrayStore(file_path).shards())
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self) -> tuple:
+        return (len(self),) + (self.parts[0].shape[1:] if self.parts else ())
+
+    @property
+    def dtype(self):
+        return self.parts[0].dtype if self.parts else np.dtype('float64')
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key) + len(self) if key < 0 else int(key)
+            if not 0 <= index < len(self):
+                raise IndexError(f'下标 {key} 超出范围 0..{len(self) - 1}')
+            part = int(np.searchsorted(self.offsets, index, side='right')) - 1
+            return np.asarray(self.parts[part][index - self.offsets[part]])
+
+        if isinstance(key, slice):
+            key = np.arange(len(self))[key]
+
+        index = np.asarray(key)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        index = np.where(index < 0, index + len(self), index)
+        if index.size and (index.min() < 0 or index.max() >= len(self)):
+            raise IndexError(f'下标超出范围 0..{len(self) - 1}')
+
+        flat = index.ravel()
+        out = np.empty((len(flat),) + self.shape[1:], dtype=self.dtype)
+
+        # 按所在文件分组, 每个文件取一次
+        part = np.searchsorted(self.offsets, flat, side='right') - 1
+        order = np.argsort(part, kind='stable')
+        bounds = np.flatnonzero(np.diff(part[order])) + 1
+        for group in np.split(order, bounds) if len(order) else []:
+            p = part[group[0]]
+            out[group] = self.parts[p][flat[group] - self.offsets[p]]
+
+        return out.reshape(index.shape + self.shape[1:])
+
+    def __array__(self, dtype=None, copy=None):
+        array = np.concatenate(self.parts) if self.parts else np.empty(self.shape, dtype=self.dtype)
+        return array if dtype is None else array.astype(dtype)
@@ -6,6 +6,7 @@ from code.Signals.StatisticsMacd import SignalMethod
 from code.MySql.DataBaseStockPool import TableStockPool
 from code.MySql.DataBaseStockData1m import StockData1m
 from Distinguish_utils import array_data
+from TrendArrayStore import ChunkedArrayStore
 from code.RnnDataFile.stock_path import AnalysisDataPath
 
 pd.set_option('display.max_columns', None)
@@ -47,19 +48,18 @@ class CountTrendData(TrendDistinguishData):
     def __init__(self, stock, _date='2019-01-01'):
         TrendDistinguishData.__init__(self, stock)
         self.data = self.calculates(_date)
+        self.stores = {}
 
     def save_array_data(self, array_data, file_path):
 
-        array_data.shape = (1, 150, 200, 4)
-
-        try:
-            existing_data = np.load(file_path, allow_pickle=True)
-            combined_data = np.append(existing_data, array_data, axis=0)
-            np.save(file_path, combined_data)
-
-        except FileNotFoundError:
+        """
+        追加到 file_path 对应的分片目录, 行形状与旧格式文件相同 (1, 150, 200, 4);
+        读取时用 ChunkedArray.open(file_path) 拼接旧文件和分片
+        """
+        if file_path not in self.stores:
+            self.stores[file_path] = ChunkedArrayStore(file_path)
 
-            pass
+        self.stores[file_path].append(array_data, row_shape=(150, 200, 4))
 
     def count_trend(self):
 
@@ -17,16 +17,20 @@ class TrendDistinguishModel:
         self.values = {0: '_down', 1: 'down_', 2: '_up', 3: 'up_'}
         self.labels = {'_down': 0, 'down_': 1, '_up': 2, 'up_': 3}
 
-    def predictive_value(self, stock_code):
+    def predictive_value(self, stock_code, img=None):
 
         """
         模型预估，return value & label ;
+        img: array_data 画好的 RGB 数组, 为空时读取 predict 目录下已保存的 jpg
         """
         # load_path = os.path.join(self.trend_path, 'predict', f'{stock_code}.jpg')
 
-        load_file_jpg = f'{stock_code}.jpg'
-        load_path = AnalysisDataPath.macd_predict_path(load_file_jpg)
-        img = imageio.imread(load_path)
+        if img is None:
+            load_file_jpg = f'{stock_code}.jpg'
+            load_path = AnalysisDataPath.macd_predict_path(load_file_jpg)
+            img = imageio.imread(load_path)
+
+        img = np.ascontiguousarray(img)
         img.shape = (1, img.shape[0], img.shape[1], img.shape[2])
 
         k.clear_session()
@@ -50,18 +54,19 @@ class TrendDistinguishModel:
 
         return result
 
-    def distinguish_1m(self, stock_code: str, freq: str, date_, returnFreq=False):
+    def distinguish_1m(self, stock_code: str, freq: str, date_, returnFreq=False, data=None):
 
         """
         预估 1m 数据
+        data: calculate_distinguish_data 的结果 (例如 calculate_distinguish_panel 批量算好的), 为空时逐只计算
         """
-        data = calculate_distinguish_data(stock_code, freq, date_=date_)
+        if data is None:
+            data = calculate_distinguish_data(stock_code, freq, date_=date_)
 
-        file_name = f'{stock_code}.jpg'
-        file_path = AnalysisDataPath.macd_predict_path(file_name)
-        array_data(data=data, name_=file_path)  # , showTicks=True)
+        # 直接用内存中的图像预测, 不再存 jpg 再读回
+        img = array_data(data=data, name_=None)[..., :3]
 
-        label_, value_ = self.predictive_value(stock_code)
+        label_, value_ = self.predictive_value(stock_code, img)
 
         if returnFreq:
             result = data, (label_, value_)
@@ -73,12 +78,9 @@ class TrendDistinguishModel:
 
     def distinguish_freq(self, stock_code, data):
 
-        file_name = f'{stock_code}.jpg'
-        file_path = AnalysisDataPath.macd_predict_path(file_name)
-
         data_ = data.tail(100).reset_index(drop=True)
-        array_data(data=data_, name_=file_path)
-        label_, value_ = self.predictive_value(stock_code)
+        img = array_data(data=data_, name_=None)[..., :3]
+        label_, value_ = self.predictive_value(stock_code, img)
         result = (label_, value_)
 
         return result
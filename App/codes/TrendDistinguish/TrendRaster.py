@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+趋势图光栅化
+
+Distinguish_utils.array_data 原先为每个样本创建一个 matplotlib 图 (figsize 1.5x2, dpi 100), 画价格 / 布林线
+和 MACD 两个子图后取 RGBA 缓冲区; 预测时还要先存成 jpg 再用 imageio 读回。这是趋势数据生成和趋势预测中最慢的一步。
+
+这里用 NumPy 直接把折线和柱子画进 (200, 150, 4) 的 uint8 数组, 按 matplotlib 的默认参数复现同样的图:
+- 子图位置: left 0.125, right 0.9, bottom 0.11, top 0.88, hspace 0.2;
+- 坐标范围: 数据范围两端各留 5%, 柱子的 0 为粘性边界 (不会因留白越过 0);
+- 柱子: 宽 0.8, 无边框, 边界对齐到整像素 (与 Agg 的 snap 一致);
+- 折线: 1.5pt 宽, 每列细分采样, 按线段胶囊体的截面计算覆盖率做抗锯齿, 超出子图的部分裁掉;
+- 边框: 0.8pt 黑线, 对齐到像素中心;
+- 绘制顺序: 柱子、折线、边框; NaN 处折线断开。
+与 matplotlib 的差别只在折线边缘少量抗锯齿像素的深浅, 以及折线两端的端点形状。
+"""
+import numpy as np
+
+DPI = 100
+WIDTH, HEIGHT = 150, 200
+SUBPLOT = {'left': 0.125, 'right': 0.9, 'bottom': 0.11, 'top': 0.88, 'hspace': 0.2}
+MARGIN = 0.05
+
+LINE_WIDTH = 1.5 * DPI / 72
+SPINE_WIDTH = 0.8 * DPI / 72
+BAR_WIDTH = 0.8
+
+COLORS = {'C0': (31, 119, 180), 'C1': (255, 127, 14), 'C2': (44, 160, 44), 'C3': (214, 39, 40),
+          'red': (255, 0, 0), 'green': (0, 128, 0), 'black': (0, 0, 0)}
+
+
+def subplot_boxes(rows: int, width=WIDTH, height=HEIGHT) -> list:
+    """ rows 行 1 列子图在图像坐标 (原点在左上, 单位像素) 中的位置 [(x0, x1, y0, y1), ...], 自上而下 """
+    left, right = SUBPLOT['left'] * width, SUBPLOT['right'] * width
+    cell = (SUBPLOT['top'] - SUBPLOT['bottom']) * height / (rows + SUBPLOT['hspace'] * (rows - 1))
+    top = (1 - SUBPLOT['top']) * height
+
+    boxes = []
+    for i in range(rows):
+        y0 = top + i * cell * (1 + SUBPLOT['hspace'])
+        boxes.append((left, right, y0, y0 + cell))
+    return boxes
+
+
+def _snap(value):
+    """ Agg 的四舍五入 """
+    return np.floor(np.asarray(value) + 0.5)
+
+
+def _nonsingular(lo, hi, expander=0.05):
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        return -expander, expander
+
+    if hi - lo <= max(abs(lo), abs(hi)) * 1e-15:
+        if lo == 0 and hi == 0:
+            return -expander, expander
+        return lo - expander * abs(lo), hi + expander * abs(hi)
+
+    return lo, hi
+
+
+def autoscale(lo, hi, stickies=()) -> tuple:
+    """ 数据范围两端各留 MARGIN, 留白不越过粘性边界 """
+    lo, hi = _nonsingular(lo, hi)
+
+    tol = 1e-5 * max(abs(lo), abs(hi), abs(hi - lo))
+    below = [s for s in stickies if s < lo + tol]
+    above = [s for s in stickies if s >= hi - tol]
+
+    delta = (hi - lo) * MARGIN
+    lo, hi = lo - delta, hi + delta
+
+    if below:
+        lo = max(lo, max(below))
+    if above:
+        hi = min(hi, min(above))
+
+    return _nonsingular(lo, hi)
+
+
+def _overlap(lo, hi, start, stop) -> np.ndarray:
+    """ 区间 [lo, hi] 与像素 [i, i + 1) 的重叠长度, i 取 start..stop-1; lo / hi 可以是数组 (最后一维为像素) """
+    pixels = np.arange(start, stop)
+    return np.clip(np.minimum(np.expand_dims(hi, -1), pixels + 1) - np.maximum(np.expand_dims(lo, -1), pixels), 0, 1)
+
+
+def line_coverage(px, py, clip, width=LINE_WIDTH, samples=4):
+    """
+    折线在裁剪框内的像素覆盖率。
+
+    px / py 为像素坐标 (可含 NaN), clip 为 (列起, 列止, 行起, 行止)。折线看成各线段胶囊体 (半径为线宽一半) 的并集,
+    每个像素列取 samples 个采样位置, 在每个位置求胶囊体截面的上下界, 与各行的重叠长度取平均即为覆盖率。
+
+    返回 (coverage, (行起, 行止, 列起, 列止)), coverage 为该范围内各像素的覆盖率; 没有可画的部分时返回 None
+    """
+    c0, c1, r0, r1 = clip
+    radius = width / 2
+
+    ok = np.isfinite(px) & np.isfinite(py)
+    segment = ok[:-1] & ok[1:]
+    ax, ay, bx, by = px[:-1][segment], py[:-1][segment], px[1:][segment], py[1:][segment]
+
+    if not len(ax):
+        return None
+
+    start = int(max(c0, np.floor(min(ax.min(), bx.min()) - radius)))
+    stop = int(min(c1, np.ceil(max(ax.max(), bx.max()) + radius)))
+
+    if start >= stop:
+        return None
+
+    x = (np.arange(start, stop)[:, None] + (np.arange(samples) + 0.5) / samples).ravel()
+
+    # 每个采样位置只需要看附近的线段: 横坐标单调时用二分查找取候选线段, 否则逐一检查全部线段
+    if np.all(bx >= ax) and np.all(np.diff(ax) >= 0):
+        first = np.searchsorted(bx + radius, x, side='left')
+        last = np.searchsorted(ax - radius, x, side='right')
+        candidate = first + np.arange(max(int((last - first).max()), 1))[:, None]
+        valid = candidate < last
+        candidate = np.minimum(candidate, len(ax) - 1)
+    else:
+        candidate = np.broadcast_to(np.arange(len(ax))[:, None], (len(ax), len(x)))
+        valid = np.ones(candidate.shape, dtype=bool)
+
+    dx, dy = bx - ax, by - ay
+    length = np.hypot(dx, dy)
+    length[length == 0] = np.inf
+    nx, ny = -dy / length * radius, dx / length * radius
+
+    ax, ay, dx, dy, nx, ny = (v[candidate] for v in (ax, ay, dx, dy, nx, ny))
+    lo = np.full(candidate.shape, np.inf)
+    hi = np.full(candidate.shape, -np.inf)
+
+    # 胶囊体的两条侧边
+    span = np.where(dx == 0, 1, dx)
+    for sign in (1, -1):
+        sx, sy = ax + sign * nx, ay + sign * ny
+        inside = valid & (dx != 0) & (x >= sx + np.minimum(dx, 0)) & (x <= sx + np.maximum(dx, 0))
+        y = sy + (x - sx) / span * dy
+        lo = np.where(inside, np.minimum(lo, y), lo)
+        hi = np.where(inside, np.maximum(hi, y), hi)
+
+    # 两端的半圆 (相邻线段的圆角连接)
+    for cx, cy in ((ax, ay), (ax + dx, ay + dy)):
+        d = x - cx
+        inside = valid & (np.abs(d) <= radius)
+        h = np.sqrt(np.clip(radius ** 2 - d ** 2, 0, None))
+        lo = np.where(inside, np.minimum(lo, cy - h), lo)
+        hi = np.where(inside, np.maximum(hi, cy + h), hi)
+
+    lo, hi = lo.min(axis=0), hi.max(axis=0)
+    drawn = np.isfinite(lo)
+    if not drawn.any():
+        return None
+
+    # 只计算折线经过的行
+    top = int(max(r0, np.floor(lo[drawn].min())))
+    bottom = int(min(r1, np.ceil(hi[drawn].max())))
+    if top >= bottom:
+        return None
+
+    coverage = _overlap(lo, hi, top, bottom)  # (采样数, 行数)
+    coverage = coverage.reshape(stop - start, samples, bottom - top).mean(axis=1).T
+
+    return coverage, (top, bottom, start, stop)
+
+
+class TrendAxes:
+    """ 一个子图: 收集折线和柱子, 按全部数据确定坐标范围后画入图像 """
+
+    def __init__(self, box):
+        self.box = box
+        self.lines = []
+        self.bars = []
+
+    def plot(self, x, y, color):
+        self.lines.append((np.asarray(x, dtype=float), np.asarray(y, dtype=float), COLORS.get(color, color)))
+
+    def bar(self, x, height, color, width=BAR_WIDTH):
+        self.bars.append((np.asarray(x, dtype=float), np.asarray(height, dtype=float), COLORS.get(color, color), width))
+
+    def limits(self) -> tuple:
+        """ ((x 下限, x 上限), (y 下限, y 上限)) """
+        xs, ys, stickies = [np.empty(0)], [np.empty(0)], []
+
+        for x, y, _ in self.lines:
+            ok = np.isfinite(x) & np.isfinite(y)
+            xs.append(x[ok])
+            ys.append(y[ok])
+
+        for x, height, _, width in self.bars:
+            ok = np.isfinite(x) & np.isfinite(height)
+            xs += [x[ok] - width / 2, x[ok] + width / 2]
+            ys += [height[ok], np.zeros(ok.sum())]
+            if ok.any():
+                stickies.append(0.0)
+
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        x_range = (xs.min(), xs.max()) if len(xs) else (np.inf, -np.inf)
+        y_range = (ys.min(), ys.max()) if len(ys) else (np.inf, -np.inf)
+
+        return autoscale(*x_range), autoscale(*y_range, stickies=stickies)
+
+    def clip(self) -> tuple:
+        x0, x1, y0, y1 = (int(v) for v in _snap(self.box))
+        return x0, x1, y0, y1
+
+    def draw(self, canvas):
+        """ canvas 为 (高, 宽, 3) 的 float 数组, 依次画柱子、折线和边框 """
+        (x_lo, x_hi), (y_lo, y_hi) = self.limits()
+        x0, x1, y0, y1 = self.box
+        sx, sy = (x1 - x0) / (x_hi - x_lo), (y1 - y0) / (y_hi - y_lo)
+
+        def to_x(v):
+            return x0 + (v - x_lo) * sx
+
+        def to_y(v):
+            return y1 - (v - y_lo) * sy
+
+        c0, c1, r0, r1 = self.clip()
+
+        for x, height, color, width in self.bars:
+            ok = np.isfinite(x) & np.isfinite(height)
+            left, right = _snap(to_x(x[ok] - width / 2)), _snap(to_x(x[ok] + width / 2))
+            base, top = _snap(to_y(np.zeros(ok.sum()))), _snap(to_y(height[ok]))
+
+            for l, r, b, t in zip(left, right, base, top):
+                l, r = int(max(l, c0)), int(min(r, c1))
+                t, b = int(max(min(b, t), r0)), int(min(max(b, t), r1))
+                if l < r and t < b:
+                    canvas[t:b, l:r] = color
+
+        for x, y, color in self.lines:
+            drawn = line_coverage(to_x(x), to_y(y), (c0, c1, r0, r1))
+            if drawn is not None:
+                coverage, (top, bottom, start, stop) = drawn
+                _blend(canvas[top:bottom, start:stop], coverage, color)
+
+        self.draw_spines(canvas)
+
+    def draw_spines(self, canvas):
+        x0, x1, y0, y1 = _snap(self.box) + 0.5
+        half = SPINE_WIDTH / 2
+        height, width = canvas.shape[:2]
+
+        for left, right, top, bottom in ((x0 - half, x0 + half, y0 - half, y1 + half),
+                                         (x1 - half, x1 + half, y0 - half, y1 + half),
+                                         (x0 - half, x1 + half, y0 - half, y0 + half),
+                                         (x0 - half, x1 + half, y1 - half, y1 + half)):
+            c0, c1 = max(int(np.floor(left)), 0), min(int(np.ceil(right)), width)
+            r0, r1 = max(int(np.floor(top)), 0), min(int(np.ceil(bottom)), height)
+            coverage = np.outer(_overlap(top, bottom, r0, r1), _overlap(left, right, c0, c1))
+            _blend(canvas[r0:r1, c0:c1], coverage, COLORS['black'])
+
+
+def _blend(target, coverage, color):
+    """ 按覆盖率把 color 叠加到 target 上 (原地) """
+    alpha = coverage[..., None]
+    target *= 1 - alpha
+    target += alpha * np.asarray(color, dtype=float)
+
+
+def rasterise(axes, width=WIDTH, height=HEIGHT) -> np.ndarray:
+    """ 白底上依次画各子图, 返回 (height, width, 4) 的 uint8 RGBA 数组 """
+    canvas = np.full((height, width, 3), 255.0)
+    for ax in axes:
+        ax.draw(canvas)
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[..., :3] = np.rint(np.clip(canvas, 0, 255))
+    image[..., 3] = 255
+    return image
+
+
+def render_trend(data) -> np.ndarray:
+    """
+    与 array_data 内容相同的趋势图: 上图 close / EmaMid / BollUp / BollDn, 下图 Dif / DifMl 和 MACD 红绿柱。
+    横坐标为 data 的索引, 返回 (200, 150, 4) 的 uint8 RGBA 数组
+    """
+    x = np.asarray(data.index, dtype=float)
+    price, macd = (TrendAxes(box) for box in subplot_boxes(2))
+
+    for column, color in zip(('close', 'EmaMid', 'BollUp', 'BollDn'), ('C0', 'C1', 'C2', 'C3')):
+        price.plot(x, data[column], color)
+
+    macd.plot(x, data['Dif'], 'C0')
+    macd.plot(x, data['DifMl'], 'C1')
+
+    value = np.asarray(data['MACD'], dtype=float)
+    macd.bar(x[value > 0], value[value > 0], 'red')
+    macd.bar(x[value < 0], value[value < 0], 'green')
+
+    return rasterise([price, macd])
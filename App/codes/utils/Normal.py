@@ -8,6 +8,7 @@ from scipy import stats
 import numpy as np
 import json
 from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnDataFile.ParamStore import param_store
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 5000)
@@ -172,16 +173,8 @@ class ReadSaveFile:
 
     @classmethod
     def read_json(cls, months: str, code: str):
-        path = StockDataPath.json_data_path(months, code)
-
-        try:
-            with open(path, 'r') as lf:
-                j = json.load(lf)
-
-            return j
-
-        except ValueError:
-            return None
+        """ 读取参数文档, 参数保存在 ParamStore 中 (首次读取时导入原 json 文件), 不存在时返回 None """
+        return param_store.get(months, code)
 
     @classmethod
     def read_json_by_path(cls, path):
@@ -197,7 +190,12 @@ class ReadSaveFile:
 
     @classmethod
     def save_json(cls, dic: dict, months: str, code: str):
-        path = StockDataPath.json_data_path(months, code)
+        """ 整体替换参数文档; 只改动个别参数时用 param_store.set / update """
+        param_store.put_document(months, code, dic)
+
+    @classmethod
+    def save_json_by_path(cls, dic: dict, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
         with open(path, 'w') as f:
             json.dump(dic, f)
 
@@ -220,6 +218,30 @@ class ReadSaveFile:
 
 class ResampleData:
 
+    # 各频率的别名
+    FREQ_ALIASES = {
+        '15m': '15m',
+        '30m': '30m',
+        '60m': '60m',
+        '120m': '120m',
+        'day': 'day',
+        'daily': 'day',
+        'd': 'day',
+        'D': 'day'
+    }
+
+    # A 股交易时段 (当天第几分钟, 两端都包含): 上午 09:31-11:30, 下午 13:00-15:00, 与 _split_and_resample_60m 相同
+    SESSIONS = ((571, 690), (780, 900))
+
+    _OHLCV = {
+        'open': 'first',
+        'close': 'last',
+        'high': 'max',
+        'low': 'min',
+        'volume': 'sum',
+        'money': 'sum'
+    }
+
     @classmethod
     def resample_fun(cls, data: pd.DataFrame, parameter: str) -> pd.DataFrame:
         """
@@ -335,35 +357,144 @@ class ResampleData:
         return day_k
 
     @classmethod
-    def resample_1m_data(cls, data: pd.DataFrame, freq: str) -> pd.DataFrame:
+    def _bucket_frame(cls, data: pd.DataFrame) -> pd.DataFrame:
         """
-        根据指定频率重采样 1 分钟数据。
+        按时间排序后的 1 分钟数据归入最小的桶 (同一根 15m、同一天、同一交易时段), 每个桶聚合一次。
+
+        15m/30m/120m(360T) 都是从 0 点起右闭、右标签的等长区间, 60m 上午按 90T、下午按 60T,
+        这些区间都由若干个 15m 区间组成, 因此各频率都可以在桶上再聚合一次得到, 不必再扫描 1 分钟数据。
+
+        返回:
+            pd.DataFrame: 每个桶的 OHLCV、最后一根 1m 的时间 (date) 以及各频率的整数桶编号 (纳秒)
         """
-        # 时间映射字典
-        time_mappings = {
-            '15m': '15T',
-            '30m': '30T',
-            '120m': '360T',
-            'day': '1440T',
-            'daily': '1440T',
-            'd': '1440T',
-            'D': '1440T'
-        }
+        # 已经是时间类型时 cache 只会多遍历一次
+        dates = pd.to_datetime(data['date'], cache=False)
+        valid = dates.notna().to_numpy()
+        frame = data.loc[valid, list(cls._OHLCV)].reset_index(drop=True)
+        ns = dates[valid].to_numpy(dtype='datetime64[ns]').view('int64')
+
+        # resample 对无序的时间索引做稳定排序
+        if (np.diff(ns) < 0).any():
+            order = np.argsort(ns, kind='stable')
+            frame, ns = frame.iloc[order].reset_index(drop=True), ns[order]
+
+        minute = 60 * 10 ** 9
+        day = ns // (1440 * minute) * (1440 * minute)
+        time_of_day = ns - day
+
+        def ceil(step):
+            return -(-ns // (step * minute)) * (step * minute)
+
+        session = np.zeros(len(ns), dtype=np.int64)
+        for number, (start, end) in enumerate(cls.SESSIONS, start=1):
+            session[(time_of_day >= start * minute) & (time_of_day <= end * minute)] = number
+
+        bar_15m = ceil(15)
+        change = np.ones(len(ns), dtype=bool)
+        change[1:] = (bar_15m[1:] != bar_15m[:-1]) | (day[1:] != day[:-1]) | (session[1:] != session[:-1])
+        code = np.cumsum(change) - 1
+
+        frame['date'] = ns.view('datetime64[ns]')
+        buckets = frame.groupby(code, sort=False).agg(dict(cls._OHLCV, date='last'))
+
+        first = np.flatnonzero(change)
+        buckets['15m'] = bar_15m[first]
+        buckets['30m'] = ceil(30)[first]
+        buckets['120m'] = ceil(360)[first]
+        buckets['day'] = day[first]
+        buckets['60m'] = np.select([session[first] == 1, session[first] == 2],
+                                   [ceil(90)[first], ceil(60)[first]], -1)
+        return buckets.reset_index(drop=True)
+
+    @classmethod
+    def _reduce_segments(cls, buckets: pd.DataFrame, starts: np.ndarray) -> dict:
+        """ 按时间排序的桶中连续的段 [starts[i], starts[i + 1]) 聚合, first / last 跳过空值 """
+        ends = np.append(starts[1:], len(buckets))
+        result = {}
+
+        for column, how in dict(cls._OHLCV, date='last').items():
+            values = buckets[column].to_numpy()
+
+            if how == 'sum':
+                # 桶上的和不含空值 (groupby 的 sum 把空值当 0)
+                result[column] = np.add.reduceat(values, starts)
+            elif how in ('max', 'min'):
+                result[column] = (np.fmax if how == 'max' else np.fmin).reduceat(values, starts)
+            else:
+                position = np.flatnonzero(pd.notna(values))
+                if how == 'first':
+                    i = np.searchsorted(position, starts)
+                    found = i < len(position)
+                    found[found] = position[i[found]] < ends[found]
+                else:
+                    i = np.searchsorted(position, ends) - 1
+                    found = i >= 0
+                    found[found] = position[i[found]] >= starts[found]
+
+                picked = values[position[np.clip(i, 0, len(position) - 1)] if len(position) else starts]
+                if not found.all():
+                    picked = pd.Series(picked).where(found).to_numpy()
+                result[column] = picked
+
+        return result
+
+    @classmethod
+    def _reduce_buckets(cls, buckets: pd.DataFrame, freq: str) -> pd.DataFrame:
+        """ 把桶按 freq 的桶编号再聚合一次, 输出与原各个重采样函数相同的列 """
+        columns = ['date', 'open', 'close', 'high', 'low', 'volume', 'money']
 
         if freq == '60m':
-            return cls._split_and_resample_60m(data)
+            buckets = buckets[buckets['60m'] >= 0]
 
-        if freq == '120m':
-            return cls._split_and_resample_120m(data)
+        if buckets.empty:
+            return pd.DataFrame(columns=columns)
 
-        elif freq in {'day', 'daily', 'd', 'D'}:
-            return cls._resample_to_daily(data)
+        # 桶按时间排序, 各频率的桶编号也是递增的, 同一编号的桶是连续的一段
+        code = buckets[freq].to_numpy()
+        starts = np.flatnonzero(np.append(True, code[1:] != code[:-1]))
+        result = pd.DataFrame(cls._reduce_segments(buckets, starts))
 
-        elif freq in time_mappings:
-            return cls.resample_fun(data, parameter=time_mappings[freq])
+        if freq == 'day':
+            # 与 _resample_to_daily 相同, date 为 datetime.date, 不删除空值
+            result['date'] = pd.DatetimeIndex(code[starts].view('datetime64[ns]')).date
+            return result[columns]
 
-        else:
-            raise ValueError(f"Unsupported frequency: {freq}")
+        # 15m / 30m 与 resample_fun 相同, date 为区间右端;
+        # 60m / 120m 与 _split_and_resample_60m / _split_and_resample_120m 相同, date 为区间内最后一根 1m 的时间
+        if freq in ('15m', '30m'):
+            result['date'] = code[starts].view('datetime64[ns]')
+
+        return result[columns].dropna(how='any').reset_index(drop=True)
+
+    @classmethod
+    def resample_1m_multi(cls, data: pd.DataFrame, freqs=('15m', '30m', '60m', '120m', 'day')) -> dict:
+        """
+        一次计算 1 分钟数据的多个频率。
+
+        每根 1m K 线的桶编号只计算一次, 在桶上聚合一次后, 各频率只需对桶 (每天十几个) 再聚合,
+        结果与 resample_fun / _split_and_resample_60m / _split_and_resample_120m / _resample_to_daily 相同
+        (索引重新编号, 不修改 data)。
+
+        参数:
+            data (pd.DataFrame): 1 分钟数据, 需包含 date, open, close, high, low, volume, money 列
+            freqs: 频率, 取值见 FREQ_ALIASES
+
+        返回:
+            dict: 频率 -> 重采样后的数据
+        """
+        for freq in freqs:
+            if freq not in cls.FREQ_ALIASES:
+                raise ValueError(f"Unsupported frequency: {freq}")
+
+        buckets = cls._bucket_frame(data)
+        return {freq: cls._reduce_buckets(buckets, cls.FREQ_ALIASES[freq]) for freq in freqs}
+
+    @classmethod
+    def resample_1m_data(cls, data: pd.DataFrame, freq: str) -> pd.DataFrame:
+        """
+        根据指定频率重采样 1 分钟数据。
+        """
+        return cls.resample_1m_multi(data, (freq,))[freq]
 
 
 class Useful:
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+股票池任务调度
+
+原先 CheckModel / MonitorModel / EvaluateBoard / DataBaseAction 都把股票列表固定切成 3~4 段，每段一个进程。
+各股票耗时差别很大 (数据长度、模型是否缓存、数据库延迟)，慢股票集中的那一段会拖住整轮，其它进程早早空闲。
+
+TaskScheduler 把每只股票作为一个任务放入共享队列，进程池中的进程空闲时自己取下一个任务 (chunksize=1):
+- 进程数默认等于 CPU 核数;
+- 每个进程执行 max_tasks_per_worker 个任务后重建，释放 TensorFlow / pandas 累积的内存;
+- 单个任务抛出的异常被记录在 failures 中，不影响其它任务;
+- 统计每个进程的任务数、忙碌时间、利用率，以及整轮的 makespan。
+
+任务函数和参数需要能被 pickle (模块级函数、类方法或可 pickle 对象的方法)。
+"""
+import os
+import time
+import traceback
+import multiprocessing
+from contextlib import contextmanager
+from collections import OrderedDict
+
+
+def _run_task(item):
+    """ 在工作进程中执行一个任务, 返回 (序号, 进程号, 开始时间, 结束时间, 是否成功, 结果或错误信息) """
+    index, func, args = item
+    start = time.time()
+
+    try:
+        value, ok = func(*args), True
+
+    except Exception as ex:
+        value, ok = {'error': repr(ex), 'traceback': traceback.format_exc()}, False
+
+    return index, os.getpid(), start, time.time(), ok, value
+
+
+@contextmanager
+def _preserve_environ():
+    """ 在当前进程内执行 initializer 时, 结束后恢复它改动的环境变量 """
+    saved = dict(os.environ)
+
+    try:
+        yield
+
+    finally:
+        for key in set(os.environ) - set(saved):
+            del os.environ[key]
+        os.environ.update(saved)
+
+
+class TaskScheduler:
+    """
+    processes: 进程数, 默认 CPU 核数, 为 1 时在当前进程内顺序执行;
+    max_tasks_per_worker: 每个进程执行多少个任务后重建, None 表示不重建;
+    initializer / initargs: 每个工作进程启动时执行一次 (顺序执行时在当前进程执行一次, 结束后恢复环境变量);
+    start_method: 进程启动方式, None 为平台默认 ('fork' / 'spawn' / 'forkserver');
+    inline: 为 False 时 processes 为 1 也在单进程的进程池中执行;
+
+    只有 processes 为 1 时才在当前进程内执行; 剩余任务少于进程数时只减少进程池的进程数。
+    """
+
+    def __init__(self, processes=None, max_tasks_per_worker=50, initializer=None, initargs=(), start_method=None,
+                 inline=True):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.initializer = initializer
+        self.initargs = initargs
+        self.start_method = start_method
+        self.inline = inline
+
+        self.failures = []  # {'task', 'args', 'error', 'traceback'}
+        self.records = []  # (序号, 进程号, 开始时间, 结束时间, 是否成功)
+        self.makespan = 0.0
+
+    def run(self, func, tasks, name=None, on_result=None) -> list:
+        """
+        执行 func(*args) for args in tasks, 返回与 tasks 顺序一致的结果, 失败的任务结果为 None。
+
+        参数:
+            func: 任务函数;
+            tasks: 参数元组的列表, 单个参数可以不写成元组;
+            name: 日志中显示的名称;
+            on_result: 每个任务完成时在主进程中调用 on_result(序号, 是否成功, 结果或错误信息);
+        """
+        tasks = [args if isinstance(args, tuple) else (args,) for args in tasks]
+        items = [(i, func, args) for i, args in enumerate(tasks)]
+        results = [None] * len(tasks)
+
+        self.failures, self.records = [], []
+        processes = min(self.processes, len(tasks)) or 1
+
+        start = time.time()
+
+        if self.processes == 1 and self.inline:
+            with _preserve_environ():
+                if self.initializer is not None:
+                    self.initializer(*self.initargs)
+
+                outputs = map(_run_task, items)
+                self._collect(outputs, tasks, results, on_result)
+
+        elif tasks:
+            context = multiprocessing.get_context(self.start_method)
+            with context.Pool(processes, initializer=self.initializer, initargs=self.initargs,
+                              maxtasksperchild=self.max_tasks_per_worker) as pool:
+                self._collect(pool.imap_unordered(_run_task, items, chunksize=1), tasks, results, on_result)
+
+        self.makespan = time.time() - start
+        self.failures.sort(key=lambda f: f['task'])
+
+        print(f'{name or getattr(func, "__name__", "task")}: 任务 {len(tasks)} 个, 进程 {processes} 个, '
+              f'失败 {len(self.failures)} 个, 耗时 {self.makespan:.1f}s')
+        return results
+
+    def _collect(self, outputs, tasks, results, on_result=None):
+        for index, pid, start, end, ok, value in outputs:
+            self.records.append((index, pid, start, end, ok))
+
+            if on_result is not None:
+                on_result(index, ok, value)
+
+            if ok:
+                results[index] = value
+
+            else:
+                self.failures.append({'task': index, 'args': tasks[index], **value})
+                print(f'任务 {tasks[index]} 失败: {value["error"]}')
+
+    def utilisation(self) -> OrderedDict:
+        """ 每个工作进程的任务数、忙碌时间和利用率 (忙碌时间 / makespan) """
+        workers = OrderedDict()
+
+        for _, pid, start, end, _ in sorted(self.records, key=lambda r: r[2]):
+            worker = workers.setdefault(pid, {'tasks': 0, 'busy': 0.0})
+            worker['tasks'] += 1
+            worker['busy'] += end - start
+
+        for worker in workers.values():
+            worker['utilisation'] = worker['busy'] / self.makespan if self.makespan else 0.0
+
+        return workers
+
+    def report(self) -> dict:
+        """ 整轮统计; pool_utilisation 为所有任务忙碌时间之和 / (进程数 * makespan) """
+        busy = sum(end - start for _, _, start, end, _ in self.records)
+        processes = min(self.processes, len(self.records)) or 1
+
+        return {'tasks': len(self.records),
+                'failures': len(self.failures),
+                'workers': len(self.utilisation()),
+                'makespan': self.makespan,
+                'busy': busy,
+                'pool_utilisation': busy / (processes * self.makespan) if self.makespan else 0.0}
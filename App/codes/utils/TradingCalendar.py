@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+交易日历
+
+Rnn_utils.date_range 每次都从 MySQL 读取 bk0424 的整年 1m 数据、重采样到日线，只为了列出交易日。
+RMHistoryCheck.loop_by_date / EvaluateAllTrend.loop_by_date 每次回放都要付出一次多年 1m 数据的读取。
+
+TradingCalendar 把交易日保存为排序的 datetime64[D] 数组, 把日内交易分钟保存为相对当天 0 点的 timedelta64[m] 数组:
+- next_day / prev_day / days_between 用二分查找, O(log n);
+- 可由任意 1m 数据构建 (from_1m), 新数据到来时 extend 合并;
+- save / load 保存为本地 .npz 小文件, 默认位于 RnnData/CommonFile/calendar/<code>.npz;
+- trading_calendar(code) 返回进程内缓存的日历, 请求的日期超出已知范围时只加载之后的 1m 数据补齐;
+  查询今天时当天的数据在进程内每 refresh_ttl 秒最多补读一次, 本地文件只在已确认日期前进时重写。
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from App.codes.MySql.DataBaseStockData1m import StockData1m
+from App.codes.RnnDataFile.stock_path import StockDataPath
+
+
+def _day(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class TradingCalendar:
+    """
+    days: 交易日, 排序去重的 datetime64[D] 数组;
+    minutes: 日内交易分钟, 相对 0 点的 timedelta64[m] 数组 (09:31 ... 15:00);
+    checked_until: 已确认数据完整到哪一天 (此前没有出现的日期不是交易日);
+    """
+
+    def __init__(self, days=(), minutes=(), checked_until=None):
+        self.days = np.unique(np.asarray(days, dtype='datetime64[D]'))
+        self.minutes = np.unique(np.asarray(minutes, dtype='timedelta64[m]'))
+
+        if checked_until is None:
+            checked_until = self.days[-1] if len(self.days) else np.datetime64('NaT', 'D')
+
+        self.checked_until = np.datetime64(checked_until, 'D')
+
+    @classmethod
+    def from_1m(cls, data: pd.DataFrame):
+        """ 由 1m 数据 (date 列) 构建 """
+        if data is None or 'date' not in data:
+            return cls()
+
+        dates = pd.to_datetime(data['date']).to_numpy(dtype='datetime64[m]')
+        days = dates.astype('datetime64[D]')
+        return cls(days, dates - days)
+
+    def extend(self, data: pd.DataFrame, checked_until=None):
+        """ 合并新的 1m 数据 """
+        other = self.from_1m(data)
+        self.days = np.union1d(self.days, other.days)
+        self.minutes = np.union1d(self.minutes, other.minutes)
+
+        checked = [self.checked_until, other.checked_until]
+        if checked_until is not None:
+            checked.append(np.datetime64(checked_until, 'D'))
+
+        checked = [d for d in checked if not np.isnat(d)]
+        if checked:
+            self.checked_until = max(checked)
+
+        return self
+
+    def __len__(self):
+        return len(self.days)
+
+    def __contains__(self, day) -> bool:
+        day = _day(day)
+        i = np.searchsorted(self.days, day)
+        return i < len(self.days) and self.days[i] == day
+
+    def is_trading_day(self, day) -> bool:
+        return day in self
+
+    def next_day(self, day, n: int = 1):
+        """ day 之后第 n 个交易日, 超出范围时返回 None """
+        i = np.searchsorted(self.days, _day(day), side='right') + n - 1
+        return self.days[i] if 0 <= i < len(self.days) else None
+
+    def prev_day(self, day, n: int = 1):
+        """ day 之前第 n 个交易日, 超出范围时返回 None """
+        i = np.searchsorted(self.days, _day(day), side='left') - n
+        return self.days[i] if 0 <= i < len(self.days) else None
+
+    def days_between(self, start, end) -> np.ndarray:
+        """ [start, end] 内的交易日 """
+        a = np.searchsorted(self.days, _day(start), side='left')
+        b = np.searchsorted(self.days, _day(end), side='right')
+        return self.days[a:b]
+
+    def session(self, day) -> np.ndarray:
+        """ 某一交易日的全部交易分钟, datetime64[m] """
+        return _day(day) + self.minutes
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 先写临时文件再原子替换，其它进程不会读到写了一半的文件
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, days=self.days, minutes=self.minutes, checked_until=np.array([self.checked_until]))
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as f:
+            return cls(f['days'], f['minutes'], f['checked_until'][0])
+
+
+# 进程内缓存: code -> TradingCalendar
+_calendars = {}
+
+# 当天数据的补读间隔 (秒) 和进程内上次补读时间: code -> time.monotonic()
+refresh_ttl = 300
+_refreshed = {}
+
+
+def trading_calendar(end=None, code='bk0424', start='2018-01-01') -> TradingCalendar:
+    """
+    返回 code 的 1m 数据对应的交易日历, 保证覆盖到 end (默认今天)。
+
+    本地文件不存在时从 start 起加载一次 1m 数据构建; 之后只加载 checked_until 之后的数据补齐。
+    当天的数据可能还未写入, 已确认日期只到昨天; 查询今天 (及以后) 时, 距上次补读不足 refresh_ttl 秒
+    直接返回内存中的日历。checked_until 没有前进时不重写本地文件。
+    """
+    path = StockDataPath.calendar_path(code)
+    calendar = _calendars.get(code)
+
+    if calendar is None and os.path.exists(path):
+        calendar = TradingCalendar.load(path)
+
+    end = _day(end if end is not None else pd.Timestamp('today'))
+    yesterday = _day(pd.Timestamp('today')) - 1
+
+    stale = calendar is None or np.isnat(calendar.checked_until) or calendar.checked_until < end
+
+    if stale and calendar is not None and not np.isnat(calendar.checked_until) and calendar.checked_until >= yesterday:
+        # 只差当天的数据
+        refreshed = _refreshed.get(code)
+        stale = refreshed is None or time.monotonic() - refreshed >= refresh_ttl
+
+    if stale:
+        if calendar is None or not len(calendar):
+            load_from = pd.Timestamp(start)
+            calendar = TradingCalendar()
+
+        else:
+            load_from = pd.Timestamp(calendar.checked_until + 1)
+
+        checked_until = calendar.checked_until
+        data = StockData1m.load_1m(code, load_from.strftime('%Y-%m-%d'), start_date=load_from, columns=['close'])
+        calendar.extend(data, checked_until=yesterday)
+
+        if np.isnat(checked_until) or calendar.checked_until > checked_until:
+            calendar.save(path)
+
+        if end > yesterday:
+            _refreshed[code] = time.monotonic()
+
+    _calendars[code] = calendar
+    return calendar
@@ -6,6 +6,7 @@ import pandas as pd
 from App.exts import db
 from typing import Dict, Any, Tuple
 import logging
+from App.utils.bulk_upsert import bulk_upsert
 from datetime import datetime
 from .basic_info import StockCodes  # 导入StockCodes模型
 
@@ -167,33 +168,14 @@ def save_1m_stock_data_to_sql(stock_code: str, year: int, data: pd.DataFrame) ->
         # 动态创建模型类
         StockModel = create_1m_stock_model(stock_code, year)
 
-        # 将 DataFrame 转为字典列表
-        records = data.to_dict(orient='records')
-
-        # 获取已存在的日期
-        existing_dates = {record.date for record in StockModel.query.with_entities(StockModel.date).all()}
-
-        # 拆分插入与更新
-        new_records = []
-        updated_count = 0
-        
-        for record in records:
-            if record['date'] in existing_dates:
-                # 更新已有记录
-                StockModel.query.filter_by(date=record['date']).update(record)
-                updated_count += 1
-            else:
-                # 收集需要插入的新记录
-                new_records.append(StockModel(**record))
-
-        # 批量插入新记录
-        if new_records:
-            db.session.bulk_save_objects(new_records)
+        # 在模型所属数据库的当前事务中批量 upsert, 主键冲突时更新
+        connection = db.session.connection(bind_arguments={'mapper': StockModel.__mapper__})
+        count = bulk_upsert(connection, StockModel.__tablename__, data, primary_key='date')
 
         # 提交事务
         db.session.commit()
         
-        logger.info(f"成功保存股票 {stock_code} {year}年1分钟数据，新增 {len(new_records)} 条，更新 {updated_count} 条")
+        logger.info(f"成功保存股票 {stock_code} {year}年1分钟数据，写入 {count} 条")
         return True
         
     except Exception as e:
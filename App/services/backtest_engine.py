@@ -0,0 +1,233 @@
+"""
+向量化回测引擎
+按 final_signal 推出持仓 (空仓遇买入信号全仓买入, 持仓遇卖出信号全部卖出), 含手续费和滑点,
+资金、持仓、权益、回撤都用 NumPy 数组计算, 只按成交笔数循环, 不再逐根 K 线循环
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Any, Optional
+
+# 没有时间索引时按日线计算年化
+TRADING_DAYS_PER_YEAR = 252
+
+
+def simulate(close, signal, initial_capital: float = 100000, fee_rate: float = 0.0,
+             slippage: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    按信号模拟成交, 得到每根 K 线的资金、持仓和权益
+
+    买入价为 close * (1 + slippage), 卖出价为 close * (1 - slippage), 买卖都按成交金额收取 fee_rate 手续费;
+    买入股数为扣除手续费后可买的整数股, 买不起 1 股时本次信号不成交。
+    fee_rate 和 slippage 为 0 时与逐行回测的结果完全一致
+
+    Args:
+        close: 收盘价
+        signal: 信号, 1 买入, -1 卖出, 其他不操作
+        initial_capital: 初始资金
+        fee_rate: 手续费率
+        slippage: 滑点 (按价格比例)
+
+    Returns:
+        Dict: entries/exits 买入、卖出所在的行号 (最后一笔未平仓时 exits 比 entries 少一个),
+              shares 每笔股数, entry_price/exit_price 成交价, entry_capital/exit_capital 成交后的资金,
+              cost 每笔买入花费 (含手续费), cash/position/equity 每根 K 线的资金、持仓、权益
+    """
+    close = np.asarray(close, dtype=float)
+    signal = np.asarray(signal, dtype=float)
+    n = len(close)
+
+    buys = np.flatnonzero(signal == 1)
+    sells = np.flatnonzero(signal == -1)
+
+    entries, exits, shares_list = [], [], []
+    entry_price, exit_price, entry_capital, exit_capital, costs = [], [], [], [], []
+
+    capital = initial_capital
+    start = 0
+    while True:
+        k = np.searchsorted(buys, start)
+        if k == len(buys):
+            break
+
+        bar = buys[k]
+        price = close[bar] * (1 + slippage)
+        shares = int(capital / (price * (1 + fee_rate)))
+        if shares <= 0:
+            start = bar + 1
+            continue
+
+        amount = shares * price
+        cost = amount + amount * fee_rate
+        capital -= cost
+        entries.append(bar)
+        shares_list.append(shares)
+        entry_price.append(price)
+        entry_capital.append(capital)
+        costs.append(cost)
+
+        k = np.searchsorted(sells, bar + 1)
+        if k == len(sells):
+            break
+
+        bar = sells[k]
+        price = close[bar] * (1 - slippage)
+        amount = shares * price
+        capital += amount - amount * fee_rate
+        exits.append(bar)
+        exit_price.append(price)
+        exit_capital.append(capital)
+        start = bar + 1
+
+    entries = np.asarray(entries, dtype=np.int64)
+    exits = np.asarray(exits, dtype=np.int64)
+    shares = np.asarray(shares_list, dtype=np.int64)
+    entry_capital = np.asarray(entry_capital, dtype=float)
+    exit_capital = np.asarray(exit_capital, dtype=float)
+
+    # 资金和持仓只在成交时变化, 每根 K 线取最近一笔成交后的值
+    bars = np.concatenate([entries, exits])
+    order = np.argsort(bars, kind='stable')
+    after = np.searchsorted(bars[order], np.arange(n), side='right')
+    cash = np.concatenate([[initial_capital], entry_capital, exit_capital]).astype(float)
+    cash = cash[np.concatenate([[0], order + 1])][after]
+    position = np.concatenate([[0], shares, np.zeros(len(exits), dtype=np.int64)])
+    position = position[np.concatenate([[0], order + 1])][after]
+    equity = cash + position * close
+
+    return {
+        'entries': entries,
+        'exits': exits,
+        'shares': shares,
+        'entry_price': np.asarray(entry_price, dtype=float),
+        'exit_price': np.asarray(exit_price, dtype=float),
+        'entry_capital': entry_capital,
+        'exit_capital': exit_capital,
+        'cost': np.asarray(costs, dtype=float),
+        'cash': cash,
+        'position': position,
+        'equity': equity,
+    }
+
+
+def trade_list(sim: Dict[str, np.ndarray], index) -> List[Dict[str, Any]]:
+    """
+    把 simulate 的成交整理成交易记录, 按时间排列
+
+    Args:
+        sim: simulate 的结果
+        index: 每根 K 线的日期 (数据框的索引)
+
+    Returns:
+        List[Dict]: 每笔交易的 date/action/price/shares/capital
+    """
+    trades = []
+    for i, bar in enumerate(sim['entries']):
+        trades.append({'date': index[bar], 'action': 'buy', 'price': sim['entry_price'][i],
+                       'shares': int(sim['shares'][i]), 'capital': sim['entry_capital'][i]})
+        if i < len(sim['exits']):
+            trades.append({'date': index[sim['exits'][i]], 'action': 'sell', 'price': sim['exit_price'][i],
+                           'shares': int(sim['shares'][i]), 'capital': sim['exit_capital'][i]})
+    return trades
+
+
+def drawdown(equity: np.ndarray):
+    """ 权益的历史最高点和回撤 """
+    peak = np.maximum.accumulate(equity)
+    return peak, (equity - peak) / peak
+
+
+def _max_run(mask: np.ndarray) -> int:
+    """ 布尔数组中最长的连续 True 个数 """
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], mask.astype(np.int8), [0]])))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def _years(dates, n: int, periods_per_year: Optional[float]):
+    """ 回测跨越的年数和每年的 K 线数, 有时间索引时按实际时间跨度计算 """
+    if periods_per_year is None and isinstance(dates, pd.DatetimeIndex) and n > 1:
+        years = (dates[-1] - dates[0]).total_seconds() / (365.25 * 24 * 3600)
+        if years > 0:
+            return years, (n - 1) / years
+
+    periods_per_year = periods_per_year or TRADING_DAYS_PER_YEAR
+    return max(n - 1, 1) / periods_per_year, periods_per_year
+
+
+def performance(sim: Dict[str, np.ndarray], close, initial_capital: float, dates=None,
+                periods_per_year: Optional[float] = None) -> Dict[str, Any]:
+    """
+    按 StrategyPerformance 的字段计算回测指标
+
+    收益率、回撤、波动率、胜率、VaR 与模型注释一致为百分数; 夏普、索提诺按每年 K 线数年化,
+    无风险利率取 0; 胜率、盈亏比等只统计已平仓的交易
+
+    Args:
+        sim: simulate 的结果
+        close: 收盘价, 用于计算基准 (买入持有) 收益率
+        initial_capital: 初始资金
+        dates: 每根 K 线的日期, 为 DatetimeIndex 时按实际时间跨度年化
+        periods_per_year: 每年的 K 线数, 不传且没有时间索引时按日线 252 计算
+
+    Returns:
+        Dict: 可直接传给 StrategyPerformance.update_performance 的字段
+    """
+    equity = sim['equity']
+    close = np.asarray(close, dtype=float)
+    n = len(equity)
+
+    final_capital = float(equity[-1])
+    total_return = (final_capital - initial_capital) / initial_capital
+    years, per_year = _years(dates, n, periods_per_year)
+    annual_return = (final_capital / initial_capital) ** (1 / years) - 1 if final_capital > 0 else -1.0
+
+    max_drawdown = float(drawdown(equity)[1].min())
+    calmar_ratio = annual_return / -max_drawdown if max_drawdown < 0 else 0.0
+
+    returns = equity[1:] / equity[:-1] - 1
+    returns = returns[~np.isnan(returns)]
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    mean = returns.mean() if len(returns) else 0.0
+    sharpe_ratio = mean / std * np.sqrt(per_year) if std > 0 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if len(returns) else 0.0
+    sortino_ratio = mean / downside * np.sqrt(per_year) if downside > 0 else 0.0
+
+    if len(returns):
+        var_95 = -np.percentile(returns, 5)
+        cvar_95 = -returns[returns <= -var_95].mean()
+    else:
+        var_95 = cvar_95 = 0.0
+
+    # 已平仓交易的盈亏: 卖出后的资金减去买入前的资金
+    closed = len(sim['exits'])
+    before_entry = np.concatenate([[initial_capital], sim['exit_capital']])[:closed]
+    pnl = sim['exit_capital'] - before_entry
+    wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+
+    valid = close[~np.isnan(close)]
+    benchmark_return = valid[-1] / valid[0] - 1 if len(valid) > 1 else 0.0
+
+    return {
+        'total_return': total_return * 100,
+        'annual_return': annual_return * 100,
+        'max_drawdown': max_drawdown * 100,
+        'sharpe_ratio': float(sharpe_ratio),
+        'sortino_ratio': float(sortino_ratio),
+        'calmar_ratio': float(calmar_ratio),
+        'volatility': float(std * np.sqrt(per_year) * 100),
+        'var_95': float(var_95 * 100),
+        'cvar_95': float(cvar_95 * 100),
+        'total_trades': len(sim['entries']) + closed,
+        'win_rate': len(wins) / closed * 100 if closed else 0.0,
+        'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else 0.0,
+        'avg_win': float(wins.mean()) if len(wins) else 0.0,
+        'avg_loss': float(losses.mean()) if len(losses) else 0.0,
+        'max_consecutive_wins': _max_run(pnl > 0),
+        'max_consecutive_losses': _max_run(pnl < 0),
+        'initial_capital': float(initial_capital),
+        'final_capital': final_capital,
+        'benchmark_return': float(benchmark_return * 100),
+        'excess_return': float((total_return - benchmark_return) * 100),
+    }
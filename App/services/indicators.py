@@ -0,0 +1,118 @@
+"""
+技术指标与信号公式
+StrategyService 的 calculate_* / generate_*_signals / combine_signals 和 parameter_sweep 的指标缓存都调用这里的函数,
+参数扫描与实际回测使用同一套公式; 指标输入输出为 Series, 信号为 int64 数组 (1 买入, -1 卖出, 0 无信号)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+# combine_signals 的默认权重
+DEFAULT_WEIGHTS = {'macd_signal': 0.4, 'bb_signal': 0.3, 'rsi_signal': 0.3}
+
+
+def ema(close: pd.Series, span: int) -> pd.Series:
+    return close.ewm(span=span, adjust=False).mean()
+
+
+def macd_lines(ema_short: pd.Series, ema_long: pd.Series, signal_period: int) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """ 由短期、长期 EMA 计算 DIFF、DEA (信号线) 和 MACD 柱线 """
+    diff = ema_short - ema_long
+    dea = diff.ewm(span=signal_period, adjust=False).mean()
+    return diff, dea, (diff - dea) * 2
+
+
+def rolling_mean(close: pd.Series, period: int) -> pd.Series:
+    return close.rolling(window=period).mean()
+
+
+def rolling_std(close: pd.Series, period: int) -> pd.Series:
+    return close.rolling(window=period).std()
+
+
+def bollinger_bands(middle: pd.Series, std: pd.Series, std_dev: float) -> Tuple[pd.Series, pd.Series]:
+    """ 由移动平均线和标准差计算上轨、下轨 """
+    return middle + (std * std_dev), middle - (std * std_dev)
+
+
+def rsi(close: pd.Series, period: int) -> pd.Series:
+    delta = close.diff()
+
+    # 分离上涨和下跌
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    rs = gain.rolling(window=period).mean() / loss.rolling(window=period).mean()
+    return 100 - (100 / (1 + rs))
+
+
+def macd_cross_signal(macd, dea) -> np.ndarray:
+    """ MACD 线上穿 DEA 线 (金叉) 为 1, 下穿 (死叉) 为 -1 """
+    macd = np.asarray(macd, dtype=float)
+    dea = np.asarray(dea, dtype=float)
+
+    macd_prev, dea_prev = np.roll(macd, 1), np.roll(dea, 1)
+    if len(macd):
+        macd_prev[0] = dea_prev[0] = np.nan
+
+    signal = np.zeros(len(macd), dtype=np.int64)
+    signal[(macd > dea) & (macd_prev <= dea_prev)] = 1
+    signal[(macd < dea) & (macd_prev >= dea_prev)] = -1
+    return signal
+
+
+def band_signal(close, upper, lower) -> np.ndarray:
+    """ 收盘价触及下轨为 1, 触及上轨为 -1 """
+    close = np.asarray(close, dtype=float)
+
+    signal = np.zeros(len(close), dtype=np.int64)
+    signal[close <= np.asarray(lower, dtype=float)] = 1
+    signal[close >= np.asarray(upper, dtype=float)] = -1
+    return signal
+
+
+def threshold_signal(values, oversold: float, overbought: float) -> np.ndarray:
+    """ 不高于超卖阈值为 1, 不低于超买阈值为 -1 """
+    values = np.asarray(values, dtype=float)
+
+    signal = np.zeros(len(values), dtype=np.int64)
+    signal[values <= oversold] = 1
+    signal[values >= overbought] = -1
+    return signal
+
+
+def combine(signals: Dict[str, object], weights: Optional[Dict[str, float]] = None):
+    """
+    加权组合信号
+
+    Args:
+        signals: 信号名 -> 信号序列, 没有给出权重的信号取 1 / 信号数
+        weights: 各信号权重, None 为 DEFAULT_WEIGHTS
+
+    Returns:
+        (combined, total_weight): 加权和 / 总权重 (总权重不为正时为 None) 和总权重
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+
+    combined = 0
+    total_weight = 0
+    for name, signal in signals.items():
+        weight = weights.get(name, 1.0 / len(signals))
+        combined += signal * weight
+        total_weight += weight
+
+    if total_weight <= 0:
+        return None, total_weight
+    return combined / total_weight, total_weight
+
+
+def final_signal(combined) -> np.ndarray:
+    """ 组合信号大于 0.5 为 1, 小于 -0.5 为 -1 """
+    combined = np.asarray(combined, dtype=float)
+
+    final = np.zeros(len(combined), dtype=np.int64)
+    final[combined > 0.5] = 1
+    final[combined < -0.5] = -1
+    return final
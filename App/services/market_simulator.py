@@ -0,0 +1,319 @@
+"""
+模拟行情与撮合
+BarFeed 按时间回放本地 1m/15m K 线作为行情源; MatchingSimulator 按 K 线的开高低收撮合订单,
+支持按 K 线数计的延迟和按成交量比例的部分成交; PositionBook 用数组保存持仓
+"""
+
+import os
+from typing import Dict, List, Any, Optional, Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+def _to_ns(value) -> int:
+    return pd.Timestamp(value).value
+
+
+class BarFeed:
+    """
+    K 线回放行情源
+
+    每只股票的 K 线按时间保存为数组, 行情时钟只能向前推进; 当前价为时钟之前 (含) 最后一根 K 线的收盘价。
+    同一个时钟下回放多只股票, 结果只取决于 K 线数据, 可重复
+    """
+
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        """
+        Args:
+            frames: 股票代码 -> K 线数据框, 包含 open/high/low/close/volume 列, 时间在 date 列或索引中
+        """
+        self._slots = {}
+        self._times = []
+        self._bars = []
+
+        for code, data in frames.items():
+            dates = data['date'] if 'date' in data.columns else data.index.to_series()
+            times = pd.to_datetime(dates, cache=False).to_numpy(dtype='datetime64[ns]').view(np.int64)
+            order = np.argsort(times, kind='stable')
+
+            self._slots[code] = len(self._times)
+            self._times.append(times[order])
+            self._bars.append(data[self.COLUMNS].to_numpy(dtype=float)[order])
+
+        self._now = None
+
+    @classmethod
+    def from_loader(cls, codes: Iterable[str], loader: Callable[[str], pd.DataFrame]) -> 'BarFeed':
+        """
+        用加载函数读取各股票的 K 线, 例如 lambda code: StockData1m.load_1m(code, '2024')
+        或 lambda code: StockData15m.load_15m(code)
+        """
+        return cls({code: loader(code) for code in codes})
+
+    @classmethod
+    def from_csv(cls, folder: str, codes: Optional[Iterable[str]] = None) -> 'BarFeed':
+        """ 读取 folder 下的 {code}.csv (本地 1m/15m 数据的目录), 不传 codes 时读取全部文件 """
+        if codes is None:
+            codes = sorted(name[:-4] for name in os.listdir(folder) if name.endswith('.csv'))
+        return cls.from_loader(codes, lambda code: pd.read_csv(os.path.join(folder, f'{code}.csv')))
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._slots
+
+    @property
+    def codes(self) -> List[str]:
+        return list(self._slots)
+
+    @property
+    def now(self) -> Optional[pd.Timestamp]:
+        """ 当前行情时间, 尚未开始回放时为 None """
+        return None if self._now is None else pd.Timestamp(self._now)
+
+    @property
+    def start(self) -> pd.Timestamp:
+        return pd.Timestamp(min(times[0] for times in self._times if len(times)))
+
+    @property
+    def end(self) -> pd.Timestamp:
+        return pd.Timestamp(max(times[-1] for times in self._times if len(times)))
+
+    def clock(self) -> pd.DatetimeIndex:
+        """ 所有股票 K 线时间的并集 """
+        return pd.DatetimeIndex(np.unique(np.concatenate(self._times)).view('datetime64[ns]'))
+
+    def advance_to(self, when):
+        """ 把行情时钟推进到 when """
+        when = _to_ns(when)
+        if self._now is not None and when < self._now:
+            raise ValueError(f"行情时间不能回退: {pd.Timestamp(when)} < {self.now}")
+        self._now = when
+
+    def times(self, code: str) -> np.ndarray:
+        return self._times[self._slot(code)]
+
+    def bars(self, code: str) -> np.ndarray:
+        """ (K 线数, 5) 数组, 列为 open/high/low/close/volume """
+        return self._bars[self._slot(code)]
+
+    def bar_index(self, code: str, when=None) -> int:
+        """ when (默认当前时间) 之前 (含) 最后一根 K 线的位置, 没有时为 -1 """
+        when = self._now if when is None else _to_ns(when)
+        if when is None:
+            return -1
+        return int(np.searchsorted(self.times(code), when, side='right')) - 1
+
+    def current_price(self, code: str) -> float:
+        i = self.bar_index(code)
+        if i < 0:
+            raise ValueError(f"{code} 在 {self.now} 之前没有行情")
+        return float(self.bars(code)[i, 3])
+
+    def _slot(self, code: str) -> int:
+        if code not in self._slots:
+            raise KeyError(f"行情源中没有 {code}")
+        return self._slots[code]
+
+
+class PositionBook:
+    """
+    数组持仓簿
+
+    每只股票占一个槽位, 数量、成本价、首次买入时间分别存在数组中, 容量不够时翻倍;
+    数量为 0 的槽位保留, 再次买入时复用
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._slots = {}
+        self._codes = []
+        self.quantity = np.zeros(capacity, dtype=np.int64)
+        self.avg_price = np.zeros(capacity)
+        self.first_buy = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    def __contains__(self, code: str) -> bool:
+        return self.quantity_of(code) > 0
+
+    def __len__(self) -> int:
+        return int((self.quantity[:len(self._codes)] > 0).sum())
+
+    def quantity_of(self, code: str) -> int:
+        slot = self._slots.get(code)
+        return 0 if slot is None else int(self.quantity[slot])
+
+    def buy(self, code: str, quantity: int, price: float, when):
+        slot = self._slot(code)
+        held = self.quantity[slot]
+        if held == 0:
+            self.avg_price[slot] = price
+            self.first_buy[slot] = np.datetime64(pd.Timestamp(when).to_datetime64(), 'ns')
+        else:
+            self.avg_price[slot] = (held * self.avg_price[slot] + quantity * price) / (held + quantity)
+        self.quantity[slot] = held + quantity
+
+    def sell(self, code: str, quantity: int):
+        held = self.quantity_of(code)
+        if quantity > held:
+            raise ValueError(f"持仓不足: {code}, 需要: {quantity}, 持有: {held}")
+        self.quantity[self._slots[code]] = held - quantity
+
+    def open_codes(self) -> List[str]:
+        held = np.flatnonzero(self.quantity[:len(self._codes)] > 0)
+        return [self._codes[slot] for slot in held]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """ 与 TradeService 原来 positions 字典相同的结构 """
+        return {code: {'quantity': int(self.quantity[self._slots[code]]),
+                       'avg_price': float(self.avg_price[self._slots[code]]),
+                       'first_buy_date': pd.Timestamp(self.first_buy[self._slots[code]]).to_pydatetime()}
+                for code in self.open_codes()}
+
+    def _slot(self, code: str) -> int:
+        slot = self._slots.get(code)
+        if slot is None:
+            slot = len(self._codes)
+            if slot == len(self.quantity):
+                self.quantity = np.concatenate([self.quantity, np.zeros_like(self.quantity)])
+                self.avg_price = np.concatenate([self.avg_price, np.zeros_like(self.avg_price)])
+                self.first_buy = np.concatenate([self.first_buy, np.full_like(self.first_buy, np.datetime64('NaT'))])
+            self._slots[code] = slot
+            self._codes.append(code)
+        return slot
+
+
+class MatchingSimulator:
+    """
+    按 K 线撮合的内存撮合器
+
+    订单在下单时刻所在的 K 线之后第 latency 根 K 线开始撮合: 市价单按该 K 线开盘价成交,
+    限价买单在最低价不高于限价时按 min(开盘价, 限价) 成交, 限价卖单在最高价不低于限价时按 max(开盘价, 限价) 成交;
+    latency 为 0 时在下单所在的 K 线按收盘价撮合。participation 不为空时每根 K 线最多成交
+    成交量 x participation, 剩余部分留到后面的 K 线继续撮合
+    """
+
+    def __init__(self, feed: BarFeed, latency: int = 1, participation: Optional[float] = None):
+        """
+        Args:
+            feed: 行情源
+            latency: 下单到开始撮合相隔的 K 线数
+            participation: 每根 K 线可成交的成交量比例, None 为不限
+        """
+        if latency < 0:
+            raise ValueError("latency 不能为负数")
+
+        self.feed = feed
+        self.latency = int(latency)
+        self.participation = participation
+        self._pending = []
+        self._seq = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(self, order: Dict[str, Any], limit: Optional[float] = None):
+        """
+        提交订单 (order 至少包含 stock_code / action / quantity), 在当前行情时间挂单
+
+        Args:
+            order: 订单, 成交后由 TradeService 更新
+            limit: 限价, None 为市价单
+        """
+        if self.feed.now is None:
+            raise ValueError("行情尚未开始回放")
+
+        code = order['stock_code']
+        current = self.feed.bar_index(code)
+        close_bar = current if self.latency == 0 and current >= 0 else -1
+
+        self._pending.append({'order': order, 'code': code, 'buy': order['action'] == 'buy',
+                              'remaining': int(order['quantity']), 'limit': limit,
+                              'bar': max(current + self.latency, 0), 'close_bar': close_bar,
+                              'seq': self._seq, 'signal_time': self.feed.now})
+        self._seq += 1
+
+    def cancel(self, order: Dict[str, Any]) -> int:
+        """ 撤销订单的剩余部分, 返回撤销的数量 """
+        for i, entry in enumerate(self._pending):
+            if entry['order'] is order:
+                del self._pending[i]
+                return entry['remaining']
+        return 0
+
+    def advance_to(self, when, on_fill: Callable[[Dict[str, Any]], int]) -> List[Dict[str, Any]]:
+        """
+        把行情推进到 when, 撮合期间 (含 when) 的 K 线, 成交按时间先后交给 on_fill
+
+        Args:
+            when: 行情时间
+            on_fill: 成交回调, 参数为成交记录, 返回实际接受的数量; 少于成交数量时撤销订单的剩余部分
+
+        Returns:
+            List[Dict]: 被接受的成交记录 (order_id/stock_code/action/quantity/price/time/signal_time/latency)
+        """
+        self.feed.advance_to(when)
+
+        # 每个挂单可能成交的 K 线: 从下一根待撮合的 K 线到当前时间
+        events = []
+        for entry in self._pending:
+            last = self.feed.bar_index(entry['code'])
+            if entry['bar'] <= last:
+                times = self.feed.times(entry['code'])[entry['bar']:last + 1]
+                events.extend((t, entry['seq'], entry, bar) for bar, t in enumerate(times, entry['bar']))
+        events.sort(key=lambda event: (event[0], event[1]))
+
+        fills = []
+        done = set()
+        for t, seq, entry, bar in events:
+            if seq in done:
+                continue
+
+            fill = self._match(entry, bar)
+            entry['bar'] = bar + 1
+            if fill is None:
+                continue
+
+            matched = fill['quantity']
+            accepted = on_fill(fill)
+            if accepted > 0:
+                fill['quantity'] = accepted
+                fills.append(fill)
+                entry['remaining'] -= accepted
+            if accepted < matched or entry['remaining'] <= 0:
+                done.add(seq)
+
+        if done:
+            self._pending = [entry for entry in self._pending if entry['seq'] not in done]
+        return fills
+
+    def _match(self, entry: Dict[str, Any], bar: int) -> Optional[Dict[str, Any]]:
+        open_, high, low, close, volume = self.feed.bars(entry['code'])[bar]
+
+        # latency 为 0 时下单所在的 K 线只剩收盘价可成交
+        if bar == entry['close_bar']:
+            open_ = high = low = close
+
+        limit = entry['limit']
+        if limit is None:
+            price = open_
+        elif entry['buy']:
+            if not low <= limit:
+                return None
+            price = min(open_, limit)
+        else:
+            if not high >= limit:
+                return None
+            price = max(open_, limit)
+
+        quantity = entry['remaining']
+        if self.participation is not None:
+            quantity = min(quantity, int(volume * self.participation))
+        if quantity <= 0 or np.isnan(price):
+            return None
+
+        time = pd.Timestamp(int(self.feed.times(entry['code'])[bar]))
+        return {'order_id': entry['order']['order_id'], 'stock_code': entry['code'],
+                'action': entry['order']['action'], 'quantity': int(quantity), 'price': float(price),
+                'time': time, 'signal_time': entry['signal_time'], 'latency': time - entry['signal_time'],
+                'order': entry['order']}
@@ -0,0 +1,317 @@
+"""
+策略参数扫描
+对 MACD、布林带、RSI 参数和 combine_signals 权重做网格 / 随机扫描, 每组参数用向量化回测评估;
+指标序列按 (收盘价指纹, 参数) 缓存, 共用窗口的参数组合不重复计算, 参数组合可分到多个进程执行
+"""
+
+import random
+import hashlib
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Callable
+
+import numpy as np
+import pandas as pd
+
+from App.services import backtest_engine, indicators
+
+logger = logging.getLogger(__name__)
+
+# 与 StrategyService 各方法的默认参数一致
+DEFAULT_PARAMS = {
+    'short_period': 12,
+    'mid_period': 20,
+    'long_period': 30,
+    'signal_period': 9,
+    'bb_period': 20,
+    'std_dev': 2.0,
+    'rsi_period': 14,
+    'oversold': 30,
+    'overbought': 70,
+    'weights': None,
+}
+
+
+def fingerprint(close) -> str:
+    """ 收盘价序列的指纹, 作为缓存键的一部分 """
+    values = np.ascontiguousarray(np.asarray(close, dtype=float))
+    return hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+
+
+class IndicatorCache:
+    """
+    指标序列缓存
+
+    按 (收盘价指纹, 指标, 参数) 缓存 EMA、滚动均值 / 标准差、RSI 和各指标的信号, 公式都来自 indicators,
+    与 StrategyService.calculate_* / generate_*_signals / combine_signals 共用, 结果完全一致。
+    MACD 信号只用到短期、长期 EMA 和信号线, 中期周期不同的组合共用同一份信号
+    """
+
+    def __init__(self):
+        self._store = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._store)
+
+    def _get(self, key, compute: Callable):
+        if key in self._store:
+            self.hits += 1
+            return self._store[key]
+
+        self.misses += 1
+        value = compute()
+        self._store[key] = value
+        return value
+
+    def ema(self, close: pd.Series, key: str, span: int) -> pd.Series:
+        return self._get((key, 'ema', span), lambda: indicators.ema(close, span))
+
+    def rolling_mean(self, close: pd.Series, key: str, period: int) -> pd.Series:
+        return self._get((key, 'rolling_mean', period), lambda: indicators.rolling_mean(close, period))
+
+    def rolling_std(self, close: pd.Series, key: str, period: int) -> pd.Series:
+        return self._get((key, 'rolling_std', period), lambda: indicators.rolling_std(close, period))
+
+    def rsi(self, close: pd.Series, key: str, period: int) -> pd.Series:
+        return self._get((key, 'rsi', period), lambda: indicators.rsi(close, period))
+
+    def macd_signal(self, close: pd.Series, key: str, short_period: int, long_period: int,
+                    signal_period: int) -> np.ndarray:
+        """ MACD 金叉为 1, 死叉为 -1 """
+        def compute():
+            _, dea, macd = indicators.macd_lines(self.ema(close, key, short_period), self.ema(close, key, long_period),
+                                                 signal_period)
+            return indicators.macd_cross_signal(macd, dea)
+
+        return self._get((key, 'macd_signal', short_period, long_period, signal_period), compute)
+
+    def bb_signal(self, close: pd.Series, key: str, period: int, std_dev: float) -> np.ndarray:
+        """ 收盘价触及下轨为 1, 触及上轨为 -1 """
+        def compute():
+            upper, lower = indicators.bollinger_bands(self.rolling_mean(close, key, period),
+                                                      self.rolling_std(close, key, period), std_dev)
+            return indicators.band_signal(close, upper, lower)
+
+        return self._get((key, 'bb_signal', period, std_dev), compute)
+
+    def rsi_signal(self, close: pd.Series, key: str, period: int, oversold: float,
+                   overbought: float) -> np.ndarray:
+        """ RSI 超卖为 1, 超买为 -1 """
+        return self._get((key, 'rsi_signal', period, oversold, overbought),
+                         lambda: indicators.threshold_signal(self.rsi(close, key, period), oversold, overbought))
+
+    def final_signal(self, close: pd.Series, key: str, params: Dict[str, Any]) -> np.ndarray:
+        """ 与 combine_signals 相同的加权组合, 大于 0.5 为 1, 小于 -0.5 为 -1 """
+        signals = {
+            'macd_signal': self.macd_signal(close, key, params['short_period'], params['long_period'],
+                                            params['signal_period']),
+            'bb_signal': self.bb_signal(close, key, params['bb_period'], params['std_dev']),
+            'rsi_signal': self.rsi_signal(close, key, params['rsi_period'], params['oversold'],
+                                          params['overbought']),
+        }
+        combined, total_weight = indicators.combine(signals, params['weights'])
+
+        if combined is None:
+            return np.zeros(len(close), dtype=np.int64)
+        return indicators.final_signal(combined)
+
+
+def _check_space(space: Dict[str, list]):
+    unknown = set(space) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"未知的参数: {sorted(unknown)}")
+
+
+def grid(space: Dict[str, list]) -> List[Dict[str, Any]]:
+    """
+    网格扫描的参数组合
+
+    Args:
+        space: 参数名 -> 候选值列表, 参数名同 DEFAULT_PARAMS, 未给出的参数取默认值
+
+    Returns:
+        List[Dict]: 全部参数组合, 靠前的参数变化最慢, 相邻组合尽量共用指标
+    """
+    _check_space(space)
+
+    names = list(space)
+    return [{**DEFAULT_PARAMS, **dict(zip(names, values))}
+            for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_sample(space: Dict[str, list], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    随机扫描的参数组合: 从网格中不重复地抽取 n 组, 不展开整个网格
+
+    Args:
+        space: 同 grid
+        n: 抽取的组合数, 超过网格大小时返回整个网格
+        seed: 随机种子
+
+    Returns:
+        List[Dict]: 按网格顺序排列的参数组合
+    """
+    _check_space(space)
+
+    names = list(space)
+    sizes = [len(space[name]) for name in names]
+    total = 1
+    for size in sizes:
+        total *= size
+    picks = sorted(random.Random(seed).sample(range(total), min(n, total)))
+
+    combos = []
+    for pick in picks:
+        values = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            pick, i = divmod(pick, size)
+            values[name] = space[name][i]
+        combos.append({**DEFAULT_PARAMS, **values})
+    return combos
+
+
+def strategy_label(strategy_name: str, params: Dict[str, Any], max_length: int = 50) -> str:
+    """
+    一组参数对应的 StrategyPerformance.strategy_name
+
+    形如 macd_m12.20.30.9_b20.2.0_r14.30.70, 自定义权重时追加权重的摘要;
+    超过字段长度时改用全部参数的摘要
+    """
+    label = (f"{strategy_name}_m{params['short_period']}.{params['mid_period']}.{params['long_period']}."
+             f"{params['signal_period']}_b{params['bb_period']}.{params['std_dev']}"
+             f"_r{params['rsi_period']}.{params['oversold']}.{params['overbought']}")
+    if params['weights'] is not None:
+        label += '_w' + hashlib.blake2b(repr(sorted(params['weights'].items())).encode(), digest_size=3).hexdigest()
+
+    if len(label) > max_length:
+        digest = hashlib.blake2b(repr(sorted((k, repr(v)) for k, v in params.items())).encode(),
+                                 digest_size=8).hexdigest()
+        label = f"{strategy_name[:max_length - len(digest) - 1]}_{digest}"
+    return label
+
+
+def evaluate(close: pd.Series, params: Dict[str, Any], cache: IndicatorCache, key: Optional[str] = None,
+             initial_capital: float = 100000, fee_rate: float = 0.0, slippage: float = 0.0,
+             periods_per_year: Optional[float] = None) -> Dict[str, Any]:
+    """
+    回测一组参数
+
+    Args:
+        close: 收盘价, 索引为日期
+        params: 参数组合, 缺少的参数取默认值
+        cache: 指标缓存
+        key: close 的指纹, 不传时现算
+
+    Returns:
+        Dict: StrategyPerformance 字段
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    key = key or fingerprint(close)
+    signal = cache.final_signal(close, key, params)
+    sim = backtest_engine.simulate(close.to_numpy(dtype=float), signal, initial_capital, fee_rate, slippage)
+    return backtest_engine.performance(sim, close.to_numpy(dtype=float), initial_capital, dates=close.index,
+                                       periods_per_year=periods_per_year)
+
+
+def _run_chunk(close: pd.Series, combos: List[Dict[str, Any]], settings: Dict[str, Any]):
+    """ 子进程: 用本进程的缓存回测一批参数组合 """
+    cache = IndicatorCache()
+    key = fingerprint(close)
+    results = [evaluate(close, params, cache, key, **settings) for params in combos]
+    return results, cache.hits, cache.misses
+
+
+class ParameterSweep:
+    """
+    参数扫描
+
+    同一只股票的收盘价上回测多组参数, 指标缓存在多次 run 之间保留;
+    workers > 1 时把参数组合按顺序切成 workers 段分给进程池, 每个进程各自缓存
+    """
+
+    def __init__(self, data: pd.DataFrame, initial_capital: float = 100000, fee_rate: float = 0.0,
+                 slippage: float = 0.0, periods_per_year: Optional[float] = None, workers: int = 1):
+        """
+        Args:
+            data: 包含 close 列的数据框, 索引为日期
+            initial_capital: 初始资金
+            fee_rate: 手续费率
+            slippage: 滑点
+            periods_per_year: 每年的 K 线数, 见 backtest_engine.performance
+            workers: 进程数, 1 为在当前进程中执行
+        """
+        if data.empty or 'close' not in data.columns:
+            raise ValueError("数据为空或缺少close列")
+
+        self.close = data['close'].astype(float)
+        self.key = fingerprint(self.close)
+        self.settings = {'initial_capital': initial_capital, 'fee_rate': fee_rate, 'slippage': slippage,
+                         'periods_per_year': periods_per_year}
+        self.workers = max(int(workers), 1)
+        self.cache = IndicatorCache()
+        self.hits = 0
+        self.misses = 0
+
+    def run(self, combos: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        回测全部参数组合
+
+        Args:
+            combos: grid / random_sample 生成的参数组合
+
+        Returns:
+            pd.DataFrame: 每组参数一行, 包含参数列和 StrategyPerformance 字段
+        """
+        combos = [{**DEFAULT_PARAMS, **params} for params in combos]
+        workers = min(self.workers, len(combos))
+
+        if workers <= 1:
+            hits, misses = self.cache.hits, self.cache.misses
+            results = [evaluate(self.close, params, self.cache, self.key, **self.settings) for params in combos]
+            self.hits += self.cache.hits - hits
+            self.misses += self.cache.misses - misses
+        else:
+            bounds = np.linspace(0, len(combos), workers + 1).astype(int)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_run_chunk, self.close, combos[lo:hi], self.settings)
+                           for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+                results = []
+                for future in futures:
+                    chunk, hits, misses = future.result()
+                    results.extend(chunk)
+                    self.hits += hits
+                    self.misses += misses
+
+        logger.info(f"参数扫描完成，组合数: {len(combos)}, 缓存命中: {self.hits}, 计算: {self.misses}")
+        return pd.concat([pd.DataFrame(combos), pd.DataFrame(results)], axis=1)
+
+    def save(self, results: pd.DataFrame, strategy_name: str, stock_code: str) -> int:
+        """
+        把扫描结果逐组写入 StrategyPerformance (需要在应用上下文中调用)
+
+        Args:
+            results: run 的结果
+            strategy_name: 策略名称前缀, 每组参数的名称见 strategy_label
+            stock_code: 股票代码
+
+        Returns:
+            int: 写入成功的组数
+        """
+        from App.models.evaluation.performance_metrics import StrategyPerformance
+
+        dates = pd.to_datetime(self.close.index)
+        start_date, end_date = dates[0].date(), dates[-1].date()
+        fields = [column for column in results.columns if column not in DEFAULT_PARAMS]
+
+        saved = 0
+        for row in results.to_dict('records'):
+            params = {name: row[name] for name in DEFAULT_PARAMS}
+            performance = {field: row[field] for field in fields}
+            if StrategyPerformance.update_performance(strategy_label(strategy_name, params), stock_code,
+                                                      start_date, end_date, **performance):
+                saved += 1
+        return saved
@@ -15,6 +15,8 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from App.exts import db
+from App.models.evaluation.performance_metrics import StrategyPerformance
+from App.services import backtest_engine, indicators
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -54,20 +56,17 @@ class StrategyService:
             result = data.copy()
             
             # 计算EMA
-            result['ema_short'] = result['close'].ewm(span=short_period, adjust=False).mean()
-            result['ema_mid'] = result['close'].ewm(span=mid_period, adjust=False).mean()
-            result['ema_long'] = result['close'].ewm(span=long_period, adjust=False).mean()
+            result['ema_short'] = indicators.ema(result['close'], short_period)
+            result['ema_mid'] = indicators.ema(result['close'], mid_period)
+            result['ema_long'] = indicators.ema(result['close'], long_period)
             
-            # 计算DIFF
-            result['diff'] = result['ema_short'] - result['ema_long']
+            # 计算DIFF、DEA（信号线）和MACD柱线
+            diff, dea, macd = indicators.macd_lines(result['ema_short'], result['ema_long'], signal_period)
+            result['diff'] = diff
             result['diff_sm'] = result['ema_short'] - result['ema_mid']
             result['diff_ml'] = result['ema_mid'] - result['ema_long']
-            
-            # 计算DEA（信号线）
-            result['dea'] = result['diff'].ewm(span=signal_period, adjust=False).mean()
-            
-            # 计算MACD柱线
-            result['macd'] = (result['diff'] - result['dea']) * 2
+            result['dea'] = dea
+            result['macd'] = macd
             
             logger.info(f"MACD计算完成，数据长度: {len(result)}")
             return result
@@ -97,14 +96,13 @@ class StrategyService:
             result = data.copy()
             
             # 计算移动平均线
-            result['bb_middle'] = result['close'].rolling(window=period).mean()
+            result['bb_middle'] = indicators.rolling_mean(result['close'], period)
             
             # 计算标准差
-            bb_std = result['close'].rolling(window=period).std()
+            bb_std = indicators.rolling_std(result['close'], period)
             
             # 计算上下轨
-            result['bb_upper'] = result['bb_middle'] + (bb_std * std_dev)
-            result['bb_lower'] = result['bb_middle'] - (bb_std * std_dev)
+            result['bb_upper'], result['bb_lower'] = indicators.bollinger_bands(result['bb_middle'], bb_std, std_dev)
             
             # 计算布林带宽度和百分比B
             result['bb_width'] = result['bb_upper'] - result['bb_lower']
@@ -135,20 +133,8 @@ class StrategyService:
             
             result = data.copy()
             
-            # 计算价格变化
-            delta = result['close'].diff()
-            
-            # 分离上涨和下跌
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            
-            # 计算平均上涨和下跌
-            avg_gain = gain.rolling(window=period).mean()
-            avg_loss = loss.rolling(window=period).mean()
-            
             # 计算RSI
-            rs = avg_gain / avg_loss
-            result['rsi'] = 100 - (100 / (1 + rs))
+            result['rsi'] = indicators.rsi(result['close'], period)
             
             logger.info(f"RSI计算完成，数据长度: {len(result)}")
             return result
@@ -174,16 +160,8 @@ class StrategyService:
             
             result = data.copy()
             
-            # 生成买卖信号
-            result['macd_signal'] = 0  # 0: 无信号, 1: 买入, -1: 卖出
-            
-            # MACD金叉（MACD线上穿DEA线）
-            result.loc[(result['macd'] > result['dea']) & 
-                      (result['macd'].shift(1) <= result['dea'].shift(1)), 'macd_signal'] = 1
-            
-            # MACD死叉（MACD线下穿DEA线）
-            result.loc[(result['macd'] < result['dea']) & 
-                      (result['macd'].shift(1) >= result['dea'].shift(1)), 'macd_signal'] = -1
+            # 生成买卖信号: 金叉（MACD线上穿DEA线）买入, 死叉（MACD线下穿DEA线）卖出
+            result['macd_signal'] = indicators.macd_cross_signal(result['macd'], result['dea'])
             
             # 计算信号强度
             result['macd_strength'] = abs(result['macd'] - result['dea'])
@@ -213,14 +191,8 @@ class StrategyService:
             
             result = data.copy()
             
-            # 生成买卖信号
-            result['bb_signal'] = 0  # 0: 无信号, 1: 买入, -1: 卖出
-            
-            # 价格触及下轨，可能反弹（买入信号）
-            result.loc[result['close'] <= result['bb_lower'], 'bb_signal'] = 1
-            
-            # 价格触及上轨，可能回落（卖出信号）
-            result.loc[result['close'] >= result['bb_upper'], 'bb_signal'] = -1
+            # 生成买卖信号: 价格触及下轨可能反弹（买入）, 触及上轨可能回落（卖出）
+            result['bb_signal'] = indicators.band_signal(result['close'], result['bb_upper'], result['bb_lower'])
             
             # 计算布林带位置
             result['bb_position'] = (result['close'] - result['bb_lower']) / (result['bb_upper'] - result['bb_lower'])
@@ -253,14 +225,8 @@ class StrategyService:
             
             result = data.copy()
             
-            # 生成买卖信号
-            result['rsi_signal'] = 0  # 0: 无信号, 1: 买入, -1: 卖出
-            
-            # RSI超卖，可能反弹（买入信号）
-            result.loc[result['rsi'] <= oversold, 'rsi_signal'] = 1
-            
-            # RSI超买，可能回落（卖出信号）
-            result.loc[result['rsi'] >= overbought, 'rsi_signal'] = -1
+            # 生成买卖信号: RSI超卖可能反弹（买入）, 超买可能回落（卖出）
+            result['rsi_signal'] = indicators.threshold_signal(result['rsi'], oversold, overbought)
             
             logger.info(f"RSI信号生成完成，买入信号: {(result['rsi_signal'] == 1).sum()}, "
                        f"卖出信号: {(result['rsi_signal'] == -1).sum()}")
@@ -288,15 +254,7 @@ class StrategyService:
             
             result = data.copy()
             
-            # 默认权重
-            if weights is None:
-                weights = {
-                    'macd_signal': 0.4,
-                    'bb_signal': 0.3,
-                    'rsi_signal': 0.3
-                }
-            
-            # 计算加权组合信号
+            # 计算加权组合信号 (默认权重见 indicators.DEFAULT_WEIGHTS)
             signal_columns = [col for col in data.columns if col.endswith('_signal')]
             available_signals = [col for col in signal_columns if col in data.columns]
             
@@ -305,21 +263,14 @@ class StrategyService:
                 return result
             
             # 计算组合信号
-            combined_signal = 0
-            total_weight = 0
-            
-            for signal_col in available_signals:
-                weight = weights.get(signal_col, 1.0 / len(available_signals))
-                combined_signal += result[signal_col] * weight
-                total_weight += weight
+            combined_signal, total_weight = indicators.combine(
+                {signal_col: result[signal_col] for signal_col in available_signals}, weights)
             
             if total_weight > 0:
-                result['combined_signal'] = combined_signal / total_weight
+                result['combined_signal'] = combined_signal
                 
-                # 生成最终信号
-                result['final_signal'] = 0
-                result.loc[result['combined_signal'] > 0.5, 'final_signal'] = 1  # 买入
-                result.loc[result['combined_signal'] < -0.5, 'final_signal'] = -1  # 卖出
+                # 生成最终信号: 大于 0.5 买入, 小于 -0.5 卖出
+                result['final_signal'] = indicators.final_signal(combined_signal)
             
             logger.info(f"信号组合完成，最终买入信号: {(result['final_signal'] == 1).sum()}, "
                        f"卖出信号: {(result['final_signal'] == -1).sum()}")
@@ -329,79 +280,44 @@ class StrategyService:
             logger.error(f"组合信号时发生错误: {e}")
             return data
     
-    def backtest_strategy(self, data: pd.DataFrame, initial_capital: float = 100000) -> Dict[str, Any]:
+    def backtest_strategy(self, data: pd.DataFrame, initial_capital: float = 100000,
+                          fee_rate: float = 0.0, slippage: float = 0.0,
+                          periods_per_year: Optional[float] = None) -> Dict[str, Any]:
         """
         回测策略
         
+        按 final_signal 推出持仓 (空仓遇买入信号全仓买入, 持仓遇卖出信号全部卖出),
+        资金、持仓和权益曲线由 backtest_engine 用数组计算, 只按成交笔数循环
+        
         Args:
             data: 包含价格和信号的数据框
             initial_capital: 初始资金
+            fee_rate: 手续费率, 买卖都按成交金额收取
+            slippage: 滑点, 买入按 close * (1 + slippage)、卖出按 close * (1 - slippage) 成交
+            periods_per_year: 每年的 K 线数, 不传时按时间索引的跨度推算, 没有时间索引按日线计算
             
         Returns:
-            Dict: 回测结果
+            Dict: 回测结果, sharpe_ratio 为未年化的简化值;
+                  performance 为按 StrategyPerformance 字段计算的指标 (收益率等为百分数)
         """
         try:
             if data.empty or 'close' not in data.columns or 'final_signal' not in data.columns:
                 logger.error("数据为空或缺少必要列")
                 return {}
             
-            # 复制数据
-            backtest_data = data.copy()
+            sim = backtest_engine.simulate(data['close'].to_numpy(dtype=float),
+                                           data['final_signal'].to_numpy(dtype=float),
+                                           initial_capital, fee_rate, slippage)
+            trades = backtest_engine.trade_list(sim, data.index)
             
-            # 初始化变量
-            capital = initial_capital
-            position = 0
-            trades = []
-            equity_curve = []
+            # 权益曲线
+            peak, drawdown = backtest_engine.drawdown(sim['equity'])
+            equity_df = pd.DataFrame({'equity': sim['equity'], 'position': sim['position'],
+                                      'peak': peak, 'drawdown': drawdown},
+                                     index=data.index.rename('date'))
             
-            for i, row in backtest_data.iterrows():
-                signal = row['final_signal']
-                price = row['close']
-                
-                # 执行交易
-                if signal == 1 and position == 0:  # 买入信号且无持仓
-                    shares = int(capital / price)
-                    if shares > 0:
-                        position = shares
-                        capital -= shares * price
-                        trades.append({
-                            'date': row.name,
-                            'action': 'buy',
-                            'price': price,
-                            'shares': shares,
-                            'capital': capital
-                        })
-                
-                elif signal == -1 and position > 0:  # 卖出信号且有持仓
-                    capital += position * price
-                    trades.append({
-                        'date': row.name,
-                        'action': 'sell',
-                        'price': price,
-                        'shares': position,
-                        'capital': capital
-                    })
-                    position = 0
-                
-                # 记录权益曲线
-                current_value = capital + (position * price)
-                equity_curve.append({
-                    'date': row.name,
-                    'equity': current_value,
-                    'position': position
-                })
-            
-            # 计算回测指标
-            equity_df = pd.DataFrame(equity_curve)
-            equity_df.set_index('date', inplace=True)
-            
-            # 计算收益率
-            total_return = (equity_df['equity'].iloc[-1] - initial_capital) / initial_capital
-            
-            # 计算最大回撤
-            equity_df['peak'] = equity_df['equity'].expanding().max()
-            equity_df['drawdown'] = (equity_df['equity'] - equity_df['peak']) / equity_df['peak']
-            max_drawdown = equity_df['drawdown'].min()
+            total_return = (sim['equity'][-1] - initial_capital) / initial_capital
+            max_drawdown = drawdown.min()
             
             # 计算夏普比率（简化版）
             returns = equity_df['equity'].pct_change().dropna()
@@ -409,13 +325,16 @@ class StrategyService:
             
             result = {
                 'initial_capital': initial_capital,
-                'final_capital': equity_df['equity'].iloc[-1],
+                'final_capital': sim['equity'][-1],
                 'total_return': total_return,
                 'max_drawdown': max_drawdown,
                 'sharpe_ratio': sharpe_ratio,
                 'total_trades': len(trades),
                 'trades': trades,
-                'equity_curve': equity_df
+                'equity_curve': equity_df,
+                'performance': backtest_engine.performance(sim, data['close'], initial_capital,
+                                                           dates=data.index,
+                                                           periods_per_year=periods_per_year)
             }
             
             logger.info(f"回测完成，总收益率: {total_return:.2%}, 最大回撤: {max_drawdown:.2%}")
@@ -424,6 +343,31 @@ class StrategyService:
         except Exception as e:
             logger.error(f"回测策略时发生错误: {e}")
             return {}
+    
+    def save_backtest_performance(self, strategy_name: str, stock_code: str,
+                                  backtest_result: Dict[str, Any]) -> bool:
+        """
+        把回测指标写入 StrategyPerformance
+        
+        Args:
+            strategy_name: 策略名称
+            stock_code: 股票代码
+            backtest_result: backtest_strategy 的结果
+            
+        Returns:
+            bool: 保存是否成功; 权益曲线没有时间索引 (无法得到起止日期) 时不保存
+        """
+        if not backtest_result:
+            return False
+        
+        dates = backtest_result['equity_curve'].index
+        if not isinstance(dates, pd.DatetimeIndex) or dates.empty:
+            logger.error(f"回测结果没有时间索引，无法保存策略表现: {strategy_name}, {stock_code}")
+            return False
+        
+        return StrategyPerformance.update_performance(strategy_name, stock_code,
+                                                      dates[0].date(), dates[-1].date(),
+                                                      **backtest_result['performance'])
 
 
 # 创建服务实例
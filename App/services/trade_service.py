@@ -4,6 +4,7 @@
 """
 
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
@@ -16,6 +17,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from App.exts import db
+from App.services.market_simulator import BarFeed, MatchingSimulator, PositionBook
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -27,11 +29,54 @@ class TradeService:
     提供交易执行、订单管理、持仓管理功能
     """
     
-    def __init__(self):
+    def __init__(self, feed: Optional[BarFeed] = None, latency: int = 1,
+                 participation: Optional[float] = None):
+        """
+        Args:
+            feed: 行情源，设置后订单交给 MatchingSimulator 按回放的 K 线撮合，当前价取自行情源
+            latency: 下单到开始撮合相隔的 K 线数，见 MatchingSimulator
+            participation: 每根 K 线可成交的成交量比例，None 为不限
+        """
         self.config = Config()
-        self.positions = {}  # 当前持仓
+        self.book = PositionBook()  # 当前持仓
         self.orders = []     # 订单历史
         self.capital = 100000  # 初始资金
+        self.feed = feed
+        self.simulator = MatchingSimulator(feed, latency, participation) if feed is not None else None
+        self.fills = []      # 模拟撮合的成交记录
+        self._pending_sell = {}  # 挂单中的卖出数量
+        self._last_prices = {}
+        self._order_seq = 0
+    
+    @property
+    def positions(self) -> Dict[str, Dict[str, Any]]:
+        """当前持仓：股票代码 -> quantity/avg_price/first_buy_date"""
+        return self.book.to_dict()
+    
+    def _new_order(self, action: str, stock_code: str, quantity: int, price: Optional[float],
+                   order_type: str) -> Dict[str, Any]:
+        """生成订单，回放行情时用行情时间作为下单时间"""
+        if self.feed is not None and self.feed.now is not None:
+            created_at = self.feed.now.to_pydatetime()
+            self._order_seq += 1
+            order_id = f"{action.upper()}_{stock_code}_{created_at.strftime('%Y%m%d_%H%M%S')}_{self._order_seq}"
+        else:
+            created_at = datetime.now()
+            order_id = f"{action.upper()}_{stock_code}_{created_at.strftime('%Y%m%d_%H%M%S')}"
+        
+        return {
+            'order_id': order_id,
+            'stock_code': stock_code,
+            'action': action,
+            'quantity': quantity,
+            'price': price,
+            'order_type': order_type,
+            'status': 'pending',
+            'created_at': created_at,
+            'executed_at': None,
+            'executed_price': None,
+            'filled_quantity': 0
+        }
     
     def place_buy_order(self, stock_code: str, quantity: int, price: float = None, 
                        order_type: str = 'market') -> Dict[str, Any]:
@@ -48,20 +93,7 @@ class TradeService:
             Dict: 订单信息
         """
         try:
-            order_id = f"BUY_{stock_code}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            order = {
-                'order_id': order_id,
-                'stock_code': stock_code,
-                'action': 'buy',
-                'quantity': quantity,
-                'price': price,
-                'order_type': order_type,
-                'status': 'pending',
-                'created_at': datetime.now(),
-                'executed_at': None,
-                'executed_price': None
-            }
+            order = self._new_order('buy', stock_code, quantity, price, order_type)
             
             # 检查资金是否足够
             if price:
@@ -75,27 +107,21 @@ class TradeService:
                 order['status'] = 'rejected'
                 order['error'] = '资金不足'
                 logger.warning(f"买单被拒绝，资金不足: {stock_code}, 需要: {required_capital}, 可用: {self.capital}")
+            elif self.simulator is not None:
+                # 挂单，随行情推进撮合
+                self.simulator.submit(order, price if order_type == 'limit' else None)
             else:
                 # 模拟订单执行
                 executed_price = price or self._get_current_price(stock_code)
                 order['status'] = 'executed'
                 order['executed_at'] = datetime.now()
                 order['executed_price'] = executed_price
+                order['filled_quantity'] = quantity
                 
                 # 更新资金和持仓
                 self.capital -= quantity * executed_price
-                if stock_code in self.positions:
-                    self.positions[stock_code]['quantity'] += quantity
-                    self.positions[stock_code]['avg_price'] = (
-                        (self.positions[stock_code]['quantity'] * self.positions[stock_code]['avg_price'] + 
-                         quantity * executed_price) / (self.positions[stock_code]['quantity'] + quantity)
-                    )
-                else:
-                    self.positions[stock_code] = {
-                        'quantity': quantity,
-                        'avg_price': executed_price,
-                        'first_buy_date': datetime.now()
-                    }
+                self.book.buy(stock_code, quantity, executed_price, order['executed_at'])
+                self._last_prices[stock_code] = executed_price
                 
                 logger.info(f"买单执行成功: {stock_code}, 数量: {quantity}, 价格: {executed_price}")
             
@@ -121,40 +147,30 @@ class TradeService:
             Dict: 订单信息
         """
         try:
-            order_id = f"SELL_{stock_code}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            order = {
-                'order_id': order_id,
-                'stock_code': stock_code,
-                'action': 'sell',
-                'quantity': quantity,
-                'price': price,
-                'order_type': order_type,
-                'status': 'pending',
-                'created_at': datetime.now(),
-                'executed_at': None,
-                'executed_price': None
-            }
+            order = self._new_order('sell', stock_code, quantity, price, order_type)
             
-            # 检查持仓是否足够
-            if stock_code not in self.positions or self.positions[stock_code]['quantity'] < quantity:
+            # 检查持仓是否足够（扣除挂单中的卖出数量）
+            available = self.book.quantity_of(stock_code) - self._pending_sell.get(stock_code, 0)
+            if available < quantity:
                 order['status'] = 'rejected'
                 order['error'] = '持仓不足'
-                logger.warning(f"卖单被拒绝，持仓不足: {stock_code}, 需要: {quantity}, 持有: {self.positions.get(stock_code, {}).get('quantity', 0)}")
+                logger.warning(f"卖单被拒绝，持仓不足: {stock_code}, 需要: {quantity}, 持有: {available}")
+            elif self.simulator is not None:
+                # 挂单，随行情推进撮合
+                self.simulator.submit(order, price if order_type == 'limit' else None)
+                self._pending_sell[stock_code] = self._pending_sell.get(stock_code, 0) + quantity
             else:
                 # 模拟订单执行
                 executed_price = price or self._get_current_price(stock_code)
                 order['status'] = 'executed'
                 order['executed_at'] = datetime.now()
                 order['executed_price'] = executed_price
+                order['filled_quantity'] = quantity
                 
                 # 更新资金和持仓
                 self.capital += quantity * executed_price
-                self.positions[stock_code]['quantity'] -= quantity
-                
-                # 如果持仓为0，删除持仓记录
-                if self.positions[stock_code]['quantity'] <= 0:
-                    del self.positions[stock_code]
+                self.book.sell(stock_code, quantity)
+                self._last_prices[stock_code] = executed_price
                 
                 logger.info(f"卖单执行成功: {stock_code}, 数量: {quantity}, 价格: {executed_price}")
             
@@ -165,6 +181,54 @@ class TradeService:
             logger.error(f"下卖单时发生错误: {e}")
             return {'error': str(e)}
     
+    def advance_to(self, when) -> List[Dict[str, Any]]:
+        """
+        把回放行情推进到 when，撮合期间的挂单并更新资金和持仓
+        
+        Args:
+            when: 行情时间
+            
+        Returns:
+            List[Dict]: 本次的成交记录
+        """
+        if self.simulator is None:
+            raise ValueError("未设置行情源")
+        return self.simulator.advance_to(when, self._apply_fill)
+    
+    def _apply_fill(self, fill: Dict[str, Any]) -> int:
+        """
+        成交回调：更新资金、持仓和订单，返回接受的数量
+        
+        买单成交时资金不足的部分撤销
+        """
+        order = fill.pop('order')
+        stock_code, quantity, price = fill['stock_code'], fill['quantity'], fill['price']
+        
+        if fill['action'] == 'buy':
+            quantity = min(quantity, int(self.capital / price))
+            if quantity < fill['quantity']:
+                order['error'] = '资金不足'
+            if quantity <= 0:
+                order['status'] = 'executed' if order['filled_quantity'] > 0 else 'rejected'
+                return 0
+            self.capital -= quantity * price
+            self.book.buy(stock_code, quantity, price, fill['time'])
+        else:
+            self.capital += quantity * price
+            self.book.sell(stock_code, quantity)
+            self._pending_sell[stock_code] -= quantity
+        
+        filled = order['filled_quantity'] + quantity
+        order['executed_price'] = ((order['executed_price'] or 0) * order['filled_quantity'] + quantity * price) / filled
+        order['filled_quantity'] = filled
+        order['executed_at'] = fill['time'].to_pydatetime()
+        order['status'] = 'executed' if filled >= order['quantity'] or 'error' in order else 'partially_filled'
+        self._last_prices[stock_code] = price
+        
+        fill['quantity'] = quantity
+        self.fills.append(fill)
+        return quantity
+    
     def get_positions(self) -> Dict[str, Any]:
         """
         获取当前持仓
@@ -256,15 +320,15 @@ class TradeService:
             
             # 计算盈亏
             total_buy_amount = sum([
-                order['quantity'] * order['executed_price'] 
+                order['filled_quantity'] * order['executed_price'] 
                 for order in self.orders 
-                if order['action'] == 'buy' and order['status'] == 'executed'
+                if order['action'] == 'buy' and order['filled_quantity'] > 0
             ])
             
             total_sell_amount = sum([
-                order['quantity'] * order['executed_price'] 
+                order['filled_quantity'] * order['executed_price'] 
                 for order in self.orders 
-                if order['action'] == 'sell' and order['status'] == 'executed'
+                if order['action'] == 'sell' and order['filled_quantity'] > 0
             ])
             
             realized_pnl = total_sell_amount - total_buy_amount
@@ -298,6 +362,8 @@ class TradeService:
         """
         执行策略信号
         
+        设置了行情源时按信号时间回放撮合，见 replay
+        
         Args:
             signals: 包含信号的数据框
             stock_code: 股票代码
@@ -307,12 +373,19 @@ class TradeService:
             List[Dict]: 执行的订单列表
         """
         try:
+            if self.simulator is not None:
+                orders = self.replay({stock_code: signals}, capital_ratio)
+                executed_orders = [order for order in orders if order['filled_quantity'] > 0]
+                logger.info(f"策略信号执行完成，执行订单数: {len(executed_orders)}")
+                return executed_orders
+            
             executed_orders = []
+            if 'final_signal' not in signals.columns:
+                return executed_orders
             
-            for index, row in signals.iterrows():
-                if 'final_signal' not in row:
-                    continue
-                
+            # 只有买卖信号的行需要处理
+            active = signals[signals['final_signal'].isin([1, -1])]
+            for index, row in active.iterrows():
                 signal = row['final_signal']
                 price = row.get('close', 0)
                 
@@ -328,12 +401,11 @@ class TradeService:
                 
                 elif signal == -1:  # 卖出信号
                     # 检查是否有持仓
-                    if stock_code in self.positions:
-                        quantity = self.positions[stock_code]['quantity']
-                        if quantity > 0:
-                            order = self.place_sell_order(stock_code, quantity, price, 'market')
-                            if order.get('status') == 'executed':
-                                executed_orders.append(order)
+                    quantity = self.book.quantity_of(stock_code)
+                    if quantity > 0:
+                        order = self.place_sell_order(stock_code, quantity, price, 'market')
+                        if order.get('status') == 'executed':
+                            executed_orders.append(order)
             
             logger.info(f"策略信号执行完成，执行订单数: {len(executed_orders)}")
             return executed_orders
@@ -342,9 +414,67 @@ class TradeService:
             logger.error(f"执行策略信号时发生错误: {e}")
             return []
     
+    def replay(self, signals: Dict[str, pd.DataFrame], capital_ratio: float = 0.1,
+               until=None) -> List[Dict[str, Any]]:
+        """
+        按时间顺序回放多只股票的信号
+        
+        每个信号先把行情推进到信号时间，再按信号 K 线的收盘价计算数量并下市价单：
+        买入信号用 capital_ratio 比例的资金，卖出信号卖出全部可卖持仓；订单随行情推进撮合
+        
+        Args:
+            signals: 股票代码 -> 包含 final_signal（和 close）列的数据框，时间在 date 列或索引中
+            capital_ratio: 每次买入使用的资金比例
+            until: 回放结束的行情时间，默认推进到行情源的最后一根 K 线
+            
+        Returns:
+            List[Dict]: 已接受的订单，成交状态随撮合更新
+        """
+        if self.simulator is None:
+            raise ValueError("未设置行情源")
+        
+        events = []
+        for stock_code, data in signals.items():
+            if 'final_signal' not in data.columns:
+                continue
+            active = data[data['final_signal'].isin([1, -1])]
+            dates = active['date'] if 'date' in active.columns else active.index.to_series()
+            events.append(pd.DataFrame({
+                'time': pd.to_datetime(dates, cache=False).to_numpy(dtype='datetime64[ns]'),
+                'stock_code': stock_code,
+                'signal': active['final_signal'].to_numpy(),
+                'price': active['close'].to_numpy(dtype=float) if 'close' in active.columns else np.nan
+            }))
+        
+        orders = []
+        if events:
+            events = pd.concat(events, ignore_index=True).sort_values('time', kind='stable')
+            for when, stock_code, signal, price in zip(events['time'], events['stock_code'],
+                                                       events['signal'], events['price']):
+                self.advance_to(when)
+                if np.isnan(price):
+                    price = self._get_current_price(stock_code)
+                
+                if signal == 1:
+                    quantity = int(self.capital * capital_ratio / price)
+                    order = self.place_buy_order(stock_code, quantity, None, 'market') if quantity > 0 else {}
+                else:
+                    quantity = self.book.quantity_of(stock_code) - self._pending_sell.get(stock_code, 0)
+                    order = self.place_sell_order(stock_code, quantity, None, 'market') if quantity > 0 else {}
+                
+                if order.get('status') in ('pending', 'partially_filled', 'executed'):
+                    orders.append(order)
+                # latency 为 0 的订单在当前 K 线成交
+                self.advance_to(when)
+        
+        self.advance_to(self.feed.end if until is None else until)
+        return orders
+    
     def _get_current_price(self, stock_code: str) -> float:
         """
-        获取当前价格（模拟）
+        获取当前价格
+        
+        设置了行情源时取回放时间之前最后一根 K 线的收盘价，否则取该股票最近一次成交价
         
         Args:
             stock_code: 股票代码
@@ -352,10 +482,11 @@ class TradeService:
         Returns:
             float: 当前价格
         """
-        # 这里应该调用实际的价格获取接口
-        # 暂时返回模拟价格
-        import random
-        return round(random.uniform(10, 100), 2)
+        if self.feed is not None and self.feed.now is not None and stock_code in self.feed:
+            return self.feed.current_price(stock_code)
+        if stock_code in self._last_prices:
+            return self._last_prices[stock_code]
+        raise ValueError(f"没有 {stock_code} 的行情")
 
 
 class RiskManagementService:
@@ -16,6 +16,13 @@ class Config:
         'password': os.getenv('DB_PASSWORD', '651748264Zz'),
         'charset': 'utf8mb4'
     }
+
+    # 连接池配置 - DB_MySql.EngineRegistry 每个数据库一个连接池
+    DB_POOL_CONFIG = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),
+    }
     
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-here')
     
@@ -65,7 +72,12 @@ class Config:
     def get_code_data_path(cls):
         """获取代码数据路径"""
         return cls.BASE_DIR / 'App' / 'codes' / 'code_data'
-    
+
+    @classmethod
+    def get_data1m_store_path(cls):
+        """获取1分钟数据本地列式存储路径"""
+        return Path(os.getenv('DATA1M_STORE_PATH', cls.BASE_DIR / 'App' / 'codes' / 'code_data' / 'data1m_store'))
+
     @classmethod
     def get_eastmoney_headers(cls, header_type: str = 'stock_1m_multiple_days'):
         """获取东方财富请求头配置"""
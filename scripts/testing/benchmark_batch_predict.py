@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+跨股票批量推理基准测试 (CPU)
+
+一轮监测对每只股票的 4 个模型各预测一次, 模型已在 ModelRegistry 中缓存, 对比
+- 逐股票 batch=1 调用模型 (DlModel.predictive_value)
+- BatchPredictor per_model: 同一模型文件合并为一个 batch
+- BatchPredictor stacked: LeNet 权重堆叠, 每个模型名一次调用
+输出每个批次的耗时和吞吐量。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnModel.ModelRegistry import ModelRegistry
+from App.codes.RnnModel.BatchPredict import BatchPredictor
+from test_model_registry import MONTH, MODEL_NAMES, save_models
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='BatchPredictor 基准测试')
+    parser.add_argument('--stocks', type=int, default=100, help='股票数量')
+    parser.add_argument('--repeat', type=int, default=3, help='重复轮数, 取最快一轮')
+    return parser.parse_args()
+
+
+def single_calls(registry, requests):
+    for name, code, x in requests:
+        np.asarray(registry.get(MONTH, name, code)(x, training=False))[0, 0]
+
+
+def batched(registry, requests, stacked):
+    predictor = BatchPredictor(registry, stacked=stacked)
+    for name, code, x in requests:
+        predictor.add(MONTH, name, code, x)
+    predictor.run()
+    return predictor.batches
+
+
+def best_of(repeat, func):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    StockDataPath.data_path = root
+
+    try:
+        codes = [f'{i:06d}' for i in range(args.stocks)]
+        logger.info(f'保存 {len(codes) * len(MODEL_NAMES)} 个 LeNet 模型')
+        save_models(root, MONTH, codes)
+
+        rng = np.random.default_rng(0)
+        requests = [(name, code, rng.random((1, 30, 30, 1))) for code in codes for name in MODEL_NAMES]
+        n = len(requests)
+
+        registry = ModelRegistry()
+        batched(registry, requests, stacked=True)  # 预热: 加载模型和权重
+
+        t_single, _ = best_of(args.repeat, lambda: single_calls(registry, requests))
+        logger.info(f'batch=1 逐个调用: {t_single:.3f}s, {n / t_single:.0f} 样本/秒')
+
+        for stacked in (False, True):
+            t, batches = best_of(args.repeat, lambda: batched(registry, requests, stacked))
+            logger.info(f"BatchPredictor {batches[0]['mode']}: {t:.3f}s, {n / t:.0f} 样本/秒, "
+                        f'加速 {t_single / t:.1f}x')
+
+            for b in batches:
+                logger.info(f"  {b['model_name']:<13} 模型 {b['models']} 个, 样本 {b['samples']} 个, "
+                            f"{b['seconds'] * 1000:.1f} ms, {b['samples_per_second']:.0f} 样本/秒")
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
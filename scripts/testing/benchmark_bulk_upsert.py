@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+批量 upsert 写入速度基准测试 (rows/second)
+
+在 SQLite 上对比三种写法, 表中预先存在一半数据 (模拟重新下载一个季度的 1m 数据):
+- iterrows: 原 upsert_dataframe_to_mysql, 每行执行一次 upsert
+- per-row update: 原 save_1m/15m_stock_data_to_sql, 读取全部已有日期, 重叠行逐行 UPDATE, 新行批量插入
+- bulk_upsert: 按字节预算的多行 INSERT ... ON CONFLICT
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.utils.bulk_upsert import bulk_upsert, dataframe_rows
+from test_bulk_upsert import CREATE_1M, make_bars
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['date', 'open', 'close', 'high', 'low', 'volume', 'money']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='bulk_upsert 基准测试')
+    parser.add_argument('--rows', type=int, default=250000, help='写入行数')
+    return parser.parse_args()
+
+
+def fresh_engine(existing):
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.exec_driver_sql(CREATE_1M)
+        bulk_upsert(conn, '000001', existing)
+    return engine
+
+
+def old_iterrows(conn, data):
+    stmt = text(f"""
+        INSERT INTO "000001" ({', '.join(COLUMNS)}) VALUES ({', '.join(f':{c}' for c in COLUMNS)})
+        ON CONFLICT(date) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in COLUMNS[1:])}
+    """)
+    for _, row in data.iterrows():
+        conn.execute(stmt, {c: (str(row[c]) if c == 'date' else float(row[c])) for c in COLUMNS})
+
+
+def old_per_row_update(conn, data):
+    existing = {r[0] for r in conn.execute(text('SELECT date FROM "000001"'))}
+    update = text(f"UPDATE \"000001\" SET {', '.join(f'{c} = :{c}' for c in COLUMNS[1:])} WHERE date = :date")
+    insert = text(f"INSERT INTO \"000001\" ({', '.join(COLUMNS)}) VALUES ({', '.join(f':{c}' for c in COLUMNS)})")
+
+    new_records = []
+    for row in dataframe_rows(data):
+        record = dict(zip(COLUMNS, row))
+        if record['date'] in existing:
+            conn.execute(update, record)
+        else:
+            new_records.append(record)
+
+    if new_records:
+        conn.execute(insert, new_records)
+
+
+def main():
+    args = parse_args()
+    data = make_bars('2024-01-02 09:31', args.rows)
+    existing = data.iloc[: args.rows // 2]
+
+    results = {}
+    for name, func in [('iterrows', old_iterrows),
+                       ('per-row update', old_per_row_update),
+                       ('bulk_upsert', lambda conn, d: bulk_upsert(conn, '000001', d))]:
+        engine = fresh_engine(existing)
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            func(conn, data)
+        elapsed = time.perf_counter() - start
+
+        with engine.connect() as conn:
+            count = conn.exec_driver_sql('SELECT COUNT(*) FROM "000001"').scalar()
+        assert count == args.rows, (name, count)
+
+        results[name] = elapsed
+        logger.info(f'{name:<15}: {elapsed:8.2f} s  {args.rows / elapsed:12,.0f} rows/s')
+
+    logger.info(f'bulk_upsert speedup vs iterrows: {results["iterrows"] / results["bulk_upsert"]:.1f}x, '
+                f'vs per-row update: {results["per-row update"] / results["bulk_upsert"]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
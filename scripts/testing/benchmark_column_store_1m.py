@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+1分钟数据本地列式存储基准测试
+
+对比 "SQLite 整表读取后在 pandas 中过滤" 与 "ColumnStore1m 日期/列下推读取" 的耗时,
+模拟 read_1m_by_15m_record 只需要最近几周数据的场景。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.MySql.ColumnStore1m import ColumnStore1m
+from test_column_store_1m import make_1m
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ColumnStore1m 基准测试')
+    parser.add_argument('--days', type=int, default=240, help='每年的交易日数量')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    return parser.parse_args()
+
+
+def timeit(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+
+    try:
+        store = ColumnStore1m(root)
+        engine = create_engine(f'sqlite:///{Path(root) / "bench.db"}')
+
+        years = [2022, 2023]
+        for year in years:
+            data = make_1m(f'{year}-01-03', args.days)
+            store.replace('000001', year, data)
+            data.to_sql(f'data1m{year}_000001', engine, if_exists='replace', index=False)
+
+        start_date = data['date'].iloc[-1] - pd.Timedelta(days=30)
+
+        def load_sql():
+            frames = [pd.read_sql(f'SELECT * FROM "data1m{y}_000001"', engine, parse_dates=['date']) for y in years]
+            df = pd.concat(frames, ignore_index=True)
+            return df[df['date'] >= start_date]
+
+        def load_store():
+            return store.load('000001', years[0], years[-1], start_date=start_date)
+
+        def load_store_columns():
+            return store.load('000001', years[0], years[-1], start_date=start_date, columns=['close', 'volume'])
+
+        t_sql, r_sql = timeit(load_sql, args.repeat)
+        t_store, r_store = timeit(load_store, args.repeat)
+        t_cols, _ = timeit(load_store_columns, args.repeat)
+
+        assert len(r_sql) == len(r_store)
+        logger.info(f'rows returned: {len(r_store)} / {args.days * 240 * len(years)} total')
+        logger.info(f'sqlite full read + filter : {t_sql * 1000:8.2f} ms')
+        logger.info(f'column store pushdown     : {t_store * 1000:8.2f} ms  ({t_sql / t_store:.1f}x)')
+        logger.info(f'column store + 2 columns  : {t_cols * 1000:8.2f} ms  ({t_sql / t_cols:.1f}x)')
+
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+数据库连接单次调用开销基准测试
+
+对比 "每次调用新建 engine" (原 pandas_conn/my_engine 行为) 与 EngineRegistry 共享连接池
+在短查询上的单次调用耗时。默认使用本地 SQLite, 也可通过 --url 指向 MySQL 测试实例。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.MySql.DB_MySql import EngineRegistry
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='EngineRegistry 单次调用开销基准测试')
+    parser.add_argument('--calls', type=int, default=500, help='调用次数')
+    parser.add_argument('--url', type=str, default=None, help='数据库 URL, 默认使用临时 SQLite 文件')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    url = args.url or f'sqlite:///{Path(root) / "bench.db"}'
+
+    try:
+        setup = create_engine(url)
+        pd.DataFrame({'code': ['000001'], 'Time15m': [pd.Timestamp('2024-01-02 15:00')]}).to_sql(
+            'runrecord', setup, if_exists='replace', index=False)
+        setup.dispose()
+
+        sql = text('SELECT Time15m FROM runrecord WHERE code = :code')
+
+        def fresh_engine_call():
+            engine = create_engine(url)
+            with engine.connect() as conn:
+                conn.execute(sql, {'code': '000001'}).fetchall()
+            engine.dispose()
+
+        registry = EngineRegistry(url_factory=lambda db: url)
+
+        def registry_call():
+            with registry.engine('bench').connect() as conn:
+                conn.execute(sql, {'code': '000001'}).fetchall()
+
+        results = {}
+        for name, func in [('fresh engine', fresh_engine_call), ('registry', registry_call)]:
+            start = time.perf_counter()
+            for _ in range(args.calls):
+                func()
+            results[name] = (time.perf_counter() - start) / args.calls
+
+        for name, per_call in results.items():
+            logger.info(f'{name:<14}: {per_call * 1e6:10.1f} us/call')
+
+        logger.info(f'speedup: {results["fresh engine"] / results["registry"]:.1f}x')
+        logger.info(f'pool status: {registry.pool_status()}')
+        registry.dispose()
+
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
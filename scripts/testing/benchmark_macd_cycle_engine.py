@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+MACD 周期统计基准测试
+
+在一年的合成 15m/1m 数据上, 分阶段对比原逐行实现与 StatisticsMacd 向量化实现的耗时。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import argparse
+import warnings
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from test_macd_cycle_engine import (make_1m, make_15m, CountMACD, StatisticsMACD,
+                                    LoopCountMACD, LoopStatisticsMACD)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='MACD 周期统计基准测试')
+    parser.add_argument('--days', type=int, default=240, help='交易日数量')
+    return parser.parse_args()
+
+
+def run_stages(count_cls, stat_cls, data15m, data1m) -> dict:
+    timings = {}
+
+    def stage(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    data = stage('count_MACD', count_cls.count_MACD, data15m.copy())
+    data = stage('s_Daily1mMax', stat_cls.s_Daily1mMax, data, data1m)
+    data = stage('s_StartEndIndex', stat_cls.s_StartEndIndex, data)
+    data = stage('s_Cycle1mVolumeMax', stat_cls.s_Cycle1mVolumeMax, data, data1m)
+    data = stage('s_CycleLength', stat_cls.s_CycleLength, data)
+    stage('s_BarMax1mVolume', stat_cls.s_BarMax1mVolume, data, data1m)
+    return timings
+
+
+def main():
+    args = parse_args()
+    warnings.simplefilter('ignore', FutureWarning)
+
+    data1m = make_1m(args.days)
+    data15m = make_15m(data1m)
+    logger.info(f'1m bars: {len(data1m)}, 15m bars: {len(data15m)}')
+
+    loop = run_stages(LoopCountMACD, LoopStatisticsMACD, data15m, data1m)
+    vector = run_stages(CountMACD, StatisticsMACD, data15m, data1m)
+
+    for name in loop:
+        logger.info(f'{name:<20}: loop {loop[name] * 1000:10.1f} ms   vector {vector[name] * 1000:8.1f} ms   '
+                    f'{loop[name] / vector[name]:8.1f}x')
+
+    total_loop, total_vector = sum(loop.values()), sum(vector.values())
+    logger.info(f'{"total":<20}: loop {total_loop * 1000:10.1f} ms   vector {total_vector * 1000:8.1f} ms   '
+                f'{total_loop / total_vector:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Keras 模型缓存基准测试
+
+模拟 15m 监测循环: 每轮对股票池中每只股票预测 4 个模型, 对比
+- 原写法: 每次预测 clear_session + load_model
+- ModelRegistry: 首轮加载, 之后命中缓存, 与 DlModel.predictive_value 一样直接调用模型推理
+输出每轮耗时、单次预测平均耗时和缓存统计。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+import numpy as np
+from keras import backend as k
+from keras.models import load_model
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnModel.ModelRegistry import ModelRegistry
+from test_model_registry import MONTH, MODEL_NAMES, save_models
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ModelRegistry 基准测试')
+    parser.add_argument('--stocks', type=int, default=20, help='股票数量')
+    parser.add_argument('--cycles', type=int, default=3, help='监测轮数')
+    return parser.parse_args()
+
+
+def legacy_predict(code, name, x):
+    k.clear_session()
+    model = load_model(StockDataPath.model_path(MONTH, f'{name}_{code}.h5'), compile=False)
+    return model.predict(x, verbose=0)[0][0]
+
+
+def run_cycles(codes, cycles, predict, x):
+    times = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        for code in codes:
+            for name in MODEL_NAMES:
+                predict(code, name, x)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    StockDataPath.data_path = root
+
+    try:
+        codes = [f'{i:06d}' for i in range(args.stocks)]
+        logger.info(f'保存 {len(codes) * len(MODEL_NAMES)} 个 LeNet 模型')
+        save_models(root, MONTH, codes)
+
+        x = np.random.default_rng(0).random((1, 30, 30, 1))
+        n = len(codes) * len(MODEL_NAMES)
+
+        legacy = run_cycles(codes, args.cycles, legacy_predict, x)
+
+        registry = ModelRegistry()
+        cached = run_cycles(codes, args.cycles,
+                            lambda code, name, x_: np.asarray(registry.get(MONTH, name, code)(x_, training=False))[0][0],
+                            x)
+
+        for label, times in (('clear_session + load_model', legacy), ('ModelRegistry', cached)):
+            per_cycle = ', '.join(f'{t:.2f}s' for t in times)
+            logger.info(f'{label:<28} 每轮: {per_cycle}  单次预测(稳态): {times[-1] / n * 1000:.1f} ms')
+
+        logger.info(f'稳态加速比: {legacy[-1] / cached[-1]:.1f}x')
+        logger.info(f'缓存统计: {registry.stats()}')
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+月份文件夹索引基准测试
+
+临时目录中放 months 个月份文件夹, 每个月份每种类型 stocks 个文件 (每个文件只出现在一半的月份), 对比
+- 原 find_file_in_paths: listdir、排序、逐个月份探测;
+- MonthManifest.find: 二分查找 (含首次扫描)。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnDataFile.MonthManifest import MonthManifest
+from test_month_manifest import touch, brute_force
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='MonthManifest 基准测试')
+    parser.add_argument('--months', type=int, default=36, help='月份数量')
+    parser.add_argument('--stocks', type=int, default=200, help='股票数量')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+
+    try:
+        months = [f'{2020 + i // 12}-{i % 12 + 1:02d}' for i in range(args.months)]
+        files = [f'weight_bar_volume_{i:06d}.h5' for i in range(args.stocks)]
+        os.makedirs(os.path.join(root, 'CommonFile'))
+
+        for j, month in enumerate(months):
+            for kind in MonthManifest.kinds:
+                for i, file_name in enumerate(files):
+                    if (i + j) % 2 == 0:
+                        touch(root, month, kind, file_name)
+
+        target = months[-1]
+
+        start = time.perf_counter()
+        old = [brute_force(root, target, 'weight', f) for f in files]
+        t_old = time.perf_counter() - start
+
+        manifest = MonthManifest(root=root, ttl=None)
+        start = time.perf_counter()
+        new = [manifest.find('weight', f, target) for f in files]
+        t_new = time.perf_counter() - start
+
+        assert old == new
+
+        logger.info(f'listdir + exists: {t_old / args.stocks * 1000:.3f} ms/只')
+        logger.info(f'MonthManifest: {t_new / args.stocks * 1000:.3f} ms/只 (含首次扫描), 加速 {t_old / t_new:.1f}x')
+
+        start = time.perf_counter()
+        for f in files:
+            manifest.find('weight', f, target)
+        logger.info(f'MonthManifest 扫描后: {(time.perf_counter() - start) / args.stocks * 1000:.4f} ms/只')
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
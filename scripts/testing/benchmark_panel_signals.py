@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+股票池面板信号计算基准测试
+
+对 stocks 只合成股票 (默认 500 只, 每只 bars 根 15m K 线) 计算 trend_3ema_MACDBoll, 对比
+- 逐只: 每只股票调用一次 SignalMethod.trend_3ema_MACDBoll (股票池评估原来的做法);
+- 面板: SignalPanel 一次计算全部股票, 分别报告只取最新一根 K 线 (latest) 和还原全部逐只 DataFrame 的耗时。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import warnings
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.Signals.StatisticsMacd import SignalMethod
+from App.codes.Signals.PanelSignals import SignalPanel
+from test_panel_signals import make_frame
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='SignalPanel 基准测试')
+    parser.add_argument('--stocks', type=int, default=500, help='股票数')
+    parser.add_argument('--bars', type=int, default=1600, help='每只股票的 15m K 线数 (约 100 个交易日)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    frames = {f'{600000 + j}': make_frame(rng, args.bars) for j in range(args.stocks)}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        start = time.perf_counter()
+        for frame in frames.values():
+            SignalMethod.trend_3ema_MACDBoll(frame.copy())
+        t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel = SignalPanel(frames).trend_3ema_MACDBoll()
+    panel.latest()
+    t_panel = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel.frames_by_code()
+    t_frames = time.perf_counter() - start
+
+    logger.info(f'{args.stocks} 只股票 x {args.bars} 根 K 线')
+    logger.info(f'逐只 SignalMethod: {t_loop:.2f}s ({t_loop / args.stocks * 1e3:.1f}ms/只)')
+    logger.info(f'SignalPanel + latest: {t_panel:.2f}s, 快 {t_loop / t_panel:.1f} 倍')
+    logger.info(f'SignalPanel + 还原逐只 DataFrame: {t_panel + t_frames:.2f}s, 快 {t_loop / (t_panel + t_frames):.1f} 倍')
+
+
+if __name__ == '__main__':
+    main()
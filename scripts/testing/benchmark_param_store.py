@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+参数存储吞吐基准测试
+
+模拟 column_stand 对每只股票标准化 15 列并保存参数, 对比
+- 原 json 路径: 每列读取整个 json 文件, 修改后整文件写回;
+- ParamStore.set: 每列一个事务;
+- ParamStore.batch: 每只股票的 15 列在一个事务中提交;
+以及监测时每只股票读取 3 次整个参数文档的耗时。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnDataFile.ParamStore import ParamStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MONTH = '2024-01'
+COLUMNS = [f'column{i}' for i in range(15)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ParamStore 基准测试')
+    parser.add_argument('--stocks', type=int, default=300, help='股票数量')
+    return parser.parse_args()
+
+
+def base_document():
+    """ 与实际参数文件规模相近的文档 """
+    return {'RecordEndDate': '2024-01-02 15:00:00', 'DailyVolEma': 123.4,
+            'TrainingData': {'dataDaily': {f'old{i}': {'num_max': i, 'num_min': 0} for i in range(30)},
+                             'data1m': {'startDate': '2018-01-02', 'EndDate': '2024-01-02'}}}
+
+
+def json_path(code):
+    return StockDataPath.json_data_path(MONTH, code)
+
+
+def json_write(codes):
+    for code in codes:
+        for i, column in enumerate(COLUMNS):
+            with open(json_path(code), 'r') as f:
+                document = json.load(f)
+
+            document['TrainingData']['dataDaily'][column] = {'num_max': i + 1, 'num_min': i}
+
+            with open(json_path(code), 'w') as f:
+                json.dump(document, f)
+
+
+def store_write(store, codes, batch):
+    for code in codes:
+        if batch:
+            with store.batch():
+                for i, column in enumerate(COLUMNS):
+                    store.set(MONTH, code, f'TrainingData/dataDaily/{column}', {'num_max': i + 1, 'num_min': i})
+        else:
+            for i, column in enumerate(COLUMNS):
+                store.set(MONTH, code, f'TrainingData/dataDaily/{column}', {'num_max': i + 1, 'num_min': i})
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    StockDataPath.data_path = root
+
+    try:
+        codes = [f'{i:06d}' for i in range(args.stocks)]
+        os.makedirs(os.path.dirname(json_path(codes[0])))
+
+        for code in codes:
+            with open(json_path(code), 'w') as f:
+                json.dump(base_document(), f)
+
+        store = ParamStore()
+        for code in codes:
+            store.put_document(MONTH, code, base_document())
+
+        writes = args.stocks * len(COLUMNS)
+        t_json = timed(lambda: json_write(codes))
+        t_set = timed(lambda: store_write(store, codes, batch=False))
+        t_batch = timed(lambda: store_write(store, codes, batch=True))
+
+        logger.info(f'{args.stocks} 只股票 x {len(COLUMNS)} 列参数写入:')
+        logger.info(f'  json 读改写:         {writes / t_json:8.0f} 次/秒')
+        logger.info(f'  ParamStore.set:      {writes / t_set:8.0f} 次/秒 ({t_json / t_set:.1f}x)')
+        logger.info(f'  ParamStore.batch:    {writes / t_batch:8.0f} 次/秒 ({t_json / t_batch:.1f}x)')
+
+        # 监测每轮对同一只股票读取 3 次参数文档
+        def json_read():
+            for code in codes:
+                for _ in range(3):
+                    with open(json_path(code), 'r') as f:
+                        json.load(f)
+
+        reads = args.stocks * 3
+        t_json_read = timed(json_read)
+        t_store_read = timed(lambda: [store.get(MONTH, code) for code in codes for _ in range(3)])
+        logger.info(f'整个参数文档读取 (每只股票 3 次): json {t_json_read / reads * 1000:.3f} ms/次, '
+                    f'ParamStore {t_store_read / reads * 1000:.3f} ms/次')
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
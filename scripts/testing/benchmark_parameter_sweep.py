@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+策略参数扫描基准测试
+
+在一年的 1m 收盘价 (默认 242 个交易日 x 240 根) 上扫描 MACD / 布林带 / RSI 参数网格, 对比
+- 原流程: 每组参数调用 calculate_* / generate_*_signals / combine_signals / backtest_strategy, 指标全部重算
+  (只实测前 sample 组, 按比例外推);
+- ParameterSweep: 指标按 (收盘价指纹, 参数) 缓存, 单进程和 workers 个进程;
+并报告缓存命中和计算次数。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.services.parameter_sweep import ParameterSweep, grid
+from App.services.strategy_service import StrategyService
+from test_parameter_sweep import service_reference
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ParameterSweep 基准测试')
+    parser.add_argument('--days', type=int, default=242, help='交易日数')
+    parser.add_argument('--workers', type=int, default=4, help='进程数')
+    parser.add_argument('--sample', type=int, default=20, help='原流程实测的组合数')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.getLogger('App.services').setLevel(logging.WARNING)
+
+    n = args.days * 240
+    rng = np.random.default_rng(0)
+    close = np.round(10 * np.exp(np.cumsum(rng.standard_normal(n) * 0.001)), 2)
+    data = pd.DataFrame({'close': close}, index=pd.date_range('2024-01-02 09:31', periods=n, freq='min'))
+
+    combos = grid({'short_period': [6, 8, 12], 'long_period': [24, 26, 30], 'signal_period': [7, 9],
+                   'bb_period': [10, 20, 30], 'std_dev': [1.5, 2.0], 'rsi_period': [6, 14],
+                   'oversold': [20, 30]})
+    settings = {'fee_rate': 0.0003, 'slippage': 0.001, 'periods_per_year': 242 * 240}
+    logger.info(f'{n} 根 1m K 线, {len(combos)} 组参数')
+
+    service = StrategyService()
+    start = time.perf_counter()
+    for params in combos[:args.sample]:
+        service_reference(service, data, params, **settings)
+    t_service = (time.perf_counter() - start) * len(combos) / args.sample
+    logger.info(f'原流程 (按 {args.sample} 组外推): {t_service:.1f}s')
+
+    for workers in (1, args.workers):
+        sweep = ParameterSweep(data, workers=workers, **settings)
+        start = time.perf_counter()
+        sweep.run(combos)
+        t_sweep = time.perf_counter() - start
+        logger.info(f'ParameterSweep ({workers} 进程): {t_sweep:.2f}s, 快 {t_service / t_sweep:.1f} 倍, '
+                    f'缓存命中 {sweep.hits}, 计算 {sweep.misses}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+1分钟成交量区间最大值索引基准测试
+
+在一年的 1m 数据 (默认 242 个交易日 x 240 根) 和对应的 15m K 线上计算 Bar1mVolMax1 / Bar1mVolMax5, 对比
+- 原实现: 每根 15m K 线 apply 一次 find_bar_max_1m, 对整张 1m 表布尔筛选再排序 (只实测前 sample 根, 按比例外推);
+- Volume1mIndex: 建索引一次, 之后对全部 15m K 线批量查询;
+并报告建索引的耗时。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.Signals.RangeMaxIndex import Volume1mIndex
+from test_range_max_index import tail_reference
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Volume1mIndex 基准测试')
+    parser.add_argument('--days', type=int, default=242, help='交易日数')
+    parser.add_argument('--sample', type=int, default=200, help='原实现实测的 15m K 线数')
+    return parser.parse_args()
+
+
+def make_year(days: int):
+    rng = np.random.default_rng(0)
+    minutes = np.concatenate([np.arange(571, 691), np.arange(781, 901)])
+    business = pd.bdate_range('2024-01-02', periods=days)
+
+    dates_1m = (business.values[:, None] + minutes[None, :] * np.timedelta64(1, 'm')).ravel()
+    data_1m = pd.DataFrame({'date': dates_1m, 'volume': np.round(rng.lognormal(8, 1, len(dates_1m)))})
+
+    # 每 15 根 1m 一根 15m K 线, 时间为第 15 根之后
+    dates_15m = pd.Series(dates_1m[14::15] + np.timedelta64(1, 'm'))
+    return data_1m, dates_15m
+
+
+def main():
+    args = parse_args()
+    data_1m, dates_15m = make_year(args.days)
+    logger.info(f'1m 数据 {len(data_1m)} 行, 15m K 线 {len(dates_15m)} 根')
+
+    sample = dates_15m.iloc[:args.sample]
+    start = time.perf_counter()
+    for num in (1, 5):
+        sample.apply(lambda x: tail_reference(data_1m, x, num))
+    t_scan = (time.perf_counter() - start) * len(dates_15m) / len(sample)
+    logger.info(f'原实现 (逐根扫描, 按 {len(sample)} 根外推): {t_scan:.1f}s')
+
+    start = time.perf_counter()
+    index = Volume1mIndex.from_frame(data_1m)
+    t_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for num in (1, 5):
+        index.top_mean(dates_15m, num, nan_policy='last')
+    t_query = time.perf_counter() - start
+
+    logger.info(f'Volume1mIndex: 建索引 {t_build * 1e3:.1f}ms, 查询 {t_query * 1e3:.1f}ms, '
+                f'快 {t_scan / (t_build + t_query):.0f} 倍')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+多频率重采样基准测试
+
+对 codes 只股票各一年的 1m 数据 (默认 100 只 x 242 个交易日 x 240 根) 计算 15m/30m/60m/120m/日线, 对比
+- 原实现: resample_fun / _split_and_resample_60m / _split_and_resample_120m / _resample_to_daily 各扫描一遍 1m 数据;
+- resample_1m_multi: 1m 数据只聚合一次, 各频率在桶上再聚合;
+以及只取 15m 时 resample_1m_data 的耗时。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.utils.Normal import ResampleData
+from test_resample_multi import make_1m, reference
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='resample_1m_multi 基准测试')
+    parser.add_argument('--codes', type=int, default=100, help='股票数')
+    parser.add_argument('--days', type=int, default=242, help='每只股票的交易日数')
+    return parser.parse_args()
+
+
+def timed(func, frames) -> float:
+    start = time.perf_counter()
+    for data in frames:
+        func(data)
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    frames = [make_1m(seed, days=args.days) for seed in range(args.codes)]
+    logger.info(f'{args.codes} 只股票, 每只 {len(frames[0])} 根 1m K 线')
+
+    t_reference = timed(reference, frames)
+    t_multi = timed(ResampleData.resample_1m_multi, frames)
+    logger.info(f'5 个频率: 原实现 {t_reference:.2f}s, resample_1m_multi {t_multi:.2f}s, '
+                f'快 {t_reference / t_multi:.1f} 倍')
+
+    t_fun = timed(lambda data: ResampleData.resample_fun(data.copy(), parameter='15T'), frames)
+    t_15m = timed(lambda data: ResampleData.resample_1m_data(data, '15m'), frames)
+    logger.info(f'只取 15m: resample_fun {t_fun:.2f}s, resample_1m_data {t_15m:.2f}s, '
+                f'快 {t_fun / t_15m:.1f} 倍')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+训练数据流式读取基准测试
+
+临时目录中写入 stocks 只股票的训练数据分片, 合并为一个数据集, 报告
+- 纯读取: 不预取 / 后台预取的 batches/s;
+- 模拟训练 (每个批次 step_ms 毫秒计算) 时预取能否完全隐藏读取;
+- 读取过程中的峰值 RSS (含 mmap 文件页) 与全部 np.load 所需内存的对比。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import shutil
+import logging
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnModel.ShardDataset import ShardDataset
+from test_shard_dataset import MONTH, MODEL, write_shards
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ShardDataset 基准测试')
+    parser.add_argument('--stocks', type=int, default=20, help='股票数量')
+    parser.add_argument('--samples', type=int, default=1000, help='每只股票的样本数')
+    parser.add_argument('--batch', type=int, default=30, help='批次大小')
+    parser.add_argument('--step-ms', type=float, default=2.0, help='模拟每个批次的训练耗时 (毫秒)')
+    return parser.parse_args()
+
+
+def consume(dataset, step):
+    start = time.perf_counter()
+    for _ in dataset.iterate():
+        if step:
+            time.sleep(step)
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    data_path = StockDataPath.data_path
+    StockDataPath.data_path = root
+
+    try:
+        codes = write_shards([args.samples] * args.stocks)
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        for prefetch in (0, 4):
+            dataset = ShardDataset.from_stocks(MONTH, MODEL, codes, batch_size=args.batch, seed=0, prefetch=prefetch)
+            seconds = consume(dataset, 0)
+            logger.info(f'读取 prefetch={prefetch}: {len(dataset) / seconds:.0f} batches/s '
+                        f'({dataset.samples} 个样本, {len(dataset)} 个批次)')
+
+        for prefetch in (0, 4):
+            dataset = ShardDataset.from_stocks(MONTH, MODEL, codes, batch_size=args.batch, seed=0, prefetch=prefetch)
+            seconds = consume(dataset, args.step_ms / 1000)
+            report = dataset.report()
+            logger.info(f'模拟训练 prefetch={prefetch}: {len(dataset) / seconds:.0f} batches/s, '
+                        f'等待读取占比 {report["wait_ratio"]:.1%} '
+                        f'(纯计算上限 {1000 / args.step_ms:.0f} batches/s)')
+
+        peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base) / 1024
+        total = args.stocks * args.samples * 30 * 30 * 4 / 2 ** 20
+        # mmap 读过的文件页计入 RSS, 但属于页缓存, 内存紧张时可回收; np.load 的数组不能回收
+        logger.info(f'峰值 RSS 增加 {peak:.1f} MB (含可回收的 mmap 文件页), 全部 np.load 需要 {total:.1f} MB')
+
+    finally:
+        StockDataPath.data_path = data_path
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+股票目录查找基准测试
+
+SQLite 中放一张与 record_stock_minute 同样规模的表, 对比
+- 原 Stocks: 每次调用整表读取再过滤;
+- StockDirectory.lookup: 进程内字典查找 (ttl 内不访问数据库)。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.MySql.StockDirectory import StockDirectory
+
+import DB_MySql
+from DB_MySql import EngineRegistry, MysqlAlchemy
+from LoadMysql import LoadBasicInform
+from test_stock_directory import make_minute, reference_stocks
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='StockDirectory 基准测试')
+    parser.add_argument('--rows', type=int, default=5000, help='股票数量')
+    parser.add_argument('--calls', type=int, default=200, help='查找次数')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    registry = EngineRegistry(url_factory=lambda db: f'sqlite:///{Path(root) / db}.db')
+
+    try:
+        with mock.patch.object(DB_MySql, 'registry', registry):
+            MysqlAlchemy.pd_replace(make_minute(args.rows), LoadBasicInform.db_basic, LoadBasicInform.tb_minute)
+            stocks = [f'股票{i * 13 % args.rows}' for i in range(args.calls)]
+
+            start = time.perf_counter()
+            for stock in stocks:
+                reference_stocks(stock)
+            t_old = time.perf_counter() - start
+
+            directory = StockDirectory(ttl=300)
+            start = time.perf_counter()
+            for stock in stocks:
+                directory.lookup(stock)
+            t_new = time.perf_counter() - start
+
+        logger.info(f'整表读取 Stocks: {t_old / args.calls * 1000:.2f} ms/次')
+        logger.info(f'StockDirectory: {t_new / args.calls * 1000:.4f} ms/次 (含首次加载), '
+                    f'整表读取 {directory.loads} 次, 加速 {t_old / t_new:.0f}x')
+
+    finally:
+        registry.dispose()
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+MACD / 布林线流式计算基准测试
+
+模拟实时监控: 已有 history 根 15m K 线, 每来一根新 K 线
+- 批量: 对全部历史重新 calculate_MACD + Bollinger (监控原先的做法);
+- 流式: StreamingMACD / StreamingBollinger 各 update 一次;
+报告每根 K 线的延迟 (中位数 / p99), 以及快照的 JSON 大小。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.Signals.MacdSignal import calculate_MACD
+from App.codes.Signals.BollingerSignal import Bollinger
+from App.codes.Signals.StreamingIndicators import StreamingMACD, StreamingBollinger
+from test_streaming_indicators import make_closes
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='StreamingMACD / StreamingBollinger 基准测试')
+    parser.add_argument('--history', type=int, default=5000, help='已有的 15m K 线数')
+    parser.add_argument('--bars', type=int, default=200, help='新到的 K 线数')
+    return parser.parse_args()
+
+
+def percentiles(seconds) -> str:
+    us = np.asarray(seconds) * 1e6
+    return f'中位数 {np.median(us):.1f}us, p99 {np.percentile(us, 99):.1f}us'
+
+
+def main():
+    args = parse_args()
+    closes = make_closes(0, n=args.history + args.bars)
+    history, new = closes[:args.history], closes[args.history:]
+
+    batch = []
+    data = pd.DataFrame({'close': history})
+    for close in new:
+        start = time.perf_counter()
+        data = pd.concat([data, pd.DataFrame({'close': [close]})], ignore_index=True)
+        data = Bollinger(calculate_MACD(data))
+        batch.append(time.perf_counter() - start)
+
+    macd, boll = StreamingMACD(), StreamingBollinger()
+    macd.run(history)
+    boll.run(history)
+
+    stream = []
+    for close in new:
+        start = time.perf_counter()
+        macd.update(close)
+        boll.update(close)
+        stream.append(time.perf_counter() - start)
+
+    state = json.dumps({'macd': macd.snapshot(), 'boll': boll.snapshot()})
+
+    logger.info(f'批量重算 ({args.history} 根历史): {percentiles(batch)}')
+    logger.info(f'流式更新: {percentiles(stream)}, 快 {np.median(batch) / np.median(stream):.0f} 倍')
+    logger.info(f'快照大小: {len(state)} 字节')
+
+
+if __name__ == '__main__':
+    main()
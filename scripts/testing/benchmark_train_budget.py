@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+自适应训练轮数基准测试 (仅 CPU, 固定随机种子可复现)
+
+合成 30x30x1 样本 (y 为中心区域均值加噪声), 用与 create_model 相同结构的 LeNet 对比
+- 固定轮数: 原 train_model 的做法, 训练 epochs 轮;
+- fit_with_budget: epochs 为上限, 早停 + 学习率衰减 + 恢复最佳权重;
+报告耗时、实际轮数和最终验证 / 测试损失。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import keras
+from keras import layers
+
+from App.codes.RnnModel.ShardDataset import ShardDataset
+from App.codes.RnnModel.TrainBudget import fit_with_budget, ValidationSequence
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='fit_with_budget 基准测试')
+    parser.add_argument('--samples', type=int, default=600, help='样本数')
+    parser.add_argument('--epochs', type=int, default=100, help='轮数 (上限)')
+    parser.add_argument('--lr', type=float, default=0.001, help='学习率')
+    return parser.parse_args()
+
+
+def lenet(lr):
+    model = keras.Sequential([keras.Input((30, 30, 1)),
+                              layers.Conv2D(6, (5, 5), activation='relu'), layers.AveragePooling2D((2, 2)),
+                              layers.Conv2D(16, (5, 5), activation='relu'), layers.AveragePooling2D((2, 2)),
+                              layers.Flatten(), layers.Dense(120, activation='relu'),
+                              layers.Dense(84, activation='relu'), layers.Dense(1)])
+    model.compile(loss='mean_squared_error', optimizer=keras.optimizers.Adam(lr))
+    return model
+
+
+def write_data(root, samples):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((samples, 30, 30, 1)).astype('float32')
+    y = (x[:, 10:20, 10:20, 0].mean(axis=(1, 2)) * 5 + 0.1 * rng.standard_normal(samples)).reshape(-1, 1)
+    np.save(os.path.join(root, 'x.npy'), x)
+    np.save(os.path.join(root, 'y.npy'), y.astype('float32'))
+    return [(os.path.join(root, 'x.npy'), os.path.join(root, 'y.npy'))]
+
+
+def datasets(shards):
+    """ 与 train_model 相同的划分: 前 80% 训练 (其中后 15% 验证), 后 20% 测试 """
+    train_all, test = ShardDataset(shards, batch_size=30, seed=0, prefetch=0).split(0.8, test_batch_size=10)
+    train, validation = train_all.split(0.85, test_batch_size=10)
+    return train, validation, test
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+
+    try:
+        shards = write_data(root, args.samples)
+
+        keras.utils.set_random_seed(0)
+        train, validation, test = datasets(shards)
+        model = lenet(args.lr)
+        start = time.perf_counter()
+        model.fit(train.repeat(), steps_per_epoch=len(train), epochs=args.epochs, verbose=0)
+        t_fixed = time.perf_counter() - start
+        val_fixed = model.evaluate(ValidationSequence(validation), verbose=0)
+        test_fixed = model.evaluate(ValidationSequence(test), verbose=0)
+
+        keras.utils.set_random_seed(0)
+        train, validation, test = datasets(shards)
+        model = lenet(args.lr)
+        record = fit_with_budget(model, train, validation, args.epochs, verbose=0)
+        val_budget = model.evaluate(ValidationSequence(validation), verbose=0)
+        test_budget = model.evaluate(ValidationSequence(test), verbose=0)
+
+        logger.info(f'固定 {args.epochs} 轮: 耗时 {t_fixed:.1f}s, 验证损失 {val_fixed:.4f}, 测试损失 {test_fixed:.4f}')
+        logger.info(f'fit_with_budget: {record["epochs"]} 轮 (最佳第 {record["best_epoch"]} 轮), '
+                    f'耗时 {record["seconds"]:.1f}s, 验证损失 {val_budget:.4f}, 测试损失 {test_budget:.4f}, '
+                    f'估计节省 {record["saved_seconds"]:.1f}s')
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+多股票并行训练基准测试 (仅 CPU)
+
+为 stocks 只股票生成合成的 30x30x1 训练数据, 用与 create_model 相同结构的 LeNet 训练 epochs 轮, 对比
+- 顺序: 1 个进程, TensorFlow 使用全部核;
+- 并行: 核数个进程, 每个进程 1 个 intra-op 线程;
+报告总耗时、每只股票耗时和 CPU 利用率。单核机器上两者接近, 并行的收益随核数增加。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnModel.TrainOrchestrator import TrainOrchestrator
+from test_train_orchestrator import MemoryLedger
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MONTH = '2024-01'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='TrainOrchestrator 基准测试')
+    parser.add_argument('--stocks', type=int, default=8, help='股票数量')
+    parser.add_argument('--samples', type=int, default=300, help='每只股票的样本数')
+    parser.add_argument('--epochs', type=int, default=5, help='训练轮数')
+    return parser.parse_args()
+
+
+def lenet_job(stock, months):
+    """ 合成数据上训练与 create_model 相同结构的 LeNet """
+    start, cpu = time.perf_counter(), time.process_time()
+
+    import keras
+    from keras import layers
+
+    root, samples, epochs = os.environ['BENCH_ROOT'], int(os.environ['BENCH_SAMPLES']), int(os.environ['BENCH_EPOCHS'])
+    x = np.load(os.path.join(root, f'{stock}_x.npy'), mmap_mode='r')
+    y = np.load(os.path.join(root, f'{stock}_y.npy'), mmap_mode='r')
+
+    keras.backend.clear_session()
+    model = keras.Sequential([keras.Input((30, 30, 1)),
+                              layers.Conv2D(6, (5, 5), activation='relu'), layers.AveragePooling2D((2, 2)),
+                              layers.Conv2D(16, (5, 5), activation='relu'), layers.AveragePooling2D((2, 2)),
+                              layers.Flatten(), layers.Dense(120, activation='relu'),
+                              layers.Dense(84, activation='relu'), layers.Dense(1)])
+    model.compile(loss='mean_squared_error', optimizer=keras.optimizers.Adam(0.01))
+    model.fit(np.asarray(x[:samples]), np.asarray(y[:samples]), epochs=epochs, batch_size=30, verbose=0)
+
+    return {'seconds': time.perf_counter() - start, 'cpu': time.process_time() - cpu}
+
+
+def make_ledger(stocks) -> MemoryLedger:
+    return MemoryLedger(pd.DataFrame({'id': range(1, len(stocks) + 1), 'name': stocks, 'ParserMonth': MONTH,
+                                      'ModelData': 'success', 'ModelDataTiming': '2024-01-02',
+                                      'ModelCreate': None}))
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+    cores = os.cpu_count() or 1
+
+    os.environ.update(BENCH_ROOT=root, BENCH_SAMPLES=str(args.samples), BENCH_EPOCHS=str(args.epochs),
+                      CUDA_VISIBLE_DEVICES='-1')
+
+    try:
+        rng = np.random.default_rng(0)
+        stocks = [f'{i:06d}' for i in range(args.stocks)]
+        for stock in stocks:
+            np.save(os.path.join(root, f'{stock}_x.npy'), rng.standard_normal((args.samples, 30, 30, 1)))
+            np.save(os.path.join(root, f'{stock}_y.npy'), rng.standard_normal((args.samples, 1)))
+
+        for label, processes, threads in (('顺序', 1, cores), ('并行', cores, 1)):
+            orchestrator = TrainOrchestrator(MONTH, processes=processes, intra_threads=threads, inter_threads=1,
+                                             job=lenet_job, ledger=make_ledger(stocks))
+
+            # 顺序时 run 在当前进程执行, 放到子进程中避免当前进程的 TensorFlow 线程设置影响并行的测量
+            report = orchestrator.run() if processes > 1 else run_isolated(orchestrator)
+            job_seconds = list(report['job_seconds'].values())
+
+            logger.info(f'{label}: 进程 {processes} x 线程 {threads}, 总耗时 {report["wall_time"]:.1f}s, '
+                        f'每只股票 {np.mean(job_seconds):.1f}s (最长 {np.max(job_seconds):.1f}s), '
+                        f'CPU 利用率 {report["cpu_utilisation"]:.0%} ({cores} 核)')
+
+    finally:
+        shutil.rmtree(root)
+
+
+def _isolated(orchestrator, queue):
+    queue.put(orchestrator.run())
+
+
+def run_isolated(orchestrator) -> dict:
+    import multiprocessing
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_isolated, args=(orchestrator, queue))
+    process.start()
+    report = queue.get()
+    process.join()
+    return report
+
+
+if __name__ == '__main__':
+    main()
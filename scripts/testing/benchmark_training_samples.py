@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+训练样本写入基准测试
+
+合成 cycles 个信号周期, 分别在子进程中运行
+- 原 data_common: 每个信号筛选整表、np.append, 最后 np.save;
+- write_training_samples: 分组一次、按块写入预先确定大小的 .npy;
+比较样本数 / 秒和子进程的峰值 RSS。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import resource
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from test_training_samples import COLUMN_X, COLUMN_Y, make_signals, reference
+from App.codes.RnnModel.TrainingSamples import write_training_samples
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='训练样本写入基准测试')
+    parser.add_argument('--cycles', type=int, default=4000, help='信号周期数')
+    return parser.parse_args()
+
+
+def run(method, cycles, root, queue):
+    data = make_signals(cycles)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if method == 'append':
+        data_x, data_y = reference(data, COLUMN_X, COLUMN_Y)
+        np.save(os.path.join(root, 'append_x.npy'), data_x)
+        np.save(os.path.join(root, 'append_y.npy'), data_y)
+        n = data_x.shape[0]
+
+    else:
+        n = write_training_samples(data, COLUMN_X, COLUMN_Y, os.path.join(root, 'stream_x.npy'),
+                                   os.path.join(root, 'stream_y.npy'))[0]
+
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((n, elapsed, (peak - base) / 1024))
+
+
+def measure(method, cycles, root):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run, args=(method, cycles, root, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    args = parse_args()
+    root = tempfile.mkdtemp()
+
+    try:
+        n_old, t_old, rss_old = measure('append', args.cycles, root)
+        n_new, t_new, rss_new = measure('stream', args.cycles, root)
+
+        np.testing.assert_array_equal(np.load(os.path.join(root, 'append_x.npy')),
+                                      np.load(os.path.join(root, 'stream_x.npy')))
+
+        logger.info(f'np.append: {n_old} 个样本, {n_old / t_old:.0f} 样本/秒, 峰值 RSS 增加 {rss_old:.1f} MB')
+        logger.info(f'write_training_samples: {n_new} 个样本, {n_new / t_new:.0f} 样本/秒, '
+                    f'峰值 RSS 增加 {rss_new:.1f} MB, 加速 {t_old / t_new:.1f}x')
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
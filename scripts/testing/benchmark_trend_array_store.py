@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+趋势图样本分片存储基准测试
+
+逐个追加 10k 和 100k 个样本, 对比
+- 原 save_array_data: 每个样本 np.load 整个文件、np.append 再 np.save (O(N²), 只实测前 legacy 个样本,
+  更大的规模按平方外推);
+- ChunkedArrayStore.append: 写入最后一个分片末尾并改写文件头;
+并报告写入的磁盘数据量和 ChunkedArray 随机取一批样本的速度。
+
+样本默认 30x40x4 uint8 (实际为 150x200x4, 100k 个样本约 12GB), 可用 --shape 修改。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.TrendDistinguish.TrendArrayStore import ChunkedArrayStore, ChunkedArray
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='ChunkedArrayStore 基准测试')
+    parser.add_argument('--samples', type=int, nargs='+', default=[10000, 100000], help='样本数')
+    parser.add_argument('--shape', type=int, nargs='+', default=[30, 40, 4], help='单个样本的形状')
+    parser.add_argument('--legacy', type=int, default=1000, help='原实现实测的样本数')
+    parser.add_argument('--batch', type=int, default=256, help='随机读取的批大小')
+    return parser.parse_args()
+
+
+def legacy_append(file_path, sample):
+    """ 原 save_array_data 的做法 (文件不存在时先创建) """
+    try:
+        existing = np.load(file_path, allow_pickle=True)
+        np.save(file_path, np.append(existing, sample, axis=0))
+    except FileNotFoundError:
+        np.save(file_path, sample)
+
+
+def main():
+    args = parse_args()
+    shape = tuple(args.shape)
+    sample = np.random.default_rng(0).integers(0, 255, (1,) + shape, dtype='uint8')
+    nbytes = sample.nbytes
+    root = tempfile.mkdtemp()
+
+    try:
+        path = os.path.join(root, 'legacy.npy')
+        start = time.perf_counter()
+        for _ in range(args.legacy):
+            legacy_append(path, sample)
+        t_legacy = time.perf_counter() - start
+        logger.info(f'原实现: {args.legacy} 个样本 {t_legacy:.2f}s, 写入 {args.legacy ** 2 / 2 * nbytes / 1e9:.2f}GB')
+
+        for samples in args.samples:
+            path = os.path.join(root, f'chunked_{samples}.npy')
+            store = ChunkedArrayStore(path)
+
+            start = time.perf_counter()
+            for _ in range(samples):
+                store.append(sample)
+            t_chunked = time.perf_counter() - start
+
+            estimate = t_legacy * (samples / args.legacy) ** 2
+            logger.info(f'{samples} 个样本: ChunkedArrayStore {t_chunked:.2f}s ({samples / t_chunked:.0f} 个/秒, '
+                        f'写入 {samples * nbytes / 1e9:.2f}GB); 原实现估算 {estimate:.0f}s '
+                        f'(写入 {samples ** 2 / 2 * nbytes / 1e12:.2f}TB), 快 {estimate / t_chunked:.0f} 倍')
+
+            array = ChunkedArray.open(path)
+            index = np.random.default_rng(1).integers(0, len(array), (20, args.batch))
+            start = time.perf_counter()
+            for batch in index:
+                array[batch]
+            t_read = time.perf_counter() - start
+            logger.info(f'    随机读取: {index.size / t_read:.0f} 个样本/秒 (批大小 {args.batch}, {len(array.parts)} 个分片)')
+
+            shutil.rmtree(store.directory)
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
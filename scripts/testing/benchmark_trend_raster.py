@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+趋势图光栅化基准测试
+
+在合成的 100 根 K 线 (价格 / 布林线 / MACD) 上对比每秒生成的图像数:
+- TrendRaster.render_trend: 直接画入内存数组;
+- matplotlib: 原 array_data 的画法 (需要安装 matplotlib);
+- matplotlib + jpg: 原预测流程, 画图后存 jpg 再用 imageio 读回 (需要安装 matplotlib 和 imageio);
+并报告 render_trend 与 matplotlib 图像的平均像素差。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.TrendDistinguish.TrendRaster import render_trend
+from test_trend_raster import make_trend, matplotlib_image
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='TrendRaster 基准测试')
+    parser.add_argument('--images', type=int, default=200, help='render_trend 生成的图像数')
+    parser.add_argument('--matplotlib-images', type=int, default=30, help='matplotlib 生成的图像数')
+    return parser.parse_args()
+
+
+def images_per_second(render, samples) -> float:
+    start = time.perf_counter()
+    for data in samples:
+        render(data)
+    return len(samples) / (time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+    samples = [make_trend(seed) for seed in range(args.images)]
+
+    rate = images_per_second(render_trend, samples)
+    logger.info(f'render_trend: {rate:.1f} 张/秒')
+
+    if not importlib.util.find_spec('matplotlib'):
+        logger.info('matplotlib 未安装, 跳过对比')
+        return
+
+    subset = samples[:args.matplotlib_images]
+    rate_mpl = images_per_second(matplotlib_image, subset)
+    diff = np.mean([np.abs(matplotlib_image(d).astype(int) - render_trend(d).astype(int))[..., :3].mean()
+                    for d in subset[:5]])
+    logger.info(f'matplotlib: {rate_mpl:.1f} 张/秒, render_trend 快 {rate / rate_mpl:.1f} 倍, 平均像素差 {diff:.3f}')
+
+    if not importlib.util.find_spec('imageio'):
+        return
+
+    import imageio
+    root = tempfile.mkdtemp()
+
+    def round_trip(data):
+        path = os.path.join(root, 'predict.jpg')
+        imageio.imwrite(path, matplotlib_image(data)[..., :3])
+        return imageio.imread(path)
+
+    try:
+        rate_jpg = images_per_second(round_trip, subset)
+        logger.info(f'matplotlib + jpg 读写: {rate_jpg:.1f} 张/秒, render_trend 快 {rate / rate_jpg:.1f} 倍')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
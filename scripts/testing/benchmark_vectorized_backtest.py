@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+向量化回测基准测试
+
+在 years 年的 1m 数据 (默认 1 年 x 242 个交易日 x 240 根) 和随机信号上回测, 对比
+- 原实现: iterrows 逐根 K 线更新资金和持仓;
+- StrategyService.backtest_strategy: 只按成交笔数循环, 权益曲线和指标用数组计算;
+并报告一组手续费 x 滑点参数扫描的总耗时。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.services.strategy_service import StrategyService
+from test_vectorized_backtest import make_signals, loop_reference
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='backtest_strategy 基准测试')
+    parser.add_argument('--years', type=int, default=1, help='1m 数据的年数')
+    parser.add_argument('--density', type=float, default=0.01, help='信号占 K 线的比例')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    service = StrategyService()
+    logging.getLogger('App.services.strategy_service').setLevel(logging.WARNING)
+
+    data = make_signals(0, n=args.years * 242 * 240, density=args.density, freq='min')
+    logger.info(f'{len(data)} 根 1m K 线, {int((data["final_signal"] != 0).sum())} 个信号')
+
+    start = time.perf_counter()
+    loop_reference(data)
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = service.backtest_strategy(data, periods_per_year=242 * 240)
+    t_vector = time.perf_counter() - start
+    logger.info(f'原实现 {t_loop:.2f}s, backtest_strategy {t_vector * 1e3:.1f}ms, 快 {t_loop / t_vector:.0f} 倍, '
+                f'{result["total_trades"]} 笔交易')
+
+    grid = [(fee, slippage) for fee in np.linspace(0, 0.001, 5) for slippage in np.linspace(0, 0.002, 5)]
+    start = time.perf_counter()
+    for fee, slippage in grid:
+        service.backtest_strategy(data, fee_rate=fee, slippage=slippage, periods_per_year=242 * 240)
+    t_grid = time.perf_counter() - start
+    logger.info(f'{len(grid)} 组手续费 x 滑点: {t_grid:.2f}s, 原实现约 {t_loop * len(grid):.0f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+列名解析器测试夹具
+
+MacdParser / BollingerParser 通过 parser_utils 从 StockColumns.json 读取列名, 该文件不随代码提交,
+且 parser_utils 在导入时向上查找 app.py 所在目录。测试时预先注册一个返回夹具列名的 parser_utils,
+使 Signals / RnnModel 模块可以离线导入。RnnModel 模块还从 App.static / root_ 导入 file_root
+(前者已注释, 后者不在仓库中), 并以顶层模块名导入 Rnn_utils, 夹具一并指向 stock_path.file_root 和
+App.codes.RnnModel.Rnn_utils。
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import types
+import importlib
+
+STOCK_COLUMNS = {
+    'Signal': {'1': 'Signal', '2': 'SignalTimes', '3': 'SignalChoice', '4': 'SignalStartTime',
+               '5': 'up', '6': 'down', '7': 1, '8': -1},
+    'Macd': {'1': 'EmaShort', '2': 'EmaMid', '3': 'EmaLong', '4': 'DIF', '5': 'DIFSm', '6': 'DIFMl',
+             '7': 'DEA', '8': 'MACD'},
+    'Boll': {'1': 'BollMid', '2': 'BollStd', '3': 'BollUp', '4': 'BollDn', '5': 'StopLoss'},
+    'cycle': {'1': 'EndPrice', '2': 'EndPriceIndex', '3': 'StartPrice', '4': 'StartPriceIndex',
+              '5': 'Cycle1mVolMax1', '6': 'Cycle1mVolMax5', '7': 'Bar1mVolMax1', '8': 'Bar1mVolMax5',
+              '9': 'CycleLengthMax', '10': 'CycleLengthPerBar', '11': 'CycleAmplitudePerBar',
+              '12': 'CycleAmplitudeMax'},
+    'Recycle': {'1': 'preCycle1mVolMax1', '2': 'preCycle1mVolMax5', '3': 'preCycleAmplitudeMax',
+                '4': 'preCycleLengthMax', '5': 'nextCycleLengthMax', '6': 'nextCycleAmplitudeMax'},
+    'Signal30m': {'1': '30mSignal', '2': '30mSignalChoice', '3': '30mSignalTimes'},
+    'Signal120m': {'1': '120mSignal', '2': '120mSignalChoice', '3': '120mSignalTimes'},
+    'SignalDaily': {'1': 'Daily1mVolMax1', '2': 'Daily1mVolMax5', '3': 'Daily1mVolMax15',
+                    '4': 'VolDailyEmaParser', '5': 'DailyVolEma'},
+}
+
+
+def install_parser_fixture():
+    """ 注册 parser_utils.read_columns 使用夹具列名, 并让 App.my_code.* 指向 App.codes.* """
+    parser_utils = types.ModuleType('parser_utils')
+    parser_utils.read_columns = lambda: STOCK_COLUMNS
+    sys.modules['parser_utils'] = parser_utils
+
+    import App.codes
+    import App.codes.parsers.MacdParser as macd_parser
+    import App.codes.parsers.BollingerParser as boll_parser
+
+    # 兼容仍使用旧包名 App.my_code 的模块
+    my_code = sys.modules.setdefault('App.my_code', types.ModuleType('App.my_code'))
+    my_code.__path__ = App.codes.__path__
+    sys.modules['App.my_code.parsers'] = sys.modules['App.codes.parsers']
+    sys.modules['App.my_code.parsers.MacdParser'] = macd_parser
+    sys.modules['App.my_code.parsers.BollingerParser'] = boll_parser
+    sys.modules.setdefault('MacdParser', macd_parser)
+    sys.modules.setdefault('BollingerParser', boll_parser)
+
+    # RnnCreationData / Data15MOriginal / Rnn_utils 的 file_root 与 Rnn_utils 入口
+    import App.static
+    from App.codes.RnnDataFile.stock_path import file_root
+
+    if not hasattr(App.static, 'file_root'):
+        App.static.file_root = file_root
+
+    root_ = sys.modules.setdefault('root_', types.ModuleType('root_'))
+    root_.file_root = getattr(root_, 'file_root', file_root)
+    sys.modules.setdefault('Rnn_utils', importlib.import_module('App.codes.RnnModel.Rnn_utils'))
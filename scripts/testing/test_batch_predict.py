@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+跨股票批量推理测试脚本
+
+在临时目录中保存多只股票的 LeNet 模型, 检查 BatchPredictor 的堆叠权重推理、按模型文件合并推理
+与逐个 batch=1 调用模型的结果一致, 并检查缺失模型和批次统计
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+import numpy as np
+from keras import Sequential, Input
+from keras.layers import Dense, Flatten
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnModel.ModelRegistry import ModelRegistry
+from App.codes.RnnModel.BatchPredict import BatchPredictor, is_lenet
+from test_model_registry import MONTH, MODEL_NAMES, save_models
+
+CODES = ['000001', '000002', '000003']
+
+
+class TestBatchPredict(unittest.TestCase):
+    """批量推理测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp()
+        cls.data_path = StockDataPath.data_path
+        StockDataPath.data_path = cls.root
+        save_models(cls.root, MONTH, CODES)
+
+    @classmethod
+    def tearDownClass(cls):
+        StockDataPath.data_path = cls.data_path
+        shutil.rmtree(cls.root)
+
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.rng = np.random.default_rng(0)
+
+    def reference(self, requests):
+        return np.array([np.asarray(self.registry.get(MONTH, name, code)(x, training=False))[0, 0]
+                         for name, code, x in requests])
+
+    def make_requests(self, codes):
+        return [(name, code, self.rng.random((1, 30, 30, 1))) for code in codes for name in MODEL_NAMES]
+
+    def run_predictor(self, requests, stacked=True):
+        predictor = BatchPredictor(self.registry, stacked=stacked)
+        for name, code, x in requests:
+            predictor.add(MONTH, name, code, x)
+        return predictor, predictor.run()
+
+    def test_is_lenet(self):
+        self.assertTrue(is_lenet(self.registry.get(MONTH, 'CycleLength4', '000001')))
+
+        model = Sequential([Input(shape=(30, 30, 1)), Flatten(), Dense(1)])
+        self.assertFalse(is_lenet(model))
+
+    def test_stacked_matches_single_calls(self):
+        # 000001 出现两次: 同一模型文件的两个样本
+        requests = self.make_requests(CODES + ['000001'])
+        predictor, values = self.run_predictor(requests)
+
+        np.testing.assert_allclose(values, self.reference(requests), rtol=1e-4, atol=1e-6)
+        self.assertEqual([b['mode'] for b in predictor.batches], ['stacked'] * 4)
+        self.assertEqual([b['samples'] for b in predictor.batches], [4] * 4)
+        self.assertEqual([b['models'] for b in predictor.batches], [3] * 4)
+
+    def test_per_model_matches_single_calls(self):
+        requests = self.make_requests(CODES + ['000002'])
+        predictor, values = self.run_predictor(requests, stacked=False)
+
+        np.testing.assert_allclose(values, self.reference(requests), rtol=1e-4, atol=1e-6)
+        self.assertEqual({b['mode'] for b in predictor.batches}, {'per_model'})
+
+    def test_stacked_chunks(self):
+        import App.codes.RnnModel.BatchPredict as batch_predict
+
+        requests = self.make_requests(CODES)
+        chunk = batch_predict.STACK_CHUNK_MODELS
+        batch_predict.STACK_CHUNK_MODELS = 2
+
+        try:
+            _, values = self.run_predictor(requests)
+        finally:
+            batch_predict.STACK_CHUNK_MODELS = chunk
+
+        np.testing.assert_allclose(values, self.reference(requests), rtol=1e-4, atol=1e-6)
+
+    def test_missing_model_left_nan(self):
+        requests = self.make_requests(['000001', '999999'])
+        predictor, values = self.run_predictor(requests)
+
+        n = len(MODEL_NAMES)
+        np.testing.assert_allclose(values[:n], self.reference(requests[:n]), rtol=1e-4, atol=1e-6)
+        self.assertTrue(np.isnan(values[n:]).all())
+        self.assertEqual([b['models'] for b in predictor.batches], [1] * n)
+
+    def test_batch_stats(self):
+        predictor, _ = self.run_predictor(self.make_requests(CODES))
+
+        for batch in predictor.batches:
+            self.assertGreater(batch['seconds'], 0)
+            self.assertAlmostEqual(batch['samples_per_second'], batch['samples'] / batch['seconds'])
+
+
+if __name__ == '__main__':
+    unittest.main()
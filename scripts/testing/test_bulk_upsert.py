@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+批量 upsert 测试脚本
+
+使用 SQLite 的 INSERT ... ON CONFLICT 等价实现测试 bulk_upsert 的插入、更新、分批和空值处理,
+并检查 MySQL 方言生成的 ON DUPLICATE KEY UPDATE 语句
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, event
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.utils.bulk_upsert import bulk_upsert, build_upsert_sql
+
+CREATE_1M = ('CREATE TABLE "000001" (date TEXT PRIMARY KEY, open REAL, close REAL, high REAL, low REAL, '
+             'volume INTEGER, money INTEGER)')
+
+
+def make_bars(start: str, n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 10 + rng.standard_normal(n).cumsum() * 0.01
+    return pd.DataFrame({'date': pd.date_range(start, periods=n, freq='1min'),
+                         'open': close, 'close': close, 'high': close + 0.01, 'low': close - 0.01,
+                         'volume': rng.integers(100, 1000, n), 'money': rng.integers(1000, 10000, n)})
+
+
+class TestBulkUpsert(unittest.TestCase):
+    """批量 upsert 测试类"""
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(CREATE_1M)
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute',
+                     lambda *args: self.statements.append(args[2]))
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_sql('SELECT * FROM "000001" ORDER BY date', self.engine, parse_dates=['date'])
+
+    def test_insert_then_update_overlap(self):
+        first = make_bars('2024-01-02 09:31', 1000, seed=1)
+        second = make_bars('2024-01-02 09:31', 1500, seed=2).iloc[500:]
+
+        with self.engine.begin() as conn:
+            self.assertEqual(bulk_upsert(conn, '000001', first), 1000)
+            self.assertEqual(bulk_upsert(conn, '000001', second), 1000)
+
+        expected = pd.concat([first.iloc[:500], second], ignore_index=True)
+        pd.testing.assert_frame_equal(self.read(), expected, check_dtype=False)
+
+    def test_batches_by_byte_budget(self):
+        data = make_bars('2024-01-02 09:31', 2000)
+
+        with self.engine.begin() as conn:
+            bulk_upsert(conn, '000001', data, max_bytes=16 * 1024)
+
+        inserts = [s for s in self.statements if s.startswith('INSERT')]
+        self.assertGreater(len(inserts), 1)
+        self.assertLess(len(inserts), 100)
+        self.assertTrue(all(len(s) < 64 * 1024 for s in inserts))
+        self.assertEqual(len(self.read()), 2000)
+
+    def test_nan_written_as_null(self):
+        data = make_bars('2024-01-02 09:31', 3)
+        data['open'] = data['open'].astype(float)
+        data.loc[1, 'open'] = np.nan
+
+        with self.engine.begin() as conn:
+            bulk_upsert(conn, '000001', data)
+
+        self.assertTrue(pd.isna(self.read().loc[1, 'open']))
+
+    def test_empty_frame(self):
+        with self.engine.begin() as conn:
+            self.assertEqual(bulk_upsert(conn, '000001', pd.DataFrame()), 0)
+
+    def test_mysql_sql(self):
+        sql = build_upsert_sql('mysql', '000001', ['date', 'close'], 'date', 2)
+        self.assertEqual(sql, 'INSERT INTO `000001` (`date`, `close`) VALUES (%s, %s), (%s, %s) '
+                              'ON DUPLICATE KEY UPDATE `close` = VALUES(`close`)')
+
+        sql = build_upsert_sql('mysql', '000001', ['date'], 'date', 1)
+        self.assertTrue(sql.startswith('INSERT IGNORE INTO'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+1分钟数据本地列式存储测试脚本
+
+测试 ColumnStore1m 的分区读写、日期/列下推, 以及 StockData1m 与 SQLite 夹具之间的一致性
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.MySql import DataBaseStockData1m
+from App.codes.MySql.ColumnStore1m import ColumnStore1m
+from App.codes.MySql.DataBaseStockData1m import StockData1m
+
+
+def make_1m(start: str, days: int) -> pd.DataFrame:
+    """ 生成每天 240 根的 1m 数据 """
+    dates = []
+    for day in pd.bdate_range(start, periods=days):
+        dates.extend(pd.date_range(day + pd.Timedelta(minutes=571), periods=120, freq='1min'))
+        dates.extend(pd.date_range(day + pd.Timedelta(minutes=781), periods=120, freq='1min'))
+
+    n = len(dates)
+    rng = np.random.default_rng(0)
+    close = 10 + rng.standard_normal(n).cumsum() * 0.01
+    return pd.DataFrame({'date': pd.DatetimeIndex(dates), 'open': close, 'close': close,
+                         'high': close + 0.01, 'low': close - 0.01,
+                         'volume': rng.integers(100, 1000, n).astype(float),
+                         'money': rng.integers(1000, 10000, n).astype(float)})
+
+
+class SQLiteAlchemy:
+    """ 以 SQLite 文件代替 data1m{year} 数据库, 表名为 {database}_{table} """
+
+    engine = None
+
+    @classmethod
+    def pd_read(cls, database: str, table: str):
+        return pd.read_sql(f'SELECT * FROM "{database}_{table}"', cls.engine, parse_dates=['date'])
+
+    @classmethod
+    def pd_append(cls, data, database: str, table: str):
+        data.to_sql(f'{database}_{table}', cls.engine, if_exists='append', index=False)
+
+    @classmethod
+    def pd_replace(cls, data, database: str, table: str):
+        data.to_sql(f'{database}_{table}', cls.engine, if_exists='replace', index=False)
+
+
+@unittest.skipUnless(ColumnStore1m.available(), 'pyarrow 未安装')
+class TestColumnStore1m(unittest.TestCase):
+    """本地列式存储测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = ColumnStore1m(self.root, row_group_size=2400)
+        self.data = make_1m('2023-01-02', 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_replace_and_read(self):
+        self.store.replace('000001', 2023, self.data)
+        self.assertEqual(self.store.years('000001'), [2023])
+
+        out = self.store.read('000001', 2023)
+        pd.testing.assert_frame_equal(out, self.data, check_dtype=False)
+
+    def test_date_and_column_pushdown(self):
+        self.store.replace('000001', 2023, self.data)
+        start, end = pd.Timestamp('2023-02-01'), pd.Timestamp('2023-02-10 15:00')
+
+        out = self.store.read('000001', 2023, start_date=start, end_date=end, columns=['close'])
+        expected = self.data[(self.data['date'] >= start) & (self.data['date'] <= end)][['date', 'close']]
+
+        self.assertEqual(list(out.columns), ['date', 'close'])
+        pd.testing.assert_frame_equal(out, expected.reset_index(drop=True), check_dtype=False)
+
+    def test_append_deduplicates(self):
+        self.store.append('000001', 2023, self.data.iloc[:3000])
+        self.store.append('000001', 2023, self.data.iloc[2000:])
+
+        out = self.store.read('000001', 2023)
+        pd.testing.assert_frame_equal(out, self.data, check_dtype=False)
+
+    def test_stock_data_1m_consistent_with_sqlite(self):
+        engine = create_engine(f'sqlite:///{Path(self.root) / "fixture.db"}')
+
+        with mock.patch.object(SQLiteAlchemy, 'engine', engine), \
+                mock.patch.object(DataBaseStockData1m, 'Alc', SQLiteAlchemy), \
+                mock.patch.object(StockData1m, 'store', self.store):
+
+            StockData1m.append_1m('000001', '2023', self.data.iloc[:5000])
+            StockData1m.append_1m('000001', '2023', self.data.iloc[5000:])
+
+            from_sql = SQLiteAlchemy.pd_read('data1m2023', '000001')
+            from_store = StockData1m.load_1m('000001', '2023', '2023')
+            pd.testing.assert_frame_equal(from_store, from_sql, check_dtype=False)
+
+            # 本地分区存在时不应访问数据库
+            with mock.patch.object(SQLiteAlchemy, 'pd_read', side_effect=AssertionError('hit database')):
+                recent = StockData1m.load_1m('000001', '2023', '2023', start_date='2023-03-01')
+
+            self.assertTrue((recent['date'] >= pd.Timestamp('2023-03-01')).all())
+            self.assertEqual(len(recent), (self.data['date'] >= pd.Timestamp('2023-03-01')).sum())
+
+            StockData1m.replace_1m('000001', '2023', self.data.iloc[:100])
+            pd.testing.assert_frame_equal(StockData1m.load_1m('000001', '2023', '2023'),
+                                          SQLiteAlchemy.pd_read('data1m2023', '000001'), check_dtype=False)
+
+    def test_first_append_seeds_partition_from_database(self):
+        engine = create_engine(f'sqlite:///{Path(self.root) / "fixture.db"}')
+
+        with mock.patch.object(SQLiteAlchemy, 'engine', engine), \
+                mock.patch.object(DataBaseStockData1m, 'Alc', SQLiteAlchemy), \
+                mock.patch.object(StockData1m, 'store', self.store):
+
+            # 数据库中已有该年数据, 本地尚无分区
+            SQLiteAlchemy.pd_replace(self.data.iloc[:4800], 'data1m2023', '000001')
+            self.assertFalse(self.store.has_partition('000001', '2023'))
+
+            StockData1m.append_1m('000001', '2023', self.data.iloc[4800:5600])
+            self.assertTrue(self.store.has_partition('000001', '2023'))
+
+            out = StockData1m.load_1m('000001', '2023', '2023')
+            self.assertEqual(5600, len(out))
+            pd.testing.assert_frame_equal(out, self.data.iloc[:5600], check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
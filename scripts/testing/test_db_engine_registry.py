@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+数据库引擎注册表测试脚本
+
+使用 SQLite 代替 MySQL, 测试 DB_MySql 中共享连接池的复用、fork 安全、连接池统计和批量 upsert,
+以及按模块名导入 DB_MySql 时不加载 Flask 的 App 包
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+import multiprocessing
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.MySql import DB_MySql
+from App.codes.MySql.DB_MySql import (EngineRegistry, MysqlAlchemy, execute_sql, execute_sql_return_value,
+                                    pandas_conn, upsert_dataframe_to_mysql)
+
+
+def child_engine_is_shared(queue, parent_engine):
+    """ 子进程中检查是否复用了父进程的 engine """
+    engine = DB_MySql.registry.engine('db1')
+    rows = execute_sql('db1', 'SELECT COUNT(*) FROM t')
+    queue.put((engine is parent_engine, rows[0][0]))
+
+
+class TestEngineRegistry(unittest.TestCase):
+    """数据库引擎注册表测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.registry = EngineRegistry(url_factory=lambda db: f'sqlite:///{Path(self.root) / db}.db')
+        self.patcher = mock.patch.object(DB_MySql, 'registry', self.registry)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.registry.dispose()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_one_engine_per_database(self):
+        self.assertIs(pandas_conn('db1'), DB_MySql.my_engine('db1'))
+        self.assertIsNot(pandas_conn('db1'), pandas_conn('db2'))
+        self.assertEqual(set(self.registry.pool_status()), {'db1', 'db2'})
+
+    def test_execute_sql_and_pandas_share_pool(self):
+        execute_sql('db1', 'CREATE TABLE t (date TEXT PRIMARY KEY, close REAL)')
+        execute_sql('db1', 'INSERT INTO t VALUES (?, ?)', ('2024-01-02 09:31:00', 10.5))
+
+        data = pd.DataFrame({'date': ['2024-01-02 09:32:00'], 'close': [10.6]})
+        MysqlAlchemy.pd_append(data, 'db1', 't')
+
+        df = MysqlAlchemy.pd_read('db1', 't')
+        self.assertEqual(df['close'].tolist(), [10.5, 10.6])
+
+        status = self.registry.pool_status()['db1']
+        self.assertGreaterEqual(status['checkouts'], 3)
+        self.assertLessEqual(status['connects'], status['checkouts'])
+        self.assertEqual(status['checked_out'], 0)
+
+    def test_execute_sql_return_value_releases_connection(self):
+        execute_sql('db1', 'CREATE TABLE t (a INTEGER)')
+        execute_sql('db1', 'INSERT INTO t VALUES (1)')
+        execute_sql_return_value('db1', 'UPDATE t SET a = ?', (2,))
+
+        self.assertEqual(self.registry.pool_status()['db1']['checked_out'], 0)
+        self.assertEqual(execute_sql('db1', 'SELECT a FROM t')[0][0], 2)
+
+    def test_upsert_dataframe(self):
+        execute_sql('db1', 'CREATE TABLE t (date TEXT PRIMARY KEY, close REAL)')
+        upsert_dataframe_to_mysql(pd.DataFrame({'date': ['a', 'b'], 'close': [1.0, 2.0]}), 'db1', 't', 'date')
+        upsert_dataframe_to_mysql(pd.DataFrame({'date': ['b', 'c'], 'close': [3.0, 4.0]}), 'db1', 't', 'date')
+
+        self.assertEqual(execute_sql('db1', 'SELECT date, close FROM t ORDER BY date'),
+                         [('a', 1.0), ('b', 3.0), ('c', 4.0)])
+
+    def test_import_does_not_load_flask_app(self):
+        # 调度器和训练进程按模块名导入 DB_MySql, 不应执行 App/__init__.py
+        code = "import sys, DB_MySql; print('App' in sys.modules, 'flask' in sys.modules)"
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(project_root),
+                                                           str(project_root / 'App' / 'codes' / 'MySql')]))
+        output = subprocess.run([sys.executable, '-c', code], env=env, cwd=tempfile.gettempdir(),
+                                capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.split()[-2:], ['False', 'False'])
+
+    def test_replace(self):
+        MysqlAlchemy.pd_replace(pd.DataFrame({'a': [1, 2]}), 'db1', 'x')
+        MysqlAlchemy.pd_replace(pd.DataFrame({'a': [3]}), 'db1', 'x')
+        self.assertEqual(MysqlAlchemy.pd_read('db1', 'x')['a'].tolist(), [3])
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), '平台不支持 fork')
+    def test_fork_does_not_share_connections(self):
+        execute_sql('db1', 'CREATE TABLE t (a INTEGER)')
+        execute_sql('db1', 'INSERT INTO t VALUES (1)')
+        parent_engine = self.registry.engine('db1')
+
+        ctx = multiprocessing.get_context('fork')
+        queue = ctx.Queue()
+        p = ctx.Process(target=child_engine_is_shared, args=(queue, parent_engine))
+        p.start()
+        shared, count = queue.get(timeout=30)
+        p.join()
+
+        self.assertFalse(shared)
+        self.assertEqual(count, 1)
+        self.assertIs(self.registry.engine('db1'), parent_engine)
+
+
+if __name__ == '__main__':
+    unittest.main()
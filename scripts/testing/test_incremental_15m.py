@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+15分钟特征增量计算测试脚本
+
+对 TrainingDataCalculate 和 Data15MOriginalCalculate 分别测试, 股票信息 (Stocks) 固定为夹具代码,
+1m 数据放在临时 ColumnStore1m, 15m 数据放在 SQLite 夹具中, 参数放在临时 ParamStore, 检查
+- 追加新交易日后增量计算结果与全量重算一致;
+- 最大日均量变大、高水位文件不完整或落后于已保存数据时回退全量重算;
+- 没有新的完整周期时直接返回已保存数据;
+- 全量和增量计算加载的 1m 数据都经过宿主类的 prepare_1m 预处理;
+- first_calculate 的 15m 和日线由 1m 数据一次分桶得到
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import warnings
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.parsers.RnnParser import *
+from App.codes.MySql import DataBaseStockData15m
+from App.codes.MySql.ColumnStore1m import ColumnStore1m
+from App.codes.MySql.DataBaseStockData1m import StockData1m
+from App.codes.MySql.DataBaseStockData15m import StockData15m
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnDataFile.MonthManifest import month_manifest
+from App.codes.RnnDataFile.ParamStore import param_store
+from App.codes.RnnModel import RnnCreationData, Data15MOriginal
+from App.codes.RnnModel.Incremental15m import Incremental15m
+from App.codes.RnnModel.RnnCreationData import TrainingDataCalculate
+from App.codes.RnnModel.Data15MOriginal import Data15MOriginalCalculate
+from test_column_store_1m import SQLiteAlchemy
+
+CODE, MONTH = '000001', '2023-08'
+
+
+def make_1m(days: int, seed: int = 0, volume_scale: float = 1.0) -> pd.DataFrame:
+    """ A 股交易时段的合成 1m 数据: 09:31-11:30, 13:01-15:00 """
+    rng = np.random.default_rng(seed)
+    minutes = np.concatenate([np.arange(571, 691), np.arange(781, 901)])
+    dates = (pd.bdate_range('2023-01-02', periods=days).values[:, None]
+             + (minutes * 60 * 10 ** 9).astype('timedelta64[ns]')).ravel()
+
+    n = len(dates)
+    close = np.round(10 * np.exp(np.cumsum(rng.standard_normal(n) * 0.002)), 2)
+    volume = rng.integers(100, 10000, n).astype(float)
+    volume[-240 * 5:] *= volume_scale
+    return pd.DataFrame({'date': pd.DatetimeIndex(dates), 'open': close, 'close': close,
+                         'high': close + 0.01, 'low': close - 0.01,
+                         'volume': volume, 'money': volume * close})
+
+
+class Incremental15mCase:
+    """15分钟增量计算测试, host_class 为宿主类"""
+
+    host_class = None
+
+    def setUp(self):
+        warnings.simplefilter('ignore')
+        self.root = tempfile.mkdtemp()
+
+        self.data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.root
+        month_manifest.invalidate()
+
+        patches = [mock.patch.object(SQLiteAlchemy, 'engine', create_engine(f'sqlite:///{self.root}/15m.db')),
+                   mock.patch.object(DataBaseStockData15m, 'Alc', SQLiteAlchemy),
+                   mock.patch.object(StockData1m, 'store', ColumnStore1m(f'{self.root}/1m'))]
+        patches += [mock.patch.object(module, 'Stocks', return_value=('平安银行', CODE, 1))
+                    for module in (RnnCreationData, Data15MOriginal)]
+
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        # rnn_parser_data 建立的参数文档, _save_record_info 在其中更新记录
+        param_store.put_document(MONTH, CODE, {CODE: {}})
+
+    def tearDown(self):
+        StockDataPath.data_path = self.data_path
+        month_manifest.invalidate()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def write_1m(self, data):
+        StockData1m.store.replace(CODE, 2023, data)
+
+        # load_1m 读取到当年, 之后的年份放空分区, 避免访问数据库
+        for year in range(2024, pd.Timestamp('today').year + 1):
+            StockData1m.store.replace(CODE, year, data.iloc[:0])
+
+    def host(self):
+        return self.host_class(CODE, MONTH, '2023-01-01')
+
+    def assert_same_as_full(self, incremental):
+        """ 与全量重算比较; 全历史的第一个有效周期与最后一个信号比较 (np.roll), 从第二个周期开始比较 """
+        full = self.host().calculate_15m_full()
+        starts = pd.to_datetime(full.loc[full[SignalChoice].notna(), 'date'])
+        first = starts.iloc[1]
+
+        def part(data):
+            data = data[pd.to_datetime(data['date']) >= first].reset_index(drop=True)
+            return data.drop(columns=[c for c in data.columns if c == 'index'])
+
+        a, b = part(incremental), part(full)
+        self.assertEqual(list(pd.to_datetime(a['date'])), list(pd.to_datetime(b['date'])))
+
+        for column in [Signal, SignalTimes, SignalChoice, DailyVolEmaParser, Bar1mVolMax1, Bar1mVolMax5,
+                       CycleLengthMax, CycleAmplitudeMax]:
+            x, y = a[column], b[column]
+            if x.dtype == object or y.dtype == object:
+                self.assertEqual(list(x.fillna('nan').astype(str)), list(y.fillna('nan').astype(str)), column)
+            else:
+                np.testing.assert_allclose(x.to_numpy(float), y.to_numpy(float), rtol=1e-9, equal_nan=True,
+                                           err_msg=column)
+
+    def test_incremental_matches_full(self):
+        data = make_1m(160)
+        self.write_1m(data.iloc[:240 * 140])
+        self.host().calculate_15m_full()
+        self.assertTrue(Path(StockDataPath.high_water_path(CODE)).exists())
+
+        self.write_1m(data)
+        host = self.host()
+
+        with mock.patch.object(StockData15m, 'replace_15m', side_effect=AssertionError('full rebuild')):
+            incremental = host.calculate_15m_incremental()
+
+        self.assertGreater(pd.to_datetime(incremental['date']).max(), pd.Timestamp('2023-07-20'))
+        self.assert_same_as_full(incremental)
+
+    def test_falls_back_when_daily_max_grows(self):
+        self.write_1m(make_1m(160).iloc[:240 * 140])
+        self.host().calculate_15m_full()
+
+        self.write_1m(make_1m(160, volume_scale=20))
+        with mock.patch.object(self.host_class, 'calculate_15m_full', autospec=True,
+                               side_effect=Incremental15m.calculate_15m_full) as full:
+            result = self.host().calculate_15m_incremental()
+
+        full.assert_called_once()
+        self.assert_same_as_full(result)
+
+    def assert_incremental_rebuilds(self):
+        with mock.patch.object(self.host_class, 'calculate_15m_full', autospec=True,
+                               side_effect=Incremental15m.calculate_15m_full) as full:
+            result = self.host().calculate_15m_incremental()
+
+        full.assert_called_once()
+        mark = self.host().read_high_water_mark()
+        self.assertEqual(pd.Timestamp(mark['RecordEndDate']), pd.to_datetime(result['date']).max())
+
+    def test_torn_mark_falls_back_to_full(self):
+        self.write_1m(make_1m(140))
+        self.host().calculate_15m_full()
+
+        path = StockDataPath.high_water_path(CODE)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+        with open(path, 'w') as f:
+            f.write('{"RecordEndDate": "2023-')
+
+        self.assertIsNone(self.host().read_high_water_mark())
+        self.assert_incremental_rebuilds()
+
+    def test_mark_behind_saved_rows_falls_back_to_full(self):
+        # 追加 15m 数据后、写高水位前中断: 高水位落后于已保存的数据
+        self.write_1m(make_1m(140))
+        host = self.host()
+        persisted = host.calculate_15m_full()
+        host.save_high_water_mark(pd.to_datetime(persisted['date']).iloc[-20])
+
+        self.assert_incremental_rebuilds()
+
+    def test_no_new_cycle_returns_persisted(self):
+        self.write_1m(make_1m(140))
+        persisted = self.host().calculate_15m_full()
+
+        with mock.patch.object(StockData15m, 'append_15m', side_effect=AssertionError('append')):
+            result = self.host().calculate_15m_incremental()
+
+        self.assertEqual(len(result), len(persisted))
+
+    def test_first_calculate_buckets_1m_once(self):
+        host = self.host()
+        host.data_1m = make_1m(60)
+        ResampleData = sys.modules[self.host_class.__module__].ResampleData
+
+        with mock.patch.object(ResampleData, '_bucket_frame', wraps=ResampleData._bucket_frame) as bucket:
+            result = host.first_calculate()
+
+        bucket.assert_called_once()
+        daily = host._process_daily_data()[DailyVolEmaParser]
+        joined = result.set_index('date')[DailyVolEmaParser]
+        np.testing.assert_allclose(joined.loc[joined.index.isin(daily.index)], daily.loc[daily.index.isin(joined.index)])
+        self.assertTrue(set(result['date']) <= set(ResampleData.resample_1m_data(host.data_1m, '15m')['date']))
+
+    def test_short_history_uses_full(self):
+        self.write_1m(make_1m(40))
+        self.host().calculate_15m_full()
+
+        host = self.host()
+        persisted = StockData15m.load_15m(CODE)
+        self.assertEqual(host.incremental_start_date(persisted), (None, None))
+
+
+
+class TestTrainingDataIncremental15m(Incremental15mCase, unittest.TestCase):
+    """TrainingDataCalculate 增量计算测试类"""
+
+    host_class = TrainingDataCalculate
+
+
+class TestData15MOriginalIncremental15m(Incremental15mCase, unittest.TestCase):
+    """Data15MOriginalCalculate 增量计算测试类"""
+
+    host_class = Data15MOriginalCalculate
+
+    def test_prepare_1m_applies_to_both_paths(self):
+        data = make_1m(160)
+        data.loc[data.index[-300:-290], ['open', 'high', 'low', 'close', 'volume']] = np.nan
+        self.write_1m(data.iloc[:240 * 140])
+        self.host().calculate_15m_full()
+
+        self.write_1m(data.sample(frac=1, random_state=0))
+        for data_1m in (self.host().load_1m_from('2023-01-01'), self.host().load_1m_from('2023-06-01')):
+            self.assertTrue(data_1m['date'].is_monotonic_increasing)
+            self.assertFalse(data_1m[['open', 'high', 'low', 'close', 'volume']].isna().any().any())
+
+        host = self.host()
+        host.calculate_15m_incremental()
+        self.assertFalse(host.data_1m['close'].isna().any())
+        self.assertEqual(host.start_date_1m, host.data_1m['date'].min().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def test_data_15m_calculate_full(self):
+        self.write_1m(make_1m(140))
+
+        with mock.patch.object(Data15MOriginalCalculate, 'third_calculate', autospec=True,
+                               side_effect=lambda host: host.data_15m):
+            result = self.host().data_15m_calculate(incremental=False)
+
+        self.assertTrue(Path(StockDataPath.high_water_path(CODE)).exists())
+        self.assertEqual(len(result), len(StockData15m.load_15m(CODE)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+MACD 周期统计向量化引擎测试脚本
+
+用原逐行实现 (LoopCountMACD / LoopStatisticsMACD) 作为参照, 在合成的 15m/1m 数据上
+检查 StatisticsMacd 中向量化实现的输出完全一致
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import warnings
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.parsers.MacdParser import *
+from App.codes.Signals.MacdSignal import calculate_MACD
+from App.codes.Signals.StatisticsMacd import CountMACD, StatisticsMACD
+from App.codes.Signals import MacdCycleEngine as engine
+
+
+def make_1m(days: int, seed: int = 0) -> pd.DataFrame:
+    """ A 股交易时段的合成 1m 数据: 09:31-11:30, 13:01-15:00 """
+    rng = np.random.default_rng(seed)
+    minutes = np.concatenate([np.arange(571, 691), np.arange(781, 901)])
+    dates = (pd.bdate_range('2023-01-02', periods=days).values[:, None]
+             + (minutes * 60 * 10 ** 9).astype('timedelta64[ns]')).ravel()
+
+    n = len(dates)
+    close = 10 * np.exp(np.cumsum(rng.standard_normal(n) * 0.002))
+    spread = np.abs(rng.standard_normal(n)) * 0.01
+    return pd.DataFrame({'date': pd.DatetimeIndex(dates), 'open': close, 'close': close,
+                         'high': close + spread, 'low': close - spread,
+                         'volume': rng.integers(100, 10000, n).astype(float)})
+
+
+def make_15m(data1m: pd.DataFrame) -> pd.DataFrame:
+    """ 以 15 分钟为界合成 15m 数据, bar 时间为区间右端 (09:45, 10:00, ...) """
+    key = data1m['date'].dt.ceil('15min')
+    data = data1m.groupby(key).agg(open=('open', 'first'), close=('close', 'last'), high=('high', 'max'),
+                                   low=('low', 'min'), volume=('volume', 'sum'))
+    return data.rename_axis('date').reset_index()
+
+
+class LoopCountMACD(CountMACD):
+    """ 原逐行实现 """
+
+    @classmethod
+    def find_effect_MACD(cls, data: pd.DataFrame) -> pd.DataFrame:
+
+        # 去除 Signal 列中为空的数据行，得到一个新的 DataFrame df
+        df = data.dropna(subset=[Signal])
+
+        # 如果 df 为空，则返回原始数据（或进行其他处理）
+        if df.empty:
+            return data
+
+        for index in df.index:
+            signal_times = data.loc[index, SignalTimes]
+            signal = data.loc[index, Signal]
+            condition = data[SignalTimes] == signal_times
+
+            diffs = data[condition & (data[DifMl] > 0) & (data[DifSm] > 0)].shape[0] if signal == upInt else \
+                    data[condition & (data[DifMl] < 0) & (data[DifSm] < 0)].shape[0]
+
+            if diffs < 7:
+                data.loc[index, Signal] = None
+
+        # 删除连续相同的信号
+        drop = data.dropna(subset=[Signal])
+
+        if not drop.empty:
+
+            for i, index in zip(range(drop.shape[0]), drop.index):
+
+                try:
+                    if drop.iloc[i][Signal] == drop.iloc[i - 1][Signal]:
+                        data.loc[index, Signal] = None
+
+                except ValueError:
+                    pass
+
+        # 重置统计列
+        data[SignalTimes] = None  # 第2次统计出 涨跌次数
+        data[SignalChoice] = None  # 第2次统计出 涨跌次数
+
+        return data
+
+
+class LoopStatisticsMACD(StatisticsMACD):
+    """ 原逐行实现 """
+
+    @classmethod
+    def find_start_end_index(cls, data: pd.DataFrame) -> pd.DataFrame:
+
+        # 设置 'date' 列为索引
+        data = data.set_index('date', drop=True)
+
+        # 删除 'SignalChoice' 列中含有缺失值的行
+        drops = data.dropna(subset=[SignalChoice])
+
+        if drops.empty:
+            # 如果没有有效数据，直接返回
+            data = data.reset_index()
+            return data
+
+        # 计算结束价格和结束价格索引
+        for i, index in zip(range(drops.shape[0]), drops.index):
+
+            if i > 0:
+                choice_ = data.loc[index, SignalChoice]
+                times_ = data.loc[index, SignalTimes]  # signal_times
+
+                if choice_ == down:
+                    end_price = data[data[SignalTimes] == times_]['low'].min()
+                    end_price_id = data[data[SignalTimes] == times_]['low'].idxmin()
+
+                else:
+                    end_price = data[data[SignalTimes] == times_]['high'].max()
+                    end_price_id = data[data[SignalTimes] == times_]['high'].idxmax()
+
+                # 设置结束价格和结束价格索引
+                data.loc[index, EndPrice] = end_price  # '结束价'
+                data.loc[index, EndPriceIndex] = end_price_id  # '结束价_index'
+
+        # find start price & start price id;
+        con1 = (~data[SignalChoice].isnull())
+        data.loc[con1, StartPrice] = data[con1][EndPrice].shift(1)
+        data.loc[con1, StartPriceIndex] = data[con1][EndPriceIndex].shift(1)
+
+        # fill nan
+        fills = [EndPrice, EndPriceIndex, StartPrice, StartPriceIndex]
+        data[fills] = data[fills].fillna(method='ffill')
+
+        # reset 'date' to column
+        data = data.reset_index()
+
+        return data
+
+    @classmethod
+    def s_StartEndIndex(cls, data: pd.DataFrame) -> pd.DataFrame:
+
+        # 将'date'列设为索引，并删除原来的'date'列
+        data = data.set_index('date', drop=True)
+
+        # 删除'SignalChoice'列为空的行
+        drops = data.dropna(subset=[SignalChoice])
+
+        for i, index in zip(range(len(drops)), drops.index):
+
+            if i > 0:  # 从第二个信号开始处理
+                signal_ = data.loc[index, SignalChoice]
+                times_ = data.loc[index, SignalTimes]  # signal_times
+
+                if signal_ == down:
+                    end_price = data[data[SignalTimes] == times_]['low'].min()
+                    end_price_id = data[data[SignalTimes] == times_]['low'].idxmin()
+
+                else:
+                    end_price = data[data[SignalTimes] == times_]['high'].max()
+                    end_price_id = data[data[SignalTimes] == times_]['high'].idxmax()
+
+                data.loc[index, EndPrice] = end_price  # '结束价'
+                data.loc[index, EndPriceIndex] = end_price_id  # '结束价_index'
+                data.loc[index, 'EndDaily1mVolMax5'] = data.loc[end_price_id, 'Daily1mVolMax5']
+
+        # 计算每个信号的起始价格和起始价格索引
+        condition = (~data[SignalChoice].isnull())
+        data.loc[condition, StartPrice] = data[condition][EndPrice].shift(1)
+        data.loc[condition, StartPriceIndex] = data[condition][EndPriceIndex].shift(1)
+
+        # 将结果进行前向填充，填补缺失值
+        fills = [EndPrice, EndPriceIndex, StartPrice, StartPriceIndex, 'EndDaily1mVolMax5']
+        data[fills] = data[fills].ffill()
+
+        # 将索引重置回原来的状态
+        data = data.reset_index()
+        return data
+
+    @classmethod
+    def s_Cycle1mVolumeMax(cls, data: pd.DataFrame, data1m: pd.DataFrame) -> pd.DataFrame:
+
+        # 筛选出 SignalChoice 不为空的行
+        conditions = (~data[SignalChoice].isnull())
+
+        for index in data[conditions].index:
+            st = data.loc[index, SignalTimes]  # 获取当前信号的时间
+            ed_time = data.loc[index, EndPriceIndex]  # 获取当前信号结束的时间
+
+            # 获取在该信号时间段内的数据
+            selects = data[(data[SignalTimes] == st) & (data['date'] < ed_time)]
+
+            if len(selects) > 5:  # 如果信号时间段内的数据超过5条
+                # 获取倒数第5条数据的时间，作为开始时间
+                st_time = data[(data[SignalTimes] == st) &
+                               (data['date'] < ed_time)].iloc[-5]['date']
+            else:
+                # 否则，使用结束时间当天的日期作为开始时间
+                st_time = pd.to_datetime(ed_time.date())
+
+            # 计算从开始时间到结束时间内，1分钟成交量的最大值
+            max1 = data1m[(data1m['date'] > st_time) &
+                          (data1m['date'] <= ed_time)].sort_values(by=['volume']).tail(1)['volume'].mean()
+
+            # 计算从开始时间到结束时间内，1分钟成交量的最大5个值的平均值
+            max5 = data1m[(data1m['date'] > st_time) &
+                          (data1m['date'] <= ed_time)].sort_values(by=['volume']).tail(5)['volume'].mean()
+
+            # 将计算出的最大1分钟和最大5分钟成交量分别赋值给对应的列
+            data.loc[(data[SignalTimes] == st), Cycle1mVolMax1] = max1
+            data.loc[(data[SignalTimes] == st), Cycle1mVolMax5] = max5
+
+        return data
+
+    @classmethod
+    def s_CycleLength(cls, data: pd.DataFrame) -> pd.DataFrame:
+
+        for index in data[~data[SignalChoice].isnull()].index:
+            st = data.loc[index, SignalTimes]  # 获取当前信号的时间
+            conditions = data[SignalTimes] == st  # 找到相同信号时间的所有行
+
+            st_index = data[conditions].index[0]  # 该信号第一次出现的索引
+            ed_index = data[conditions].index[-1]  # 该信号最后一次出现的索引
+
+            # 计算周期的总长度，并填充到'CycleLengthMax'列中
+            data.loc[conditions, CycleLengthMax] = ed_index - st_index
+
+            # 计算每个bar在周期中的位置，并填充到'CycleLengthPerBar'列中
+            data.loc[conditions, CycleLengthPerBar] = data[conditions].index - st_index
+
+        return data
+
+    @classmethod
+    def s_Daily1mMax(cls, data: pd.DataFrame, data1m: pd.DataFrame) -> pd.DataFrame:  # 找出每天最大的 1根，5根，15根 1分钟成交量
+
+        # 用于存储每天最大1分钟，5分钟和15分钟成交量的列名
+        fills = [Daily1mVolMax1, Daily1mVolMax5, Daily1mVolMax15]
+
+        # 提取日期中的时间部分，作为新的列 'minute_date'
+        data.loc[:, 'minute_date'] = data['date'].dt.time
+
+        def find_Daily1mMax(x: pd.Timestamp, num: int, data1m: pd.DataFrame) -> int:
+            """
+            在给定日期的下一天内，找到最大的num个成交量并计算平均值。
+
+            参数:
+            - x (pd.Timestamp): 当天的日期。
+            - num (int): 要取的最大成交量数量。
+            - data1m (pd.DataFrame): 包含1分钟成交量数据的数据集。
+
+            返回:
+            - int: 计算出的最大成交量的平均值（取整）。
+            """
+            st_date = pd.to_datetime(x.date())
+            ed_date = st_date + pd.Timedelta(days=1)
+
+            # 筛选出当天的1分钟成交量数据
+            select = data1m[(data1m['date'] > st_date) & (data1m['date'] < ed_date)]
+
+            # 计算出最大num个成交量的平均值，并取整
+            max_volume = select.sort_values(by=['volume'])['volume'].tail(num).mean()
+            return int(max_volume)
+
+        # 找到当天09:45:00的记录，并对其应用find_Daily1mMax函数，分别计算最大1, 5, 15分钟的成交量
+        con = data['minute_date'] == pd.to_datetime('09:45:00').time()
+        data.loc[con, Daily1mVolMax1] = data.loc[con, 'date'].apply(find_Daily1mMax, args=(1, data1m,))
+        data.loc[con, Daily1mVolMax5] = data.loc[con, 'date'].apply(find_Daily1mMax, args=(5, data1m,))
+        data.loc[con, Daily1mVolMax15] = data.loc[con, 'date'].apply(find_Daily1mMax, args=(15, data1m,))
+
+        # 对计算出来的最大成交量进行前向填充，填充空值
+        data[fills] = data[fills].ffill()
+
+        return data
+
+    @classmethod
+    def s_BarMax1mVolume(cls, data: pd.DataFrame, data1m: pd.DataFrame) -> pd.DataFrame:
+        # 使用 find_Bar1mMax 方法为每个时间点计算 1 分钟最大成交量
+        data.loc[:, Cycle1mVolMax1] = data['date'].apply(cls.find_Bar1mMax, args=(1, data1m,))
+
+        # 使用 find_Bar1mMax 方法为每个时间点计算最大 5 个成交量的平均值
+        data.loc[:, Cycle1mVolMax5] = data['date'].apply(cls.find_Bar1mMax, args=(5, data1m,))
+        return data
+
+
+
+def run_pipeline(count_cls, stat_cls, data15m, data1m):
+    """ 与 SignalMethod.signal_by_MACD_3ema 相同的统计流程 (不含 Bollinger) """
+    data = count_cls.count_MACD(data15m.copy())
+    data = stat_cls.s_Daily1mMax(data, data1m)
+    data = stat_cls.s_StartEndIndex(data)
+    data = stat_cls.s_CycleAmplitude(data)
+    data = stat_cls.s_Cycle1mVolumeMax(data, data1m)
+    data = stat_cls.s_CycleLength(data)
+    return data.drop(columns=['minute_date'])
+
+
+class TestMacdCycleEngine(unittest.TestCase):
+    """MACD 周期统计向量化引擎测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        warnings.simplefilter('ignore', FutureWarning)
+        cls.data1m = make_1m(40)
+        cls.data15m = make_15m(cls.data1m)
+
+    def test_signal_pipeline_matches_loop(self):
+        expected = run_pipeline(LoopCountMACD, LoopStatisticsMACD, self.data15m, self.data1m)
+        result = run_pipeline(CountMACD, StatisticsMACD, self.data15m, self.data1m)
+
+        self.assertGreater(result[SignalChoice].notna().sum(), 5)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_find_effect_macd_matches_loop(self):
+        data = CountMACD.find_MACD_times(CountMACD.remark_MACD(calculate_MACD(self.data15m.copy())))
+
+        expected = LoopCountMACD.find_effect_MACD(data.copy())
+        result = CountMACD.find_effect_MACD(data.copy())
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_find_start_end_index_matches_loop(self):
+        data = CountMACD.count_MACD(self.data15m.copy())
+
+        expected = LoopStatisticsMACD.find_start_end_index(data.copy())
+        result = StatisticsMACD.find_start_end_index(data.copy())
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_bar_max_1m_volume_matches_loop(self):
+        data = self.data15m.iloc[:400]
+
+        expected = LoopStatisticsMACD.s_BarMax1mVolume(data.copy(), self.data1m)
+        result = StatisticsMACD.s_BarMax1mVolume(data.copy(), self.data1m)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_segment_kernels(self):
+        values = np.array([3., 1., 2., 1., 5., np.nan, 5., 0.])
+        starts = np.array([1, 4, 7])
+
+        extreme, position = engine.segment_arg_extreme(values, starts, 'max')
+        np.testing.assert_array_equal(extreme, [2., 5., 0.])
+        np.testing.assert_array_equal(position, [2, 4, 7])
+
+        np.testing.assert_array_equal(engine.segment_count(values > 1, starts), [1, 2, 0])
+        np.testing.assert_array_equal(engine.segment_ids(starts, 8), [-1, 0, 0, 0, 1, 1, 1, 2])
+
+    def test_window_topk_mean(self):
+        values = np.array([1., 9., 3., 7., 5.])
+        top = engine.window_topk_mean(values, np.array([0, 2, 3]), np.array([5, 4, 3]), ks=(1, 2))
+
+        np.testing.assert_array_equal(top[1], [9., 7., np.nan])
+        np.testing.assert_array_equal(top[2], [8., 5., np.nan])
+
+
+if __name__ == '__main__':
+    unittest.main()
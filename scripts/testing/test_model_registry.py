@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Keras 模型缓存测试脚本
+
+在临时目录中保存随机初始化的小型 LeNet 模型 (与 RnnCreationModel.create_model 结构相同),
+在 CPU 上检查 ModelRegistry 的命中统计、预测结果、mtime 失效重新加载和 LRU 淘汰
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+import numpy as np
+from keras import Sequential, Input
+from keras.layers import Dense, Flatten, Conv2D, AveragePooling2D
+from keras.models import load_model
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnModel.ModelRegistry import ModelRegistry
+
+MONTH = '2024-01'
+MODEL_NAMES = ['CycleLength4', 'CycleChange4', 'BarChange4', 'BarVolume4']
+
+
+def create_lenet(seed: int = 0):
+    """ 与 RnnCreationModel.create_model 相同的 LeNet 结构 """
+    import keras
+    keras.utils.set_random_seed(seed)
+
+    model = Sequential()
+    model.add(Input(shape=(30, 30, 1)))
+    model.add(Conv2D(filters=6, kernel_size=(5, 5), strides=(1, 1), padding='valid', activation='relu'))
+    model.add(AveragePooling2D(pool_size=(2, 2)))
+    model.add(Conv2D(filters=16, kernel_size=(5, 5), strides=(1, 1), padding='valid', activation='relu'))
+    model.add(AveragePooling2D(pool_size=(2, 2)))
+    model.add(Flatten())
+    model.add(Dense(units=120, activation='relu'))
+    model.add(Dense(units=84, activation='relu'))
+    model.add(Dense(units=1))
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def save_models(root: str, month: str, codes, seed: int = 0):
+    """ 按 RnnData/<month>/model/<name>_<code>.h5 保存模型 """
+    folder = os.path.join(root, StockDataPath.rnn_data_file, month, 'model')
+    os.makedirs(folder, exist_ok=True)
+
+    for i, code in enumerate(codes):
+        for j, name in enumerate(MODEL_NAMES):
+            create_lenet(seed + i * len(MODEL_NAMES) + j).save(os.path.join(folder, f'{name}_{code}.h5'))
+
+
+class TestModelRegistry(unittest.TestCase):
+    """模型缓存测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = tempfile.mkdtemp()
+        cls.data_path = StockDataPath.data_path
+        StockDataPath.data_path = cls.root
+        save_models(cls.root, MONTH, ['000001', '000002'])
+
+    @classmethod
+    def tearDownClass(cls):
+        StockDataPath.data_path = cls.data_path
+        shutil.rmtree(cls.root)
+
+    def setUp(self):
+        self.x = np.random.default_rng(0).random((1, 30, 30, 1))
+
+    def test_hit_after_first_load(self):
+        registry = ModelRegistry()
+        first = registry.get(MONTH, 'CycleLength4', '000001')
+        second = registry.get(MONTH, 'CycleLength4', '000001')
+
+        self.assertIs(first, second)
+        stats = registry.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertGreater(stats['load_seconds'], 0)
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_prediction_matches_load_model(self):
+        registry = ModelRegistry()
+        path = StockDataPath.model_path(MONTH, 'BarChange4_000002.h5')
+        expected = load_model(path, compile=False).predict(self.x, verbose=0)
+
+        for _ in range(3):
+            model = registry.get(MONTH, 'BarChange4', '000002')
+            np.testing.assert_allclose(np.asarray(model(self.x, training=False)), expected, rtol=1e-5)
+
+    def test_reload_when_file_changes(self):
+        registry = ModelRegistry()
+        path = StockDataPath.model_path(MONTH, 'BarVolume4_000001.h5')
+        before = registry.get(MONTH, 'BarVolume4', '000001').predict(self.x, verbose=0)
+
+        create_lenet(seed=99).save(path)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        after = registry.get(MONTH, 'BarVolume4', '000001').predict(self.x, verbose=0)
+        np.testing.assert_allclose(after, load_model(path, compile=False).predict(self.x, verbose=0), rtol=1e-6)
+        self.assertFalse(np.allclose(before, after))
+        self.assertEqual(registry.stats()['reloads'], 1)
+        self.assertEqual(len(registry), 1)
+
+    def test_lru_eviction_by_count(self):
+        registry = ModelRegistry(max_models=3)
+        keys = [(MONTH, name, '000001') for name in MODEL_NAMES]
+
+        for key in keys[:3]:
+            registry.get(*key)
+        registry.get(*keys[0])  # keys[0] 变为最近使用
+        registry.get(*keys[3])
+
+        self.assertEqual(len(registry), 3)
+        self.assertNotIn(keys[1], registry)
+        self.assertIn(keys[0], registry)
+        self.assertEqual(registry.stats()['evictions'], 1)
+
+    def test_eviction_by_bytes(self):
+        nbytes = ModelRegistry.model_bytes(ModelRegistry().get(MONTH, 'CycleLength4', '000001'))
+
+        registry = ModelRegistry(max_models=100, max_bytes=int(nbytes * 2.5))
+        for name in MODEL_NAMES:
+            registry.get(MONTH, name, '000002')
+
+        self.assertEqual(len(registry), 2)
+        self.assertLessEqual(registry.stats()['bytes'], nbytes * 2.5)
+
+    def test_invalidate_by_stock(self):
+        registry = ModelRegistry()
+        for code in ('000001', '000002'):
+            registry.get(MONTH, 'CycleChange4', code)
+
+        registry.invalidate(stock_code='000001')
+        self.assertNotIn((MONTH, 'CycleChange4', '000001'), registry)
+        self.assertIn((MONTH, 'CycleChange4', '000002'), registry)
+
+        registry.invalidate()
+        self.assertEqual(len(registry), 0)
+        self.assertEqual(registry.stats()['bytes'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+月份文件夹索引测试脚本
+
+在临时 RnnData 目录树中检查 MonthManifest:
+- 之前最近月份的查询与逐个月份 listdir / exists 的原实现一致;
+- 写入后 record 更新索引, 新增月份文件夹后自动重新扫描, 已删除的文件被跳过;
+- MyJsonData.find_previous_month_json_parser 和 find_file_in_paths 的 json 类型同时查找 ParamStore 和未导入的 json 文件, 查找不写文件
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import json
+import shutil
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.RnnDataFile import MonthManifest as manifest_module
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnDataFile.MonthManifest import MonthManifest
+from App.codes.RnnDataFile.ParamStore import param_store
+from App.codes.RnnDataFile.JsonData import MyJsonData
+from App.codes.RnnModel.Rnn_utils import find_file_in_paths
+
+
+def touch(root, month, kind, file_name):
+    folder = os.path.join(root, month, kind)
+    os.makedirs(folder, exist_ok=True)
+    Path(folder, file_name).write_text('x')
+
+
+def brute_force(root, month, kind, file_name):
+    """ 原 find_file_in_paths 的做法: listdir、倒序、逐个探测 """
+    names = sorted([f for f in os.listdir(root) if os.path.isdir(os.path.join(root, f))], reverse=True)
+    names = [f for f in names if f != 'CommonFile' and f < month]
+
+    for m in names:
+        path = os.path.join(root, m, kind, file_name)
+        if os.path.isfile(path):
+            return path, m
+
+    return None, None
+
+
+class TestMonthManifest(unittest.TestCase):
+    """月份文件夹索引测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.tmp
+
+        self.root = StockDataPath.rnnData_folder_path()
+        os.makedirs(os.path.join(self.root, 'CommonFile'))
+        self.manifest = MonthManifest(ttl=None)
+
+    def tearDown(self):
+        StockDataPath.data_path = self.data_path
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        months = [f'{y}-{m:02d}' for y in (2022, 2023, 2024) for m in range(1, 13)]
+        files = [f'weight_bar_volume_{i:06d}.h5' for i in range(20)]
+
+        for month in months:
+            for kind in MonthManifest.kinds:
+                for file_name in rng.sample(files, 5):
+                    touch(self.root, month, kind, file_name)
+
+        for month in months + ['2021-12', '2025-01']:
+            for kind in MonthManifest.kinds:
+                for file_name in files[:6]:
+                    self.assertEqual(self.manifest.find(kind, file_name, month),
+                                     brute_force(self.root, month, kind, file_name), (month, kind, file_name))
+
+        self.assertEqual(self.manifest.builds, 1)
+        self.assertEqual(self.manifest.month_folders(), months)
+        self.assertEqual(self.manifest.previous_month_folders('2022-03'), ['2022-02', '2022-01'])
+
+    def test_record_on_write(self):
+        touch(self.root, '2024-01', 'train_data', 'a.npy')
+        touch(self.root, '2024-03', 'train_data', 'b.npy')
+        self.assertIsNone(self.manifest.previous_month('train_data', 'a.npy', '2024-01'))
+
+        touch(self.root, '2024-03', 'train_data', 'a.npy')
+        self.manifest.record('train_data', '2024-03', 'a.npy')
+
+        self.assertEqual(self.manifest.months('train_data', 'a.npy'), ['2024-01', '2024-03'])
+        self.assertEqual(self.manifest.previous_month('train_data', 'a.npy', '2024-04'), '2024-03')
+        self.assertEqual(self.manifest.builds, 1)
+
+    def test_rebuilds_when_month_folder_added(self):
+        touch(self.root, '2024-01', 'weight', 'w.h5')
+        self.assertEqual(self.manifest.previous_month('weight', 'w.h5', '2024-06'), '2024-01')
+
+        touch(self.root, '2024-02', 'weight', 'w.h5')
+        # 目录修改时间的精度可能较粗, 显式推进
+        stat = os.stat(self.root)
+        os.utime(self.root, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.assertEqual(self.manifest.previous_month('weight', 'w.h5', '2024-06'), '2024-02')
+        self.assertEqual(self.manifest.builds, 2)
+
+    def test_invalidate_and_deleted_files(self):
+        touch(self.root, '2024-01', 'model', 'm.h5')
+        touch(self.root, '2024-02', 'model', 'm.h5')
+        self.assertEqual(self.manifest.find('model', 'm.h5', '2024-03')[1], '2024-02')
+
+        os.remove(os.path.join(self.root, '2024-02', 'model', 'm.h5'))
+        self.assertEqual(self.manifest.find('model', 'm.h5', '2024-03')[1], '2024-01')
+
+        touch(self.root, '2024-02', 'model', 'n.h5')
+        self.assertIsNone(self.manifest.previous_month('model', 'n.h5', '2024-03'))
+
+        self.manifest.invalidate()
+        self.assertEqual(self.manifest.previous_month('model', 'n.h5', '2024-03'), '2024-02')
+
+    def test_previous_json_parser_uses_store_and_files(self):
+        code = '000001'
+        old = os.path.join(self.root, '2023-11', 'json')
+        os.makedirs(old)
+        with open(os.path.join(old, f'{code}.json'), 'w', encoding='utf-8') as f:
+            json.dump({'DailyVolEma': 1}, f)
+
+        os.makedirs(os.path.join(self.root, '2024-01'))
+        manifest_module.month_manifest.invalidate()
+
+        self.assertEqual(MyJsonData.find_previous_month_json_parser('2024-01', code), ({'DailyVolEma': 1}, '2023-11'))
+
+        param_store.set('2023-12', code, 'DailyVolEma', 2)
+        self.assertEqual(MyJsonData.find_previous_month_json_parser('2024-01', code), ({'DailyVolEma': 2}, '2023-12'))
+        self.assertEqual(MyJsonData.find_previous_month_json_parser('2023-11', code), (False, False))
+        self.assertEqual(param_store.previous_month(code, '2024-01'), '2023-12')
+
+    def test_find_file_in_paths_json_uses_store(self):
+        code = '000001'
+        old = os.path.join(self.root, '2023-11', 'json')
+        os.makedirs(old)
+        with open(os.path.join(old, f'{code}.json'), 'w', encoding='utf-8') as f:
+            json.dump({'DailyVolEma': 1}, f)
+
+        manifest_module.month_manifest.invalidate()
+        param_store.set('2023-12', code, 'DailyVolEma', 2)
+
+        files = sorted(Path(self.root).rglob('*.json'))
+        self.assertEqual(find_file_in_paths('2024-01', 'json', f'{code}.json'), ({'DailyVolEma': 2}, '2023-12'))
+        self.assertEqual(sorted(Path(self.root).rglob('*.json')), files)
+
+        self.assertEqual(find_file_in_paths('2023-12', 'json', f'{code}.json')[1], '2023-11')
+        self.assertEqual(find_file_in_paths('2023-11', 'json', f'{code}.json'), (False, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+股票池面板信号计算测试脚本
+
+在合成的股票池 (长度不同的 K 线、常数价格、只有一根 K 线、没有有效信号的股票) 上检查
+- SignalPanel 的 trend_MACD / trend_3ema_MACDBoll / ema3_MACDBoll 还原出的每只股票与 SignalMethod 逐位一致,
+  macd_boll 与 calculate_MACD + Bollinger 逐位一致;
+- latest() 为每只股票最新一根 K 线的数值
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.parsers.MacdParser import macd_, Signal, EndPrice
+from App.codes.parsers.BollingerParser import BollMid
+from App.codes.Signals.StatisticsMacd import SignalMethod
+from App.codes.Signals.MacdSignal import calculate_MACD
+from App.codes.Signals.BollingerSignal import Bollinger
+from App.codes.Signals.PanelSignals import SignalPanel
+
+
+def make_frame(rng, n: int, start='2024-01-02 09:45') -> pd.DataFrame:
+    """ 两位小数的随机游走 15m K 线 """
+    close = np.round(10 + np.cumsum(rng.standard_normal(n) * 0.05), 2)
+    high = close + np.round(rng.random(n) * 0.05, 2)
+    low = close - np.round(rng.random(n) * 0.05, 2)
+    return pd.DataFrame({'date': pd.date_range(start, periods=n, freq='15min'), 'open': close, 'close': close,
+                         'high': high, 'low': low, 'volume': np.round(rng.random(n) * 1e5), 'money': rng.random(n)})
+
+
+def make_pool(seed=0, stocks=60, bars=(1, 600)) -> dict:
+    rng = np.random.default_rng(seed)
+    frames = {f'{600000 + j}': make_frame(rng, int(rng.integers(*bars))) for j in range(stocks)}
+
+    constant = make_frame(rng, 200)
+    constant[['open', 'close', 'high', 'low']] = 10.0
+    frames['000001'] = constant
+    return frames
+
+
+class TestPanelSignals(unittest.TestCase):
+    """股票池面板信号计算测试类"""
+
+    def setUp(self):
+        self.frames = make_pool()
+
+    def test_matches_per_stock(self):
+        for method in ('trend_MACD', 'trend_3ema_MACDBoll', 'ema3_MACDBoll'):
+            panel = getattr(SignalPanel(self.frames), method)()
+            for code, frame in self.frames.items():
+                expected = getattr(SignalMethod, method)(frame.copy())
+                pd.testing.assert_frame_equal(expected, panel.frame(code), check_exact=True, obj=f'{method} {code}')
+
+    def test_macd_boll_matches_per_stock(self):
+        panel = SignalPanel(self.frames).macd_boll()
+        for code, frame in self.frames.items():
+            expected = Bollinger(calculate_MACD(frame.copy()))
+            pd.testing.assert_frame_equal(expected, panel.frame(code), check_exact=True, obj=code)
+
+    def test_short_histories(self):
+        # 没有信号、只有无效信号的股票都要覆盖到
+        frames = make_pool(1, stocks=120, bars=(1, 80))
+        panel = SignalPanel(frames).trend_3ema_MACDBoll()
+        self.assertTrue((~panel.has_raw_signal).any())
+        self.assertTrue((panel.has_raw_signal & ~panel.has_signal).any())
+
+        for code, frame in frames.items():
+            pd.testing.assert_frame_equal(SignalMethod.trend_3ema_MACDBoll(frame.copy()), panel.frame(code),
+                                          check_exact=True, obj=code)
+
+    def test_latest(self):
+        panel = SignalPanel(self.frames).trend_3ema_MACDBoll()
+        latest = panel.latest([macd_, Signal, EndPrice, BollMid])
+
+        self.assertEqual(list(self.frames), list(latest.index))
+        for code, frame in self.frames.items():
+            expected = SignalMethod.trend_3ema_MACDBoll(frame.copy()).iloc[-1]
+            for column in latest.columns:
+                self.assertTrue(np.array_equal(expected.get(column, np.nan), latest.loc[code, column], equal_nan=True),
+                                f'{code} {column}')
+
+
+if __name__ == '__main__':
+    unittest.main()
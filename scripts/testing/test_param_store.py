@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+参数存储测试脚本
+
+在临时目录中检查 ParamStore 的路径读写、嵌套合并、事务回滚、原 json 文件的导入导出,
+以及多个写进程同时更新同一股票不同参数时没有丢失更新、同时导出同一文件时不相互截断
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from pathlib import Path
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnDataFile.ParamStore import ParamStore, param_store
+from App.codes.utils.Normal import ReadSaveFile
+
+MONTH, CODE = '2024-01', '000001'
+
+
+def write_columns(worker: int, columns: int):
+    """ 写进程: 每个参数单独一个事务, 与 stand_save_parser 的写法相同 """
+    store = ParamStore()
+    for i in range(columns):
+        store.set(MONTH, CODE, f'TrainingData/dataDaily/w{worker}_c{i}', {'num_max': i + 1, 'num_min': i})
+
+
+class TestParamStore(unittest.TestCase):
+    """参数存储测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.root
+        self.store = ParamStore()
+
+    def tearDown(self):
+        StockDataPath.data_path = self.data_path
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_set_and_get_paths(self):
+        self.store.set(MONTH, CODE, 'TrainingData/dataDaily/volume', {'num_max': np.float64(2.5), 'num_min': 0})
+        self.store.set(MONTH, CODE, 'DailyVolEma', np.float32(10.5))
+
+        self.assertEqual(self.store.get(MONTH, CODE, 'TrainingData/dataDaily/volume/num_max'), 2.5)
+        self.assertEqual(self.store.get(MONTH, CODE, 'TrainingData/dataDaily'),
+                         {'volume': {'num_max': 2.5, 'num_min': 0}})
+        self.assertEqual(self.store.get(MONTH, CODE),
+                         {'TrainingData': {'dataDaily': {'volume': {'num_max': 2.5, 'num_min': 0}}},
+                          'DailyVolEma': 10.5})
+        self.assertIsNone(self.store.get(MONTH, '999999'))
+        self.assertEqual(self.store.get(MONTH, CODE, 'missing', default={}), {})
+
+    def test_set_replaces_subtree(self):
+        self.store.set(MONTH, CODE, 'a', {'b': 1, 'c': {'d': 2}})
+        self.store.set(MONTH, CODE, 'a/c', 3)
+        self.assertEqual(self.store.get(MONTH, CODE), {'a': {'b': 1, 'c': 3}})
+
+        self.store.set(MONTH, CODE, 'a/c/e', 4)
+        self.assertEqual(self.store.get(MONTH, CODE), {'a': {'b': 1, 'c': {'e': 4}}})
+
+    def test_paths_with_underscore_not_wildcards(self):
+        self.store.set(MONTH, CODE, 'x_y', 1)
+        self.store.set(MONTH, CODE, 'xay', {'z': 2})
+        self.store.set(MONTH, CODE, 'x_y', 5)
+
+        self.assertEqual(self.store.get(MONTH, CODE), {'xay': {'z': 2}, 'x_y': 5})
+
+    def test_update_merges_like_modify_nested_dict(self):
+        self.store.put_document(MONTH, CODE, {'TrainingData': {'data1m': {'startDate': 'a'}, 'EndSignal': 1}, 'k': 0})
+        self.store.update(MONTH, CODE, {'TrainingData': {'EndSignal': {'SignalName': 'x'}, 'StartSignal': 2}})
+
+        self.assertEqual(self.store.get(MONTH, CODE),
+                         {'TrainingData': {'data1m': {'startDate': 'a'}, 'EndSignal': {'SignalName': 'x'},
+                                           'StartSignal': 2}, 'k': 0})
+
+    def test_batch_rolls_back(self):
+        self.store.set(MONTH, CODE, 'a', 1)
+
+        with self.assertRaises(RuntimeError):
+            with self.store.batch():
+                self.store.set(MONTH, CODE, 'a', 2)
+                self.store.set(MONTH, CODE, 'b', 3)
+                raise RuntimeError
+
+        self.assertEqual(self.store.get(MONTH, CODE), {'a': 1})
+
+    def test_import_and_export_json(self):
+        path = StockDataPath.json_data_path(MONTH, CODE)
+        os.makedirs(os.path.dirname(path))
+        document = {'DailyVolEma': 3.5, 'TrainingData': {'dataDaily': {'volume': {'num_max': 9, 'num_min': 1}}}}
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+
+        # 第一次写入某个路径前导入其余参数
+        self.store.set(MONTH, CODE, 'TrainingData/dataDaily/volume/num_max', 10)
+        os.remove(path)
+
+        document['TrainingData']['dataDaily']['volume']['num_max'] = 10
+        self.assertEqual(self.store.get(MONTH, CODE), document)
+
+        self.assertEqual(self.store.export_json(MONTH), [path])
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), document)
+
+    def test_concurrent_exports_use_own_temp_files(self):
+        self.store.update(MONTH, CODE, {'DailyVolEma': 3.5, 'RecordEndSignal': 1})
+        path = StockDataPath.json_data_path(MONTH, CODE)
+
+        with ThreadPool(8) as pool:
+            results = pool.map(lambda _: self.store.export_json(MONTH, CODE), range(40))
+
+        self.assertEqual(results, [[path]] * 40)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'DailyVolEma': 3.5, 'RecordEndSignal': 1})
+
+    def test_read_save_file_uses_store(self):
+        ReadSaveFile.save_json({'RecordEndDate': '2024-01-02 15:00:00'}, MONTH, CODE)
+        param_store.update(MONTH, CODE, {'RecordEndSignal': 1})
+
+        self.assertEqual(ReadSaveFile.read_json(MONTH, CODE),
+                         {'RecordEndDate': '2024-01-02 15:00:00', 'RecordEndSignal': 1})
+        self.assertFalse(os.path.exists(StockDataPath.json_data_path(MONTH, CODE)))
+
+    def test_cache_invalidated_by_other_process(self):
+        self.store.set(MONTH, CODE, 'a', 1)
+        document = self.store.get(MONTH, CODE)
+        document['a'] = 100  # 调用方修改返回值不影响缓存
+
+        process = multiprocessing.Process(target=write_columns, args=(0, 1))
+        process.start()
+        process.join()
+
+        self.assertEqual(self.store.get(MONTH, CODE, 'a'), 1)
+        self.assertEqual(self.store.get(MONTH, CODE, 'TrainingData/dataDaily/w0_c0'), {'num_max': 1, 'num_min': 0})
+
+    def test_concurrent_writers_lose_nothing(self):
+        workers, columns = 4, 40
+        processes = [multiprocessing.Process(target=write_columns, args=(w, columns)) for w in range(workers)]
+
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+
+        self.assertEqual([p.exitcode for p in processes], [0] * workers)
+
+        daily = self.store.get(MONTH, CODE, 'TrainingData/dataDaily')
+        self.assertEqual(len(daily), workers * columns)
+        self.assertEqual(daily['w3_c39'], {'num_max': 40, 'num_min': 39})
+
+
+if __name__ == '__main__':
+    unittest.main()
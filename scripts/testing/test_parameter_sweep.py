@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+策略参数扫描测试脚本
+
+用 StrategyService 的 calculate_* / generate_*_signals / combine_signals / backtest_strategy 逐组计算作为参照,
+检查 ParameterSweep 的结果完全一致 (改动 indicators 中的公式后也一致)、共用窗口的指标只计算一次、多进程与单进程结果相同,
+以及 grid / random_sample 的组合和写入 StrategyPerformance 的记录
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from flask import Flask
+
+from App.exts import db
+from App.models.evaluation.performance_metrics import StrategyPerformance
+from App.services import parameter_sweep, indicators
+from App.services.parameter_sweep import ParameterSweep, IndicatorCache, grid, random_sample, strategy_label
+from App.services.strategy_service import StrategyService
+
+
+def make_prices(seed=0, n=800) -> pd.DataFrame:
+    """ 随机游走的日线收盘价 """
+    rng = np.random.default_rng(seed)
+    close = np.round(10 * np.exp(np.cumsum(rng.standard_normal(n) * 0.02)), 2)
+    return pd.DataFrame({'close': close}, index=pd.bdate_range('2020-01-01', periods=n))
+
+
+def service_reference(service: StrategyService, data: pd.DataFrame, params: dict, **settings) -> dict:
+    """ 按 StrategyService 原有流程逐组计算 """
+    result = service.calculate_macd(data, params['short_period'], params['mid_period'], params['long_period'],
+                                    params['signal_period'])
+    result = service.calculate_bollinger_bands(result, params['bb_period'], params['std_dev'])
+    result = service.calculate_rsi(result, params['rsi_period'])
+    result = service.generate_macd_signals(result)
+    result = service.generate_bollinger_signals(result)
+    result = service.generate_rsi_signals(result, params['oversold'], params['overbought'])
+    result = service.combine_signals(result, params['weights'])
+    return service.backtest_strategy(result, **settings)['performance']
+
+
+class TestParameterSweep(unittest.TestCase):
+    """策略参数扫描测试类"""
+
+    def setUp(self):
+        self.data = make_prices()
+        self.service = StrategyService()
+
+    def test_matches_service(self):
+        space = {'short_period': [8, 12], 'long_period': [26, 30], 'bb_period': [10, 20], 'std_dev': [1.5, 2.0],
+                 'rsi_period': [6, 14], 'oversold': [30, 40],
+                 'weights': [None, {'macd_signal': 0.6, 'bb_signal': 0.2, 'rsi_signal': 0.2}]}
+        combos = random_sample(space, 12, seed=0)
+        settings = {'initial_capital': 50000, 'fee_rate': 0.0003, 'slippage': 0.001}
+
+        results = ParameterSweep(self.data, **settings).run(combos)
+        self.assertEqual(len(combos), len(results))
+        for params, row in zip(combos, results.to_dict('records')):
+            expected = service_reference(self.service, self.data, params, **settings)
+            self.assertEqual(expected, {field: row[field] for field in expected})
+            self.assertEqual(params, {name: row[name] for name in params})
+
+    def test_follows_service_formula_changes(self):
+        # 扫描与 StrategyService 共用 indicators 中的公式, 公式改动后两者仍然一致
+        def rsi(close, period):
+            return close.rolling(window=period).apply(lambda window: (window.diff() > 0).mean() * 100, raw=False)
+
+        params = {**parameter_sweep.DEFAULT_PARAMS, 'oversold': 40, 'overbought': 60}
+        with mock.patch.object(indicators, 'rsi', side_effect=rsi):
+            expected = service_reference(self.service, self.data, params)
+            row = ParameterSweep(self.data).run([params]).to_dict('records')[0]
+
+        self.assertEqual(expected, {field: row[field] for field in expected})
+        self.assertNotEqual(expected, service_reference(self.service, self.data, params))
+
+    def test_cache_hits(self):
+        combos = grid({'short_period': [8, 12], 'mid_period': [20, 26], 'long_period': [26, 30],
+                       'std_dev': [1.5, 2.0]})
+        sweep = ParameterSweep(self.data)
+        sweep.run(combos)
+
+        # EMA 8/12/26/30 四条, MACD 信号 (中期周期不参与) 4 份, 均值、标准差各 1 条, 布林带信号 2 份,
+        # RSI 与 RSI 信号各 1 份
+        self.assertEqual(4 + 4 + 2 + 2 + 2, sweep.misses)
+        self.assertEqual(len(sweep.cache), sweep.misses)
+        self.assertEqual(len(combos) * 3 + 4 * 2 + 2 * 2 + 1 - sweep.misses, sweep.hits)
+
+        # 再次扫描全部命中
+        misses, hits = sweep.misses, sweep.hits
+        sweep.run(combos)
+        self.assertEqual(misses, sweep.misses)
+        self.assertEqual(hits + len(combos) * 3, sweep.hits)
+
+        # 不同的收盘价不共用缓存
+        cache = IndicatorCache()
+        other = make_prices(1)['close']
+        parameter_sweep.evaluate(self.data['close'], combos[0], cache)
+        parameter_sweep.evaluate(other, combos[0], cache)
+        self.assertEqual(0, cache.hits)
+
+    def test_workers(self):
+        combos = grid({'short_period': [8, 12], 'long_period': [26, 30], 'rsi_period': [6, 14]})
+        single = ParameterSweep(self.data).run(combos)
+        sweep = ParameterSweep(self.data, workers=3)
+        pd.testing.assert_frame_equal(single, sweep.run(combos))
+        self.assertGreater(sweep.hits, 0)
+
+    def test_grid_and_random_sample(self):
+        space = {'short_period': [8, 10, 12], 'bb_period': [10, 20], 'oversold': [20, 25, 30]}
+        combos = grid(space)
+        self.assertEqual(18, len(combos))
+        self.assertEqual({**parameter_sweep.DEFAULT_PARAMS, 'short_period': 8, 'bb_period': 10, 'oversold': 20},
+                         combos[0])
+
+        sample = random_sample(space, 7, seed=1)
+        self.assertEqual(7, len(sample))
+        self.assertEqual(sample, random_sample(space, 7, seed=1))
+        positions = [combos.index(params) for params in sample]
+        self.assertEqual(sorted(set(positions)), positions)
+        self.assertEqual(combos, random_sample(space, 100))
+
+        # 不展开整个网格
+        huge = {name: list(range(100)) for name in ('short_period', 'long_period', 'bb_period', 'rsi_period',
+                                                    'oversold', 'overbought')}
+        self.assertEqual(5, len(random_sample(huge, 5, seed=2)))
+
+        with self.assertRaises(ValueError):
+            grid({'period': [1]})
+        with self.assertRaises(ValueError):
+            ParameterSweep(self.data[[]])
+
+    def test_save(self):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_BINDS={'quanttradingsystem': 'sqlite://'})
+        db.init_app(app)
+
+        combos = grid({'short_period': [8, 12], 'weights': [None, {'macd_signal': 1.0}]})
+        sweep = ParameterSweep(self.data)
+        results = sweep.run(combos)
+
+        with app.app_context():
+            StrategyPerformance.__table__.create(db.engines['quanttradingsystem'])
+            self.assertEqual(4, sweep.save(results, 'sweep', '000001'))
+            self.assertEqual(4, sweep.save(results, 'sweep', '000001'))  # 同一组参数更新原记录
+
+            rows = StrategyPerformance.query.order_by(StrategyPerformance.id).all()
+            self.assertEqual(4, len(rows))
+            self.assertEqual(strategy_label('sweep', combos[1]), rows[1].strategy_name)
+            self.assertEqual(results['total_return'][1], rows[1].total_return)
+            self.assertEqual(results['win_rate'][1], rows[1].win_rate)
+            self.assertEqual(self.data.index[0].date(), rows[0].start_date)
+            self.assertEqual(self.data.index[-1].date(), rows[0].end_date)
+
+    def test_strategy_label(self):
+        params = dict(parameter_sweep.DEFAULT_PARAMS)
+        self.assertEqual('macd_m12.20.30.9_b20.2.0_r14.30.70', strategy_label('macd', params))
+
+        weighted = {**params, 'weights': {'macd_signal': 1.0}}
+        self.assertNotEqual(strategy_label('macd', params), strategy_label('macd', weighted))
+
+        long_name = strategy_label('a_very_long_strategy_name_for_sweeps', weighted)
+        self.assertLessEqual(len(long_name), 50)
+        self.assertNotEqual(long_name, strategy_label('a_very_long_strategy_name_for_sweeps', params))
+
+
+if __name__ == '__main__':
+    unittest.main()
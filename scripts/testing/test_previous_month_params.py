@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+上月参数沿用测试脚本
+
+TrainingDataCalculate.stand_save_parser 的上下限和 TrainingDataCalculate / Data15MOriginalCalculate
+的最大日均量都与上个月保存的参数比较。参数保存在 ParamStore 中, 检查连续两个月计算时
+- 第二个月沿用第一个月更宽的上下限;
+- 第二个月沿用第一个月更大的 DailyVolEma;
+- 没有上个月参数时只用本月数据
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import warnings
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.parsers.RnnParser import *
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnDataFile.MonthManifest import month_manifest
+from App.codes.RnnDataFile.ParamStore import param_store
+from App.codes.RnnModel import RnnCreationData, Data15MOriginal
+from App.codes.RnnModel.RnnCreationData import TrainingDataCalculate
+from App.codes.RnnModel.Data15MOriginal import Data15MOriginalCalculate
+from test_incremental_15m import make_1m
+
+CODE = '000001'
+
+
+class TestPreviousMonthParams(unittest.TestCase):
+    """上月参数沿用测试类"""
+
+    def setUp(self):
+        warnings.simplefilter('ignore')
+        self.root = tempfile.mkdtemp()
+
+        self.data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.root
+        os.makedirs(os.path.join(StockDataPath.rnnData_folder_path(), 'CommonFile'))
+        month_manifest.invalidate()
+
+        for module in (RnnCreationData, Data15MOriginal):
+            patch = mock.patch.object(module, 'Stocks', return_value=('平安银行', CODE, 1))
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        StockDataPath.data_path = self.data_path
+        month_manifest.invalidate()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_stand_save_parser_carries_bounds(self):
+        rng = np.random.default_rng(0)
+        wide = pd.DataFrame({'volume': rng.uniform(0, 1000, 500)})
+        narrow = pd.DataFrame({'volume': rng.uniform(200, 600, 500)})
+
+        TrainingDataCalculate(CODE, '2024-01', '2023-01-01').stand_save_parser(wide, 'volume', False, None)
+        bounds = param_store.get('2024-01', CODE, 'volume')
+        self.assertLess(bounds['num_min'], narrow['volume'].min())
+        self.assertGreater(bounds['num_max'], narrow['volume'].max())
+
+        expected = (narrow['volume'] - bounds['num_min']) / (bounds['num_max'] - bounds['num_min'])
+        out = TrainingDataCalculate(CODE, '2024-02', '2023-01-01').stand_save_parser(narrow.copy(), 'volume',
+                                                                                     False, None)
+
+        self.assertEqual(param_store.get('2024-02', CODE, 'volume'), bounds)
+        np.testing.assert_allclose(out['volume'], expected)
+
+    def test_daily_volume_max_carries_over(self):
+        first = TrainingDataCalculate(CODE, '2024-01', '2023-01-01')
+        first.data_1m = make_1m(120, volume_scale=20)
+        first._process_daily_data()
+
+        # 没有上个月参数时只用本月数据
+        expected = make_1m(120, volume_scale=20)
+        expected = expected.groupby(expected['date'].dt.date)['volume'].sum().rolling(90, min_periods=1).mean()
+        self.assertAlmostEqual(first.daily_volume_max, round(expected.max(), 2))
+
+        # column_stand 保存的最大日均量
+        param_store.set(first.month, CODE, DailyVolEma, first.daily_volume_max)
+
+        for cls in (TrainingDataCalculate, Data15MOriginalCalculate):
+            host = cls(CODE, '2024-02', '2023-01-01')
+            host.data_1m = make_1m(120)
+            daily = host._process_daily_data()
+
+            self.assertEqual(host.daily_volume_max, first.daily_volume_max, cls.__name__)
+            self.assertGreater(daily[DailyVolEmaParser].min(), 1, cls.__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
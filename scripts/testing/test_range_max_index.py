@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+1分钟成交量区间最大值索引测试脚本
+
+用原逐行扫描的实现作为参照, 在合成的 1m 数据 (含 NaN 成交量、缺失的分钟、乱序行) 上检查
+- RangeMaxIndex 的区间最大值与逐个区间求 max 一致;
+- Volume1mIndex.top_mean 的 'last' / 'skip' 口径分别与 sort_values().tail(num).mean() / nlargest(num).mean() 一致;
+- ProcessTrainingData.find_bar_max_1m / bar_max_1m 与原实现一致;
+- StatisticsMACD.find_Bar1mMax / s_BarMax1mVolume 与原实现一致 (空窗口为 0)
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.parsers.MacdParser import Cycle1mVolMax1, Cycle1mVolMax5
+from App.codes.Signals.RangeMaxIndex import RangeMaxIndex, Volume1mIndex
+from App.codes.Signals.StatisticsMacd import StatisticsMACD
+from App.codes.RnnModel.ProcessTrainingData import TrainingDataCalculate
+
+
+def make_1m(seed=0, days=5) -> pd.DataFrame:
+    """ 每天 240 根 1m K 线, 随机去掉一些分钟、置空一些成交量, 并打乱行序 """
+    rng = np.random.default_rng(seed)
+    minutes = np.concatenate([np.arange(571, 691), np.arange(781, 901)])  # 09:31-11:30, 13:01-15:00
+    dates = pd.DatetimeIndex([pd.Timestamp('2024-03-04') + pd.Timedelta(days=d, minutes=int(m))
+                              for d in range(days) for m in minutes])
+
+    volume = np.round(rng.lognormal(8, 1, len(dates)))
+    volume[rng.random(len(dates)) < 0.08] = np.nan
+    volume[100:115] = np.nan  # 整个 15 分钟窗口都是 NaN
+    volume[300:310] = 5000.0  # 相同的成交量
+
+    data = pd.DataFrame({'date': dates, 'volume': volume})
+    data = data.drop(index=rng.choice(len(data), len(data) // 20, replace=False))
+    data = data.drop(index=range(480, 520), errors='ignore')  # 一段连续缺失
+    return data.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def make_15m_dates(data_1m) -> pd.Series:
+    """ 每 15 分钟的 K 线时间, 加上几个不在整点上的时间和 1m 数据范围之外的时间 """
+    first, last = data_1m['date'].min().normalize(), data_1m['date'].max().normalize()
+    grid = pd.date_range(first, last + pd.Timedelta(days=1), freq='15min')
+    grid = grid[((grid.hour >= 9) & (grid.hour <= 15))]
+    extra = pd.to_datetime(['2024-03-04 10:07:00', '2024-03-05 13:00:00', '2024-02-01 10:00:00'])
+    return pd.Series(grid.append(extra))
+
+
+def tail_reference(data_1m, x, num):
+    """ 原 ProcessTrainingData / RnnCreationData / RnnRunModel 的逐行实现 """
+    st, ed = pd.to_datetime(x) + pd.Timedelta(minutes=-15), pd.to_datetime(x)
+    vol = data_1m[(data_1m['date'] > st) & (data_1m['date'] < ed)]
+    return vol.sort_values(by=['volume'])['volume'].tail(num).mean()
+
+
+def nlargest_reference(data_1m, x, num):
+    """ 原 Data15MOriginal.find_bar_max_1m 的逐行实现 """
+    st, ed = pd.to_datetime(x) + pd.Timedelta(minutes=-15), pd.to_datetime(x)
+    vol = data_1m[(data_1m['date'] > st) & (data_1m['date'] < ed)]
+    return vol.nlargest(num, 'volume')['volume'].mean()
+
+
+def find_bar1m_max_reference(x, num, data1m):
+    """ 原 StatisticsMACD.find_Bar1mMax 的逐行实现 """
+    st, ed = pd.to_datetime(x) + pd.Timedelta(minutes=-15), pd.to_datetime(x)
+    filtered_data = data1m[(data1m['date'] > st) & (data1m['date'] <= ed)]
+    if filtered_data.empty:
+        return 0
+    return filtered_data['volume'].nlargest(num).mean()
+
+
+def truncate(value):
+    return None if pd.isna(value) else int(value)
+
+
+class TestRangeMaxIndex(unittest.TestCase):
+    """1分钟成交量区间最大值索引测试类"""
+
+    def setUp(self):
+        self.data_1m = make_1m()
+        self.dates = make_15m_dates(self.data_1m)
+
+    def assert_same(self, expected, actual):
+        self.assertTrue(np.array_equal(np.asarray(expected, dtype=float), np.asarray(actual, dtype=float),
+                                       equal_nan=True))
+
+    def test_sparse_table(self):
+        rng = np.random.default_rng(1)
+        for n in (1, 2, 7, 64, 1000):
+            values = rng.standard_normal(n)
+            values[rng.random(n) < 0.2] = np.nan
+            index = RangeMaxIndex(values)
+
+            lo = rng.integers(0, n + 1, 500)
+            hi = np.minimum(lo + rng.integers(0, n + 1, 500), n)
+            expected = [np.nan if np.isnan(values[a:b]).all() else np.nanmax(values[a:b]) for a, b in zip(lo, hi)]
+            self.assert_same(expected, index.query(lo, hi))
+
+    def test_top_mean(self):
+        index = Volume1mIndex.from_frame(self.data_1m)
+        for num in (1, 3, 5):
+            last = [tail_reference(self.data_1m, x, num) for x in self.dates]
+            skip = [nlargest_reference(self.data_1m, x, num) for x in self.dates]
+
+            self.assert_same(last, index.top_mean(self.dates, num, nan_policy='last'))
+            self.assert_same(skip, index.top_mean(self.dates, num, nan_policy='skip'))
+
+        with self.assertRaises(ValueError):
+            index.top_mean(self.dates, 1, nan_policy='drop')
+
+    def test_process_training_data(self):
+        calculate = object.__new__(TrainingDataCalculate)
+        calculate.data_1m = self.data_1m
+
+        for num in (1, 5):
+            expected = [truncate(tail_reference(self.data_1m, x, num)) for x in self.dates]
+            self.assertEqual(expected, [calculate.find_bar_max_1m(x, num) for x in self.dates])
+            self.assert_same([np.nan if v is None else v for v in expected], calculate.bar_max_1m(self.dates, num))
+
+        # 换成新的 1m 数据后索引重建
+        calculate.data_1m = make_1m(seed=2)
+        expected = [truncate(tail_reference(calculate.data_1m, x, 5)) for x in self.dates]
+        self.assertEqual(expected, [calculate.find_bar_max_1m(x, 5) for x in self.dates])
+
+        # 同一轮共用传入的索引; 不传时按当前 1m 数据现建, 原地修改 (行数不变) 后的结果随之变化
+        index = Volume1mIndex.from_frame(calculate.data_1m)
+        self.assert_same(calculate.bar_max_1m(self.dates, 5), calculate.bar_max_1m(self.dates, 5, index))
+
+        calculate.data_1m['volume'] *= 2
+        expected = [truncate(tail_reference(calculate.data_1m, x, 5)) for x in self.dates]
+        self.assertEqual(expected, [calculate.find_bar_max_1m(x, 5) for x in self.dates])
+        self.assertFalse(hasattr(calculate, '_volume_1m_index'))
+        self.assertFalse(hasattr(Volume1mIndex, 'cached'))
+
+    def test_statistics_macd(self):
+        for num in (1, 5):
+            expected = [find_bar1m_max_reference(x, num, self.data_1m) for x in self.dates]
+            actual = [StatisticsMACD.find_Bar1mMax(x, num, self.data_1m) for x in self.dates]
+            self.assert_same(expected, actual)
+
+        index = Volume1mIndex.from_frame(self.data_1m)
+        actual = [StatisticsMACD.find_Bar1mMax(x, 5, self.data_1m, index) for x in self.dates]
+        self.assert_same([find_bar1m_max_reference(x, 5, self.data_1m) for x in self.dates], actual)
+
+        data = pd.DataFrame({'date': self.dates})
+        result = StatisticsMACD.s_BarMax1mVolume(data, self.data_1m)
+        self.assert_same([find_bar1m_max_reference(x, 1, self.data_1m) for x in self.dates], result[Cycle1mVolMax1])
+        self.assert_same([find_bar1m_max_reference(x, 5, self.data_1m) for x in self.dates], result[Cycle1mVolMax5])
+
+        # 不在类上缓存 1m 数据, 原地修改 (行数不变) 后的结果随之变化
+        self.assertFalse(hasattr(StatisticsMACD, '_volume_1m_index'))
+        self.data_1m['volume'] *= 2
+        result = StatisticsMACD.s_BarMax1mVolume(data, self.data_1m)
+        self.assert_same([find_bar1m_max_reference(x, 1, self.data_1m) for x in self.dates], result[Cycle1mVolMax1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+多频率重采样测试脚本
+
+用原来的 resample_fun / _split_and_resample_60m / _split_and_resample_120m / _resample_to_daily 作为参照,
+在合成的 1m 数据 (含空值、缺失的分钟、集合竞价和 13:00 的 K 线、带秒的时间、0 点附近的数据) 上检查
+ResampleData.resample_1m_multi 与 resample_1m_data 的结果一致
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import warnings
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.utils.Normal import ResampleData
+
+
+def make_1m(seed=0, days=20, integer_volume=False) -> pd.DataFrame:
+    """ 交易时段内的 1m K 线, 加上 09:25 集合竞价、13:00 和若干非交易时段的数据 """
+    rng = np.random.default_rng(seed)
+    minutes = np.concatenate([[565, 570], np.arange(571, 691), np.arange(780, 901)])
+    business = pd.bdate_range('2024-01-02', periods=days)
+    dates = (business.values[:, None] + minutes[None, :] * np.timedelta64(1, 'm')).ravel()
+
+    n = len(dates)
+    close = np.round(10 + np.cumsum(rng.standard_normal(n) * 0.01), 2)
+    volume = rng.integers(0, 100000, n)
+    data = pd.DataFrame({'date': dates, 'open': close + 0.01, 'close': close, 'high': close + 0.02,
+                         'low': close - 0.02, 'volume': volume if integer_volume else volume.astype(float),
+                         'money': np.round(rng.random(n) * 1e6, 2)})
+
+    data.loc[rng.random(n) < 0.05, ['open', 'close']] = np.nan
+    data.loc[rng.random(n) < 0.02, 'high'] = np.nan
+    data.loc[240:300, ['open', 'close', 'high', 'low']] = np.nan  # 整根 15m、60m 都是空值
+    data = data.drop(index=rng.choice(n, n // 10, replace=False))
+
+    extra = pd.DataFrame({'date': pd.to_datetime(['2024-01-02 11:30:30', '2024-01-03 09:30:30',
+                                                  '2024-01-03 23:50:00', '2024-01-04 00:00:00',
+                                                  '2024-01-06 10:00:00']),
+                          'open': 10.0, 'close': 10.0, 'high': 10.5, 'low': 9.5, 'volume': 100, 'money': 1000.0})
+    if not integer_volume:
+        extra['volume'] = extra['volume'].astype(float)
+
+    return pd.concat([data, extra]).sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def reference(data: pd.DataFrame) -> dict:
+    """ 原来的逐频率实现 (会修改传入的数据, 每次传入副本) """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        return {
+            '15m': ResampleData.resample_fun(data.copy(), parameter='15T'),
+            '30m': ResampleData.resample_fun(data.copy(), parameter='30T'),
+            '60m': ResampleData._split_and_resample_60m(data.copy()),
+            '120m': ResampleData._split_and_resample_120m(data.copy()),
+            'day': ResampleData._resample_to_daily(data.copy()),
+        }
+
+
+class TestResampleMulti(unittest.TestCase):
+    """多频率重采样测试类"""
+
+    def assert_frame_same(self, expected, actual):
+        expected = expected.reset_index(drop=True)
+        self.assertEqual(list(expected.columns), list(actual.columns))
+        self.assertEqual(len(expected), len(actual))
+
+        for column in expected.columns:
+            self.assertEqual(expected[column].dtype, actual[column].dtype, column)
+            if column in ('volume', 'money'):
+                # 先按桶求和再合并, 与逐行求和只差舍入误差
+                np.testing.assert_allclose(expected[column].to_numpy(float), actual[column].to_numpy(float),
+                                           rtol=1e-12, err_msg=column)
+            else:
+                self.assertTrue(expected[column].equals(actual[column]), column)
+
+    def test_matches_reference(self):
+        for seed, integer_volume in ((0, False), (1, True)):
+            data = make_1m(seed, integer_volume=integer_volume)
+            expected = reference(data)
+            result = ResampleData.resample_1m_multi(data)
+
+            for freq in expected:
+                self.assert_frame_same(expected[freq], result[freq])
+
+    def test_resample_1m_data(self):
+        data = make_1m(2)
+        expected = reference(data)
+        original = data.copy()
+
+        for freq, name in (('15m', '15m'), ('30m', '30m'), ('60m', '60m'), ('120m', '120m'),
+                           ('day', 'day'), ('daily', 'day'), ('d', 'day'), ('D', 'day')):
+            self.assert_frame_same(expected[name], ResampleData.resample_1m_data(data, freq))
+
+        # 不修改传入的数据
+        pd.testing.assert_frame_equal(original, data)
+
+        with self.assertRaises(ValueError):
+            ResampleData.resample_1m_data(data, '5m')
+
+    def test_unsorted_and_string_dates(self):
+        data = make_1m(3, days=5)
+        expected = ResampleData.resample_1m_multi(data)
+
+        shuffled = data.sample(frac=1, random_state=0).reset_index(drop=True)
+        shuffled['date'] = shuffled['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        result = ResampleData.resample_1m_multi(shuffled, ('15m', '60m', '120m'))
+
+        for freq in result:
+            self.assert_frame_same(expected[freq], result[freq])
+
+    def test_empty(self):
+        result = ResampleData.resample_1m_multi(make_1m(4).iloc[:0])
+        for freq, frame in result.items():
+            self.assertTrue(frame.empty, freq)
+            self.assertEqual(['date', 'open', 'close', 'high', 'low', 'volume', 'money'], list(frame.columns))
+
+
+if __name__ == '__main__':
+    unittest.main()
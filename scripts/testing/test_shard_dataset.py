@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+训练数据流式读取测试脚本
+
+在临时目录中写入多个 (x, y) 分片, 检查 ShardDataset:
+- 每轮恰好读取每个样本一次, x 与 y 对应, 固定 seed 时可复现且各轮顺序不同;
+- split 的划分与原 train_model 的前 80% / 后 20% 一致;
+- 提前结束迭代时后台预取线程退出, 读取错误传递给训练方;
+- 可直接作为 Keras model.fit 的输入 (CPU)
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.RnnModel.ShardDataset import ShardDataset, train_data_shards
+
+MONTH, MODEL = '2024-01', 'CycleLength4'
+
+
+def write_shards(sizes, seed=0) -> list:
+    """ 每个样本 x 的第一个元素为全局编号, y 为编号 * 2 """
+    rng = np.random.default_rng(seed)
+    shards, offset = [], 0
+
+    for i, n in enumerate(sizes):
+        code = f'{i:06d}'
+        x = rng.standard_normal((n, 30, 30, 1)).astype('float32')
+        x[:, 0, 0, 0] = np.arange(offset, offset + n)
+        y = (x[:, 0, 0, 0] * 2).reshape(-1, 1)
+
+        path_x = StockDataPath.train_data_path(MONTH, f'{MODEL}_{code}_x.npy')
+        path_y = StockDataPath.train_data_path(MONTH, f'{MODEL}_{code}_y.npy')
+        os.makedirs(os.path.dirname(path_x), exist_ok=True)
+        np.save(path_x, x)
+        np.save(path_y, y)
+
+        shards.append(code)
+        offset += n
+
+    return shards
+
+
+def ids(batches) -> list:
+    return [int(v) for x, _ in batches for v in x[:, 0, 0, 0]]
+
+
+class TestShardDataset(unittest.TestCase):
+    """训练数据流式读取测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.root
+        self.codes = write_shards([37, 5, 58])
+
+    def tearDown(self):
+        StockDataPath.data_path = self.data_path
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def dataset(self, **kwargs):
+        return ShardDataset.from_stocks(MONTH, MODEL, self.codes + ['999999'], **kwargs)
+
+    def test_epoch_covers_every_sample_once(self):
+        dataset = self.dataset(batch_size=16, seed=1)
+        self.assertEqual((dataset.samples, len(dataset)), (100, 7))
+
+        first = list(dataset.iterate())
+        for x, y in first:
+            self.assertEqual(x.shape[1:], (30, 30, 1))
+            np.testing.assert_array_equal(y[:, 0], x[:, 0, 0, 0] * 2)
+
+        self.assertEqual(sorted(ids(first)), list(range(100)))
+
+        second = ids(dataset.iterate())
+        self.assertNotEqual(ids(first), second)
+        self.assertEqual(sorted(second), list(range(100)))
+
+        again = self.dataset(batch_size=16, seed=1, prefetch=0)
+        self.assertEqual(ids(again.iterate()), ids(first))
+        self.assertEqual(dataset.report()['batches'], 14)
+
+    def test_split_matches_train_model(self):
+        train, test = self.dataset(batch_size=8, shuffle=False).split(0.8, test_batch_size=4)
+
+        expected_train, expected_test, offset = [], [], 0
+        for n in (37, 5, 58):
+            cut = int(n * 0.8)
+            expected_train += list(range(offset, offset + cut))
+            expected_test += list(range(offset + cut, offset + n))
+            offset += n
+
+        self.assertEqual(ids(train.iterate()), expected_train)
+        self.assertEqual(ids(test.iterate()), expected_test)
+        self.assertTrue(all(len(x) <= 4 for x, _ in test.iterate()))
+
+    def test_prefetch_thread_stops_early(self):
+        before = threading.active_count()
+        batches = self.dataset(batch_size=4, prefetch=2).repeat()
+
+        for _ in range(60):
+            next(batches)
+
+        batches.close()
+        self.assertEqual(threading.active_count(), before)
+
+    def test_read_error_raised_to_consumer(self):
+        dataset = self.dataset(batch_size=10)
+        dataset._arrays[0] = (None, None)
+
+        with self.assertRaises(AttributeError):
+            list(dataset.iterate())
+
+    def test_keras_fit_on_cpu(self):
+        os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+        import keras
+
+        train, test = self.dataset(batch_size=10, seed=0).split()
+        model = keras.Sequential([keras.Input((30, 30, 1)), keras.layers.Flatten(), keras.layers.Dense(1)])
+        model.compile(loss='mean_squared_error', optimizer='adam')
+
+        model.fit(train.repeat(), steps_per_epoch=len(train), epochs=2, verbose=0)
+        loss = model.evaluate(test.iterate(), steps=len(test), verbose=0)
+
+        self.assertTrue(np.isfinite(loss))
+        self.assertGreaterEqual(train.report()['samples'], 2 * train.samples)
+        self.assertEqual(len(train_data_shards(MONTH, MODEL, ['999999'])), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+进程内股票目录测试脚本
+
+使用 SQLite 代替 stock_basic_information 库, 检查 StockDirectory 按名称 / 代码 / id 的查找结果
+与原 Stocks 整表过滤实现一致, 以及版本变化、ttl 和强制刷新时的失效逻辑
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.MySql.StockDirectory import StockDirectory
+from App.codes.utils.Normal import StockCode
+
+# LoadMysql / StockDirectory 通过 MySql 目录下的模块名导入 DB_MySql
+import DB_MySql
+import sql_utils
+from DB_MySql import EngineRegistry, MysqlAlchemy, execute_sql
+from LoadMysql import LoadBasicInform
+
+
+def make_minute(n: int) -> pd.DataFrame:
+    return pd.DataFrame({'id': range(1, n + 1),
+                         'name': [f'股票{i}' for i in range(n)],
+                         'code': [f'{i * 7 % 1000000:06d}' for i in range(n)],
+                         'EndDate': pd.Timestamp('2024-01-02')})
+
+
+def reference_stocks(stock):
+    """ 原 sql_utils.Stocks: 每次整表读取后过滤 """
+    tables = LoadBasicInform.load_minute()
+
+    for column, key in (('name', stock), ('code', StockCode.stand_code(stock)), ('id', stock)):
+        rows = tables[tables[column] == key]
+        if len(rows):
+            return rows.iloc[0]['name'], rows.iloc[0]['code'], rows.iloc[0]['id']
+
+    return None, None, None
+
+
+class TestStockDirectory(unittest.TestCase):
+    """股票目录测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.registry = EngineRegistry(url_factory=lambda db: f'sqlite:///{Path(self.root) / db}.db')
+        self.patcher = mock.patch.object(DB_MySql, 'registry', self.registry)
+        self.patcher.start()
+
+        MysqlAlchemy.pd_replace(make_minute(50), LoadBasicInform.db_basic, LoadBasicInform.tb_minute)
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.registry.dispose()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def insert(self, id_, name, code):
+        execute_sql(LoadBasicInform.db_basic, f'INSERT INTO {LoadBasicInform.tb_minute} (id, name, code) '
+                                              f"VALUES ({id_}, '{name}', '{code}')")
+
+    def test_matches_reference(self):
+        directory = StockDirectory()
+        # 名称、标准代码、不足 6 位的代码、整数 id, 以及找不到的情况
+        for stock in ['股票3', '000021', '21', 7, 49, '不存在', 10 ** 9]:
+            self.assertEqual(directory.lookup(stock), reference_stocks(stock), stock)
+
+        self.assertEqual(len(directory), 50)
+        self.assertEqual(directory.loads, 1)
+
+    def test_duplicate_rows_take_first(self):
+        self.insert(51, '股票3', '999999')
+        self.assertEqual(StockDirectory().lookup('股票3'), reference_stocks('股票3'))
+
+    def test_version_change_reloads(self):
+        directory = StockDirectory(ttl=None)
+        self.assertEqual(directory.lookup('新股'), (None, None, None))
+
+        self.insert(51, '新股', '688001')
+        self.assertEqual(directory.lookup('新股'), (None, None, None))  # 未刷新, 使用旧快照
+
+        self.assertTrue(directory.refresh())
+        self.assertEqual(directory.lookup('新股'), ('新股', '688001', 51))
+        self.assertFalse(directory.refresh())  # 版本未变化, 不重新加载
+        self.assertEqual(directory.loads, 2)
+
+    def test_ttl_checks_version(self):
+        directory = StockDirectory(ttl=0)
+        directory.lookup('股票1')
+
+        self.insert(51, '新股', '688001')
+        self.assertEqual(directory.lookup('688001'), ('新股', '688001', 51))
+
+        directory.lookup('股票1')
+        self.assertEqual(directory.loads, 2)
+        self.assertEqual(directory.checks, 3)
+
+    def test_force_refresh_after_in_place_update(self):
+        directory = StockDirectory(ttl=None)
+        directory.lookup('股票1')
+
+        # 原地改名, 行数和最大 id 不变
+        execute_sql(LoadBasicInform.db_basic, f"UPDATE {LoadBasicInform.tb_minute} SET name = '改名' WHERE id = 2")
+        self.assertFalse(directory.refresh())
+        self.assertEqual(directory.lookup('改名'), (None, None, None))
+
+        self.assertTrue(directory.refresh(force=True))
+        self.assertEqual(directory.lookup('改名'), ('改名', '000007', 2))
+
+    def test_stocks_uses_directory(self):
+        directory = StockDirectory()
+        with mock.patch.object(sql_utils, 'stock_directory', directory):
+            self.assertEqual(sql_utils.Stocks('股票5'), reference_stocks('股票5'))
+            sql_utils.Stocks('股票6')
+
+        self.assertEqual(directory.loads, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+MACD / 布林线流式计算测试脚本
+
+在合成的 15m 收盘价 (含 NaN、连续相同价格和负数) 上检查
+- StreamingMACD / StreamingBollinger 与 calculate_MACD / Bollinger 逐位一致;
+- RollingMean / RollingVar 在窗口为 1、2 等边界情况下与 pandas 一致;
+- snapshot 经 JSON 往返后 restore, 继续计算的结果不变;
+- revise 修改最后一根 K 线等价于直接用新收盘价计算
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import json
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.Signals.MacdSignal import calculate_MACD
+from App.codes.Signals.BollingerSignal import Bollinger
+from App.codes.Signals.StreamingIndicators import StreamingMACD, StreamingBollinger, RollingMean, RollingVar
+
+
+def make_closes(seed=0, n=2000, offset=10.0) -> np.ndarray:
+    """ 两位小数的随机游走, 含零星 NaN 和一段不变的价格 """
+    rng = np.random.default_rng(seed)
+    close = np.round(offset + np.cumsum(rng.standard_normal(n) * 0.05), 2)
+    close[rng.integers(0, n, n // 100)] = np.nan
+    close[n // 6: n // 6 + 40] = close[n // 6]
+    return close
+
+
+def assert_identical(test, expected, actual):
+    for name, values in actual.items():
+        test.assertTrue(np.array_equal(np.asarray(expected[name], dtype=float), values, equal_nan=True), name)
+
+
+def streaming(closes) -> dict:
+    result = StreamingMACD().run(closes)
+    result.update(StreamingBollinger().run(closes))
+    return result
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    """MACD / 布林线流式计算测试类"""
+
+    def test_matches_batch(self):
+        for seed, offset in ((0, 10.0), (1, 0.3), (2, 25.0)):
+            closes = make_closes(seed, offset=offset)
+            batch = Bollinger(calculate_MACD(pd.DataFrame({'close': closes})))
+            assert_identical(self, batch, streaming(closes))
+
+    def test_rolling_windows(self):
+        rng = np.random.default_rng(3)
+        values = rng.standard_normal(300)
+        values[::7] = np.nan
+        values[50:60] = -1.5
+
+        for window in (1, 2, 5, 30):
+            mean, var = RollingMean(window), RollingVar(window)
+            series = pd.Series(values).rolling(window, min_periods=1)
+
+            self.assertTrue(np.array_equal([mean.update(v) for v in values], series.mean(), equal_nan=True))
+            self.assertTrue(np.array_equal([var.update(v) for v in values], series.var(), equal_nan=True))
+
+    def test_snapshot_restore(self):
+        closes = make_closes(4, n=500)
+        expected = streaming(closes)
+
+        macd, boll = StreamingMACD(), StreamingBollinger()
+        macd.run(closes[:321])
+        boll.run(closes[:321])
+
+        state = json.loads(json.dumps({'macd': macd.snapshot(), 'boll': boll.snapshot()}))
+        macd, boll = StreamingMACD().restore(state['macd']), StreamingBollinger().restore(state['boll'])
+
+        rest = macd.run(closes[321:])
+        rest.update(boll.run(closes[321:]))
+        assert_identical(self, {k: v[321:] for k, v in expected.items()}, rest)
+
+    def test_revise_last_bar(self):
+        closes = make_closes(5, n=200)
+        expected = StreamingMACD().run(closes)
+
+        macd = StreamingMACD()
+        for close in closes[:-1]:
+            macd.update(close)
+        macd.update(closes[-1] + 0.37)
+        macd.revise(closes[-1] + 0.1)
+        last = macd.revise(closes[-1])
+
+        for name, value in last.items():
+            self.assertEqual(value, expected[name][-1], name)
+
+        with self.assertRaises(ValueError):
+            StreamingMACD().revise(1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
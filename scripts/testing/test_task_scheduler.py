@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+股票池任务调度测试脚本
+
+检查 TaskScheduler 的结果顺序、任务失败收集、工作进程重建、利用率统计,
+耗时不均时动态领取任务比固定分段更早完成, 以及 initializer 不改动主进程的环境变量
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.utils.TaskScheduler import TaskScheduler
+
+
+def square(x):
+    return x * x
+
+
+def fail_on_odd(x):
+    if x % 2:
+        raise ValueError(f'odd {x}')
+    return x
+
+
+def sleep_task(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def set_marker(value):
+    os.environ['TASK_SCHEDULER_MARKER'] = value
+
+
+def read_marker(_):
+    return os.getpid(), os.environ.get('TASK_SCHEDULER_MARKER')
+
+
+class TestTaskScheduler(unittest.TestCase):
+    """任务调度测试类"""
+
+    def test_results_in_task_order(self):
+        scheduler = TaskScheduler(processes=3)
+        self.assertEqual(scheduler.run(square, range(20)), [x * x for x in range(20)])
+        self.assertEqual(scheduler.report()['tasks'], 20)
+
+    def test_single_process_runs_inline(self):
+        scheduler = TaskScheduler(processes=1)
+        self.assertEqual(set(scheduler.run(sleep_task, [0, 0])), {os.getpid()})
+
+    def test_last_task_keeps_parent_environment(self):
+        # 只剩一个任务时仍在工作进程中执行, initializer 不改动主进程的环境变量
+        scheduler = TaskScheduler(processes=2, initializer=set_marker, initargs=('worker',))
+        [(pid, marker)] = scheduler.run(read_marker, [0])
+
+        self.assertNotEqual(pid, os.getpid())
+        self.assertEqual(marker, 'worker')
+        self.assertNotIn('TASK_SCHEDULER_MARKER', os.environ)
+
+    def test_inline_initializer_environment_restored(self):
+        scheduler = TaskScheduler(processes=1, initializer=set_marker, initargs=('inline',))
+        self.assertEqual(scheduler.run(read_marker, [0]), [(os.getpid(), 'inline')])
+        self.assertNotIn('TASK_SCHEDULER_MARKER', os.environ)
+
+    def test_failures_collected(self):
+        scheduler = TaskScheduler(processes=2)
+        results = scheduler.run(fail_on_odd, range(6))
+
+        self.assertEqual(results, [0, None, 2, None, 4, None])
+        self.assertEqual([f['args'] for f in scheduler.failures], [(1,), (3,), (5,)])
+        self.assertIn('ValueError', scheduler.failures[0]['traceback'])
+
+    def test_workers_recycled(self):
+        scheduler = TaskScheduler(processes=2, max_tasks_per_worker=2)
+        pids = scheduler.run(sleep_task, [0.01] * 8)
+
+        self.assertGreaterEqual(len(set(pids)), 4)
+        self.assertTrue(all(w['tasks'] <= 2 for w in scheduler.utilisation().values()))
+
+    def test_skewed_tasks_pulled_dynamically(self):
+        # 慢任务集中在前 1/3, 固定分 3 段时第一段需要 0.6s
+        durations = [0.2] * 3 + [0.01] * 6
+        scheduler = TaskScheduler(processes=3)
+        scheduler.run(sleep_task, durations)
+
+        report = scheduler.report()
+        self.assertLess(report['makespan'], 0.5)
+        self.assertAlmostEqual(report['busy'], sum(durations), delta=0.1)
+
+        for worker in scheduler.utilisation().values():
+            self.assertGreater(worker['utilisation'], 0)
+            self.assertLessEqual(worker['utilisation'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
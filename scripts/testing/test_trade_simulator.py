@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+模拟行情与撮合测试脚本
+
+在合成的多只股票 1m K 线上检查
+- BarFeed 的当前价、时钟推进和从本地 csv 读取;
+- PositionBook 的成本价、扩容和持仓字典;
+- MatchingSimulator 的延迟、收盘价撮合、限价单和按成交量比例的部分成交;
+- TradeService 设置行情源且 latency 为 0 时, execute_strategy_signals 与原来按信号价立即成交的结果一致,
+  多只股票的回放可重复, 资金不足时撤销剩余部分
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.services.market_simulator import BarFeed, MatchingSimulator, PositionBook
+from App.services.trade_service import TradeService
+
+
+def make_bars(seed=0, days=2, start='2024-01-02') -> pd.DataFrame:
+    """ 每天 240 根 1m K 线 """
+    rng = np.random.default_rng(seed)
+    minutes = np.concatenate([np.arange(571, 691), np.arange(781, 901)])
+    business = pd.bdate_range(start, periods=days)
+    dates = (business.values[:, None] + minutes[None, :] * np.timedelta64(1, 'm')).ravel()
+
+    n = len(dates)
+    close = np.round(10 * np.exp(np.cumsum(rng.standard_normal(n) * 0.002)), 2)
+    open_ = np.round(np.r_[close[0], close[:-1]] + rng.standard_normal(n) * 0.01, 2)
+    return pd.DataFrame({'date': dates, 'open': open_, 'high': np.maximum(open_, close) + 0.01,
+                         'low': np.minimum(open_, close) - 0.01, 'close': close,
+                         'volume': rng.integers(100, 5000, n).astype(float)})
+
+
+def make_signals(bars: pd.DataFrame, seed=0, density=0.05) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    signal = np.where(rng.random(len(bars)) < density, rng.choice([1, -1], len(bars)), 0)
+    return pd.DataFrame({'close': bars['close'].to_numpy(), 'final_signal': signal},
+                        index=pd.DatetimeIndex(bars['date']))
+
+
+def make_pool(codes=3, days=2):
+    return {f'{600000 + i}': make_bars(i, days) for i in range(codes)}
+
+
+class TestTradeSimulator(unittest.TestCase):
+    """模拟行情与撮合测试类"""
+
+    def setUp(self):
+        self.bars = make_pool()
+        self.code = '600000'
+
+    def test_feed(self):
+        feed = BarFeed(self.bars)
+        data = self.bars[self.code]
+        self.assertIsNone(feed.now)
+        self.assertEqual(-1, feed.bar_index(self.code))
+
+        feed.advance_to(data['date'].iloc[10] + pd.Timedelta(seconds=30))
+        self.assertEqual(10, feed.bar_index(self.code))
+        self.assertEqual(data['close'].iloc[10], feed.current_price(self.code))
+
+        with self.assertRaises(ValueError):
+            feed.advance_to(data['date'].iloc[5])
+        with self.assertRaises(KeyError):
+            feed.current_price('000000')
+
+        self.assertEqual(pd.Timestamp(data['date'].iloc[0]), feed.start)
+        self.assertEqual(pd.Timestamp(data['date'].iloc[-1]), feed.end)
+        self.assertEqual(len(data), len(feed.clock()))
+
+        # 乱序、日期在索引中的数据和本地 csv
+        shuffled = BarFeed({self.code: data.sample(frac=1, random_state=0).set_index('date')})
+        np.testing.assert_array_equal(feed.bars(self.code), shuffled.bars(self.code))
+        with tempfile.TemporaryDirectory() as folder:
+            for code, bars in self.bars.items():
+                bars.to_csv(Path(folder) / f'{code}.csv', index=False)
+            local = BarFeed.from_csv(folder)
+            self.assertEqual(sorted(self.bars), local.codes)
+            np.testing.assert_array_equal(feed.times(self.code), local.times(self.code))
+
+    def test_position_book(self):
+        book = PositionBook(capacity=2)
+        book.buy('a', 100, 10.0, '2024-01-02 09:31')
+        book.buy('a', 300, 12.0, '2024-01-02 10:00')
+        self.assertEqual(400, book.quantity_of('a'))
+        self.assertAlmostEqual(11.5, book.to_dict()['a']['avg_price'])
+        self.assertEqual(pd.Timestamp('2024-01-02 09:31'), book.to_dict()['a']['first_buy_date'])
+
+        for i in range(5):
+            book.buy(f'c{i}', i + 1, 1.0, '2024-01-03')
+        self.assertEqual(6, len(book))
+
+        book.sell('a', 400)
+        self.assertNotIn('a', book)
+        self.assertNotIn('a', book.to_dict())
+        with self.assertRaises(ValueError):
+            book.sell('c0', 2)
+
+        # 清仓后再买入重新计算成本价和首次买入时间
+        book.buy('a', 100, 9.0, '2024-01-04')
+        self.assertEqual({'quantity': 100, 'avg_price': 9.0, 'first_buy_date': pd.Timestamp('2024-01-04')},
+                         book.to_dict()['a'])
+
+    def run_orders(self, simulator, orders, until, limit=None):
+        fills = []
+        for order in orders:
+            simulator.submit(order, limit)
+        fills.extend(simulator.advance_to(until, lambda fill: fill['quantity']))
+        return fills
+
+    def test_matching(self):
+        data = self.bars[self.code]
+        dates = data['date']
+
+        # latency 1: 下一根 K 线开盘价
+        feed = BarFeed(self.bars)
+        feed.advance_to(dates.iloc[20])
+        simulator = MatchingSimulator(feed, latency=1)
+        order = {'order_id': 'b1', 'stock_code': self.code, 'action': 'buy', 'quantity': 100}
+        fills = self.run_orders(simulator, [order], dates.iloc[25])
+        self.assertEqual(1, len(fills))
+        self.assertEqual(data['open'].iloc[21], fills[0]['price'])
+        self.assertEqual(pd.Timestamp(dates.iloc[21]), fills[0]['time'])
+        self.assertEqual(pd.Timedelta(minutes=1), fills[0]['latency'])
+        self.assertEqual(0, simulator.pending)
+
+        # latency 3 且行情未推进到可成交的 K 线时继续挂单
+        simulator = MatchingSimulator(feed, latency=3)
+        self.assertEqual([], self.run_orders(simulator, [dict(order)], dates.iloc[27]))
+        self.assertEqual(1, simulator.pending)
+        self.assertEqual(data['open'].iloc[28], simulator.advance_to(dates.iloc[28], lambda f: f['quantity'])[0]['price'])
+
+        # latency 0: 当前 K 线收盘价
+        simulator = MatchingSimulator(feed, latency=0)
+        fills = self.run_orders(simulator, [dict(order)], dates.iloc[28])
+        self.assertEqual(data['close'].iloc[28], fills[0]['price'])
+
+        # 限价买单等到最低价不高于限价
+        limit = data['low'].iloc[30:].min() + 0.001
+        first = int(np.argmax(data['low'].to_numpy()[30:] <= limit)) + 30
+        simulator = MatchingSimulator(feed, latency=1)
+        fills = self.run_orders(simulator, [dict(order)], dates.iloc[-1], limit=limit)
+        self.assertEqual(pd.Timestamp(dates.iloc[first]), fills[0]['time'])
+        self.assertEqual(min(data['open'].iloc[first], limit), fills[0]['price'])
+
+    def test_partial_fills(self):
+        data = self.bars[self.code]
+        feed = BarFeed(self.bars)
+        feed.advance_to(data['date'].iloc[0])
+        simulator = MatchingSimulator(feed, latency=1, participation=0.1)
+
+        order = {'order_id': 's1', 'stock_code': self.code, 'action': 'sell', 'quantity': 2000}
+        fills = self.run_orders(simulator, [order], data['date'].iloc[-1])
+
+        caps = (data['volume'].to_numpy()[1:] * 0.1).astype(int)
+        expected = np.minimum(caps, 2000 - np.concatenate([[0], np.cumsum(caps)[:-1]]))
+        expected = expected[expected > 0]
+        self.assertEqual(list(expected), [fill['quantity'] for fill in fills])
+        self.assertEqual(2000, sum(fill['quantity'] for fill in fills))
+        self.assertEqual(list(data['open'].iloc[1:len(fills) + 1]), [fill['price'] for fill in fills])
+
+        # 回调只接受一部分时撤销剩余部分
+        feed = BarFeed(self.bars)
+        feed.advance_to(data['date'].iloc[0])
+        simulator = MatchingSimulator(feed, latency=1, participation=0.1)
+        simulator.submit({'order_id': 'b1', 'stock_code': self.code, 'action': 'buy', 'quantity': 10 ** 6})
+        fills = simulator.advance_to(data['date'].iloc[-1], lambda fill: 1)
+        self.assertEqual([1], [fill['quantity'] for fill in fills])
+        self.assertEqual(0, simulator.pending)
+
+    def test_matches_immediate_execution(self):
+        signals = make_signals(self.bars[self.code], seed=1)
+
+        immediate = TradeService()
+        expected = immediate.execute_strategy_signals(signals, self.code, capital_ratio=0.5)
+
+        replay = TradeService(BarFeed(self.bars), latency=0)
+        result = replay.execute_strategy_signals(signals, self.code, capital_ratio=0.5)
+
+        self.assertGreater(len(expected), 4)
+        self.assertEqual([(o['action'], o['quantity'], o['executed_price']) for o in expected],
+                         [(o['action'], o['filled_quantity'], o['executed_price']) for o in result])
+        self.assertEqual(list(signals.index[signals['final_signal'].isin([1, -1])][:1]),
+                         [pd.Timestamp(result[0]['created_at'])])
+        self.assertAlmostEqual(immediate.capital, replay.capital, places=6)
+        self.assertEqual(immediate.positions.keys(), replay.positions.keys())
+
+    def test_replay(self):
+        signals = {code: make_signals(bars, seed=int(code)) for code, bars in self.bars.items()}
+
+        def run():
+            service = TradeService(BarFeed(self.bars), latency=2, participation=0.2)
+            orders = service.replay(signals, capital_ratio=0.2)
+            return service, orders
+
+        first, orders = run()
+        second, _ = run()
+        self.assertGreater(len(first.fills), len(orders))  # 有部分成交
+        self.assertEqual(first.fills, second.fills)
+        self.assertEqual(first.capital, second.capital)
+
+        # 成交按时间先后, 延迟至少 2 根 K 线
+        times = [fill['time'] for fill in first.fills]
+        self.assertEqual(sorted(times), times)
+        self.assertTrue(all(fill['latency'] >= pd.Timedelta(minutes=2) for fill in first.fills))
+
+        # 资金、持仓与成交一致
+        cash = 100000 - sum(f['quantity'] * f['price'] * (1 if f['action'] == 'buy' else -1) for f in first.fills)
+        self.assertAlmostEqual(cash, first.capital, places=6)
+        for code in self.bars:
+            held = sum(f['quantity'] * (1 if f['action'] == 'buy' else -1)
+                       for f in first.fills if f['stock_code'] == code)
+            self.assertEqual(held, first.book.quantity_of(code))
+        for order in orders:
+            self.assertEqual(order['filled_quantity'],
+                             sum(f['quantity'] for f in first.fills if f['order_id'] == order['order_id']))
+
+        # 当前价取自行情源
+        positions = first.get_positions()
+        for code, position in positions['positions'].items():
+            self.assertEqual(self.bars[code]['close'].iloc[-1], position['current_price'])
+
+    def test_insufficient_capital(self):
+        data = self.bars[self.code]
+        service = TradeService(BarFeed(self.bars), latency=1)
+        service.advance_to(data['date'].iloc[0])
+        price = data['close'].iloc[0]
+
+        # 两笔买单各自都够, 合计不够: 第二笔按剩余资金成交, 其余撤销
+        quantity = int(service.capital * 0.6 / price)
+        first = service.place_buy_order(self.code, quantity)
+        second = service.place_buy_order(self.code, quantity)
+        service.advance_to(data['date'].iloc[5])
+
+        self.assertEqual('executed', first['status'])
+        self.assertEqual('executed', second['status'])
+        self.assertLess(second['filled_quantity'], quantity)
+        self.assertEqual('资金不足', second['error'])
+        self.assertGreaterEqual(service.capital, 0)
+        self.assertLess(service.capital, data['open'].iloc[1])
+
+        # 挂单中的数量不能重复卖出
+        held = service.book.quantity_of(self.code)
+        self.assertEqual('pending', service.place_sell_order(self.code, held)['status'])
+        self.assertEqual('rejected', service.place_sell_order(self.code, 1)['status'])
+
+        # 没有行情源时用最近一次成交价
+        plain = TradeService()
+        self.assertIn('error', plain.place_buy_order(self.code, 100))
+        plain.place_buy_order(self.code, 100, 10.0)
+        self.assertEqual(10.0, plain.get_positions()['positions'][self.code]['current_price'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+交易日历测试脚本
+
+由合成的 1m 数据构建 TradingCalendar, 检查交易日 / 交易分钟、前后交易日和区间查询与 pandas 参照一致,
+本地文件的保存读取, 以及 trading_calendar 在临时 ColumnStore1m 上的构建、缓存、增量补齐和当天数据的补读间隔
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.MySql.ColumnStore1m import ColumnStore1m
+from App.codes.MySql.DataBaseStockData1m import StockData1m
+from App.codes.RnnDataFile.stock_path import StockDataPath
+from App.codes.utils import TradingCalendar as calendar_module
+from App.codes.utils.TradingCalendar import TradingCalendar, trading_calendar
+from test_column_store_1m import make_1m
+
+CODE = 'bk0424'
+
+
+class TestTradingCalendar(unittest.TestCase):
+    """交易日历测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.data = make_1m('2023-01-02', 120)
+        self.days = pd.to_datetime(self.data['date']).dt.normalize().drop_duplicates().reset_index(drop=True)
+        self.calendar = TradingCalendar.from_1m(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_days_and_minutes(self):
+        self.assertEqual(len(self.calendar), 120)
+        np.testing.assert_array_equal(self.calendar.days, self.days.to_numpy(dtype='datetime64[D]'))
+
+        session = self.calendar.session('2023-01-03')
+        self.assertEqual(len(session), 240)
+        self.assertEqual(str(session[0]), '2023-01-03T09:31')
+        self.assertEqual(str(session[-1]), '2023-01-03T15:00')
+
+    def test_queries_match_reference(self):
+        days = self.days
+        for value in ['2023-01-01', '2023-01-06', '2023-01-07', '2023-03-15', '2023-06-30']:
+            t = pd.Timestamp(value)
+            after, before = days[days > t], days[days < t]
+
+            self.assertEqual(value in self.calendar, t in set(days))
+            self.assertEqual(self.calendar.next_day(value), after.iloc[0] if len(after) else None)
+            self.assertEqual(self.calendar.prev_day(value), before.iloc[-1] if len(before) else None)
+
+        self.assertEqual(self.calendar.next_day('2023-01-06', 3), np.datetime64('2023-01-11'))
+        self.assertIsNone(self.calendar.prev_day('2023-01-02'))
+
+        between = self.calendar.days_between('2023-01-07', '2023-02-01')
+        expected = days[(days >= '2023-01-07') & (days <= '2023-02-01')]
+        np.testing.assert_array_equal(between, expected.to_numpy(dtype='datetime64[D]'))
+
+    def test_save_load_and_extend(self):
+        path = f'{self.root}/calendar.npz'
+        calendar = TradingCalendar.from_1m(self.data.iloc[:240 * 60])
+        calendar.save(path)
+
+        loaded = TradingCalendar.load(path)
+        np.testing.assert_array_equal(loaded.days, calendar.days)
+        np.testing.assert_array_equal(loaded.minutes, calendar.minutes)
+        self.assertEqual(loaded.checked_until, calendar.checked_until)
+
+        loaded.extend(self.data.iloc[240 * 50:])
+        np.testing.assert_array_equal(loaded.days, self.calendar.days)
+
+        # 覆盖保存不留下临时文件
+        loaded.save(path)
+        self.assertEqual([p.name for p in Path(self.root).iterdir()], ['calendar.npz'])
+        np.testing.assert_array_equal(TradingCalendar.load(path).days, self.calendar.days)
+
+    def test_trading_calendar_cached_and_extended(self):
+        data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.root
+        store = ColumnStore1m(f'{self.root}/1m')
+
+        for year in range(2023, pd.Timestamp('today').year + 1):
+            store.replace(CODE, year, self.data.iloc[:240 * 60] if year == 2023 else self.data.iloc[:0])
+
+        try:
+            with mock.patch.object(StockData1m, 'store', store), mock.patch.dict(calendar_module._calendars, clear=True):
+                calendar = trading_calendar('2023-02-10', code=CODE, start='2023-01-01')
+                self.assertEqual(len(calendar), 60)
+                self.assertTrue(Path(StockDataPath.calendar_path(CODE)).exists())
+
+                # 已确认的范围内从进程缓存 / 本地文件读取, 不访问 1m 数据
+                calendar_module._calendars.clear()
+                with mock.patch.object(StockData1m, 'load_1m', side_effect=AssertionError('load_1m')):
+                    self.assertEqual(len(trading_calendar('2023-02-10', code=CODE)), 60)
+
+                # 模拟 1m 数据只确认到 2023-03-24 (第 60 个交易日), 之后写入新数据, 只加载之后的部分
+                store.replace(CODE, 2023, self.data)
+                calendar_module._calendars[CODE].checked_until = np.datetime64('2023-03-24')
+                calendar = trading_calendar('2023-06-01', code=CODE)
+
+            np.testing.assert_array_equal(calendar.days, self.calendar.days)
+
+        finally:
+            StockDataPath.data_path = data_path
+
+    def test_today_refresh_throttled(self):
+        data_path = StockDataPath.data_path
+        StockDataPath.data_path = self.root
+        today = pd.Timestamp('today').normalize()
+        yesterday = np.datetime64(today.date(), 'D') - 1
+
+        calendar = TradingCalendar.from_1m(self.data)
+        calendar.checked_until = yesterday
+        calendar.save(StockDataPath.calendar_path(CODE))
+        path = Path(StockDataPath.calendar_path(CODE))
+        mtime = path.stat().st_mtime_ns
+
+        try:
+            with mock.patch.dict(calendar_module._calendars, clear=True), \
+                    mock.patch.dict(calendar_module._refreshed, clear=True), \
+                    mock.patch.object(StockData1m, 'load_1m', return_value=self.data.iloc[:0]) as load_1m:
+
+                for _ in range(3):
+                    trading_calendar(today, code=CODE)
+
+                # 当天只补读一次, 已确认日期没有前进, 不重写本地文件
+                self.assertEqual(load_1m.call_count, 1)
+                self.assertEqual(path.stat().st_mtime_ns, mtime)
+
+                # 超过补读间隔后再读一次
+                calendar_module._refreshed[CODE] -= calendar_module.refresh_ttl
+                trading_calendar(today, code=CODE)
+                self.assertEqual(load_1m.call_count, 2)
+
+                # 已确认范围内的查询不补读
+                trading_calendar(today - pd.Timedelta(days=1), code=CODE)
+                self.assertEqual(load_1m.call_count, 2)
+
+        finally:
+            StockDataPath.data_path = data_path
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+自适应训练轮数测试脚本
+
+在合成的线性回归数据上用小模型检查 fit_with_budget:
+- 验证损失不再下降时提前停止, 记录实际轮数、最佳轮次和节省时间;
+- 训练结束后恢复验证损失最低的权重;
+- 没有验证集时以训练损失为准
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import keras
+
+from App.codes.RnnModel.ShardDataset import ShardDataset
+from App.codes.RnnModel.TrainBudget import fit_with_budget, budget_patience
+
+
+def write_linear(root, samples=400, noise=0.1, seed=0) -> list:
+    """ y = x 的加权和 + 噪声 """
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((samples, 4, 4, 1)).astype('float32')
+    w = rng.standard_normal(16).astype('float32')
+    y = (x.reshape(samples, -1) @ w + noise * rng.standard_normal(samples)).reshape(-1, 1).astype('float32')
+
+    np.save(os.path.join(root, 'x.npy'), x)
+    np.save(os.path.join(root, 'y.npy'), y)
+    return [(os.path.join(root, 'x.npy'), os.path.join(root, 'y.npy'))]
+
+
+def small_model(lr=0.05):
+    model = keras.Sequential([keras.Input((4, 4, 1)), keras.layers.Flatten(), keras.layers.Dense(1)])
+    model.compile(loss='mean_squared_error', optimizer=keras.optimizers.Adam(lr))
+    return model
+
+
+class TestTrainBudget(unittest.TestCase):
+    """自适应训练轮数测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        keras.utils.set_random_seed(0)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_stops_early_and_restores_best(self):
+        dataset = ShardDataset(write_linear(self.root), batch_size=32, seed=0, prefetch=0)
+        train, validation = dataset.split(0.8)
+        model = small_model()
+
+        record = fit_with_budget(model, train, validation, epochs=300, patience=5, verbose=0)
+
+        self.assertEqual(record['monitor'], 'val_loss')
+        self.assertLess(record['epochs'], 300)
+        self.assertGreater(record['saved_seconds'], 0)
+        self.assertLessEqual(record['best_epoch'], record['epochs'])
+        self.assertLess(record['best_loss'], 0.05)
+
+        restored = model.evaluate(validation.iterate(), steps=len(validation), verbose=0)
+        self.assertAlmostEqual(restored, record['best_loss'], places=4)
+
+    def test_without_validation_uses_training_loss(self):
+        dataset = ShardDataset(write_linear(self.root, samples=100), batch_size=20, seed=0, prefetch=0)
+        train, validation = dataset.split(1.0)
+        self.assertEqual(validation.samples, 0)
+
+        record = fit_with_budget(small_model(), train, validation, epochs=15, verbose=0)
+        self.assertEqual(record['monitor'], 'loss')
+        self.assertLessEqual(record['epochs'], 15)
+
+    def test_patience_scales_with_budget(self):
+        self.assertEqual(budget_patience(500), 25)
+        self.assertEqual(budget_patience(100), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+多股票并行训练测试脚本
+
+用内存中的训练台账和合成的训练函数检查 TrainOrchestrator:
+- 只训练本月数据已生成、模型未完成的股票, 按 ModelDataTiming 从新到旧排序;
+- 每只股票完成时写入 success / error, 再次运行只训练未成功的股票;
+- spawn 进程池中的工作进程按设置限制了线程数, 只有一个进程或只剩一只股票时也不在测试进程内训练;
+- TaskScheduler 的 initializer / on_result 扩展
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from App.codes.RnnModel.TrainOrchestrator import TrainOrchestrator, TrainRecordLedger
+from App.codes.utils.TaskScheduler import TaskScheduler
+
+MONTH = '2024-01'
+
+
+def fake_job(stock, months):
+    """ 合成训练: 返回本进程的线程设置; 名称以 bad 开头的股票失败 """
+    if stock.startswith('bad'):
+        raise ValueError(f'{stock} 训练失败')
+
+    start, cpu = time.perf_counter(), time.process_time()
+    sum(i * i for i in range(20000))
+    return {'seconds': time.perf_counter() - start, 'cpu': time.process_time() - cpu,
+            'pid': os.getpid(), 'threads': os.environ.get('OMP_NUM_THREADS')}
+
+
+def good_job(stock, months):
+    return {'seconds': 0.0, 'cpu': 0.0}
+
+
+class MemoryLedger(TrainRecordLedger):
+    """ 内存中的 trainrecord """
+
+    def __init__(self, records: pd.DataFrame):
+        self.records = records
+        self.marks = []
+
+    def load(self):
+        return self.records.copy()
+
+    def mark(self, ids, state, timing=None):
+        self.marks.append((tuple(ids), state))
+        self.records.loc[self.records['id'].isin(list(ids)), 'ModelCreate'] = state
+
+
+def make_records() -> pd.DataFrame:
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4, 5, 6],
+        'name': ['old', 'new', 'bad1', 'done', 'other_month', 'no_data'],
+        'ParserMonth': [MONTH, MONTH, MONTH, MONTH, '2023-12', MONTH],
+        'ModelData': ['success', 'success', 'success', 'success', 'success', 'pending'],
+        'ModelDataTiming': ['2024-01-02', '2024-01-20', '2024-01-10', '2024-01-05', '2024-01-25', None],
+        'ModelCreate': [None, 'error', 'running', 'success', None, None]})
+
+
+class TestTrainOrchestrator(unittest.TestCase):
+    """多股票并行训练测试类"""
+
+    def test_pending_jobs_ordered_by_freshness(self):
+        orchestrator = TrainOrchestrator(MONTH, processes=1, job=fake_job, ledger=MemoryLedger(make_records()))
+        self.assertEqual(orchestrator.pending_jobs()['name'].tolist(), ['new', 'bad1', 'old'])
+
+    def test_ledger_and_resume(self):
+        ledger = MemoryLedger(make_records())
+        report = TrainOrchestrator(MONTH, processes=1, job=fake_job, ledger=ledger).run()
+
+        self.assertEqual((report['jobs'], report['success'], report['errors']), (3, 2, 1))
+        self.assertEqual(ledger.marks[0], ((2, 3, 1), 'running'))
+        self.assertEqual(dict(zip(ledger.records['name'], ledger.records['ModelCreate']))['bad1'], 'error')
+        self.assertEqual(set(report['job_seconds']), {'new', 'old'})
+
+        report = TrainOrchestrator(MONTH, processes=1, job=good_job, ledger=ledger).run()
+        self.assertEqual((report['jobs'], report['success']), (1, 1))
+        self.assertEqual(ledger.records.set_index('name').loc['bad1', 'ModelCreate'], 'success')
+
+        report = TrainOrchestrator(MONTH, processes=1, job=good_job, ledger=ledger).run()
+        self.assertEqual(report['jobs'], 0)
+
+    def test_spawn_workers_limit_threads(self):
+        records = make_records()
+        records['name'] = [f's{i}' for i in range(6)]
+        records['ModelData'] = 'success'
+        records['ParserMonth'] = MONTH
+        records['ModelCreate'] = None
+
+        orchestrator = TrainOrchestrator(MONTH, processes=2, intra_threads=1, job=fake_job,
+                                         ledger=MemoryLedger(records))
+        results = []
+        orchestrator.scheduler.run(fake_job, [(s, MONTH) for s in records['name']],
+                                   on_result=lambda i, ok, value: results.append((i, ok, value)))
+
+        self.assertEqual(sorted(i for i, _, _ in results), list(range(6)))
+        self.assertTrue(all(ok and value['threads'] == '1' for _, ok, value in results))
+        self.assertTrue(all(value['pid'] != os.getpid() for _, _, value in results))
+
+    def test_single_job_runs_in_worker(self):
+        records = make_records()
+        records['ModelCreate'] = ['success', 'success', 'success', 'success', None, None]
+        records.loc[4, 'ParserMonth'] = MONTH
+
+        orchestrator = TrainOrchestrator(MONTH, processes=1, intra_threads=1, job=fake_job,
+                                         ledger=MemoryLedger(records))
+        threads = os.environ.get('OMP_NUM_THREADS')
+        results = []
+        orchestrator.scheduler.run(fake_job, [('other_month', MONTH)],
+                                   on_result=lambda i, ok, value: results.append(value))
+        report = orchestrator.run()
+
+        self.assertEqual((report['jobs'], report['success']), (1, 1))
+        self.assertNotEqual(results[0]['pid'], os.getpid())
+        self.assertEqual(results[0]['threads'], '1')
+        self.assertEqual(os.environ.get('OMP_NUM_THREADS'), threads)
+
+    def test_scheduler_initializer_inline(self):
+        seen = []
+        scheduler = TaskScheduler(processes=1, initializer=seen.append, initargs=('init',))
+        scheduler.run(abs, [-1, -2], on_result=lambda i, ok, value: seen.append((i, ok, value)))
+        self.assertEqual(seen, ['init', (0, True, 1), (1, True, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
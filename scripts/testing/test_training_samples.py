@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+训练样本写入测试脚本
+
+用合成的 15m 信号数据检查 write_training_samples 与原 data_common 中 np.append 的实现逐元素一致
+(含缺失值、以前月份的样本), 以及 NpyStreamWriter 写入行数不符或出错时不留下目标文件
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.codes.parsers.RnnParser import *
+from App.codes.RnnModel.TrainingSamples import NpyStreamWriter, write_training_samples
+
+COLUMN_X = XColumn()[0]
+COLUMN_Y = YColumn()[0]
+
+
+def make_signals(cycles: int, seed: int = 0, nan_rate: float = 0.05) -> pd.DataFrame:
+    """ cycles 个信号周期, 每个周期 5~45 根 15m bar, 最后一根带 SignalChoice """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(5, 46, cycles)
+    times = np.repeat(np.arange(cycles), lengths)
+
+    data = pd.DataFrame(rng.standard_normal((len(times), len(COLUMN_X) + len(COLUMN_Y))),
+                        columns=list(dict.fromkeys(COLUMN_X + COLUMN_Y)))
+    data[Signal] = rng.choice([-1.0, 1.0], len(times))
+    data[SignalTimes] = times
+
+    mask = rng.random(data.shape) < nan_rate
+    data = data.mask(pd.DataFrame(mask, columns=data.columns).assign(**{Signal: False, SignalTimes: False}))
+
+    ends = np.cumsum(lengths) - 1
+    data[SignalChoice] = np.nan
+    data.loc[ends, SignalChoice] = 1
+    return data
+
+
+def reference(data_15m, column_x, column_y, height=30, width=30, data_x=None, data_y=None):
+    """ 原 RnnCreationData.ModelData.data_common 的实现 """
+    data_x = np.zeros([0]) if data_x is None else data_x
+    data_y = np.empty([0]) if data_y is None else data_y
+
+    for st in data_15m.dropna(subset=[SignalChoice])[SignalTimes]:
+        x = data_15m[data_15m[SignalTimes] == st][column_x].dropna(how='any').tail(height)
+        y = data_15m[data_15m[SignalTimes] == st][column_y].dropna(how='any').tail(1)
+
+        if not x.shape[0] or not y.shape[0]:
+            continue
+
+        x = pd.concat([x[[Signal]], x], axis=1).to_numpy()
+        h, w = height - x.shape[0], width - x.shape[1]
+        x = np.pad(x, ((h // 2, h - h // 2), (w - w // 2, w // 2)), 'constant', constant_values=(0, 0))
+        x.shape = (1, height, width, 1)
+        y = y.to_numpy()
+
+        if data_x.shape[0]:
+            data_x, data_y = np.append(data_x, x, axis=0), np.append(data_y, y, axis=0)
+        else:
+            data_x, data_y = x, y
+
+    return data_x, data_y
+
+
+class TestTrainingSamples(unittest.TestCase):
+    """训练样本写入测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path_x = os.path.join(self.root, 'train_data', 'x.npy')
+        self.path_y = os.path.join(self.root, 'train_data', 'y.npy')
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_matches_np_append(self):
+        data = make_signals(300)
+        shape = write_training_samples(data, COLUMN_X, COLUMN_Y, self.path_x, self.path_y, chunk=64)
+
+        expected_x, expected_y = reference(data, COLUMN_X, COLUMN_Y)
+        self.assertEqual(shape, expected_x.shape)
+        np.testing.assert_array_equal(np.load(self.path_x), expected_x)
+        np.testing.assert_array_equal(np.load(self.path_y), expected_y)
+        self.assertFalse(any(name.endswith('.tmp') for name in os.listdir(os.path.dirname(self.path_x))))
+
+    def test_previous_samples_first(self):
+        previous = make_signals(50, seed=1)
+        pre_x, pre_y = reference(previous, COLUMN_X, COLUMN_Y)
+        np.save(os.path.join(self.root, 'pre_x.npy'), pre_x)
+        np.save(os.path.join(self.root, 'pre_y.npy'), pre_y)
+
+        data = make_signals(80, seed=2)
+        write_training_samples(data, COLUMN_X, COLUMN_Y, self.path_x, self.path_y, chunk=16,
+                               previous=(os.path.join(self.root, 'pre_x.npy'), os.path.join(self.root, 'pre_y.npy')))
+
+        expected_x, expected_y = reference(data, COLUMN_X, COLUMN_Y, data_x=pre_x, data_y=pre_y)
+        np.testing.assert_array_equal(np.load(self.path_x), expected_x)
+        np.testing.assert_array_equal(np.load(self.path_y), expected_y)
+
+    def test_short_cycles_and_empty(self):
+        data = make_signals(40, seed=3, nan_rate=0.0)
+        height = 8
+        write_training_samples(data, COLUMN_X, COLUMN_Y, self.path_x, self.path_y, height=height, width=20)
+        expected_x, _ = reference(data, COLUMN_X, COLUMN_Y, height=height, width=20)
+        np.testing.assert_array_equal(np.load(self.path_x), expected_x)
+
+        shape = write_training_samples(data.iloc[:0], COLUMN_X, COLUMN_Y, self.path_x, self.path_y)
+        self.assertEqual(shape, (0, 30, 30, 1))
+        self.assertEqual(np.load(self.path_x).shape, (0, 30, 30, 1))
+
+    def test_writer_row_count_checked(self):
+        with self.assertRaises(ValueError):
+            with NpyStreamWriter(self.path_x, (3, 2), 'float64') as writer:
+                writer.next_row()[:] = 1
+
+        with self.assertRaises(RuntimeError):
+            with NpyStreamWriter(self.path_x, (3, 2), 'float64') as writer:
+                raise RuntimeError('stop')
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path_x)), [])
+
+        with NpyStreamWriter(self.path_x, (3, 2), 'float64', chunk=2) as writer:
+            writer.write(np.ones((1, 2)))
+            for i in range(2):
+                writer.next_row()[:] = i + 2
+
+        np.testing.assert_array_equal(np.load(self.path_x), [[1, 1], [2, 2], [3, 3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+趋势图样本分片存储测试脚本
+
+在临时目录中检查 ChunkedArrayStore / ChunkedArray:
+- 追加跨越分片边界, 分片为标准 .npy, 重新打开后继续追加;
+- 旧格式的单个 .npy 与分片按顺序拼接读取;
+- 追加中断 (文件头未更新) 时读取方仍看到旧行数, 下一次追加覆盖残留数据;
+- 整数、负数、切片、下标数组和布尔索引
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.TrendDistinguish.TrendArrayStore import ChunkedArrayStore, ChunkedArray, chunk_directory
+
+
+class TestTrendArrayStore(unittest.TestCase):
+    """趋势图样本分片存储测试类"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.file = os.path.join(self.root, '600000.npy')
+        self.rows = np.arange(23 * 3 * 2, dtype='uint8').reshape(23, 3, 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_append_across_chunks(self):
+        store = ChunkedArrayStore(self.file, chunk_rows=5)
+        for i in range(0, 21, 3):
+            store.append(self.rows[i: i + 3])
+
+        self.assertEqual(len(store), 21)
+        self.assertEqual(chunk_directory(self.file), os.path.join(self.root, '600000.chunks'))
+        self.assertEqual([os.path.basename(p) for p in store.shards()],
+                         ['00000.npy', '00001.npy', '00002.npy', '00003.npy', '00004.npy'])
+        self.assertTrue(np.array_equal(np.load(store.shards()[1]), self.rows[5:10]))
+
+        # 重新打开后接着最后一个分片追加
+        store = ChunkedArrayStore(self.file, chunk_rows=5)
+        self.assertEqual(store.append(self.rows[21:22].reshape(-1), row_shape=(3, 2)), 22)
+        store.append(self.rows[22:])
+
+        array = store.open()
+        self.assertEqual(array.shape, (23, 3, 2))
+        self.assertTrue(np.array_equal(np.asarray(array), self.rows))
+
+        with self.assertRaises(ValueError):
+            store.append(np.zeros((1, 3, 2), dtype='float32'))
+
+    def test_legacy_file_read_first(self):
+        np.save(self.file, self.rows[:7])
+        ChunkedArrayStore(self.file, chunk_rows=4).append(self.rows[7:])
+
+        array = ChunkedArray.open(self.file)
+        self.assertEqual(len(array), 23)
+        self.assertTrue(np.array_equal(np.asarray(array), self.rows))
+        self.assertTrue(np.array_equal(np.load(self.file), self.rows[:7]))
+
+        self.assertEqual(len(ChunkedArray.open(os.path.join(self.root, 'missing.npy'))), 0)
+
+    def test_interrupted_append(self):
+        store = ChunkedArrayStore(self.file, chunk_rows=10)
+        store.append(self.rows[:3])
+
+        # 数据已写入、文件头未更新
+        with open(store.shards()[0], 'ab') as f:
+            f.write(b'\xff' * 12)
+
+        self.assertEqual(len(ChunkedArray.open(self.file)), 3)
+        self.assertEqual(np.load(store.shards()[0]).shape, (3, 3, 2))
+
+        ChunkedArrayStore(self.file, chunk_rows=10).append(self.rows[3:5])
+        self.assertTrue(np.array_equal(np.asarray(ChunkedArray.open(self.file)), self.rows[:5]))
+
+    def test_indexing(self):
+        np.save(self.file, self.rows[:4])
+        ChunkedArrayStore(self.file, chunk_rows=6).append(self.rows[4:])
+        array = ChunkedArray.open(self.file)
+
+        self.assertTrue(np.array_equal(array[5], self.rows[5]))
+        self.assertTrue(np.array_equal(array[-1], self.rows[-1]))
+        self.assertTrue(np.array_equal(array[2:17:3], self.rows[2:17:3]))
+        self.assertTrue(np.array_equal(array[[22, 0, 9, 9]], self.rows[[22, 0, 9, 9]]))
+
+        mask = np.arange(23) % 4 == 1
+        self.assertTrue(np.array_equal(array[mask], self.rows[mask]))
+
+        with self.assertRaises(IndexError):
+            array[23]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+趋势图光栅化测试脚本
+
+在合成的价格 / MACD 数据上检查 TrendRaster.render_trend:
+- 输出 (200, 150, 4) uint8, 白底, 子图边框位置与 matplotlib 默认布局一致;
+- 价格线在上图、MACD 红柱在 0 轴之上、绿柱在 0 轴之下;
+- 坐标范围留白与粘性边界, NaN 处折线断开;
+- 安装了 matplotlib 时与原 array_data 的图逐像素比较
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import importlib.util
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from App.codes.TrendDistinguish.TrendRaster import render_trend, autoscale, subplot_boxes, COLORS
+
+
+def make_trend(seed=0, n=100) -> pd.DataFrame:
+    """ 随机游走收盘价及 EmaMid / 布林线 / MACD, 前 19 行布林线为 NaN """
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'close': 10 + np.cumsum(rng.standard_normal(n) * 0.1)})
+    data['EmaMid'] = data['close'].ewm(span=20).mean()
+
+    mid, std = data['close'].rolling(20).mean(), data['close'].rolling(20).std()
+    data['BollUp'], data['BollDn'] = mid + 2 * std, mid - 2 * std
+
+    data['Dif'] = data['close'].ewm(span=12).mean() - data['close'].ewm(span=26).mean()
+    data['DifMl'] = data['Dif'].ewm(span=9).mean()
+    data['MACD'] = 2 * (data['Dif'] - data['DifMl'])
+    return data
+
+
+def color_mask(image, color, tolerance=10) -> np.ndarray:
+    return (np.abs(image[..., :3].astype(int) - np.array(COLORS[color])) <= tolerance).all(axis=-1)
+
+
+def matplotlib_image(data) -> np.ndarray:
+    """ 原 array_data 的 matplotlib 画法 """
+    import matplotlib
+    matplotlib.use('agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(nrows=2, ncols=1, figsize=(1.5, 2))
+    for column in ('close', 'EmaMid', 'BollUp', 'BollDn'):
+        ax[0].plot(data.index, data[column])
+
+    ax[1].plot(data.index, data['Dif'])
+    ax[1].plot(data.index, data['DifMl'])
+    ax[1].bar(data[data['MACD'] > 0].index, data[data['MACD'] > 0]['MACD'], color='red')
+    ax[1].bar(data[data['MACD'] < 0].index, data[data['MACD'] < 0]['MACD'], color='green')
+
+    for a in ax:
+        a.axes.xaxis.set_ticks([])
+        a.axes.yaxis.set_ticks([])
+
+    fig.canvas.draw()
+    image = np.array(fig.canvas.renderer.buffer_rgba())
+    plt.close('all')
+    return image
+
+
+class TestTrendRaster(unittest.TestCase):
+    """趋势图光栅化测试类"""
+
+    def test_layout(self):
+        self.assertEqual(subplot_boxes(2), [(18.75, 135.0, 24.0, 94.0), (18.75, 135.0, 108.0, 178.0)])
+
+        image = render_trend(make_trend())
+        self.assertEqual(image.shape, (200, 150, 4))
+        self.assertEqual(image.dtype, np.uint8)
+        self.assertTrue((image[..., 3] == 255).all())
+
+        # 边框外为白色, 边框为黑线
+        self.assertTrue((image[:22, :, :3] == 255).all())
+        self.assertTrue((image[:, :17, :3] == 255).all())
+        for row in (24, 94, 108, 178):
+            self.assertTrue((image[row, 20:135, :3] < 30).all())
+        for column in (19, 135):
+            self.assertTrue((image[25:94, column, :3] < 30).all())
+
+    def test_lines_and_bars(self):
+        data = make_trend()
+        image = render_trend(data)
+
+        # 布林线只在上图, Dif / DifMl 与 close / EmaMid 同色, 两个子图中都有
+        for color in ('C2', 'C3'):
+            rows = np.nonzero(color_mask(image, color))[0]
+            self.assertTrue(len(rows) and rows.min() > 24 and rows.max() < 94, color)
+        for color in ('C0', 'C1'):
+            mask = color_mask(image, color)
+            self.assertTrue(mask[25:94].any() and mask[109:178].any(), color)
+
+        red, green = color_mask(image, 'red', 0), color_mask(image, 'green', 0)
+        self.assertTrue(red.any() and green.any())
+        self.assertLess(np.nonzero(red)[0].max(), np.nonzero(green)[0].min() + 1)
+        self.assertGreater(np.nonzero(red)[0].min(), 108)
+        self.assertLess(np.nonzero(green)[0].max(), 178)
+
+        # 前半段 MACD 为正、后半段为负时, 红柱全部在绿柱左侧
+        data['MACD'] = np.where(data.index < 50, 1.0, -1.0)
+        image = render_trend(data)
+        red, green = color_mask(image, 'red', 0), color_mask(image, 'green', 0)
+        self.assertLess(np.nonzero(red)[1].max(), np.nonzero(green)[1].min())
+
+    def test_autoscale(self):
+        self.assertEqual(autoscale(0.0, 10.0), (-0.5, 10.5))
+        self.assertEqual(autoscale(0.0, 10.0, stickies=[0.0]), (0.0, 10.5))
+        self.assertEqual(autoscale(-1.0, 1.0, stickies=[0.0]), (-1.1, 1.1))
+        self.assertEqual(autoscale(5.0, 5.0), (4.75 - 0.025, 5.25 + 0.025))
+
+    def test_nan_gap(self):
+        data = make_trend()
+        data.loc[40:60, 'close'] = np.nan
+        image = render_trend(data)
+
+        blue = color_mask(image, 'C0', 0)[24:94]
+        x = 18.75 + (np.arange(100) + 4.95) / 108.9 * 116.25
+        self.assertFalse(blue[:, int(x[45]):int(x[55])].any())
+        self.assertTrue(blue[:, int(x[20]):int(x[30])].any())
+
+    def test_deterministic(self):
+        data = make_trend(1)
+        self.assertTrue(np.array_equal(render_trend(data), render_trend(data.copy())))
+
+    @unittest.skipUnless(importlib.util.find_spec('matplotlib'), 'matplotlib 未安装')
+    def test_matches_matplotlib(self):
+        for seed in range(3):
+            data = make_trend(seed)
+            diff = np.abs(matplotlib_image(data).astype(int) - render_trend(data).astype(int))[..., :3]
+            self.assertLess(diff.mean(), 1.0)
+            self.assertLess((diff.max(axis=-1) > 64).mean(), 0.002)
+
+
+if __name__ == '__main__':
+    unittest.main()
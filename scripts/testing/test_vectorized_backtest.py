@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+向量化回测测试脚本
+
+用原来逐行 iterrows 的回测作为参照 (加上同样口径的手续费和滑点), 在随机信号 (含连续买入、空仓卖出、
+资金不足买不起、开头买入、结尾未平仓) 和 combine_signals 生成的信号上检查
+StrategyService.backtest_strategy 的交易记录、权益曲线和指标一致, 并检查 StrategyPerformance 字段,
+以及没有时间索引的回测结果不写入 StrategyPerformance
+
+作者: 系统管理员
+创建时间: 2026-10-18
+最后修改: 2026-10-18
+版本: 1.0.0
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from parser_fixture import install_parser_fixture
+
+install_parser_fixture()
+
+from App.services import backtest_engine, strategy_service
+from App.services.strategy_service import StrategyService
+
+
+def make_signals(seed=0, n=1000, density=0.1, freq='B') -> pd.DataFrame:
+    """ 随机游走的收盘价和随机的 1/-1 信号 """
+    rng = np.random.default_rng(seed)
+    close = np.round(10 * np.exp(np.cumsum(rng.standard_normal(n) * 0.02)), 2)
+    signal = np.where(rng.random(n) < density, rng.choice([1, -1], n), 0)
+    return pd.DataFrame({'close': close, 'final_signal': signal},
+                        index=pd.date_range('2020-01-01', periods=n, freq=freq))
+
+
+def loop_reference(data: pd.DataFrame, initial_capital=100000, fee_rate=0.0, slippage=0.0):
+    """ 原 backtest_strategy 的逐行实现, 买卖价和资金按 simulate 的口径加上手续费和滑点 """
+    capital = initial_capital
+    position = 0
+    trades = []
+    equity_curve = []
+
+    for i, row in data.iterrows():
+        signal = row['final_signal']
+        price = row['close']
+
+        if signal == 1 and position == 0:
+            fill = price * (1 + slippage)
+            shares = int(capital / (fill * (1 + fee_rate)))
+            if shares > 0:
+                position = shares
+                amount = shares * fill
+                capital -= amount + amount * fee_rate
+                trades.append({'date': row.name, 'action': 'buy', 'price': fill, 'shares': shares,
+                               'capital': capital})
+
+        elif signal == -1 and position > 0:
+            fill = price * (1 - slippage)
+            amount = position * fill
+            capital += amount - amount * fee_rate
+            trades.append({'date': row.name, 'action': 'sell', 'price': fill, 'shares': position,
+                           'capital': capital})
+            position = 0
+
+        equity_curve.append({'date': row.name, 'equity': capital + (position * price), 'position': position})
+
+    equity_df = pd.DataFrame(equity_curve)
+    equity_df.set_index('date', inplace=True)
+    equity_df['peak'] = equity_df['equity'].expanding().max()
+    equity_df['drawdown'] = (equity_df['equity'] - equity_df['peak']) / equity_df['peak']
+    returns = equity_df['equity'].pct_change().dropna()
+
+    return {
+        'initial_capital': initial_capital,
+        'final_capital': equity_df['equity'].iloc[-1],
+        'total_return': (equity_df['equity'].iloc[-1] - initial_capital) / initial_capital,
+        'max_drawdown': equity_df['drawdown'].min(),
+        'sharpe_ratio': returns.mean() / returns.std() if returns.std() > 0 else 0,
+        'total_trades': len(trades),
+        'trades': trades,
+        'equity_curve': equity_df,
+    }
+
+
+class TestVectorizedBacktest(unittest.TestCase):
+    """向量化回测测试类"""
+
+    def setUp(self):
+        self.service = StrategyService()
+
+    def assert_same(self, expected, result):
+        self.assertEqual(expected['trades'], result['trades'])
+        self.assertEqual(expected['total_trades'], result['total_trades'])
+        pd.testing.assert_frame_equal(expected['equity_curve'], result['equity_curve'],
+                                      check_exact=True, check_freq=False)
+        for key in ('initial_capital', 'final_capital', 'total_return', 'max_drawdown'):
+            self.assertEqual(expected[key], result[key], key)
+        self.assertAlmostEqual(expected['sharpe_ratio'], result['sharpe_ratio'], places=12)
+
+    def test_matches_loop(self):
+        for seed, density in ((0, 0.1), (1, 0.5), (2, 0.02)):
+            data = make_signals(seed, density=density)
+            self.assert_same(loop_reference(data), self.service.backtest_strategy(data))
+
+    def test_fees_and_slippage(self):
+        data = make_signals(3)
+        for fee_rate, slippage in ((0.0003, 0.0), (0.0, 0.001), (0.00025, 0.002)):
+            expected = loop_reference(data, 50000, fee_rate, slippage)
+            result = self.service.backtest_strategy(data, 50000, fee_rate=fee_rate, slippage=slippage)
+            self.assert_same(expected, result)
+
+        # 成本越高收益越低
+        returns = [self.service.backtest_strategy(data, fee_rate=fee)['total_return'] for fee in (0, 0.001, 0.01)]
+        self.assertGreater(returns[0], returns[1])
+        self.assertGreater(returns[1], returns[2])
+
+    def test_edge_cases(self):
+        data = make_signals(4, n=12)
+        data['final_signal'] = [1, 1, -1, -1, -1, 1, 0, 1, -1, 1, 0, 0]  # 开头买入、重复信号、结尾未平仓
+        self.assert_same(loop_reference(data), self.service.backtest_strategy(data))
+
+        # 资金不够买 1 股时跳过, 之后价格回落再买入
+        data['close'] = [200.0, 50, 60, 70, 250, 300, 40, 45, 80, 90, 100, 110]
+        data['final_signal'] = [1, 0, 1, -1, 0, 1, 0, 1, -1, -1, 1, 0]
+        expected = loop_reference(data, 100)
+        self.assertEqual([2, 3, 7, 8, 10], [data.index.get_loc(trade['date']) for trade in expected['trades']])
+        self.assert_same(expected, self.service.backtest_strategy(data, 100))
+
+        # 没有任何成交
+        data['final_signal'] = -1
+        self.assert_same(loop_reference(data), self.service.backtest_strategy(data))
+
+        self.assertEqual({}, self.service.backtest_strategy(data.iloc[:0]))
+        self.assertEqual({}, self.service.backtest_strategy(data[['close']]))
+
+    def test_combine_signals(self):
+        rng = np.random.default_rng(5)
+        close = 10 + np.cumsum(rng.standard_normal(600) * 0.2)
+        data = pd.DataFrame({'close': close, 'high': close + 0.1, 'low': close - 0.1},
+                            index=pd.bdate_range('2020-01-01', periods=600))
+        data = self.service.calculate_rsi(self.service.calculate_bollinger_bands(self.service.calculate_macd(data)))
+        data = self.service.generate_rsi_signals(
+            self.service.generate_bollinger_signals(self.service.generate_macd_signals(data)))
+        data = self.service.combine_signals(data)
+
+        self.assert_same(loop_reference(data), self.service.backtest_strategy(data))
+
+    def test_performance(self):
+        data = make_signals(6, n=504, density=0.05)
+        result = self.service.backtest_strategy(data, fee_rate=0.0003)
+        performance = result['performance']
+        equity = result['equity_curve']['equity']
+
+        self.assertAlmostEqual(result['total_return'] * 100, performance['total_return'])
+        self.assertAlmostEqual(result['max_drawdown'] * 100, performance['max_drawdown'])
+        self.assertEqual(result['total_trades'], performance['total_trades'])
+        self.assertEqual(equity.iloc[-1], performance['final_capital'])
+
+        # 按实际时间跨度年化
+        years = (data.index[-1] - data.index[0]).total_seconds() / (365.25 * 24 * 3600)
+        annual = (equity.iloc[-1] / 100000) ** (1 / years) - 1
+        self.assertAlmostEqual(annual * 100, performance['annual_return'])
+        self.assertAlmostEqual(performance['annual_return'] / -performance['max_drawdown'],
+                               performance['calmar_ratio'])
+
+        returns = equity.pct_change().dropna()
+        per_year = (len(data) - 1) / years
+        self.assertAlmostEqual(returns.mean() / returns.std() * np.sqrt(per_year), performance['sharpe_ratio'])
+        downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+        self.assertAlmostEqual(returns.mean() / downside * np.sqrt(per_year), performance['sortino_ratio'])
+
+        # 逐笔盈亏: 卖出后的资金减去买入前的资金
+        trades = result['trades']
+        capital = [100000] + [trade['capital'] for trade in trades if trade['action'] == 'sell']
+        pnl = np.diff(capital)
+        self.assertAlmostEqual((pnl > 0).mean() * 100, performance['win_rate'])
+        self.assertAlmostEqual(pnl[pnl > 0].sum() / -pnl[pnl < 0].sum(), performance['profit_factor'])
+
+        # 没有时间索引时按日线 252 根年化, 也可以指定每年的 K 线数
+        plain = data.reset_index(drop=True)
+        self.assertAlmostEqual(returns.mean() / returns.std() * np.sqrt(252),
+                               self.service.backtest_strategy(plain, fee_rate=0.0003)['performance']['sharpe_ratio'])
+        minute = self.service.backtest_strategy(data, fee_rate=0.0003, periods_per_year=60480)['performance']
+        self.assertAlmostEqual(returns.mean() / returns.std() * np.sqrt(60480), minute['sharpe_ratio'])
+
+    def test_save_requires_datetime_index(self):
+        data = make_signals(7, n=200)
+
+        with mock.patch.object(strategy_service, 'StrategyPerformance') as performance:
+            performance.update_performance.return_value = True
+            plain = self.service.backtest_strategy(data.reset_index(drop=True))
+            self.assertFalse(self.service.save_backtest_performance('macd', '000001', plain))
+            performance.update_performance.assert_not_called()
+
+            result = self.service.backtest_strategy(data)
+            self.assertTrue(self.service.save_backtest_performance('macd', '000001', result))
+
+        args = performance.update_performance.call_args[0]
+        self.assertEqual(('macd', '000001', data.index[0].date(), data.index[-1].date()), args)
+
+    def test_max_run(self):
+        self.assertEqual(0, backtest_engine._max_run(np.array([], dtype=bool)))
+        self.assertEqual(3, backtest_engine._max_run(np.array([1, 1, 0, 1, 1, 1, 0, 1], dtype=bool)))
+        self.assertEqual(2, backtest_engine._max_run(np.array([0, 1, 1], dtype=bool)))
+
+
+if __name__ == '__main__':
+    unittest.main()